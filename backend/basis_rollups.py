@@ -0,0 +1,160 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func, text
+from models import BasisSyncLog
+
+ROLLUP_SYNC_TYPE = 'weekly_rollup'
+
+ROLLUP_STATEMENTS = [
+    ("DELETE FROM basis_exchange_weekly WHERE week_start >= :lo AND week_start < :hi",
+     """
+        INSERT INTO basis_exchange_weekly (week_start, exchange_name, impressions, clicks, spend, bids, refreshed_at)
+        SELECT date_trunc('week', report_date)::date, exchange_name,
+               SUM(COALESCE(impressions, 0)), SUM(COALESCE(clicks, 0)),
+               SUM(COALESCE(spend, 0)), SUM(COALESCE(bids, 0)), NOW()
+        FROM basis_exchange_stats
+        WHERE report_date >= :lo AND report_date < :hi
+        GROUP BY 1, 2
+     """),
+    ("DELETE FROM basis_campaign_weekly WHERE week_start >= :lo AND week_start < :hi",
+     """
+        INSERT INTO basis_campaign_weekly (week_start, basis_campaign_id, impressions, clicks, spend, bids, refreshed_at)
+        SELECT date_trunc('week', report_date)::date, basis_campaign_id,
+               SUM(COALESCE(impressions, 0)), SUM(COALESCE(clicks, 0)),
+               SUM(COALESCE(spend, 0)), SUM(COALESCE(bids, 0)), NOW()
+        FROM basis_exchange_stats
+        WHERE report_date >= :lo AND report_date < :hi
+        GROUP BY 1, 2
+     """),
+    ("DELETE FROM basis_property_weekly WHERE week_start >= :lo AND week_start < :hi",
+     """
+        INSERT INTO basis_property_weekly (week_start, property_name, vendor_name, impressions, clicks, spend, days_active, refreshed_at)
+        SELECT date_trunc('week', report_date)::date, property_name, vendor_name,
+               SUM(COALESCE(impressions, 0)), SUM(COALESCE(clicks, 0)),
+               SUM(COALESCE(spend, 0)), COUNT(DISTINCT report_date), NOW()
+        FROM basis_daily_stats
+        WHERE report_date >= :lo AND report_date < :hi
+          AND property_name IS NOT NULL AND LENGTH(property_name) > 0
+        GROUP BY 1, 2, 3
+     """),
+]
+
+
+def week_start(d):
+    return d - timedelta(days=d.weekday())
+
+
+def rollup_span(start, end):
+    roll_lo = None
+    if start:
+        roll_lo = week_start(start) if start.weekday() == 0 else week_start(start) + timedelta(days=7)
+    roll_hi = week_start(end + timedelta(days=1)) if end else None
+
+    if roll_lo and roll_hi and roll_lo >= roll_hi:
+        return None, [(start, end)]
+
+    raw_ranges = []
+    if start and start < roll_lo:
+        raw_ranges.append((start, roll_lo - timedelta(days=1)))
+    if end and roll_hi <= end:
+        raw_ranges.append((roll_hi, end))
+    return (roll_lo, roll_hi), raw_ranges
+
+
+def _raw_bounds(session):
+    lo, hi = session.execute(text("""
+        SELECT LEAST((SELECT MIN(report_date) FROM basis_exchange_stats),
+                     (SELECT MIN(report_date) FROM basis_daily_stats)),
+               GREATEST((SELECT MAX(report_date) FROM basis_exchange_stats),
+                        (SELECT MAX(report_date) FROM basis_daily_stats))
+    """)).one()
+    return lo, hi
+
+
+def refresh_basis_rollups(session, start_date=None, end_date=None):
+    started = datetime.utcnow()
+    session.execute(text("SELECT pg_advisory_xact_lock(hashtext('basis_weekly_rollups'))"))
+
+    if start_date is None or end_date is None:
+        raw_lo, raw_hi = _raw_bounds(session)
+        start_date = start_date or raw_lo
+        end_date = end_date or raw_hi
+
+    rows = 0
+    if start_date and end_date:
+        params = {'lo': week_start(start_date), 'hi': week_start(end_date) + timedelta(days=7)}
+        for delete_sql, insert_sql in ROLLUP_STATEMENTS:
+            session.execute(text(delete_sql), params)
+            rows += session.execute(text(insert_sql), params).rowcount
+
+    completed = datetime.utcnow()
+    session.add(BasisSyncLog(
+        sync_started_at=started,
+        sync_completed_at=completed,
+        sync_status='success',
+        endpoint='basis_weekly_rollups',
+        sync_type=ROLLUP_SYNC_TYPE,
+        records_processed=rows,
+        records_inserted=rows,
+        date_range_start=start_date,
+        date_range_end=end_date,
+        execution_time_seconds=(completed - started).total_seconds(),
+    ))
+    session.commit()
+    return rows
+
+
+STALE_ALL = 'all'
+
+
+def _pending_syncs(session):
+    last_rollup = session.query(func.max(BasisSyncLog.sync_completed_at)).filter(
+        BasisSyncLog.sync_status == 'success',
+        BasisSyncLog.sync_type == ROLLUP_SYNC_TYPE
+    ).scalar()
+
+    pending = session.query(BasisSyncLog).filter(
+        BasisSyncLog.sync_status == 'success',
+        func.coalesce(BasisSyncLog.sync_type, '') != ROLLUP_SYNC_TYPE
+    )
+    if last_rollup:
+        pending = pending.filter(BasisSyncLog.sync_completed_at > last_rollup)
+    return last_rollup, pending.all()
+
+
+def stale_rollup_weeks(session):
+    last_rollup, pending = _pending_syncs(session)
+    if last_rollup and not pending:
+        return None
+    if not last_rollup or any(p.date_range_start is None or p.date_range_end is None for p in pending):
+        return STALE_ALL
+    return (week_start(min(p.date_range_start for p in pending)),
+            week_start(max(p.date_range_end for p in pending)) + timedelta(days=7))
+
+
+def split_stale_weeks(weeks, stale):
+    roll_lo, roll_hi = weeks
+    if not stale:
+        return [weeks], []
+    if stale == STALE_ALL:
+        return [], [(roll_lo, roll_hi - timedelta(days=1) if roll_hi else None)]
+
+    stale_lo, stale_hi = stale
+    rolled = []
+    if roll_lo is None or roll_lo < stale_lo:
+        rolled.append((roll_lo, stale_lo if roll_hi is None else min(roll_hi, stale_lo)))
+    if roll_hi is None or roll_hi > stale_hi:
+        rolled.append((stale_hi if roll_lo is None else max(roll_lo, stale_hi), roll_hi))
+
+    overlap_lo = stale_lo if roll_lo is None else max(roll_lo, stale_lo)
+    overlap_hi = stale_hi if roll_hi is None else min(roll_hi, stale_hi)
+    raw = [(overlap_lo, overlap_hi - timedelta(days=1))] if overlap_lo < overlap_hi else []
+    return rolled, raw
+
+
+def ensure_basis_rollups(session):
+    stale = stale_rollup_weeks(session)
+    if not stale:
+        return 0
+    if stale == STALE_ALL:
+        return refresh_basis_rollups(session)
+    return refresh_basis_rollups(session, stale[0], stale[1] - timedelta(days=1))
@@ -0,0 +1,104 @@
+import hashlib
+import json
+from datetime import date
+from flask import request, jsonify, Response, current_app
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError, SQLAlchemyError
+
+BOARD_SOURCES = [
+    'campaign_report_manager',
+    'campaign_reporting_metadata',
+    'cmi_contract_values',
+    'cmi_expected_reports',
+]
+SNAPSHOT_RETENTION_DAYS = 14
+
+_board_builders = {}
+
+
+def register_board(board, current_week, build):
+    _board_builders[board] = (current_week, build)
+
+
+def board_version(session):
+    try:
+        rows = session.execute(text("""
+            SELECT source_name, version
+            FROM market_intel_source_versions
+            WHERE source_name = ANY(:sources)
+        """), {'sources': BOARD_SOURCES}).fetchall()
+    except ProgrammingError:
+        session.rollback()
+        return None
+    versions = dict(rows)
+    if any(s not in versions for s in BOARD_SOURCES):
+        return None
+    return '|'.join(f"{s}:{versions[s]}" for s in BOARD_SOURCES)
+
+
+def _store_snapshot(session, board, week_start, params_key, version, payload):
+    session.execute(text("""
+        INSERT INTO cmi_board_snapshots (board, week_start, params_key, version, payload, built_at)
+        VALUES (:board, :week_start, :params_key, :version, CAST(:payload AS jsonb), NOW())
+        ON CONFLICT (board, week_start, params_key) DO UPDATE
+        SET version = EXCLUDED.version,
+            payload = EXCLUDED.payload,
+            built_at = EXCLUDED.built_at
+    """), {'board': board, 'week_start': week_start, 'params_key': params_key,
+           'version': version, 'payload': json.dumps(payload, default=str)})
+    session.execute(text("""
+        DELETE FROM cmi_board_snapshots
+        WHERE board = :board AND built_at < NOW() - make_interval(days => :days)
+    """), {'board': board, 'days': SNAPSHOT_RETENTION_DAYS})
+
+
+def _params_key(args):
+    params = '&'.join(f"{k}={v}" for k, v in sorted(args.items()))
+    return f"{date.today()}|{params}"
+
+
+def rebuild_board_snapshots(session, boards=None):
+    version = board_version(session)
+    if version is None:
+        return 0
+    rebuilt = 0
+    try:
+        with current_app.test_request_context('/'):
+            for board, (current_week, build) in _board_builders.items():
+                if boards and board not in boards:
+                    continue
+                payload = build(session)
+                _store_snapshot(session, board, current_week(), _params_key(request.args), version, payload)
+                rebuilt += 1
+        session.commit()
+    except SQLAlchemyError:
+        session.rollback()
+        return 0
+    return rebuilt
+
+
+def board_snapshot_response(session, board, week_start, build):
+    version = board_version(session)
+    if version is None:
+        return jsonify(build()), 200
+
+    params_key = _params_key(request.args)
+    etag = hashlib.md5(f"{board}|{week_start}|{params_key}|{version}".encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    try:
+        row = session.execute(text("""
+            SELECT version, payload FROM cmi_board_snapshots
+            WHERE board = :board AND week_start = :week_start AND params_key = :params_key
+        """), {'board': board, 'week_start': week_start, 'params_key': params_key}).first()
+    except ProgrammingError:
+        session.rollback()
+        row = None
+    payload = row.payload if row and row.version == version else build()
+
+    response = jsonify(payload)
+    response.set_etag(etag)
+    return response, 200
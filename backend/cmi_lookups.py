@@ -0,0 +1,97 @@
+from sqlalchemy import func, or_, tuple_
+from models import CampaignReportingMetadata, CMIContractValue
+
+LOOKUP_CHUNK = 5000
+
+
+def metadata_name_key(campaign_name, send_date):
+    return f"{(campaign_name or '').lower().strip()}_{send_date}"
+
+
+def _normalized_name():
+    return func.lower(func.btrim(CampaignReportingMetadata.campaign_name))
+
+
+def _lookup_cache(session, kind):
+    return session.info.setdefault('cmi_lookups', {}).setdefault(kind, {})
+
+
+def _cached_lookup(session, kind, keys, load):
+    cache = _lookup_cache(session, kind)
+    missing = [k for k in dict.fromkeys(keys) if k not in cache]
+    for i in range(0, len(missing), LOOKUP_CHUNK):
+        chunk = missing[i:i + LOOKUP_CHUNK]
+        found = load(chunk)
+        for k in chunk:
+            cache[k] = found.get(k)
+    return {k: cache[k] for k in keys if cache.get(k) is not None}
+
+
+def metadata_by_name_date(session, campaigns):
+    keys = [metadata_name_key(name, send_date) for name, send_date in campaigns]
+    pairs = {metadata_name_key(name, send_date): ((name or '').lower().strip(), send_date)
+             for name, send_date in campaigns}
+
+    def load(chunk):
+        dated = [pairs[k] for k in chunk if pairs[k][1] is not None]
+        undated = [pairs[k][0] for k in chunk if pairs[k][1] is None]
+        conditions = []
+        if dated:
+            conditions.append(tuple_(_normalized_name(), CampaignReportingMetadata.send_date).in_(dated))
+        if undated:
+            conditions.append(_normalized_name().in_(undated) & CampaignReportingMetadata.send_date.is_(None))
+        found = {}
+        for condition in conditions:
+            for m in session.query(CampaignReportingMetadata).filter(condition).order_by(CampaignReportingMetadata.id):
+                found[metadata_name_key(m.campaign_name, m.send_date)] = m
+        return found
+
+    return _cached_lookup(session, 'metadata_by_name_date', keys, load)
+
+
+def metadata_by_campaign_id(session, campaign_ids):
+    keys = [str(c) for c in campaign_ids if c]
+
+    def load(chunk):
+        rows = session.query(CampaignReportingMetadata).filter(CampaignReportingMetadata.campaign_id.in_(chunk))
+        return {str(m.campaign_id): m for m in rows}
+
+    return _cached_lookup(session, 'metadata_by_campaign_id', keys, load)
+
+
+def metadata_by_placement(session, placement_ids):
+    keys = [str(p) for p in placement_ids if p]
+
+    def load(chunk):
+        rows = session.query(CampaignReportingMetadata).filter(
+            CampaignReportingMetadata.cmi_placement_id.in_(chunk)
+        ).order_by(CampaignReportingMetadata.id)
+        return {str(m.cmi_placement_id): m for m in rows}
+
+    return _cached_lookup(session, 'metadata_by_placement', keys, load)
+
+
+def contracts_by_placement(session, placement_ids):
+    keys = [str(p) for p in placement_ids if p]
+
+    def load(chunk):
+        rows = session.query(CMIContractValue).filter(CMIContractValue.placement_id.in_(chunk))
+        return {str(c.placement_id): c for c in rows}
+
+    return _cached_lookup(session, 'contracts_by_placement', keys, load)
+
+
+def placed_metadata_for(session, campaign_ids, send_dates):
+    campaign_ids = [str(c) for c in campaign_ids if c]
+    send_dates = [d for d in send_dates if d]
+    conditions = []
+    if campaign_ids:
+        conditions.append(CampaignReportingMetadata.campaign_id.in_(campaign_ids))
+    if send_dates:
+        conditions.append(CampaignReportingMetadata.send_date.in_(send_dates))
+    if not conditions:
+        return []
+    return session.query(CampaignReportingMetadata).filter(
+        CampaignReportingMetadata.cmi_placement_id.isnot(None),
+        or_(*conditions)
+    ).order_by(CampaignReportingMetadata.id).all()
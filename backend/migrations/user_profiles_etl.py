@@ -1,15 +1,28 @@
 import json
 import sys
 import os
+import time
 from datetime import datetime
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from models import UserProfile, CampaignInteraction, Base
+from query_helpers import copy_rows
+from routes.deliverability import refresh_domain_deliverability
 
 load_dotenv()
 
+JSON_CHUNK_CHARS = 1 << 20
+STREAM_BATCH_USERS = 5000
+EMPTY_LIST_COLUMNS = ['address_history', 'print_lists_subscribed', 'print_lists_unsubscribed',
+                      'digital_lists_subscribed', 'digital_lists_unsubscribed', 'target_lists',
+                      'ac_tags', 'ac_segments']
+USER_COPY_COLUMNS = ['contact_id', 'email', 'first_name', 'last_name', 'specialty', 'degree', 'address',
+                     'city', 'state', 'zipcode', 'country', 'is_active', 'created_at', 'updated_at'] + EMPTY_LIST_COLUMNS
+INTERACTION_COPY_COLUMNS = ['email', 'campaign_id', 'campaign_name', 'campaign_subject', 'timestamp',
+                            'event_type', 'url', 'created_at']
+
 def parse_user_profiles_json(file_path):
     print(f"Loading JSON file: {file_path}")
     with open(file_path, 'r', encoding='utf-8') as f:
@@ -82,6 +95,7 @@ def migrate_data(json_file_path):
 
         total_users = 0
         total_interactions = 0
+        loaded_campaigns = set()
 
         for user_batch, interaction_batch in transform_to_relational(json_data):
             user_objects = [UserProfile(**u) for u in user_batch]
@@ -93,9 +107,16 @@ def migrate_data(json_file_path):
             session.bulk_save_objects(interaction_objects)
             session.commit()
             total_interactions += len(interaction_batch)
+            loaded_campaigns.update(i['campaign_id'] for i in interaction_batch)
 
             print(f"Migrated {total_users} users and {total_interactions} interactions so far...")
 
+        cursor = session.connection().connection.cursor()
+        domain_rows = refresh_domain_deliverability(cursor, loaded_campaigns)
+        cursor.close()
+        session.commit()
+        print(f"Refreshed deliverability rollups for {len(loaded_campaigns)} campaigns ({domain_rows} domain rows)")
+
         print(f"\nMigration complete!")
         print(f"Total users migrated: {total_users}")
         print(f"Total interactions migrated: {total_interactions}")
@@ -107,10 +128,200 @@ def migrate_data(json_file_path):
     finally:
         session.close()
 
+def iter_json_object(file_path, start=0, chunk_chars=JSON_CHUNK_CHARS):
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        skipped = 0
+        while skipped < start:
+            read = len(f.read(min(chunk_chars, start - skipped)))
+            if not read:
+                return
+            skipped += read
+
+        buf, pos, base, eof = '', 0, start, False
+
+        def read_more():
+            nonlocal buf, pos, base, eof
+            more = f.read(chunk_chars)
+            base += pos
+            buf, pos, eof = buf[pos:] + more, 0, not more
+
+        def next_char():
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in ' \t\r\n':
+                    pos += 1
+                if pos < len(buf):
+                    return buf[pos]
+                if eof:
+                    raise ValueError(f"Unexpected end of JSON at offset {base + pos}")
+                read_more()
+
+        def expect(char):
+            nonlocal pos
+            if next_char() != char:
+                raise ValueError(f"Expected {char!r} at offset {base + pos}")
+            pos += 1
+
+        def decode():
+            nonlocal pos
+            next_char()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                    if end < len(buf) or eof:
+                        pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                read_more()
+
+        if start == 0:
+            if next_char() != '{':
+                raise ValueError("Streaming ETL expects a top-level JSON object")
+            pos += 1
+            if next_char() == '}':
+                return
+        else:
+            if next_char() == '}':
+                return
+            expect(',')
+
+        while True:
+            key = decode()
+            expect(':')
+            value = decode()
+            yield key, value, base + pos
+            if next_char() == '}':
+                return
+            expect(',')
+
+def _parse_timestamp(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00')) if value else None
+
+def user_copy_rows(email, user_data, loaded_at):
+    user_row = (
+        user_data.get('contact_id', ''), email, user_data.get('first_name', ''),
+        user_data.get('last_name', ''), user_data.get('specialty', ''), user_data.get('degree', ''),
+        user_data.get('address', ''), user_data.get('city', ''), user_data.get('state', ''),
+        user_data.get('zipcode', ''), user_data.get('country', 'United States'), True, loaded_at, loaded_at,
+    ) + ('[]',) * len(EMPTY_LIST_COLUMNS)
+
+    interaction_rows = []
+    for campaign_id, campaign_data in (user_data.get('campaigns') or {}).items():
+        for interaction in campaign_data.get('interactions', []):
+            interaction_rows.append((
+                email, campaign_id, campaign_data.get('campaign_name', ''),
+                campaign_data.get('campaign_subject', ''), _parse_timestamp(interaction.get('timestamp')),
+                interaction.get('type', ''), interaction.get('url', ''), loaded_at,
+            ))
+    return user_row, interaction_rows
+
+def _load_checkpoint(cursor, job):
+    cursor.execute("""
+        SELECT source_offset, users_loaded, interactions_loaded, campaign_ids, completed_at
+        FROM etl_checkpoints WHERE job = %s
+    """, (job,))
+    return cursor.fetchone()
+
+def _save_checkpoint(cursor, job, offset, users, interactions, campaign_ids, completed=False):
+    cursor.execute("""
+        INSERT INTO etl_checkpoints
+            (job, source_offset, users_loaded, interactions_loaded, campaign_ids, completed_at, updated_at)
+        VALUES (%s, %s, %s, %s, %s, CASE WHEN %s THEN NOW() END, NOW())
+        ON CONFLICT (job) DO UPDATE
+        SET source_offset = EXCLUDED.source_offset,
+            users_loaded = EXCLUDED.users_loaded,
+            interactions_loaded = EXCLUDED.interactions_loaded,
+            campaign_ids = EXCLUDED.campaign_ids,
+            completed_at = EXCLUDED.completed_at,
+            updated_at = EXCLUDED.updated_at
+    """, (job, offset, users, interactions, json.dumps(sorted(campaign_ids)), completed))
+
+def _report_throughput(label, users, interactions, chars, elapsed):
+    elapsed = max(elapsed, 1e-6)
+    print(f"{label}: {users} users ({users / elapsed:,.0f}/s), "
+          f"{interactions} interactions ({interactions / elapsed:,.0f}/s), "
+          f"{chars / elapsed / (1 << 20):,.1f} MB/s of JSON, {elapsed:,.1f}s elapsed")
+
+def migrate_data_streaming(json_file_path, batch_size=STREAM_BATCH_USERS, restart=False):
+    engine = create_engine(os.getenv('DATABASE_URL'))
+    Base.metadata.create_all(engine)
+    job = f"user_profiles_etl:{os.path.abspath(json_file_path)}"
+    conn = engine.raw_connection()
+    cursor = conn.cursor()
+
+    try:
+        if restart:
+            cursor.execute("DELETE FROM etl_checkpoints WHERE job = %s", (job,))
+            conn.commit()
+        checkpoint = _load_checkpoint(cursor, job)
+        if checkpoint and checkpoint[4]:
+            print(f"{json_file_path} already loaded at {checkpoint[4]} (use --restart to reload)")
+            return
+        offset, total_users, total_interactions, campaign_ids, _ = checkpoint or (0, 0, 0, [], None)
+        loaded_campaigns = set(campaign_ids or [])
+        if offset:
+            print(f"Resuming at offset {offset} after {total_users} users and {total_interactions} interactions")
+
+        start_offset = offset
+        started = time.perf_counter()
+        user_rows = []
+        interaction_rows = []
+        loaded_at = datetime.utcnow()
+
+        def flush(offset):
+            nonlocal total_users, total_interactions
+            copy_rows(cursor, 'user_profiles', USER_COPY_COLUMNS, user_rows)
+            copy_rows(cursor, 'campaign_interactions', INTERACTION_COPY_COLUMNS, interaction_rows)
+            total_users += len(user_rows)
+            total_interactions += len(interaction_rows)
+            loaded_campaigns.update(r[1] for r in interaction_rows)
+            _save_checkpoint(cursor, job, offset, total_users, total_interactions, loaded_campaigns)
+            conn.commit()
+            user_rows.clear()
+            interaction_rows.clear()
+            _report_throughput(f"Loaded through offset {offset}", total_users, total_interactions,
+                               offset - start_offset, time.perf_counter() - started)
+
+        for email, user_data, offset in iter_json_object(json_file_path, start=start_offset):
+            if email == 'processed_campaign_ids' or not isinstance(user_data, dict):
+                continue
+            user_row, rows = user_copy_rows(email, user_data, loaded_at)
+            user_rows.append(user_row)
+            interaction_rows.extend(rows)
+            if len(user_rows) >= batch_size:
+                flush(offset)
+        if user_rows:
+            flush(offset)
+
+        domain_rows = refresh_domain_deliverability(cursor, loaded_campaigns)
+        _save_checkpoint(cursor, job, offset, total_users, total_interactions, loaded_campaigns, completed=True)
+        conn.commit()
+        print(f"Refreshed deliverability rollups for {len(loaded_campaigns)} campaigns ({domain_rows} domain rows)")
+
+        print(f"\nStreaming migration complete!")
+        _report_throughput("Throughput", total_users, total_interactions, offset - start_offset,
+                           time.perf_counter() - started)
+
+    except Exception as e:
+        conn.rollback()
+        print(f"Error during streaming migration (resume from last checkpoint): {e}")
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("Usage: python user_profiles_etl.py <path_to_user_profiles.json>")
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if not args:
+        print("Usage: python user_profiles_etl.py <path_to_user_profiles.json> [--stream] [--restart]")
         sys.exit(1)
 
-    json_file = sys.argv[1]
-    migrate_data(json_file)
\ No newline at end of file
+    json_file = args[0]
+    if '--stream' in sys.argv:
+        migrate_data_streaming(json_file, restart='--restart' in sys.argv)
+    else:
+        migrate_data(json_file)
\ No newline at end of file
@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine, Column, Integer, BigInteger, String, Boolean, DateTime, Text, Float, Numeric, Date, JSON, Index, ForeignKey
+from sqlalchemy import create_engine, Column, Computed, Integer, BigInteger, String, Boolean, DateTime, Text, Float, Numeric, Date, JSON, Index, ForeignKey, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -41,9 +42,15 @@ class UserProfile(Base):
     inactive_reason = Column(Text)
     inactive_source = Column(Text)
     inactive_at = Column(DateTime)
+    last_address_flag_event = Column(String(50))
+    last_address_flag_reason = Column(Text)
+    last_address_flag_source = Column(String(100))
+    last_address_flag_at = Column(DateTime)
+    addr_hash = Column(BigInteger)
 
     __table_args__ = (
         Index('idx_email_specialty', 'email', 'specialty'),
+        Index('idx_user_profiles_addr_hash', 'addr_hash'),
     )
 
 class UniversalProfile(Base):
@@ -105,11 +112,19 @@ class UniversalProfile(Base):
     digital_lists_unsubscribed = Column(JSON, default=list)
     target_lists = Column(JSON, default=list)
     unsubscribe_reason = Column(Text)
+    last_address_flag_event = Column(String(50))
+    last_address_flag_reason = Column(Text)
+    last_address_flag_source = Column(String(100))
+    last_address_flag_at = Column(DateTime)
+    practice_addr_hash = Column(BigInteger)
+    mailing_addr_hash = Column(BigInteger)
 
     __table_args__ = (
         Index('idx_npi_active', 'npi', 'is_active'),
         Index('idx_state_specialty', 'practice_state', 'primary_specialty'),
         Index('idx_last_synced', 'last_synced_at'),
+        Index('idx_universal_profiles_practice_addr_hash', 'practice_addr_hash'),
+        Index('idx_universal_profiles_mailing_addr_hash', 'mailing_addr_hash'),
     )
 
 class CampaignInteraction(Base):
@@ -128,8 +143,28 @@ class CampaignInteraction(Base):
     __table_args__ = (
         Index('idx_email_campaign', 'email', 'campaign_id'),
         Index('idx_campaign_event', 'campaign_id', 'event_type'),
+        Index('idx_ci_campaign_id_id', 'campaign_id', 'id'),
     )
 
+class CampaignDomainDeliverability(Base):
+    __tablename__ = 'campaign_domain_deliverability'
+
+    campaign_id = Column(String(100), primary_key=True)
+    domain = Column(String(255), primary_key=True)
+    sent = Column(Integer, default=0)
+    bounces = Column(Integer, default=0)
+    opens = Column(Integer, default=0)
+    clicks = Column(Integer, default=0)
+    unsubs = Column(Integer, default=0)
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
+class CampaignDeliverabilityState(Base):
+    __tablename__ = 'campaign_deliverability_state'
+
+    campaign_id = Column(String(100), primary_key=True)
+    last_interaction_id = Column(BigInteger, nullable=False, default=0)
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
 class DashboardSave(Base):
     __tablename__ = 'dashboard_saves'
 
@@ -188,6 +223,11 @@ class CampaignReportingMetadata(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     uploaded_by = Column(String(100))
 
+    __table_args__ = (
+        Index('idx_crm_name_send_date', func.lower(func.btrim(campaign_name)), 'send_date'),
+        Index('idx_crm_cmi_placement_id', 'cmi_placement_id'),
+    )
+
 class CMIContractValue(Base):
     __tablename__ = 'cmi_contract_values'
 
@@ -212,6 +252,21 @@ class CMIContractValue(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class CMIBoardSnapshot(Base):
+    __tablename__ = 'cmi_board_snapshots'
+
+    id = Column(Integer, primary_key=True)
+    board = Column(String(50), nullable=False)
+    week_start = Column(Date, nullable=False)
+    params_key = Column(String(500), nullable=False)
+    version = Column(String(255), nullable=False)
+    payload = Column(JSON)
+    built_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_cmi_board_snapshot_key', 'board', 'week_start', 'params_key', unique=True),
+    )
+
 class CMIExpectedReport(Base):
     __tablename__ = 'cmi_expected_reports'
 
@@ -651,6 +706,62 @@ class BasisExchangeStats(Base):
         Index('idx_exchange_performance', 'exchange_name', 'ctr', 'ecpc'),
     )
 
+class BasisExchangeWeekly(Base):
+    __tablename__ = 'basis_exchange_weekly'
+
+    id = Column(Integer, primary_key=True)
+    week_start = Column(Date, nullable=False, index=True)
+    exchange_name = Column(String(255), nullable=False)
+
+    impressions = Column(BigInteger, default=0)
+    clicks = Column(BigInteger, default=0)
+    spend = Column(Float, default=0)
+    bids = Column(BigInteger, default=0)
+
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_bew_week_exchange', 'week_start', 'exchange_name', unique=True),
+    )
+
+class BasisPropertyWeekly(Base):
+    __tablename__ = 'basis_property_weekly'
+
+    id = Column(Integer, primary_key=True)
+    week_start = Column(Date, nullable=False, index=True)
+    property_name = Column(String(255), nullable=False)
+    vendor_name = Column(String(255))
+
+    impressions = Column(BigInteger, default=0)
+    clicks = Column(BigInteger, default=0)
+    spend = Column(Float, default=0)
+    days_active = Column(Integer, default=0)
+
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_bpw_week_property_vendor', 'week_start', 'property_name', 'vendor_name'),
+        Index('idx_bpw_vendor', 'vendor_name'),
+    )
+
+class BasisCampaignWeekly(Base):
+    __tablename__ = 'basis_campaign_weekly'
+
+    id = Column(Integer, primary_key=True)
+    week_start = Column(Date, nullable=False, index=True)
+    basis_campaign_id = Column(String(100), nullable=False, index=True)
+
+    impressions = Column(BigInteger, default=0)
+    clicks = Column(BigInteger, default=0)
+    spend = Column(Float, default=0)
+    bids = Column(BigInteger, default=0)
+
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_bcw_week_campaign', 'week_start', 'basis_campaign_id', unique=True),
+    )
+
 class PrintOnlyContact(Base):
     __tablename__ = 'print_only_contacts'
 
@@ -672,13 +783,19 @@ class PrintOnlyContact(Base):
     unsubscribe_reason = Column(Text)
     source = Column(String(255))
     address_history = Column(JSON, default=list)
+    last_address_flag_event = Column(String(50))
+    last_address_flag_reason = Column(Text)
+    last_address_flag_source = Column(String(100))
+    last_address_flag_at = Column(DateTime)
     is_active = Column(Boolean, default=True, nullable=False)
+    addr_hash = Column(BigInteger)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     __table_args__ = (
         Index('idx_poc_name', 'first_name', 'last_name'),
         Index('idx_poc_company', 'company'),
+        Index('idx_print_only_contacts_addr_hash', 'addr_hash'),
     )
 
 class ACMembershipEvent(Base):
@@ -698,6 +815,7 @@ class ACMembershipEvent(Base):
         Index('idx_ame_user', 'user_profile_id', 'at'),
         Index('idx_ame_email', 'email', 'at'),
         Index('idx_ame_dim_name', 'dimension', 'name', 'at'),
+        Index('uq_ame_user_dim_name_event_at', 'user_profile_id', 'dimension', 'name', 'event', 'at', unique=True),
     )
 
 class CampaignValidationFlag(Base):
@@ -1007,6 +1125,11 @@ class PrintListSubscriber(Base):
     address_history = Column(JSON, default=list)
     subscribed_lists = Column(Text)
     unsubscribed_lists = Column(Text)
+    print_lists_subscribed = Column(JSONB, default=list)
+    print_lists_unsubscribed = Column(JSONB, default=list)
+    match_key = Column(Text, Computed('print_list_match_key(npi, first_name, last_name, address_1, city, state, zipcode)', persisted=True))
+    name_key = Column(Text, Computed('print_list_name_key(first_name, last_name)', persisted=True))
+    addr_hash = Column(BigInteger)
     is_comp = Column(Boolean, default=False)
     is_subscribed = Column(Boolean, default=True, index=True)
     unsubscribe_reason = Column(Text)
@@ -1022,6 +1145,10 @@ class PrintListSubscriber(Base):
         Index('idx_print_npi', 'npi'),
         Index('idx_print_subscribed', 'is_subscribed'),
         Index('idx_print_subscribed_lists', 'subscribed_lists'),
+        Index('idx_print_lists_subscribed_gin', 'print_lists_subscribed', postgresql_using='gin'),
+        Index('idx_print_match_key', 'match_key'),
+        Index('idx_print_name_key', 'name_key'),
+        Index('idx_print_list_subscribers_addr_hash', 'addr_hash'),
     )
 
 class BlacklistedAddress(Base):
@@ -1064,8 +1191,43 @@ class ShadowEngager(Base):
     __table_args__ = (
         Index('idx_shadow_confidence', 'confidence_pct'),
         Index('idx_shadow_classification', 'classification'),
+        Index('idx_shadow_confidence_keyset', 'confidence_pct', 'id'),
+        Index('idx_shadow_class_confidence_keyset', 'classification', 'confidence_pct', 'id'),
+        Index('idx_shadow_updated_at', 'updated_at'),
     )
 
+class ShadowEngagerRescore(Base):
+    __tablename__ = 'shadow_engager_rescores'
+
+    email = Column(String(255), primary_key=True)
+    confidence_pct = Column(Float, nullable=False)
+    classification = Column(String(20), nullable=False)
+    campaigns_clicked_no_open = Column(Integer, default=0)
+    campaigns_with_opens = Column(Integer, default=0)
+    total_campaigns_sent = Column(Integer, default=0)
+    total_clean_clicks_no_open = Column(Integer, default=0)
+    distinct_campaigns_clicked = Column(Integer, default=0)
+    rescored_at = Column(DateTime, default=datetime.utcnow)
+
+class ShadowEngagerWatermark(Base):
+    __tablename__ = 'shadow_engager_watermarks'
+
+    id = Column(Integer, primary_key=True)
+    last_interaction_id = Column(BigInteger, nullable=False, default=0)
+    emails_rescored = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class EtlCheckpoint(Base):
+    __tablename__ = 'etl_checkpoints'
+
+    job = Column(String(500), primary_key=True)
+    source_offset = Column(BigInteger, nullable=False, default=0)
+    users_loaded = Column(BigInteger, default=0)
+    interactions_loaded = Column(BigInteger, default=0)
+    campaign_ids = Column(JSON, default=list)
+    completed_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
 class ClinicalTrial(Base):
     __tablename__ = 'clinical_trials'
 
@@ -1240,6 +1402,41 @@ class MarketBenchmark(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class MarketIntelSourceVersion(Base):
+    __tablename__ = 'market_intel_source_versions'
+
+    id = Column(Integer, primary_key=True)
+    source_name = Column(String(100), nullable=False)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_misv_source_unique', 'source_name', unique=True),
+    )
+
+class CompanyOpportunityScore(Base):
+    __tablename__ = 'company_opportunity_scores'
+
+    id = Column(Integer, primary_key=True)
+    company = Column(String(500), index=True)
+    total_trials = Column(Integer, default=0)
+    upcoming_trials = Column(Integer, default=0)
+    recruiting = Column(Integer, default=0)
+    trial_areas = Column(JSON)
+    total_kols = Column(Integer, default=0)
+    total_spend = Column(Numeric(16, 2), default=0)
+    audience_kols = Column(Integer, default=0)
+    pending_pdufa = Column(Integer, default=0)
+    next_pdufa_date = Column(Date)
+    expiring_drugs = Column(Integer, default=0)
+    opportunity_score = Column(Float, default=0)
+    source_version = Column(String(255), nullable=False)
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_cos_score', 'opportunity_score', 'total_spend'),
+    )
+
 class FDAApproval(Base):
     __tablename__ = 'fda_approvals'
 
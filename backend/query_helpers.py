@@ -0,0 +1,81 @@
+from contextlib import contextmanager
+from io import StringIO
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+ARRAY_BIND_LIMIT = 10000
+
+
+def _copy_escape(value):
+    if value is None:
+        return '\\N'
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r'))
+
+
+def copy_rows(cursor, table_name, columns, rows):
+    buf = StringIO()
+    for row in rows:
+        buf.write('\t'.join(_copy_escape(v) for v in row))
+        buf.write('\n')
+    buf.seek(0)
+    cursor.copy_expert(f"COPY {table_name} ({', '.join(columns)}) FROM STDIN", buf)
+
+
+def stage_values(cursor, table_name, values, sql_type='TEXT'):
+    cursor.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS {table_name} (
+            value {sql_type} PRIMARY KEY
+        ) ON COMMIT DROP
+    """)
+    cursor.execute(f"TRUNCATE {table_name}")
+    copy_rows(cursor, table_name, ['value'], ((v,) for v in dict.fromkeys(values) if v is not None))
+    cursor.execute(f"ANALYZE {table_name}")
+
+
+def id_set_filter(cursor, column_expr, values, table_name='tmp_id_set', sql_type='TEXT'):
+    values = list(values)
+    if len(values) <= ARRAY_BIND_LIMIT:
+        return f"{column_expr} = ANY(CAST(%s AS {sql_type}[]))", [values]
+    stage_values(cursor, table_name, values, sql_type)
+    return f"{column_expr} IN (SELECT value FROM {table_name})", []
+
+
+def session_id_set_filter(session, column_expr, values, param_name='ids',
+                          table_name='tmp_id_set', sql_type='TEXT'):
+    values = list(values)
+    if len(values) <= ARRAY_BIND_LIMIT:
+        return f"{column_expr} = ANY(CAST(:{param_name} AS {sql_type}[]))", {param_name: values}
+    cursor = session.connection().connection.cursor()
+    try:
+        stage_values(cursor, table_name, values, sql_type)
+    finally:
+        cursor.close()
+    return f"{column_expr} IN (SELECT value FROM {table_name})", {}
+
+
+@contextmanager
+def count_statements(target=Engine, tables=None):
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if tables is None or any(t in statement for t in tables):
+            statements.append(statement)
+
+    event.listen(target, 'before_cursor_execute', _record)
+    try:
+        yield statements
+    finally:
+        event.remove(target, 'before_cursor_execute', _record)
+
+
+@contextmanager
+def assert_max_statements(limit, target=Engine, tables=None):
+    with count_statements(target, tables) as statements:
+        yield statements
+    if len(statements) > limit:
+        listing = '\n'.join(f"  {' '.join(s.split())[:120]}" for s in statements)
+        raise AssertionError(f"expected at most {limit} statements, ran {len(statements)}:\n{listing}")
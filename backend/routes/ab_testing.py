@@ -17,8 +17,21 @@ def get_session():
     return Session()
 
 
-def serialize_test(test, session):
-    groups = session.query(ABTestGroup).filter_by(ab_test_id=test.id).order_by(ABTestGroup.group_label).all()
+def _groups_by_test(session, test_ids):
+    groups_by_test = {test_id: [] for test_id in test_ids}
+    if not test_ids:
+        return groups_by_test
+    groups = session.query(ABTestGroup).filter(
+        ABTestGroup.ab_test_id.in_(test_ids)
+    ).order_by(ABTestGroup.ab_test_id, ABTestGroup.group_label).all()
+    for g in groups:
+        groups_by_test[g.ab_test_id].append(g)
+    return groups_by_test
+
+
+def serialize_test(test, session, groups=None):
+    if groups is None:
+        groups = _groups_by_test(session, [test.id])[test.id]
     return {
         'id': test.id,
         'base_campaign_name': test.base_campaign_name,
@@ -45,7 +58,8 @@ def get_all_tests():
     try:
         session = get_session()
         tests = session.query(ABTest).order_by(ABTest.updated_at.desc()).all()
-        result = [serialize_test(t, session) for t in tests]
+        groups_by_test = _groups_by_test(session, [t.id for t in tests])
+        result = [serialize_test(t, session, groups_by_test[t.id]) for t in tests]
         session.close()
 
         return jsonify({
@@ -11,6 +11,7 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from state_mapper import zipcode_to_state_abbrev, state_abbrev_to_full_name, classify_zipcode_urbanization, STATE_NAME_TO_ABBREV
 from db_pool import get_db_connection, execute_query
+from query_helpers import id_set_filter
 
 analytics_bp = Blueprint('analytics', __name__)
 
@@ -924,32 +925,30 @@ def timing_intelligence():
         else:
             date_filter = "AND ci.timestamp >= NOW() - INTERVAL '6 months'"
 
+        conn = get_db_connection()
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute("SET LOCAL statement_timeout = '60s'")
+
         up_join = ""
         specialty_filter = ""
+        specialty_params = []
         if specialties:
             up_join = "INNER JOIN user_profiles up ON up.email = LOWER(ci.email)"
-            placeholders = ', '.join(['%s'] * len(specialties))
-            specialty_filter = f"AND up.specialty IN ({placeholders})"
+            specialty_clause, specialty_params = id_set_filter(cursor, 'up.specialty', specialties, 'tmp_timing_specialties')
+            specialty_filter = f"AND {specialty_clause}"
 
         cd_join = ""
         campaign_filter = ""
         if campaigns:
             cd_join = "INNER JOIN campaign_deployments cd ON cd.campaign_id = ci.campaign_id"
-            conditions = ' OR '.join(['cd.campaign_base_name LIKE %s'] * len(campaigns))
-            campaign_filter = f"AND ({conditions})"
+            campaign_filter = "AND cd.campaign_base_name LIKE ANY(CAST(%s AS TEXT[]))"
 
         def build_params():
-            p = []
-            if specialties:
-                p.extend(specialties)
+            p = list(specialty_params)
             if campaigns:
-                p.extend([f"{c}%" for c in campaigns])
+                p.append([f"{c}%" for c in campaigns])
             return p
 
-        conn = get_db_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute("SET LOCAL statement_timeout = '60s'")
-
         heatmap_query = f"""
             SELECT
                 EXTRACT(HOUR FROM ci.timestamp)::int AS hour,
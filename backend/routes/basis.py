@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine, func, desc
-from models import BasisCampaign, BasisDailyStats, BasisExchangeStats, BasisSyncLog
+from models import (BasisCampaign, BasisDailyStats, BasisExchangeStats, BasisSyncLog,
+                    BasisExchangeWeekly, BasisPropertyWeekly, BasisCampaignWeekly)
+from basis_rollups import ROLLUP_SYNC_TYPE, rollup_span, split_stale_weeks, stale_rollup_weeks
 from datetime import datetime, timedelta
 import os
 
@@ -13,40 +15,122 @@ def get_session():
     return Session()
 
 
+def _parse_date(value):
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _accumulate(totals, rows, key_fields, sum_fields):
+    for row in rows:
+        key = tuple(getattr(row, f) for f in key_fields)
+        entry = totals.setdefault(key, dict.fromkeys(sum_fields, 0))
+        for f in sum_fields:
+            value = getattr(row, f) or 0
+            entry[f] += float(value) if f == 'spend' else int(value)
+
+
+def _raw_sum(raw_model, field):
+    if field == 'days_active':
+        return func.count(func.distinct(raw_model.report_date))
+    return func.sum(getattr(raw_model, field))
+
+
+def _rolled_totals(session, rollup_model, raw_model, key_fields, sum_fields, start=None, end=None,
+                   rollup_filters=(), raw_filters=(), use_rollup=True, stale=None):
+    weeks, raw_ranges = rollup_span(start, end) if use_rollup else (None, [(start, end)])
+    rolled_ranges = []
+    if weeks:
+        rolled_ranges, stale_ranges = split_stale_weeks(weeks, stale)
+        raw_ranges = raw_ranges + stale_ranges
+    totals = {}
+
+    for roll_lo, roll_hi in rolled_ranges:
+        query = session.query(
+            *[getattr(rollup_model, f) for f in key_fields],
+            *[func.sum(getattr(rollup_model, f)).label(f) for f in sum_fields]
+        ).filter(*rollup_filters)
+        if roll_lo:
+            query = query.filter(rollup_model.week_start >= roll_lo)
+        if roll_hi:
+            query = query.filter(rollup_model.week_start < roll_hi)
+        _accumulate(totals, query.group_by(*[getattr(rollup_model, f) for f in key_fields]).all(),
+                    key_fields, sum_fields)
+
+    for lo, hi in raw_ranges:
+        query = session.query(
+            *[getattr(raw_model, f) for f in key_fields],
+            *[_raw_sum(raw_model, f).label(f) for f in sum_fields]
+        ).filter(*raw_filters)
+        if lo:
+            query = query.filter(raw_model.report_date >= lo)
+        if hi:
+            query = query.filter(raw_model.report_date <= hi)
+        _accumulate(totals, query.group_by(*[getattr(raw_model, f) for f in key_fields]).all(),
+                    key_fields, sum_fields)
+
+    return totals
+
+
+def exchange_totals(session, start=None, end=None, campaign_id=None, stale=None):
+    raw_filters = (BasisExchangeStats.basis_campaign_id == campaign_id,) if campaign_id else ()
+    return _rolled_totals(session, BasisExchangeWeekly, BasisExchangeStats,
+                          ['exchange_name'], ['impressions', 'clicks', 'spend', 'bids'], start, end,
+                          raw_filters=raw_filters, use_rollup=not campaign_id, stale=stale)
+
+
+def campaign_totals(session, start=None, end=None, campaign_id=None, stale=None):
+    rollup_filters, raw_filters = (), ()
+    if campaign_id:
+        rollup_filters = (BasisCampaignWeekly.basis_campaign_id == campaign_id,)
+        raw_filters = (BasisExchangeStats.basis_campaign_id == campaign_id,)
+    return _rolled_totals(session, BasisCampaignWeekly, BasisExchangeStats,
+                          ['basis_campaign_id'], ['impressions', 'clicks', 'spend', 'bids'], start, end,
+                          rollup_filters, raw_filters, stale=stale)
+
+
+def property_totals(session, start=None, end=None, vendor_names=(), campaign_id=None, stale=None):
+    rollup_filters = [BasisPropertyWeekly.vendor_name == v for v in vendor_names]
+    raw_filters = [
+        BasisDailyStats.property_name.isnot(None),
+        func.length(BasisDailyStats.property_name) > 0,
+    ] + [BasisDailyStats.vendor_name == v for v in vendor_names]
+    if campaign_id:
+        raw_filters.append(BasisDailyStats.basis_campaign_id == campaign_id)
+    return _rolled_totals(session, BasisPropertyWeekly, BasisDailyStats,
+                          ['property_name', 'vendor_name'], ['impressions', 'clicks', 'spend', 'days_active'],
+                          start, end, rollup_filters, raw_filters, use_rollup=not campaign_id, stale=stale)
+
+
 @basis_bp.route('/recommendations', methods=['GET'])
 def get_recommendations():
     try:
         session = get_session()
         recommendations = []
 
-        exchange_data = session.query(
-            BasisExchangeStats.exchange_name,
-            func.sum(BasisExchangeStats.impressions).label('impressions'),
-            func.sum(BasisExchangeStats.clicks).label('clicks'),
-            func.sum(BasisExchangeStats.spend).label('spend'),
-            func.sum(BasisExchangeStats.bids).label('bids')
-        ).group_by(BasisExchangeStats.exchange_name).all()
+        stale = stale_rollup_weeks(session)
+        exchange_data = [dict(v, exchange_name=k[0]) for k, v in exchange_totals(session, stale=stale).items()]
 
         if not exchange_data:
             session.close()
             return jsonify({'status': 'success', 'recommendations': [], 'summary': {}}), 200
 
-        total_impr = sum(ex.impressions or 0 for ex in exchange_data)
-        total_spend = sum(float(ex.spend or 0) for ex in exchange_data)
-        total_clicks = sum(ex.clicks or 0 for ex in exchange_data)
-        total_bids = sum(ex.bids or 0 for ex in exchange_data)
+        total_impr = sum(ex['impressions'] or 0 for ex in exchange_data)
+        total_spend = sum(float(ex['spend'] or 0) for ex in exchange_data)
+        total_clicks = sum(ex['clicks'] or 0 for ex in exchange_data)
+        total_bids = sum(ex['bids'] or 0 for ex in exchange_data)
         avg_ecpm = (total_spend / total_impr * 1000) if total_impr > 0 else 0
         avg_ctr = (total_clicks / total_impr * 100) if total_impr > 0 else 0
         overall_win_rate = (total_impr / total_bids * 100) if total_bids > 0 else 0
 
         exchange_analysis = []
         for ex in exchange_data:
-            impr = ex.impressions or 0
+            impr = ex['impressions'] or 0
             if impr < 100:
                 continue
-            clicks = ex.clicks or 0
-            spend = float(ex.spend or 0)
-            bids = ex.bids or 0
+            clicks = ex['clicks'] or 0
+            spend = float(ex['spend'] or 0)
+            bids = ex['bids'] or 0
             ecpm = (spend / impr * 1000) if impr > 0 else 0
             ctr = (clicks / impr * 100) if impr > 0 else 0
             win_rate = (impr / bids * 100) if bids > 0 else 0
@@ -56,7 +140,7 @@ def get_recommendations():
             potential_impr = max(0, potential_impr)
 
             exchange_analysis.append({
-                'name': ex.exchange_name,
+                'name': ex['exchange_name'],
                 'impressions': impr,
                 'clicks': clicks,
                 'spend': spend,
@@ -474,7 +558,8 @@ def get_last_updated():
         session = get_session()
 
         last_sync = session.query(func.max(BasisSyncLog.sync_completed_at)).filter(
-            BasisSyncLog.sync_status == 'success'
+            BasisSyncLog.sync_status == 'success',
+            func.coalesce(BasisSyncLog.sync_type, '') != ROLLUP_SYNC_TYPE
         ).scalar()
 
         latest_data = session.query(func.max(BasisDailyStats.report_date)).filter(
@@ -504,112 +589,80 @@ def get_exchange_stats():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
 
-        base_query = session.query(BasisExchangeStats)
-
-        if campaign_id:
-            base_query = base_query.filter(BasisExchangeStats.basis_campaign_id == campaign_id)
-
-        if start_date:
-            base_query = base_query.filter(BasisExchangeStats.report_date >= start_date)
-        if end_date:
-            base_query = base_query.filter(BasisExchangeStats.report_date <= end_date)
+        start = _parse_date(start_date)
+        end = _parse_date(end_date)
+        stale = stale_rollup_weeks(session)
 
         if group_by == 'campaign':
-            stats = base_query.with_entities(
-                BasisExchangeStats.basis_campaign_id,
-                func.sum(BasisExchangeStats.impressions).label('impressions'),
-                func.sum(BasisExchangeStats.clicks).label('clicks'),
-                func.sum(BasisExchangeStats.spend).label('spend'),
-                func.sum(BasisExchangeStats.bids).label('bids')
-            ).group_by(BasisExchangeStats.basis_campaign_id).all()
-
-            campaign_ids = [s.basis_campaign_id for s in stats]
+            stats = campaign_totals(session, start, end, campaign_id, stale)
+
             campaigns = session.query(BasisCampaign).filter(
-                BasisCampaign.basis_campaign_id.in_(campaign_ids)
+                BasisCampaign.basis_campaign_id.in_([k[0] for k in stats])
             ).all()
             campaign_map = {c.basis_campaign_id: {'name': c.campaign_name, 'brand': c.brand_name} for c in campaigns}
 
             data = []
-            for s in stats:
-                if s.impressions and s.impressions > 0:
-                    campaign_info = campaign_map.get(s.basis_campaign_id, {})
+            for (basis_campaign_id,), s in stats.items():
+                if s['impressions'] > 0:
+                    campaign_info = campaign_map.get(basis_campaign_id, {})
                     data.append({
-                        'id': s.basis_campaign_id,
-                        'name': campaign_info.get('name', s.basis_campaign_id),
+                        'id': basis_campaign_id,
+                        'name': campaign_info.get('name', basis_campaign_id),
                         'brand': campaign_info.get('brand', 'Unknown'),
-                        'impressions': s.impressions,
-                        'clicks': s.clicks,
-                        'spend': float(s.spend),
-                        'ecpm': round((s.spend / s.impressions) * 1000, 2),
-                        'ctr': round((s.clicks / s.impressions) * 100, 4) if s.impressions > 0 else 0,
-                        'ecpc': round(s.spend / s.clicks, 2) if s.clicks > 0 else None
+                        'impressions': s['impressions'],
+                        'clicks': s['clicks'],
+                        'spend': s['spend'],
+                        'ecpm': round((s['spend'] / s['impressions']) * 1000, 2),
+                        'ctr': round((s['clicks'] / s['impressions']) * 100, 4),
+                        'ecpc': round(s['spend'] / s['clicks'], 2) if s['clicks'] > 0 else None
                     })
 
         elif group_by == 'brand':
-            campaign_ids_query = base_query.with_entities(
-                BasisExchangeStats.basis_campaign_id
-            ).distinct()
+            stats = campaign_totals(session, start, end, campaign_id, stale)
 
-            campaigns = session.query(BasisCampaign).filter(
-                BasisCampaign.basis_campaign_id.in_(campaign_ids_query)
+            campaigns = session.query(BasisCampaign.basis_campaign_id, BasisCampaign.brand_name).filter(
+                BasisCampaign.basis_campaign_id.in_([k[0] for k in stats])
             ).all()
 
-            brand_campaigns = {}
+            brand_stats = {}
             for c in campaigns:
-                brand = c.brand_name or 'Unknown'
-                if brand not in brand_campaigns:
-                    brand_campaigns[brand] = []
-                brand_campaigns[brand].append(c.basis_campaign_id)
+                s = stats[(c.basis_campaign_id,)]
+                entry = brand_stats.setdefault(c.brand_name or 'Unknown',
+                                               {'campaign_count': 0, 'impressions': 0, 'clicks': 0, 'spend': 0.0})
+                entry['campaign_count'] += 1
+                entry['impressions'] += s['impressions']
+                entry['clicks'] += s['clicks']
+                entry['spend'] += s['spend']
 
             data = []
-            for brand, camp_ids in brand_campaigns.items():
-                brand_query = session.query(
-                    func.sum(BasisExchangeStats.impressions).label('impressions'),
-                    func.sum(BasisExchangeStats.clicks).label('clicks'),
-                    func.sum(BasisExchangeStats.spend).label('spend'),
-                    func.count(func.distinct(BasisExchangeStats.basis_campaign_id)).label('campaign_count')
-                ).filter(BasisExchangeStats.basis_campaign_id.in_(camp_ids))
-
-                if start_date:
-                    brand_query = brand_query.filter(BasisExchangeStats.report_date >= start_date)
-                if end_date:
-                    brand_query = brand_query.filter(BasisExchangeStats.report_date <= end_date)
-
-                stats = brand_query.first()
-
-                if stats and stats.impressions and stats.impressions > 0:
+            for brand, totals in brand_stats.items():
+                if totals['impressions'] > 0:
                     data.append({
                         'name': brand,
-                        'campaign_count': stats.campaign_count,
-                        'impressions': stats.impressions,
-                        'clicks': stats.clicks,
-                        'spend': float(stats.spend),
-                        'ecpm': round((stats.spend / stats.impressions) * 1000, 2),
-                        'ctr': round((stats.clicks / stats.impressions) * 100, 4) if stats.impressions > 0 else 0,
-                        'ecpc': round(stats.spend / stats.clicks, 2) if stats.clicks > 0 else None
+                        'campaign_count': totals['campaign_count'],
+                        'impressions': totals['impressions'],
+                        'clicks': totals['clicks'],
+                        'spend': totals['spend'],
+                        'ecpm': round((totals['spend'] / totals['impressions']) * 1000, 2),
+                        'ctr': round((totals['clicks'] / totals['impressions']) * 100, 4),
+                        'ecpc': round(totals['spend'] / totals['clicks'], 2) if totals['clicks'] > 0 else None
                     })
         else:
-            exchanges = base_query.with_entities(
-                BasisExchangeStats.exchange_name,
-                func.sum(BasisExchangeStats.impressions).label('impressions'),
-                func.sum(BasisExchangeStats.clicks).label('clicks'),
-                func.sum(BasisExchangeStats.spend).label('spend'),
-                func.sum(BasisExchangeStats.bids).label('bids')
-            ).group_by(BasisExchangeStats.exchange_name).all()
+            exchanges = exchange_totals(session, start, end, campaign_id, stale)
 
             data = []
-            for ex in exchanges:
-                if ex.impressions and ex.impressions > 0:
+            for (exchange_name,), ex in exchanges.items():
+                if ex['impressions'] > 0:
                     data.append({
-                        'name': ex.exchange_name,
-                        'impressions': ex.impressions,
-                        'clicks': ex.clicks,
-                        'spend': float(ex.spend),
-                        'bids': ex.bids or 0,
-                        'ecpm': round((ex.spend / ex.impressions) * 1000, 2),
-                        'ctr': round((ex.clicks / ex.impressions) * 100, 4) if ex.impressions > 0 else 0,
-                        'ecpc': round(ex.spend / ex.clicks, 2) if ex.clicks > 0 else None,
-                        'win_rate': round((ex.impressions / ex.bids * 100), 2) if ex.bids and ex.bids > 0 else None
+                        'name': exchange_name,
+                        'impressions': ex['impressions'],
+                        'clicks': ex['clicks'],
+                        'spend': ex['spend'],
+                        'bids': ex['bids'],
+                        'ecpm': round((ex['spend'] / ex['impressions']) * 1000, 2),
+                        'ctr': round((ex['clicks'] / ex['impressions']) * 100, 4),
+                        'ecpc': round(ex['spend'] / ex['clicks'], 2) if ex['clicks'] > 0 else None,
+                        'win_rate': round((ex['impressions'] / ex['bids'] * 100), 2) if ex['bids'] > 0 else None
                     })
 
         if not data:
@@ -787,34 +840,14 @@ def get_property_stats():
 
         cutoff_date = datetime.utcnow().date() - timedelta(days=days)
 
-        query = session.query(
-            BasisDailyStats.property_name,
-            BasisDailyStats.vendor_name,
-            func.sum(BasisDailyStats.impressions).label('impressions'),
-            func.sum(BasisDailyStats.clicks).label('clicks'),
-            func.sum(BasisDailyStats.spend).label('spend'),
-            func.count(func.distinct(BasisDailyStats.report_date)).label('days_active')
-        ).filter(
-            BasisDailyStats.report_date >= cutoff_date,
-            BasisDailyStats.property_name.isnot(None),
-            func.length(BasisDailyStats.property_name) > 0
-        )
-
-        if exchange:
-            query = query.filter(BasisDailyStats.vendor_name == exchange)
-        if vendor:
-            query = query.filter(BasisDailyStats.vendor_name == vendor)
-        if campaign_id:
-            query = query.filter(BasisDailyStats.basis_campaign_id == campaign_id)
-
-        query = query.group_by(
-            BasisDailyStats.property_name,
-            BasisDailyStats.vendor_name
-        ).having(
-            func.sum(BasisDailyStats.impressions) >= min_impressions
-        )
+        stale = stale_rollup_weeks(session)
+        totals = property_totals(session, cutoff_date, None, [v for v in (exchange, vendor) if v], campaign_id, stale)
 
-        results = query.all()
+        results = [
+            dict(t, property_name=property_name, vendor_name=vendor_name)
+            for (property_name, vendor_name), t in totals.items()
+            if t['impressions'] >= min_impressions
+        ]
 
         if not results:
             session.close()
@@ -824,20 +857,20 @@ def get_property_stats():
                 'summary': {}
             }), 200
 
-        total_impressions = sum(r.impressions or 0 for r in results)
-        total_spend = sum(float(r.spend or 0) for r in results)
-        total_clicks = sum(r.clicks or 0 for r in results)
+        total_impressions = sum(r['impressions'] or 0 for r in results)
+        total_spend = sum(float(r['spend'] or 0) for r in results)
+        total_clicks = sum(r['clicks'] or 0 for r in results)
         avg_ecpm = (total_spend / total_impressions * 1000) if total_impressions > 0 else 0
         avg_ctr = (total_clicks / total_impressions * 100) if total_impressions > 0 else 0
 
         data = []
         for r in results:
-            if not r.impressions or r.impressions < min_impressions:
+            if not r['impressions'] or r['impressions'] < min_impressions:
                 continue
 
-            spend = float(r.spend or 0)
-            impressions = r.impressions
-            clicks = r.clicks or 0
+            spend = float(r['spend'] or 0)
+            impressions = r['impressions']
+            clicks = r['clicks'] or 0
 
             ecpm = (spend / impressions * 1000) if impressions > 0 else 0
             ctr = (clicks / impressions * 100) if impressions > 0 else 0
@@ -857,8 +890,8 @@ def get_property_stats():
                 status = 'poor'
 
             data.append({
-                'property_name': r.property_name,
-                'exchange': r.vendor_name,
+                'property_name': r['property_name'],
+                'exchange': r['vendor_name'],
                 'impressions': impressions,
                 'clicks': clicks,
                 'spend': round(spend, 2),
@@ -868,7 +901,7 @@ def get_property_stats():
                 'volume_pct': round(volume_pct, 2),
                 'vs_avg_ecpm': round((ecpm_ratio - 1) * 100, 1),
                 'vs_avg_ctr': round((ctr / avg_ctr - 1) * 100, 1) if avg_ctr > 0 else 0,
-                'days_active': r.days_active,
+                'days_active': r['days_active'],
                 'status': status
             })
 
@@ -3,6 +3,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine, text
 from models import CampaignReportingMetadata, BrandEditorAgency, CMIContractValue, GCMPlacementLookup, UserProfile, UniversalProfile
 from werkzeug.utils import secure_filename
+from spreadsheet_reader import iter_xlsx_rows, find_header_row
 import os
 import json
 import re
@@ -10,7 +11,6 @@ import threading
 import time
 import traceback
 from datetime import datetime
-import openpyxl
 import tempfile
 from sqlalchemy.exc import OperationalError
 
@@ -121,16 +121,14 @@ def extract_target_list_data(file_content, filename):
                     if header:
                         row_data[header] = sheet.cell_value(1, idx)
             else:
-                wb = openpyxl.load_workbook(tmp_path, data_only=True)
-                sheet = wb.active
-                headers = [cell.value for cell in sheet[1]]
-                if sheet.max_row < 2:
+                rows = list(iter_xlsx_rows(tmp_path, max_rows=2))
+                if len(rows) < 2:
                     return {'error': 'No data rows found'}
+                headers, values = rows
                 row_data = {}
                 for idx, header in enumerate(headers):
-                    cell_value = sheet.cell(row=2, column=idx+1).value
                     if header:
-                        row_data[header] = cell_value
+                        row_data[header] = values[idx] if idx < len(values) else None
         finally:
             os.unlink(tmp_path)
 
@@ -173,6 +171,9 @@ def _normalize_npi(val):
     digits = re.sub(r'\D', '', str(val))
     return digits if len(digits) == 10 else None
 
+def _row_value(row, idx):
+    return row[idx] if idx < len(row) else None
+
 def _find_npi_col_index(headers):
     candidates = {'npi', 'npinumber', 'npi#', 'npiid', 'nationalproviderid', 'nationalprovideridentifier'}
     for idx, h in enumerate(headers):
@@ -208,24 +209,19 @@ def extract_npis_from_target_list(file_content, filename):
                     if npi:
                         npis.add(npi)
             else:
-                wb = openpyxl.load_workbook(tmp_path, data_only=True, read_only=True)
-                sheet = wb.active
-                row_iter = sheet.iter_rows(values_only=True)
+                row_iter = iter_xlsx_rows(tmp_path)
                 try:
                     headers = list(next(row_iter))
                 except StopIteration:
-                    wb.close()
                     return []
                 npi_col = _find_npi_col_index(headers)
                 if npi_col is None:
-                    wb.close()
+                    row_iter.close()
                     return []
                 for row in row_iter:
-                    if npi_col < len(row):
-                        npi = _normalize_npi(row[npi_col])
-                        if npi:
-                            npis.add(npi)
-                wb.close()
+                    npi = _normalize_npi(_row_value(row, npi_col))
+                    if npi:
+                        npis.add(npi)
         finally:
             try:
                 os.unlink(tmp_path)
@@ -394,20 +390,11 @@ def extract_tags_data(file_content, filename):
                         row_values = [sheet.cell_value(row_idx, col) for col in range(sheet.ncols)]
                         rows_data.append(row_values)
             else:
-                wb = openpyxl.load_workbook(tmp_path, data_only=True)
-                sheet = wb.active
-
-                for row_idx in range(1, min(sheet.max_row + 1, 20)):
-                    row_values = [sheet.cell(row=row_idx, column=col).value for col in range(1, sheet.max_column + 1)]
-                    if any('Placement ID' in str(cell) for cell in row_values if cell):
-                        headers = row_values
-                        header_row_idx = row_idx
-                        break
+                header_row_idx, headers = find_header_row(tmp_path, lambda cell: 'Placement ID' in str(cell), scan_rows=19)
 
                 if headers and header_row_idx is not None:
-                    for row_idx in range(header_row_idx + 1, sheet.max_row + 1):
-                        row_values = [sheet.cell(row=row_idx, column=col).value for col in range(1, sheet.max_column + 1)]
-                        rows_data.append(row_values)
+                    for row_values in iter_xlsx_rows(tmp_path, min_row=header_row_idx + 1):
+                        rows_data.append(list(row_values))
         finally:
             os.unlink(tmp_path)
 
@@ -900,17 +887,9 @@ def upload_gcm_tags():
                     })
 
         elif ext == 'xlsx':
-            wb = openpyxl.load_workbook(file_path, data_only=True)
-            sheet = wb.active
-
-            header_row_idx = None
-            headers = []
-            for row_idx in range(1, min(sheet.max_row + 1, 20)):
-                row_values = [sheet.cell(row=row_idx, column=col).value for col in range(1, sheet.max_column + 1)]
-                if any('Placement ID' in str(cell) or 'Placement Id' in str(cell) for cell in row_values if cell):
-                    headers = row_values
-                    header_row_idx = row_idx
-                    break
+            header_row_idx, headers = find_header_row(
+                file_path, lambda cell: 'Placement ID' in str(cell) or 'Placement Id' in str(cell), scan_rows=19
+            )
 
             if header_row_idx is None:
                 os.remove(file_path)
@@ -921,35 +900,35 @@ def upload_gcm_tags():
                 if header:
                     header_str = str(header).strip().lower()
                     if 'placement id' in header_str and 'name' not in header_str:
-                        col_map['placement_id'] = idx + 1
+                        col_map['placement_id'] = idx
                     elif 'placement name' in header_str:
-                        col_map['placement_name'] = idx + 1
+                        col_map['placement_name'] = idx
                     elif 'advertiser id' in header_str:
-                        col_map['advertiser_id'] = idx + 1
+                        col_map['advertiser_id'] = idx
                     elif 'advertiser name' in header_str:
-                        col_map['advertiser_name'] = idx + 1
+                        col_map['advertiser_name'] = idx
                     elif 'campaign id' in header_str and 'name' not in header_str:
-                        col_map['campaign_id'] = idx + 1
+                        col_map['campaign_id'] = idx
                     elif 'campaign name' in header_str:
-                        col_map['campaign_name'] = idx + 1
+                        col_map['campaign_name'] = idx
                     elif 'site' in header_str:
-                        col_map['site'] = idx + 1
+                        col_map['site'] = idx
                     elif 'start' in header_str and 'date' in header_str:
-                        col_map['start_date'] = idx + 1
+                        col_map['start_date'] = idx
                     elif 'end' in header_str and 'date' in header_str:
-                        col_map['end_date'] = idx + 1
+                        col_map['end_date'] = idx
 
-            for row_idx in range(header_row_idx + 1, sheet.max_row + 1):
-                placement_id = sheet.cell(row=row_idx, column=col_map.get('placement_id', 1)).value if 'placement_id' in col_map else None
+            for row in iter_xlsx_rows(file_path, min_row=header_row_idx + 1):
+                placement_id = _row_value(row, col_map['placement_id']) if 'placement_id' in col_map else None
                 if placement_id:
                     placements.append({
                         'gcm_placement_id': str(int(placement_id) if isinstance(placement_id, float) else placement_id),
-                        'placement_name': str(sheet.cell(row=row_idx, column=col_map['placement_name']).value) if 'placement_name' in col_map else None,
-                        'advertiser_id': str(sheet.cell(row=row_idx, column=col_map['advertiser_id']).value) if 'advertiser_id' in col_map else None,
-                        'advertiser_name': str(sheet.cell(row=row_idx, column=col_map['advertiser_name']).value) if 'advertiser_name' in col_map else None,
-                        'campaign_id': str(sheet.cell(row=row_idx, column=col_map['campaign_id']).value) if 'campaign_id' in col_map else None,
-                        'campaign_name': str(sheet.cell(row=row_idx, column=col_map['campaign_name']).value) if 'campaign_name' in col_map else None,
-                        'site': str(sheet.cell(row=row_idx, column=col_map['site']).value) if 'site' in col_map else None,
+                        'placement_name': str(_row_value(row, col_map['placement_name'])) if 'placement_name' in col_map else None,
+                        'advertiser_id': str(_row_value(row, col_map['advertiser_id'])) if 'advertiser_id' in col_map else None,
+                        'advertiser_name': str(_row_value(row, col_map['advertiser_name'])) if 'advertiser_name' in col_map else None,
+                        'campaign_id': str(_row_value(row, col_map['campaign_id'])) if 'campaign_id' in col_map else None,
+                        'campaign_name': str(_row_value(row, col_map['campaign_name'])) if 'campaign_name' in col_map else None,
+                        'site': str(_row_value(row, col_map['site'])) if 'site' in col_map else None,
                         'brand': brand,
                         'source_file': file.filename
                     })
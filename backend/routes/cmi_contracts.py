@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine, text
 from models import CMIContractValue, CmiOrphanNoDataSubmission, Base
+from query_helpers import session_id_set_filter
 from datetime import datetime, timedelta
 import os
 import csv
@@ -323,8 +324,7 @@ def get_contracts_with_validation():
 
         cmi_rows = {}
         if contract_ids:
-            placeholders = ','.join([f":p{i}" for i in range(len(contract_ids))])
-            params = {f"p{i}": pid for i, pid in enumerate(contract_ids)}
+            placement_filter, params = session_id_set_filter(session, 'cmi_placement_id', contract_ids, 'placement_ids')
             result = session.execute(text(f"""
                 SELECT cmi_placement_id, contract_number, client_name, brand_name,
                        vehicle_name, placement_description, ad_format, media_tactic_id,
@@ -332,7 +332,7 @@ def get_contracts_with_validation():
                        buying_channel, is_amo, start_date, end_date, is_current,
                        data_type
                 FROM cmi_metadata_schedule
-                WHERE cmi_placement_id IN ({placeholders})
+                WHERE {placement_filter}
             """), params)
             cols = result.keys()
             for row in result:
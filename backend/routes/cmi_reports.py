@@ -3,6 +3,7 @@ from flask_cors import cross_origin
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine
 from models import CampaignReportManager, CMIContractValue
+from cmi_board_snapshots import rebuild_board_snapshots
 from datetime import datetime
 import os
 
@@ -131,6 +132,7 @@ def update_submission_status(report_id):
         }
 
         session.commit()
+        rebuild_board_snapshots(session)
         session.close()
 
         return jsonify(result_data), 200
@@ -173,6 +175,7 @@ def update_placement_id(report_id):
         report.updated_at = datetime.utcnow()
 
         session.commit()
+        rebuild_board_snapshots(session)
         session.close()
 
         return jsonify({
@@ -212,6 +215,7 @@ def update_report_metadata(report_id):
         report.updated_at = datetime.utcnow()
 
         session.commit()
+        rebuild_board_snapshots(session)
         session.close()
 
         return jsonify({
@@ -247,6 +251,7 @@ def toggle_not_needed(report_id):
         report.updated_at = datetime.utcnow()
 
         session.commit()
+        rebuild_board_snapshots(session)
         session.close()
 
         return jsonify({
@@ -297,6 +302,7 @@ def submit_entire_week(week_start):
             updated_count += 1
 
         session.commit()
+        rebuild_board_snapshots(session)
         session.close()
 
         return jsonify({
@@ -5,6 +5,69 @@ from db_pool import get_db_connection
 
 deliverability_bp = Blueprint('deliverability', __name__)
 
+DOMAIN_ROLLUP_FIELDS = ['sent', 'bounces', 'opens', 'clicks', 'unsubs']
+
+STALE_CAMPAIGNS_SQL = """
+    SELECT c.campaign_id
+    FROM unnest(CAST(%s AS TEXT[])) AS c(campaign_id)
+    LEFT JOIN campaign_deliverability_state st ON st.campaign_id = c.campaign_id
+    WHERE st.campaign_id IS NULL
+       OR EXISTS (
+            SELECT 1 FROM campaign_interactions ci
+            WHERE ci.campaign_id = c.campaign_id AND ci.id > st.last_interaction_id
+       )
+"""
+
+DOMAIN_COUNTS_SQL = """
+    SELECT campaign_id, dim_value AS domain,
+           COUNT(*) FILTER (WHERE s) AS sent,
+           COUNT(*) FILTER (WHERE s AND b) AS bounces,
+           COUNT(*) FILTER (WHERE s AND NOT b AND o) AS opens,
+           COUNT(*) FILTER (WHERE s AND NOT b AND c) AS clicks,
+           COUNT(*) FILTER (WHERE s AND NOT b AND u) AS unsubs
+    FROM (
+        SELECT campaign_id,
+               LOWER(SPLIT_PART(email, '@', 2)) AS dim_value,
+               bool_or(event_type = 'sent') AS s,
+               bool_or(event_type = 'bounce') AS b,
+               bool_or(event_type = 'open') AS o,
+               bool_or(event_type = 'click') AS c,
+               bool_or(event_type = 'unsubscribe') AS u
+        FROM campaign_interactions
+        WHERE campaign_id = ANY(%s) AND email LIKE '%%@%%'
+        GROUP BY campaign_id, LOWER(email), LOWER(SPLIT_PART(email, '@', 2))
+    ) pe
+    GROUP BY campaign_id, dim_value
+"""
+
+def refresh_domain_deliverability(cursor, campaign_ids):
+    campaign_ids = sorted({str(c) for c in campaign_ids if c})
+    if not campaign_ids:
+        return 0
+    cursor.execute("DELETE FROM campaign_domain_deliverability WHERE campaign_id = ANY(%s)", (campaign_ids,))
+    cursor.execute(f"""
+        INSERT INTO campaign_domain_deliverability
+            (campaign_id, domain, sent, bounces, opens, clicks, unsubs, refreshed_at)
+        SELECT d.*, NOW()
+        FROM ({DOMAIN_COUNTS_SQL}) d
+    """, (campaign_ids,))
+    rows = cursor.rowcount
+    cursor.execute("""
+        INSERT INTO campaign_deliverability_state (campaign_id, last_interaction_id, refreshed_at)
+        SELECT c.campaign_id,
+               COALESCE((SELECT MAX(ci.id) FROM campaign_interactions ci WHERE ci.campaign_id = c.campaign_id), 0),
+               NOW()
+        FROM unnest(CAST(%s AS TEXT[])) AS c(campaign_id)
+        ON CONFLICT (campaign_id) DO UPDATE
+        SET last_interaction_id = EXCLUDED.last_interaction_id,
+            refreshed_at = EXCLUDED.refreshed_at
+    """, (campaign_ids,))
+    return rows
+
+def stale_domain_campaigns(cursor, campaign_ids):
+    cursor.execute(STALE_CAMPAIGNS_SQL, (campaign_ids,))
+    return [r[0] if isinstance(r, tuple) else r['campaign_id'] for r in cursor.fetchall()]
+
 def _rate(num, denom):
     if not denom:
         return None
@@ -47,42 +110,35 @@ def campaign_breakdown():
         cursor = conn.cursor(cursor_factory=RealDictCursor)
         cursor.execute("SET LOCAL statement_timeout = '60s'")
 
-        cursor.execute("""
-            WITH pe AS (
-                SELECT LOWER(email) AS em,
-                       LOWER(SPLIT_PART(email, '@', 2)) AS dim_value,
-                       bool_or(event_type = 'sent') AS s,
-                       bool_or(event_type = 'bounce') AS b,
-                       bool_or(event_type = 'open') AS o,
-                       bool_or(event_type = 'click') AS c,
-                       bool_or(event_type = 'unsubscribe') AS u
-                FROM campaign_interactions
-                WHERE campaign_id = ANY(%s) AND email LIKE '%%@%%'
-                GROUP BY LOWER(email), LOWER(SPLIT_PART(email, '@', 2))
-            )
-            SELECT COALESCE(dim_value, 'unknown') AS dim_value,
-                   COUNT(*) FILTER (WHERE s) AS sent,
-                   COUNT(*) FILTER (WHERE s AND b) AS bounces,
-                   COUNT(*) FILTER (WHERE s AND NOT b AND o) AS opens,
-                   COUNT(*) FILTER (WHERE s AND NOT b AND c) AS clicks,
-                   COUNT(*) FILTER (WHERE s AND NOT b AND u) AS unsubs
-            FROM pe
-            GROUP BY dim_value
-        """, (campaign_ids,))
+        stale = set(stale_domain_campaigns(cursor, campaign_ids))
+        rolled = [c for c in campaign_ids if c not in stale]
+
+        cursor.execute(f"""
+            SELECT COALESCE(NULLIF(domain, ''), 'unknown') AS dim_value,
+                   SUM(sent) AS sent,
+                   SUM(bounces) AS bounces,
+                   SUM(opens) AS opens,
+                   SUM(clicks) AS clicks,
+                   SUM(unsubs) AS unsubs
+            FROM (
+                SELECT domain, sent, bounces, opens, clicks, unsubs
+                FROM campaign_domain_deliverability
+                WHERE campaign_id = ANY(%s)
+                UNION ALL
+                SELECT domain, sent, bounces, opens, clicks, unsubs
+                FROM ({DOMAIN_COUNTS_SQL}) raw
+            ) d
+            GROUP BY 1
+        """, (rolled, sorted(stale)))
         per_domain = {}
         for row in cursor.fetchall():
             dv = row['dim_value'] or 'unknown'
-            per_domain[dv] = {
-                'sent': int(row['sent'] or 0),
-                'bounces': int(row['bounces'] or 0),
-                'opens': int(row['opens'] or 0),
-                'clicks': int(row['clicks'] or 0),
-                'unsubs': int(row['unsubs'] or 0),
-            }
+            per_domain[dv] = {f: int(row[f] or 0) for f in DOMAIN_ROLLUP_FIELDS}
 
         cursor.execute("""
             WITH pe AS (
-                SELECT LOWER(email) AS em,
+                SELECT campaign_id,
+                       LOWER(email) AS em,
                        bool_or(event_type = 'sent') AS s,
                        bool_or(event_type = 'bounce') AS b,
                        bool_or(event_type = 'open') AS o,
@@ -90,14 +146,14 @@ def campaign_breakdown():
                        bool_or(event_type = 'unsubscribe') AS u
                 FROM campaign_interactions
                 WHERE campaign_id = ANY(%s) AND email LIKE '%%@%%'
-                GROUP BY LOWER(email)
+                GROUP BY campaign_id, LOWER(email)
             )
             SELECT UPPER(up.state) AS dim_value,
-                   COUNT(DISTINCT pe.em) FILTER (WHERE pe.s) AS sent,
-                   COUNT(DISTINCT pe.em) FILTER (WHERE pe.s AND pe.b) AS bounces,
-                   COUNT(DISTINCT pe.em) FILTER (WHERE pe.s AND NOT pe.b AND pe.o) AS opens,
-                   COUNT(DISTINCT pe.em) FILTER (WHERE pe.s AND NOT pe.b AND pe.c) AS clicks,
-                   COUNT(DISTINCT pe.em) FILTER (WHERE pe.s AND NOT pe.b AND pe.u) AS unsubs
+                   COUNT(DISTINCT (pe.campaign_id, pe.em)) FILTER (WHERE pe.s) AS sent,
+                   COUNT(DISTINCT (pe.campaign_id, pe.em)) FILTER (WHERE pe.s AND pe.b) AS bounces,
+                   COUNT(DISTINCT (pe.campaign_id, pe.em)) FILTER (WHERE pe.s AND NOT pe.b AND pe.o) AS opens,
+                   COUNT(DISTINCT (pe.campaign_id, pe.em)) FILTER (WHERE pe.s AND NOT pe.b AND pe.c) AS clicks,
+                   COUNT(DISTINCT (pe.campaign_id, pe.em)) FILTER (WHERE pe.s AND NOT pe.b AND pe.u) AS unsubs
             FROM pe
             JOIN user_profiles up ON LOWER(up.email) = pe.em
             WHERE up.state IS NOT NULL AND up.state <> ''
@@ -123,4 +179,4 @@ def campaign_breakdown():
     domains.sort(key=lambda x: x['sent'] or 0, reverse=True)
     states.sort(key=lambda x: x['sent'] or 0, reverse=True)
 
-    return jsonify({'domains': domains, 'states': states})
\ No newline at end of file
+    return jsonify({'domains': domains, 'states': states, 'count_basis': 'per_deployment'})
\ No newline at end of file
@@ -2,7 +2,9 @@ from flask import Blueprint, request, jsonify
 from flask_cors import cross_origin
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine, or_, and_
-from models import CMIExpectedReport, CampaignReportingMetadata, CMIContractValue, CampaignReportManager, CmiOrphanNoDataSubmission
+from models import CMIExpectedReport, CMIContractValue, CampaignReportManager, CmiOrphanNoDataSubmission
+from cmi_lookups import metadata_by_placement, contracts_by_placement as lookup_contracts
+from cmi_board_snapshots import board_snapshot_response, register_board, rebuild_board_snapshots
 from datetime import datetime, timedelta
 import os
 
@@ -43,111 +45,116 @@ def get_pending_monthly_periods():
         periods.append(dt.date())
     return periods
 
-@expected_reports_bp.route('/expected', methods=['GET'])
-@cross_origin()
-def get_expected_reports():
-    try:
-        session = get_session()
-        week_start, week_end = get_current_reporting_week()
+def _expected_reports_payload(session):
+    week_start, week_end = get_current_reporting_week()
 
-        week_param = request.args.get('week')
-        if week_param:
-            week_start = datetime.strptime(week_param, '%Y-%m-%d').date()
-            week_end = week_start + timedelta(days=6)
+    week_param = request.args.get('week')
+    if week_param:
+        week_start = datetime.strptime(week_param, '%Y-%m-%d').date()
+        week_end = week_start + timedelta(days=6)
 
-        monthly_start, is_first_week = get_monthly_report_period()
-        filters = [CMIExpectedReport.reporting_week_start == week_start]
-        if is_first_week and monthly_start:
-            filters.append(
-                and_(
-                    CMIExpectedReport.expected_data_frequency == 'Monthly',
-                    CMIExpectedReport.reporting_week_start == monthly_start
-                )
-            )
-        pending_monthly_periods = get_pending_monthly_periods()
-        if pending_monthly_periods:
-            filters.append(
-                and_(
-                    CMIExpectedReport.expected_data_frequency == 'Monthly',
-                    CMIExpectedReport.reporting_week_start.in_(pending_monthly_periods),
-                    CMIExpectedReport.is_submitted == False
-                )
+    monthly_start, is_first_week = get_monthly_report_period()
+    filters = [CMIExpectedReport.reporting_week_start == week_start]
+    if is_first_week and monthly_start:
+        filters.append(
+            and_(
+                CMIExpectedReport.expected_data_frequency == 'Monthly',
+                CMIExpectedReport.reporting_week_start == monthly_start
             )
-        week_1_start = week_start - timedelta(days=7)
-        week_2_start = week_start - timedelta(days=14)
+        )
+    pending_monthly_periods = get_pending_monthly_periods()
+    if pending_monthly_periods:
         filters.append(
             and_(
-                CMIExpectedReport.reporting_week_start.in_([week_1_start, week_2_start]),
-                CMIExpectedReport.expected_data_frequency != 'Monthly',
-                CMIExpectedReport.status.in_(['attached', 'standalone', 'moved_to_due'])
+                CMIExpectedReport.expected_data_frequency == 'Monthly',
+                CMIExpectedReport.reporting_week_start.in_(pending_monthly_periods),
+                CMIExpectedReport.is_submitted == False
             )
         )
-        reports = session.query(CMIExpectedReport).filter(or_(*filters)).order_by(
-            CMIExpectedReport.is_matched,
-            CMIExpectedReport.brand_name
-        ).all()
+    week_1_start = week_start - timedelta(days=7)
+    week_2_start = week_start - timedelta(days=14)
+    filters.append(
+        and_(
+            CMIExpectedReport.reporting_week_start.in_([week_1_start, week_2_start]),
+            CMIExpectedReport.expected_data_frequency != 'Monthly',
+            CMIExpectedReport.status.in_(['attached', 'standalone', 'moved_to_due'])
+        )
+    )
+    reports = session.query(CMIExpectedReport).filter(or_(*filters)).order_by(
+        CMIExpectedReport.is_matched,
+        CMIExpectedReport.brand_name
+    ).all()
+
+    placement_ids = [str(r.cmi_placement_id) for r in reports if r.cmi_placement_id]
+    contracts = {}
+    if placement_ids:
+        for c in lookup_contracts(session, placement_ids).values():
+            contracts[str(c.placement_id)] = {
+                'notes': c.notes,
+                'placement_description': c.placement_description,
+                'metric': c.metric,
+                'frequency': c.frequency
+            }
 
-        placement_ids = [str(r.cmi_placement_id) for r in reports if r.cmi_placement_id]
-        contracts = {}
-        if placement_ids:
-            contract_records = session.query(CMIContractValue).all()
-            for c in contract_records:
-                if c.placement_id:
-                    contracts[str(c.placement_id)] = {
-                        'notes': c.notes,
-                        'placement_description': c.placement_description,
-                        'metric': c.metric,
-                        'frequency': c.frequency
-                    }
-
-        result = []
-        for r in reports:
-            contract = contracts.get(str(r.cmi_placement_id), {}) if r.cmi_placement_id else {}
-            result.append({
-                'id': r.id,
-                'cmi_placement_id': r.cmi_placement_id,
-                'client_placement_id': r.client_placement_id,
-                'contract_number': r.contract_number,
-                'client_name': r.client_name,
-                'brand_name': r.brand_name,
-                'supplier': r.supplier,
-                'vehicle_name': r.vehicle_name,
-                'placement_description': r.placement_description or contract.get('placement_description'),
-                'buy_type': r.buy_type,
-                'channel': r.channel,
-                'data_type': r.data_type,
-                'expected_data_frequency': r.expected_data_frequency,
-                'reporting_week_start': r.reporting_week_start.isoformat() if r.reporting_week_start else None,
-                'reporting_week_end': r.reporting_week_end.isoformat() if r.reporting_week_end else None,
-                'date_data_expected': r.date_data_expected.isoformat() if r.date_data_expected else None,
-                'matched_campaign_id': r.matched_campaign_id,
-                'matched_metadata_id': r.matched_metadata_id,
-                'is_matched': r.is_matched,
-                'match_type': r.match_type,
-                'is_agg_only': r.is_agg_only,
-                'attached_to_campaign_id': r.attached_to_campaign_id,
-                'is_standalone': r.is_standalone,
-                'agg_metric': r.agg_metric,
-                'agg_value': r.agg_value,
-                'status': r.status,
-                'is_submitted': r.is_submitted,
-                'submitted_for_week': r.submitted_for_week.isoformat() if r.submitted_for_week else None,
-                'source_file': r.source_file,
-                'notes': r.notes,
-                'contract_notes': contract.get('notes'),
-                'contract_metric': contract.get('metric'),
-                'contract_frequency': contract.get('frequency')
-            })
+    result = []
+    for r in reports:
+        contract = contracts.get(str(r.cmi_placement_id), {}) if r.cmi_placement_id else {}
+        result.append({
+            'id': r.id,
+            'cmi_placement_id': r.cmi_placement_id,
+            'client_placement_id': r.client_placement_id,
+            'contract_number': r.contract_number,
+            'client_name': r.client_name,
+            'brand_name': r.brand_name,
+            'supplier': r.supplier,
+            'vehicle_name': r.vehicle_name,
+            'placement_description': r.placement_description or contract.get('placement_description'),
+            'buy_type': r.buy_type,
+            'channel': r.channel,
+            'data_type': r.data_type,
+            'expected_data_frequency': r.expected_data_frequency,
+            'reporting_week_start': r.reporting_week_start.isoformat() if r.reporting_week_start else None,
+            'reporting_week_end': r.reporting_week_end.isoformat() if r.reporting_week_end else None,
+            'date_data_expected': r.date_data_expected.isoformat() if r.date_data_expected else None,
+            'matched_campaign_id': r.matched_campaign_id,
+            'matched_metadata_id': r.matched_metadata_id,
+            'is_matched': r.is_matched,
+            'match_type': r.match_type,
+            'is_agg_only': r.is_agg_only,
+            'attached_to_campaign_id': r.attached_to_campaign_id,
+            'is_standalone': r.is_standalone,
+            'agg_metric': r.agg_metric,
+            'agg_value': r.agg_value,
+            'status': r.status,
+            'is_submitted': r.is_submitted,
+            'submitted_for_week': r.submitted_for_week.isoformat() if r.submitted_for_week else None,
+            'source_file': r.source_file,
+            'notes': r.notes,
+            'contract_notes': contract.get('notes'),
+            'contract_metric': contract.get('metric'),
+            'contract_frequency': contract.get('frequency')
+        })
+
+    return {
+        'status': 'success',
+        'week_start': week_start.isoformat(),
+        'week_end': week_end.isoformat(),
+        'reports': result,
+        'count': len(result)
+    }
+
+register_board('expected_reports', lambda: get_current_reporting_week()[0], _expected_reports_payload)
 
+@expected_reports_bp.route('/expected', methods=['GET'])
+@cross_origin()
+def get_expected_reports():
+    try:
+        session = get_session()
+        week_param = request.args.get('week')
+        week_start = datetime.strptime(week_param, '%Y-%m-%d').date() if week_param else get_current_reporting_week()[0]
+        response = board_snapshot_response(session, 'expected_reports', week_start, lambda: _expected_reports_payload(session))
         session.close()
-
-        return jsonify({
-            'status': 'success',
-            'week_start': week_start.isoformat(),
-            'week_end': week_end.isoformat(),
-            'reports': result,
-            'count': len(result)
-        }), 200
+        return response
 
     except Exception as e:
         return jsonify({
@@ -183,6 +190,7 @@ def match_expected_report(report_id):
         report.updated_at = datetime.utcnow()
 
         session.commit()
+        rebuild_board_snapshots(session)
         session.close()
 
         return jsonify({
@@ -219,6 +227,7 @@ def attach_expected_report(report_id):
         report.updated_at = datetime.utcnow()
 
         session.commit()
+        rebuild_board_snapshots(session)
         session.close()
 
         return jsonify({
@@ -250,6 +259,7 @@ def detach_expected_report(report_id):
         report.updated_at = datetime.utcnow()
 
         session.commit()
+        rebuild_board_snapshots(session)
         session.close()
 
         return jsonify({
@@ -287,6 +297,7 @@ def set_agg_values(report_id):
         report.updated_at = datetime.utcnow()
 
         session.commit()
+        rebuild_board_snapshots(session)
 
         return jsonify({
             'status': 'success',
@@ -329,6 +340,7 @@ def submit_expected_report(report_id):
             report.submitted_at = None
 
         session.commit()
+        rebuild_board_snapshots(session)
         session.close()
 
         return jsonify({
@@ -378,6 +390,7 @@ def move_to_due(report_id):
         report.updated_at = datetime.utcnow()
 
         session.commit()
+        rebuild_board_snapshots(session)
         session.close()
 
         return jsonify({
@@ -421,17 +434,12 @@ def auto_match_expected_reports():
             CMIExpectedReport.is_matched == False
         ).all()
 
-        metadata_records = session.query(CampaignReportingMetadata).all()
-
-        metadata_by_placement = {}
-        for m in metadata_records:
-            if m.cmi_placement_id:
-                metadata_by_placement[str(m.cmi_placement_id)] = m
+        metadata_lookup = metadata_by_placement(session, [r.cmi_placement_id for r in expected_reports])
 
         matched_count = 0
         for report in expected_reports:
-            if report.cmi_placement_id and str(report.cmi_placement_id) in metadata_by_placement:
-                matched_meta = metadata_by_placement[str(report.cmi_placement_id)]
+            if report.cmi_placement_id and str(report.cmi_placement_id) in metadata_lookup:
+                matched_meta = metadata_lookup[str(report.cmi_placement_id)]
                 report.matched_metadata_id = matched_meta.id
                 report.is_matched = True
                 report.match_type = 'auto_placement_id'
@@ -440,6 +448,7 @@ def auto_match_expected_reports():
                 matched_count += 1
 
         session.commit()
+        rebuild_board_snapshots(session)
         session.close()
 
         return jsonify({
@@ -530,6 +539,7 @@ def create_from_placement():
         session.commit()
 
         report_id = new_report.id
+        rebuild_board_snapshots(session)
 
         result = {
             'id': report_id,
@@ -563,152 +573,157 @@ def create_from_placement():
         if session:
             session.close()
 
-@expected_reports_bp.route('/expected/no-data', methods=['GET'])
-@cross_origin()
-def get_no_data_reports():
-    try:
-        session = get_session()
-        week_start, week_end = get_current_reporting_week()
+def _no_data_payload(session):
+    week_start, week_end = get_current_reporting_week()
 
-        week_param = request.args.get('week')
-        if week_param:
-            week_start = datetime.strptime(week_param, '%Y-%m-%d').date()
+    week_param = request.args.get('week')
+    if week_param:
+        week_start = datetime.strptime(week_param, '%Y-%m-%d').date()
 
-        monthly_start, is_first_week = get_monthly_report_period()
-        filters = [CMIExpectedReport.reporting_week_start == week_start]
-        if is_first_week and monthly_start:
-            filters.append(
-                and_(
-                    CMIExpectedReport.expected_data_frequency == 'Monthly',
-                    CMIExpectedReport.reporting_week_start == monthly_start
-                )
+    monthly_start, is_first_week = get_monthly_report_period()
+    filters = [CMIExpectedReport.reporting_week_start == week_start]
+    if is_first_week and monthly_start:
+        filters.append(
+            and_(
+                CMIExpectedReport.expected_data_frequency == 'Monthly',
+                CMIExpectedReport.reporting_week_start == monthly_start
             )
-        pending_monthly_periods = get_pending_monthly_periods()
-        if pending_monthly_periods:
-            filters.append(
-                and_(
-                    CMIExpectedReport.expected_data_frequency == 'Monthly',
-                    CMIExpectedReport.reporting_week_start.in_(pending_monthly_periods),
-                    CMIExpectedReport.is_submitted == False
-                )
+        )
+    pending_monthly_periods = get_pending_monthly_periods()
+    if pending_monthly_periods:
+        filters.append(
+            and_(
+                CMIExpectedReport.expected_data_frequency == 'Monthly',
+                CMIExpectedReport.reporting_week_start.in_(pending_monthly_periods),
+                CMIExpectedReport.is_submitted == False
             )
-        reports = session.query(CMIExpectedReport).filter(
-            or_(*filters),
-            CMIExpectedReport.is_matched == False,
-            CMIExpectedReport.status.in_(['pending', 'no_data'])
-        ).order_by(
-            CMIExpectedReport.data_type,
-            CMIExpectedReport.brand_name
-        ).all()
-
-        contract_values = session.query(CMIContractValue).all()
-        contracts_by_placement = {}
-        for cv in contract_values:
-            if cv.placement_id:
-                contracts_by_placement[str(cv.placement_id)] = {
-                    'contract_number': cv.contract_number,
-                    'client': cv.client,
-                    'brand': cv.brand,
-                    'vehicle': cv.vehicle,
-                    'placement_description': cv.placement_description,
-                    'buy_component_type': cv.buy_component_type,
-                    'frequency': cv.frequency,
-                    'metric': cv.metric,
-                    'data_type': cv.data_type,
-                    'notes': cv.notes
-                }
-
-        pld_and_agg = []
-        pld_only = []
-        agg_only = []
-
-        seen_placements = set()
-        placement_types = {}
-        for r in reports:
-            pid = r.cmi_placement_id
-            if pid not in placement_types:
-                placement_types[pid] = set()
-            if r.data_type:
-                placement_types[pid].add(r.data_type.upper())
-
-        for r in reports:
-            pid = str(r.cmi_placement_id) if r.cmi_placement_id else None
-            if pid and pid in seen_placements:
-                continue
-
-            contract_data = contracts_by_placement.get(pid, {}) if pid else {}
+        )
+    reports = session.query(CMIExpectedReport).filter(
+        or_(*filters),
+        CMIExpectedReport.is_matched == False,
+        CMIExpectedReport.status.in_(['pending', 'no_data'])
+    ).order_by(
+        CMIExpectedReport.data_type,
+        CMIExpectedReport.brand_name
+    ).all()
+
+    contracts_by_placement = {}
+    for cv in lookup_contracts(session, [r.cmi_placement_id for r in reports]).values():
+        contracts_by_placement[str(cv.placement_id)] = {
+            'contract_number': cv.contract_number,
+            'client': cv.client,
+            'brand': cv.brand,
+            'vehicle': cv.vehicle,
+            'placement_description': cv.placement_description,
+            'buy_component_type': cv.buy_component_type,
+            'frequency': cv.frequency,
+            'metric': cv.metric,
+            'data_type': cv.data_type,
+            'notes': cv.notes
+        }
 
-            report_dict = {
-                'id': r.id,
-                'cmi_placement_id': r.cmi_placement_id,
-                'client_placement_id': r.client_placement_id,
-                'contract_number': r.contract_number or contract_data.get('contract_number'),
-                'client_name': r.client_name or contract_data.get('client'),
-                'brand_name': r.brand_name or contract_data.get('brand'),
-                'supplier': r.supplier,
-                'vehicle_name': r.vehicle_name or contract_data.get('vehicle'),
-                'placement_description': r.placement_description or contract_data.get('placement_description'),
-                'data_type': r.data_type,
-                'expected_data_frequency': r.expected_data_frequency or contract_data.get('frequency'),
-                'reporting_week_start': r.reporting_week_start.isoformat() if r.reporting_week_start else None,
-                'reporting_week_end': r.reporting_week_end.isoformat() if r.reporting_week_end else None,
-                'is_agg_only': r.is_agg_only,
-                'agg_metric': r.agg_metric or contract_data.get('metric'),
-                'agg_value': r.agg_value,
-                'status': r.status,
-                'buy_component_type': contract_data.get('buy_component_type'),
-                'contract_notes': contract_data.get('notes'),
-                'contract_metric': contract_data.get('metric'),
-                'has_contract_match': bool(contract_data)
-            }
+    pld_and_agg = []
+    pld_only = []
+    agg_only = []
+
+    seen_placements = set()
+    placement_types = {}
+    for r in reports:
+        pid = r.cmi_placement_id
+        if pid not in placement_types:
+            placement_types[pid] = set()
+        if r.data_type:
+            placement_types[pid].add(r.data_type.upper())
+
+    for r in reports:
+        pid = str(r.cmi_placement_id) if r.cmi_placement_id else None
+        if pid and pid in seen_placements:
+            continue
+
+        contract_data = contracts_by_placement.get(pid, {}) if pid else {}
+
+        report_dict = {
+            'id': r.id,
+            'cmi_placement_id': r.cmi_placement_id,
+            'client_placement_id': r.client_placement_id,
+            'contract_number': r.contract_number or contract_data.get('contract_number'),
+            'client_name': r.client_name or contract_data.get('client'),
+            'brand_name': r.brand_name or contract_data.get('brand'),
+            'supplier': r.supplier,
+            'vehicle_name': r.vehicle_name or contract_data.get('vehicle'),
+            'placement_description': r.placement_description or contract_data.get('placement_description'),
+            'data_type': r.data_type,
+            'expected_data_frequency': r.expected_data_frequency or contract_data.get('frequency'),
+            'reporting_week_start': r.reporting_week_start.isoformat() if r.reporting_week_start else None,
+            'reporting_week_end': r.reporting_week_end.isoformat() if r.reporting_week_end else None,
+            'is_agg_only': r.is_agg_only,
+            'agg_metric': r.agg_metric or contract_data.get('metric'),
+            'agg_value': r.agg_value,
+            'status': r.status,
+            'buy_component_type': contract_data.get('buy_component_type'),
+            'contract_notes': contract_data.get('notes'),
+            'contract_metric': contract_data.get('metric'),
+            'has_contract_match': bool(contract_data)
+        }
 
-            contract_data_type = contract_data.get('data_type', '').upper() if contract_data else ''
+        contract_data_type = contract_data.get('data_type', '').upper() if contract_data else ''
+
+        if contract_data_type:
+            if pid:
+                seen_placements.add(pid)
+            if contract_data_type == 'AGG':
+                report_dict['is_agg_only'] = True
+                agg_only.append(report_dict)
+            elif contract_data_type in ('PLD & AGG', 'PLD AND AGG', 'PLD&AGG'):
+                pld_and_agg.append(report_dict)
+            elif contract_data_type == 'PLD':
+                pld_only.append(report_dict)
+            else:
+                pld_and_agg.append(report_dict)
+        else:
+            types_for_placement = placement_types.get(r.cmi_placement_id, set())
 
-            if contract_data_type:
+            if 'PLD' in types_for_placement and 'AGG' in types_for_placement:
+                if pid:
+                    seen_placements.add(pid)
+                pld_and_agg.append(report_dict)
+            elif 'PLD' in types_for_placement:
                 if pid:
                     seen_placements.add(pid)
-                if contract_data_type == 'AGG':
+                pld_only.append(report_dict)
+            elif 'AGG' in types_for_placement:
+                if pid:
+                    seen_placements.add(pid)
+                report_dict['is_agg_only'] = True
+                agg_only.append(report_dict)
+            else:
+                if r.data_type and r.data_type.upper() == 'AGG':
                     report_dict['is_agg_only'] = True
                     agg_only.append(report_dict)
-                elif contract_data_type in ('PLD & AGG', 'PLD AND AGG', 'PLD&AGG'):
-                    pld_and_agg.append(report_dict)
-                elif contract_data_type == 'PLD':
-                    pld_only.append(report_dict)
                 else:
                     pld_and_agg.append(report_dict)
-            else:
-                types_for_placement = placement_types.get(r.cmi_placement_id, set())
 
-                if 'PLD' in types_for_placement and 'AGG' in types_for_placement:
-                    if pid:
-                        seen_placements.add(pid)
-                    pld_and_agg.append(report_dict)
-                elif 'PLD' in types_for_placement:
-                    if pid:
-                        seen_placements.add(pid)
-                    pld_only.append(report_dict)
-                elif 'AGG' in types_for_placement:
-                    if pid:
-                        seen_placements.add(pid)
-                    report_dict['is_agg_only'] = True
-                    agg_only.append(report_dict)
-                else:
-                    if r.data_type and r.data_type.upper() == 'AGG':
-                        report_dict['is_agg_only'] = True
-                        agg_only.append(report_dict)
-                    else:
-                        pld_and_agg.append(report_dict)
+    return {
+        'status': 'success',
+        'week_start': week_start.isoformat(),
+        'pld_and_agg': pld_and_agg,
+        'pld_only': pld_only,
+        'agg_only': agg_only,
+        'total': len(reports)
+    }
 
-        session.close()
+register_board('expected_no_data', lambda: get_current_reporting_week()[0], _no_data_payload)
 
-        return jsonify({
-            'status': 'success',
-            'week_start': week_start.isoformat(),
-            'pld_and_agg': pld_and_agg,
-            'pld_only': pld_only,
-            'agg_only': agg_only,
-            'total': len(reports)
-        }), 200
+@expected_reports_bp.route('/expected/no-data', methods=['GET'])
+@cross_origin()
+def get_no_data_reports():
+    try:
+        session = get_session()
+        week_param = request.args.get('week')
+        week_start = datetime.strptime(week_param, '%Y-%m-%d').date() if week_param else get_current_reporting_week()[0]
+        response = board_snapshot_response(session, 'expected_no_data', week_start, lambda: _no_data_payload(session))
+        session.close()
+        return response
 
     except Exception as e:
         return jsonify({
@@ -732,15 +747,13 @@ def get_future_reports():
         ).all()
 
         contracts_by_placement = {}
-        contract_values = session.query(CMIContractValue).all()
-        for cv in contract_values:
-            if cv.placement_id:
-                contracts_by_placement[str(cv.placement_id)] = {
-                    'notes': cv.notes,
-                    'placement_description': cv.placement_description,
-                    'metric': cv.metric,
-                    'frequency': cv.frequency
-                }
+        for cv in lookup_contracts(session, [r.cmi_placement_id for r in reports]).values():
+            contracts_by_placement[str(cv.placement_id)] = {
+                'notes': cv.notes,
+                'placement_description': cv.placement_description,
+                'metric': cv.metric,
+                'frequency': cv.frequency
+            }
 
         result = []
         for r in reports:
@@ -923,15 +936,13 @@ def get_archive_aggregates():
         ).order_by(CMIExpectedReport.submitted_at.desc()).all()
 
         contracts_by_placement = {}
-        contract_values = session.query(CMIContractValue).all()
-        for cv in contract_values:
-            if cv.placement_id:
-                contracts_by_placement[str(cv.placement_id)] = {
-                    'notes': cv.notes,
-                    'placement_description': cv.placement_description,
-                    'metric': cv.metric,
-                    'frequency': cv.frequency
-                }
+        for cv in lookup_contracts(session, [r.cmi_placement_id for r in reports]).values():
+            contracts_by_placement[str(cv.placement_id)] = {
+                'notes': cv.notes,
+                'placement_description': cv.placement_description,
+                'metric': cv.metric,
+                'frequency': cv.frequency
+            }
 
         result = []
         for r in reports:
@@ -1,7 +1,10 @@
 import re
+import hashlib
+from functools import lru_cache
 from flask import Blueprint, request, jsonify
 from psycopg2.extras import RealDictCursor
 from db_pool import get_db_connection
+from query_helpers import copy_rows
 
 ga_insights_bp = Blueprint('ga_insights', __name__)
 
@@ -66,6 +69,90 @@ def classify_page_disease(title, url, prop=None):
             return dis
     return None
 
+DISEASE_RULES_VERSION = hashlib.md5(repr((
+    DISEASE_KEYWORDS, sorted(_SHORT_KW), _NO_PAGE_TOPIC_DOMAINS, _MASTHEAD_NOISE, _HT_PROPERTY_DISEASE
+)).encode('utf-8')).hexdigest()[:12]
+
+PAGE_DISEASE_BATCH = 10000
+
+def _page_url_key(url):
+    return (url or '').lower().split('?')[0].split('#')[0]
+
+def _page_url_key_sql(alias=''):
+    p = f"{alias}." if alias else ''
+    return f"lower(split_part(split_part(COALESCE({p}url, ''), '?', 1), '#', 1))"
+
+def _page_disease_key_sql(alias=''):
+    p = f"{alias}." if alias else ''
+    return (f"md5(concat_ws(E'\\x1f', {_page_url_key_sql(alias)}, "
+            f"COALESCE({p}page_title, ''), COALESCE({p}property, '')))")
+
+@lru_cache(maxsize=65536)
+def _classify_page_key(title, url_key, prop):
+    return classify_page_disease(title, url_key, prop or None)
+
+def cached_page_disease(title, url, prop=None):
+    return _classify_page_key(title or '', _page_url_key(url), prop or '')
+
+def _store_page_diseases(cursor, rows):
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS tmp_page_disease (
+            key_hash TEXT, url_key TEXT, page_title TEXT, property TEXT, disease TEXT
+        ) ON COMMIT DROP
+    """)
+    stored = 0
+    for i in range(0, len(rows), PAGE_DISEASE_BATCH):
+        batch = rows[i:i + PAGE_DISEASE_BATCH]
+        cursor.execute("TRUNCATE tmp_page_disease")
+        copy_rows(cursor, 'tmp_page_disease', ['key_hash', 'url_key', 'page_title', 'property', 'disease'],
+                  ((k, u, t, p, _classify_page_key(t, u, p)) for k, u, t, p in batch))
+        cursor.execute("""
+            INSERT INTO ga_page_disease (key_hash, url_key, page_title, property, disease, rules_version, classified_at)
+            SELECT key_hash, url_key, page_title, property, disease, %s, NOW()
+            FROM tmp_page_disease
+            ON CONFLICT (key_hash) DO UPDATE
+            SET disease = EXCLUDED.disease,
+                rules_version = EXCLUDED.rules_version,
+                classified_at = EXCLUDED.classified_at
+        """, (DISEASE_RULES_VERSION,))
+        stored += cursor.rowcount
+    return stored
+
+def classify_ga_pages(conn, since_day=None):
+    cursor = conn.cursor()
+    since = "AND ts >= %s" if since_day else ""
+    cursor.execute(f"""
+        SELECT DISTINCT e.key_hash, e.url_key, e.page_title, e.property
+        FROM (
+            SELECT {_page_disease_key_sql()} AS key_hash,
+                   {_page_url_key_sql()} AS url_key,
+                   COALESCE(page_title, '') AS page_title,
+                   COALESCE(property, '') AS property
+            FROM ga_events
+            WHERE event = 'page_view' {since}
+        ) e
+        WHERE NOT EXISTS (
+            SELECT 1 FROM ga_page_disease pd
+            WHERE pd.key_hash = e.key_hash AND pd.rules_version = %s
+        )
+    """, ([since_day] if since_day else []) + [DISEASE_RULES_VERSION])
+    stored = _store_page_diseases(cursor, cursor.fetchall())
+    conn.commit()
+    cursor.close()
+    return stored
+
+def reclassify_ga_pages(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT key_hash, url_key, page_title, property
+        FROM ga_page_disease
+        WHERE rules_version <> %s
+    """, (DISEASE_RULES_VERSION,))
+    stored = _store_page_diseases(cursor, cursor.fetchall())
+    conn.commit()
+    cursor.close()
+    return stored + classify_ga_pages(conn)
+
 def _clean_url(u):
     u = (u or "").strip()
     if not u:
@@ -81,6 +168,41 @@ def _url_variants(u):
     variants = {base, stripped, stripped + "/"}
     return list(variants)
 
+GA_DAILY_ROWS_SQL = """
+    SELECT ts::date AS day, url_clean, user_pseudo_id,
+           COUNT(*) AS events,
+           COUNT(*) FILTER (WHERE event = 'page_view') AS page_views,
+           COALESCE(SUM(engagement_ms), 0) AS engagement_ms,
+           ARRAY_AGG(DISTINCT session_id::text) FILTER (WHERE session_id IS NOT NULL) AS session_ids,
+           MIN(ts) AS first_seen,
+           MAX(ts) AS last_seen,
+           (ARRAY_AGG(city ORDER BY ts DESC) FILTER (WHERE city IS NOT NULL AND city <> '(not set)'))[1] AS city,
+           MAX(ts) FILTER (WHERE city IS NOT NULL AND city <> '(not set)') AS city_ts,
+           (ARRAY_AGG(device ORDER BY ts DESC) FILTER (WHERE device IS NOT NULL))[1] AS device,
+           MAX(ts) FILTER (WHERE device IS NOT NULL) AS device_ts,
+           (ARRAY_AGG(property ORDER BY ts DESC))[1] AS property
+    FROM ga_events
+    WHERE url_clean <> '' AND {where}
+    GROUP BY 1, 2, 3
+"""
+
+GA_DAILY_COLUMNS = ('day, url_clean, user_pseudo_id, events, page_views, engagement_ms, session_ids, '
+                    'first_seen, last_seen, city, city_ts, device, device_ts, property')
+
+def refresh_ga_url_user_daily(cursor, since_day, until_day=None):
+    until = "LEAST(%s::date, CURRENT_DATE)" if until_day else "CURRENT_DATE"
+    bounds = (since_day, until_day) if until_day else (since_day,)
+    cursor.execute(f"DELETE FROM ga_url_user_daily WHERE day >= %s AND day < {until}", bounds)
+    cursor.execute(f"""
+        INSERT INTO ga_url_user_daily ({GA_DAILY_COLUMNS})
+        {GA_DAILY_ROWS_SQL.format(where=f"ts >= %s AND ts < {until}")}
+    """, bounds)
+    return cursor.rowcount
+
+def _ga_daily_cutoff(cursor):
+    cursor.execute("SELECT COALESCE(MAX(day) + 1, DATE '1970-01-01') AS cutoff FROM ga_url_user_daily")
+    return cursor.fetchone()['cutoff']
+
 @ga_insights_bp.route('/user-events', methods=['POST'])
 def user_events():
     try:
@@ -93,14 +215,19 @@ def user_events():
         cursor = conn.cursor(cursor_factory=RealDictCursor)
         cursor.execute("SET statement_timeout = '20s'")
 
-        cursor.execute("""
-            SELECT event, ts, url, page_title, engagement_ms, session_id,
-                   city, region, device, source, medium, property, market
-            FROM ga_events
-            WHERE user_pseudo_id = %s
-            ORDER BY ts ASC
+        cursor.execute(f"""
+            SELECT e.event, e.ts, e.url, e.page_title, e.engagement_ms, e.session_id,
+                   e.city, e.region, e.device, e.source, e.medium, e.property, e.market,
+                   pd.disease, (pd.key_hash IS NOT NULL) AS classified
+            FROM ga_events e
+            LEFT JOIN ga_page_disease pd
+              ON e.event = 'page_view'
+             AND pd.key_hash = {_page_disease_key_sql('e')}
+             AND pd.rules_version = %s
+            WHERE e.user_pseudo_id = %s
+            ORDER BY e.ts ASC
             LIMIT %s
-        """, (upid, MAX_USER_EVENTS + 1))
+        """, (DISEASE_RULES_VERSION, upid, MAX_USER_EVENTS + 1))
         rows = cursor.fetchall()
 
         truncated = len(rows) > MAX_USER_EVENTS
@@ -124,7 +251,7 @@ def user_events():
                 if cu and cu not in seen_pages:
                     seen_pages.add(cu)
                     pages.append(cu)
-                dis = classify_page_disease(r['page_title'], r['url'], r.get('property'))
+                dis = r['disease'] if r['classified'] else cached_page_disease(r['page_title'], r['url'], r.get('property'))
                 if dis:
                     ts_d = topic_stats.setdefault(dis, {'page_views': 0, 'engagement_ms': 0})
                     ts_d['page_views'] += 1
@@ -192,29 +319,42 @@ def url_viewers():
         cursor = conn.cursor(cursor_factory=RealDictCursor)
         cursor.execute("SET statement_timeout = '25s'")
 
-        cursor.execute("""
-            WITH viewers AS (
+        cutoff = _ga_daily_cutoff(cursor)
+        cursor.execute(f"""
+            WITH daily AS (
+                SELECT {GA_DAILY_COLUMNS}
+                FROM ga_url_user_daily
+                WHERE url_clean = ANY(%s) AND day < %s
+                UNION ALL
+                {GA_DAILY_ROWS_SQL.format(where="url_clean = ANY(%s) AND ts >= %s")}
+            ),
+            sessions AS (
+                SELECT d.user_pseudo_id, COUNT(DISTINCT s.session_id) AS sessions
+                FROM daily d, unnest(d.session_ids) AS s(session_id)
+                GROUP BY d.user_pseudo_id
+            ),
+            viewers AS (
                 SELECT
-                    e.user_pseudo_id,
-                    COUNT(*) AS events,
-                    COUNT(*) FILTER (WHERE e.event = 'page_view') AS page_views,
-                    COALESCE(SUM(e.engagement_ms), 0) AS engagement_ms,
-                    COUNT(DISTINCT e.session_id) AS sessions,
-                    MIN(e.ts) AS first_seen,
-                    MAX(e.ts) AS last_seen,
-                    (ARRAY_AGG(e.city ORDER BY e.ts DESC) FILTER (WHERE e.city IS NOT NULL AND e.city <> '(not set)'))[1] AS city,
-                    (ARRAY_AGG(e.device ORDER BY e.ts DESC) FILTER (WHERE e.device IS NOT NULL))[1] AS device,
-                    (ARRAY_AGG(e.property ORDER BY e.ts DESC))[1] AS property
-                FROM ga_events e
-                WHERE e.url_clean = ANY(%s)
-                GROUP BY e.user_pseudo_id
+                    d.user_pseudo_id,
+                    SUM(d.events)::bigint AS events,
+                    SUM(d.page_views)::bigint AS page_views,
+                    SUM(d.engagement_ms) AS engagement_ms,
+                    MIN(d.first_seen) AS first_seen,
+                    MAX(d.last_seen) AS last_seen,
+                    (ARRAY_AGG(d.city ORDER BY d.city_ts DESC) FILTER (WHERE d.city IS NOT NULL))[1] AS city,
+                    (ARRAY_AGG(d.device ORDER BY d.device_ts DESC) FILTER (WHERE d.device IS NOT NULL))[1] AS device,
+                    (ARRAY_AGG(d.property ORDER BY d.last_seen DESC))[1] AS property
+                FROM daily d
+                GROUP BY d.user_pseudo_id
             )
-            SELECT v.*, b.email, b.npi, b.name, b.specialty, b.city AS hcp_city,
+            SELECT v.*, COALESCE(s.sessions, 0) AS sessions,
+                   b.email, b.npi, b.name, b.specialty, b.city AS hcp_city,
                    b.state AS hcp_state, b.confidence, b.distinct_ga_cities
             FROM viewers v
+            LEFT JOIN sessions s ON s.user_pseudo_id = v.user_pseudo_id
             LEFT JOIN ga_bridges b ON b.user_pseudo_id = v.user_pseudo_id
             ORDER BY v.engagement_ms DESC, v.events DESC
-        """, (variants,))
+        """, (variants, cutoff, variants, cutoff))
         rows = cursor.fetchall()
 
         viewers = []
@@ -281,26 +421,35 @@ def top_urls():
         cursor = conn.cursor(cursor_factory=RealDictCursor)
         cursor.execute("SET statement_timeout = '20s'")
 
-        params = [days]
         like = ""
+        like_params = []
         if q:
             like = "AND url_clean LIKE %s"
-            params.append(f"%{q}%")
-        params.append(limit)
+            like_params = [f"%{q}%"]
 
+        cutoff = _ga_daily_cutoff(cursor)
         cursor.execute(f"""
+            WITH src AS (
+                SELECT url_clean, user_pseudo_id, page_views
+                FROM ga_url_user_daily
+                WHERE day >= CURRENT_DATE - %s AND day < %s
+                  {like}
+                UNION ALL
+                SELECT url_clean, user_pseudo_id, CASE WHEN event = 'page_view' THEN 1 ELSE 0 END
+                FROM ga_events
+                WHERE ts >= GREATEST(%s, CURRENT_DATE - %s)
+                  AND url_clean <> ''
+                  {like}
+            )
             SELECT url_clean,
-                   COUNT(*) FILTER (WHERE event='page_view') AS page_views,
+                   SUM(page_views)::bigint AS page_views,
                    COUNT(DISTINCT user_pseudo_id) AS viewers
-            FROM ga_events
-            WHERE ts >= now() - (%s || ' days')::interval
-              AND url_clean <> ''
-              {like}
+            FROM src
             GROUP BY url_clean
-            HAVING COUNT(*) FILTER (WHERE event='page_view') > 0
+            HAVING SUM(page_views) > 0
             ORDER BY viewers DESC
             LIMIT %s
-        """, params)
+        """, [days, cutoff] + like_params + [cutoff, days] + like_params + [limit])
         rows = cursor.fetchall()
         cursor.execute("SET statement_timeout = 0")
         cursor.close()
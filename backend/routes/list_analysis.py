@@ -2,18 +2,27 @@ from flask import Blueprint, request, jsonify, send_file
 from psycopg2.extras import RealDictCursor
 import os
 import sys
+import numpy as np
 import pandas as pd
 import json
+import secrets
+import tempfile
+import time
 from io import BytesIO
 from collections import defaultdict
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from db_pool import get_db_connection
+from query_helpers import copy_rows
+from spreadsheet_reader import read_xlsx_frame, read_csv_frame, sniff_csv, csv_encodings
 
 DMA_MAPPING_PATH = os.path.join(
     os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
     'src', 'components', 'listanalysis', 'DMACodeMapping'
 )
 
+LIST_SESSION_DIR = os.path.join(tempfile.gettempdir(), 'list_analysis_sessions')
+LIST_SESSION_TTL_SECONDS = 6 * 60 * 60
+
 _dma_cache = None
 
 def load_dma_mapping():
@@ -34,6 +43,36 @@ def load_dma_mapping():
         print(f"DMA mapping file not found at {DMA_MAPPING_PATH}")
     return _dma_cache
 
+_dma_index = None
+
+DMA_CHUNK_ROWS = 250000
+DMA_SNIFF_ROWS = 1000
+
+def load_dma_index():
+    global _dma_index
+    if _dma_index is not None:
+        return _dma_index
+    mapping = load_dma_mapping()
+    if not mapping:
+        return pd.Series(dtype='category')
+    _dma_index = pd.Series(
+        pd.Categorical(list(mapping.values())),
+        index=pd.Index(list(mapping.keys()), dtype=object),
+    )
+    return _dma_index
+
+def clean_zip_series(series):
+    zips = series.dropna().astype(str).str.replace(r'\.0$', '', regex=True).str.strip()
+    zips = zips[zips != '']
+    zips = zips.str.split('-', n=1).str[0].str.split('.', n=1, regex=False).str[0]
+    return zips.str.zfill(5).str[:5]
+
+def count_dma_codes(zips, dma_index):
+    dma_codes = clean_zip_series(zips).map(dma_index)
+    mapped = dma_codes.dropna()
+    counts = mapped.astype(object).value_counts()
+    return len(dma_codes), counts, len(dma_codes) - len(mapped)
+
 list_analysis_bp = Blueprint('list_analysis', __name__)
 
 def find_npi_column(df):
@@ -88,7 +127,10 @@ def validate_email_column(series):
 
     return has_at_sign / total >= 0.8
 
-def read_file_to_dataframe(file):
+def is_npi_header(name):
+    return 'NPI' in str(name).upper()
+
+def read_file_to_dataframe(file, columns=None):
     filename = file.filename
     file_extension = filename.lower().split('.')[-1] if '.' in filename else ''
 
@@ -99,9 +141,12 @@ def read_file_to_dataframe(file):
     try:
         if file_extension in ['xlsx', 'xls']:
             try:
-                df = pd.read_excel(file, sheet_name=0, engine='openpyxl' if file_extension == 'xlsx' else None)
+                if file_extension == 'xlsx':
+                    df = read_xlsx_frame(file, sheet=0, columns=columns)
+                else:
+                    df = pd.read_excel(file, sheet_name=0)
 
-                if df.empty or len(df.columns) == 0:
+                if len(df.columns) == 0 or (df.empty and columns is None):
                     return None, f"File '{filename}' appears to be empty or has no data in the first sheet."
 
                 return df, None
@@ -110,35 +155,104 @@ def read_file_to_dataframe(file):
                 return None, f"Failed to read Excel file '{filename}': {str(excel_error)}. The file may be corrupted or password-protected."
 
         elif file_extension == 'csv':
-            encodings_to_try = [
-                ('utf-8', 'UTF-8'),
-                ('latin-1', 'Latin-1 (ISO-8859-1)'),
-                ('cp1252', 'Windows-1252'),
-                ('utf-8-sig', 'UTF-8 with BOM')
-            ]
-
-            last_error = None
-            for encoding, encoding_name in encodings_to_try:
-                try:
-                    file.seek(0)
-                    df = pd.read_csv(file, encoding=encoding, low_memory=False)
-
-                    if df.empty or len(df.columns) == 0:
-                        return None, f"File '{filename}' appears to be empty or has no columns."
-
-                    return df, None
+            try:
+                df = read_csv_frame(file, columns=columns)
+            except Exception as e:
+                return None, f"Failed to read CSV file '{filename}': {str(e)}"
 
-                except UnicodeDecodeError as e:
-                    last_error = e
-                    continue 
-                except Exception as e:
-                    return None, f"Failed to read CSV file '{filename}': {str(e)}"
+            if len(df.columns) == 0 or (df.empty and columns is None):
+                return None, f"File '{filename}' appears to be empty or has no columns."
 
-            return None, f"Failed to read CSV file '{filename}'. Unable to detect proper encoding. Tried: UTF-8, Latin-1, Windows-1252. Please ensure the file is properly formatted."
+            return df, None
 
     except Exception as e:
         return None, f"Unexpected error reading file '{filename}': {str(e)}"
 
+def npi_array(series):
+    values = pd.to_numeric(series.dropna().astype(str).str.strip(), errors='coerce').dropna()
+    values = values[(values > 0) & (values == np.floor(values))]
+    return np.unique(values.astype(np.int64).to_numpy())
+
+def _list_session_path(token):
+    if not token or not all(c.isalnum() or c in '-_' for c in token):
+        return None
+    return os.path.join(LIST_SESSION_DIR, f'{token}.npz')
+
+def _prune_list_sessions():
+    cutoff = time.time() - LIST_SESSION_TTL_SECONDS
+    for name in os.listdir(LIST_SESSION_DIR):
+        path = os.path.join(LIST_SESSION_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+def save_list_session(iqvia_npis, target_lists):
+    os.makedirs(LIST_SESSION_DIR, exist_ok=True)
+    _prune_list_sessions()
+    token = secrets.token_urlsafe(24)
+    arrays = {'iqvia': iqvia_npis}
+    for idx, target_list in enumerate(target_lists):
+        arrays[f'target_{idx}'] = target_list['npis']
+    arrays['filenames'] = np.array([t['filename'] for t in target_lists], dtype=str)
+    tmp_path = os.path.join(LIST_SESSION_DIR, f'.{token}.npz')
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, _list_session_path(token))
+    return token
+
+def load_list_session(token):
+    path = _list_session_path(token)
+    if not path or not os.path.exists(path):
+        return None
+    if os.path.getmtime(path) < time.time() - LIST_SESSION_TTL_SECONDS:
+        os.remove(path)
+        return None
+    with np.load(path) as data:
+        filenames = data['filenames'].tolist()
+        target_lists = [{'filename': name, 'npis': data[f'target_{idx}']}
+                        for idx, name in enumerate(filenames)]
+        return data['iqvia'], target_lists
+
+def _session_or_error(data):
+    loaded = load_list_session((data or {}).get('session_id'))
+    if loaded is None:
+        return None, (jsonify({'error': 'Upload session expired or not found. Please upload the lists again.'}), 410)
+    return loaded, None
+
+def npi_membership(npis, sorted_npis):
+    if not len(sorted_npis):
+        return np.zeros(len(npis), dtype=bool)
+    values = pd.to_numeric(pd.Series(npis, dtype=object), errors='coerce').fillna(-1).astype(np.int64).to_numpy()
+    positions = np.minimum(np.searchsorted(sorted_npis, values), len(sorted_npis) - 1)
+    return sorted_npis[positions] == values
+
+def build_crossover_matrix(iqvia_npis, target_lists):
+    membership = np.zeros((len(target_lists), len(iqvia_npis)), dtype=bool)
+    for idx, target_list in enumerate(target_lists):
+        npis = target_list['npis']
+        if not len(npis):
+            continue
+        membership[idx] = np.isin(iqvia_npis, npis, assume_unique=True)
+    return pd.Index(iqvia_npis.astype(str)), membership
+
+def compute_npi_tiers(iqvia_npis, target_lists):
+    npi_index, membership = build_crossover_matrix(iqvia_npis, target_lists)
+    tiers = membership.sum(axis=0, dtype=np.int32)
+    distribution = np.bincount(tiers, minlength=len(target_lists) + 1)
+    return npi_index, tiers, distribution
+
+def stage_npi_tiers(cursor, npi_index, tiers):
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS tmp_npi_tiers (
+            npi TEXT PRIMARY KEY,
+            tier INTEGER NOT NULL
+        ) ON COMMIT DROP
+    """)
+    cursor.execute("TRUNCATE tmp_npi_tiers")
+    copy_rows(cursor, 'tmp_npi_tiers', ['npi', 'tier'], zip(npi_index, tiers.tolist()))
+    cursor.execute("ANALYZE tmp_npi_tiers")
+
 @list_analysis_bp.route('/upload', methods=['POST'])
 def upload_lists():
     try:
@@ -154,7 +268,7 @@ def upload_lists():
         if not iqvia_file.filename:
             return jsonify({'error': 'No IQVIA file selected'}), 400
 
-        iqvia_df, error = read_file_to_dataframe(iqvia_file)
+        iqvia_df, error = read_file_to_dataframe(iqvia_file, columns=is_npi_header)
         if error:
             return jsonify({'error': error}), 400
 
@@ -168,7 +282,7 @@ def upload_lists():
                          f'Please ensure the file contains a valid NPI column with 10-digit numbers starting with "1".'
             }), 400
 
-        iqvia_npis = set(iqvia_df[npi_column].dropna().astype(str).str.strip().tolist())
+        iqvia_npis = npi_array(iqvia_df[npi_column])
 
         if len(iqvia_npis) == 0:
             return jsonify({'error': f'IQVIA list "{iqvia_file.filename}" contains no valid NPIs'}), 400
@@ -178,7 +292,7 @@ def upload_lists():
             if not target_file.filename:
                 return jsonify({'error': f'Target list #{idx + 1} has no filename (no file selected)'}), 400
 
-            target_df, error = read_file_to_dataframe(target_file)
+            target_df, error = read_file_to_dataframe(target_file, columns=is_npi_header)
             if error:
                 return jsonify({'error': error}), 400
 
@@ -192,24 +306,22 @@ def upload_lists():
                              f'Please ensure the file contains a valid NPI column with 10-digit numbers starting with "1".'
                 }), 400
 
-            target_npis = set(target_df[target_npi_column].dropna().astype(str).str.strip().tolist())
+            target_npis = npi_array(target_df[target_npi_column])
 
             if len(target_npis) == 0:
                 return jsonify({'error': f'Target list "{target_file.filename}" contains no valid NPIs'}), 400
 
             target_lists_data.append({
                 'filename': target_file.filename,
-                'npis': list(target_npis),
-                'count': len(target_npis)
+                'npis': target_npis
             })
 
-        session_id = str(hash(frozenset(iqvia_npis)))
+        session_id = save_list_session(iqvia_npis, target_lists_data)
 
         return jsonify({
             'session_id': session_id,
             'iqvia_count': len(iqvia_npis),
-            'iqvia_npis': list(iqvia_npis),
-            'target_lists': target_lists_data
+            'target_lists': [{'filename': t['filename'], 'count': len(t['npis'])} for t in target_lists_data]
         }), 200
 
     except Exception as e:
@@ -221,33 +333,23 @@ def upload_lists():
 @list_analysis_bp.route('/calculate-crossover', methods=['POST'])
 def calculate_crossover():
     try:
-        data = request.json
-        iqvia_npis = set(data.get('iqvia_npis', []))
-        target_lists = data.get('target_lists', [])
+        loaded, error = _session_or_error(request.json)
+        if error:
+            return error
+        iqvia_npis, target_lists = loaded
 
-        if not iqvia_npis or not target_lists:
+        if not len(iqvia_npis) or not target_lists:
             return jsonify({'error': 'Missing required data'}), 400
 
-        npi_to_lists = defaultdict(set)
-
-        for idx, target_list in enumerate(target_lists):
-            for npi in target_list.get('npis', []):
-                if npi in iqvia_npis:
-                    npi_to_lists[npi].add(idx)
-
         total_lists = len(target_lists)
-        distribution = defaultdict(int)
-
-        for npi in iqvia_npis:
-            count = len(npi_to_lists.get(npi, set()))
-            distribution[count] += 1
+        _, _, distribution = compute_npi_tiers(iqvia_npis, target_lists)
 
         distribution_list = []
         for i in range(total_lists + 1):
             percentage = (distribution[i] / len(iqvia_npis) * 100) if len(iqvia_npis) > 0 else 0
             distribution_list.append({
                 'lists_count': f'{i}/{total_lists}',
-                'users_count': distribution[i],
+                'users_count': int(distribution[i]),
                 'percentage': round(percentage, 2)
             })
 
@@ -267,246 +369,239 @@ def calculate_crossover():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _empty_tier_result(tier_label):
+    return {
+        'tier': tier_label,
+        'user_count': 0,
+        'matched_count': 0,
+        'aggregate': {
+            'total_delivered': 0,
+            'total_unique_opens': 0,
+            'total_opens': 0,
+            'total_unique_clicks': 0,
+            'total_clicks': 0,
+            'avg_unique_open_rate': 0,
+            'avg_total_open_rate': 0,
+            'avg_unique_click_rate': 0,
+            'avg_total_click_rate': 0,
+            'specialties': [],
+            'campaigns': []
+        },
+        'users': []
+    }
+
+def _build_tier_result(tier_label, user_count, raw_data):
+    users_data = {}
+
+    for row in raw_data:
+        email = row['email'].lower() if row['email'] else '' 
+        campaign_name = row['campaign_base_name']
+        event_type = row['event_type']
+
+        if email not in users_data:
+            users_data[email] = {
+                'email': email,
+                'first_name': row['first_name'],
+                'last_name': row['last_name'],
+                'specialty': row['specialty'] or '',
+                'npi': row['npi'],
+                'campaigns': {},
+                'total_sends': 0,
+                'unique_opens': 0,
+                'total_opens': 0,
+                'unique_clicks': 0,
+                'total_clicks': 0
+            }
+
+        if not campaign_name or not event_type:
+            continue
+
+        event_type_lower = event_type.lower()
+        event_count = row['event_count']
+
+        if campaign_name not in users_data[email]['campaigns']:
+            users_data[email]['campaigns'][campaign_name] = {
+                'sent': False,
+                'bounced': False,
+                'opened': False,
+                'clicked': False,
+                'open_count': 0,
+                'click_count': 0
+            }
+
+        if event_type_lower == 'sent':
+            users_data[email]['campaigns'][campaign_name]['sent'] = True
+        elif event_type_lower == 'bounce':
+            users_data[email]['campaigns'][campaign_name]['bounced'] = True
+        elif event_type_lower == 'open':
+            users_data[email]['campaigns'][campaign_name]['opened'] = True
+            users_data[email]['campaigns'][campaign_name]['open_count'] = event_count
+        elif event_type_lower == 'click':
+            users_data[email]['campaigns'][campaign_name]['clicked'] = True
+            users_data[email]['campaigns'][campaign_name]['click_count'] = event_count
+
+    enriched_users = []
+    aggregate_stats = {
+        'total_delivered': 0,
+        'total_unique_opens': 0,
+        'total_opens': 0,
+        'total_unique_clicks': 0,
+        'total_clicks': 0,
+        'specialties': set(),
+        'campaigns': set()
+    }
+
+    for email, user_data in users_data.items():
+        user_campaigns = []
+        total_delivered = 0
+
+        for campaign_name, camp_stats in user_data['campaigns'].items():
+            if camp_stats['sent']:
+                is_delivered = not camp_stats['bounced'] or camp_stats['opened']
+
+                if is_delivered:
+                    total_delivered += 1
+                    user_campaigns.append(campaign_name)
+
+                    if camp_stats['opened']:
+                        user_data['unique_opens'] += 1
+                        user_data['total_opens'] += camp_stats['open_count']
+
+                    if camp_stats['clicked']:
+                        user_data['unique_clicks'] += 1
+                        user_data['total_clicks'] += camp_stats['click_count']
+
+        if total_delivered == 0:
+            continue
+
+        unique_open_rate = round((user_data['unique_opens'] / total_delivered * 100), 2) if total_delivered > 0 else 0
+        total_open_rate = round((user_data['total_opens'] / total_delivered * 100), 2) if total_delivered > 0 else 0
+        unique_click_rate = round((user_data['unique_clicks'] / user_data['unique_opens'] * 100), 2) if user_data['unique_opens'] > 0 else 0
+        total_click_rate = round((user_data['total_clicks'] / user_data['total_opens'] * 100), 2) if user_data['total_opens'] > 0 else 0
+
+        enriched_users.append({
+            'email': user_data['email'],
+            'first_name': user_data['first_name'],
+            'last_name': user_data['last_name'],
+            'specialty': user_data['specialty'],
+            'npi': user_data['npi'],
+            'campaigns_sent': user_campaigns,
+            'campaign_count': total_delivered,
+            'unique_opens': user_data['unique_opens'],
+            'total_opens': user_data['total_opens'],
+            'unique_clicks': user_data['unique_clicks'],
+            'total_clicks': user_data['total_clicks'],
+            'unique_open_rate': unique_open_rate,
+            'total_open_rate': total_open_rate,
+            'unique_click_rate': unique_click_rate,
+            'total_click_rate': total_click_rate
+        })
+
+        aggregate_stats['total_delivered'] += total_delivered
+        aggregate_stats['total_unique_opens'] += user_data['unique_opens']
+        aggregate_stats['total_opens'] += user_data['total_opens']
+        aggregate_stats['total_unique_clicks'] += user_data['unique_clicks']
+        aggregate_stats['total_clicks'] += user_data['total_clicks']
+        aggregate_stats['specialties'].add(user_data['specialty'])
+        aggregate_stats['campaigns'].update(user_campaigns)
+
+    aggregate_stats['avg_unique_open_rate'] = round(
+        (aggregate_stats['total_unique_opens'] / aggregate_stats['total_delivered'] * 100), 2
+    ) if aggregate_stats['total_delivered'] > 0 else 0
+
+    aggregate_stats['avg_total_open_rate'] = round(
+        (aggregate_stats['total_opens'] / aggregate_stats['total_delivered'] * 100), 2
+    ) if aggregate_stats['total_delivered'] > 0 else 0
+
+    aggregate_stats['avg_unique_click_rate'] = round(
+        (aggregate_stats['total_unique_clicks'] / aggregate_stats['total_unique_opens'] * 100), 2
+    ) if aggregate_stats['total_unique_opens'] > 0 else 0
+
+    aggregate_stats['avg_total_click_rate'] = round(
+        (aggregate_stats['total_clicks'] / aggregate_stats['total_opens'] * 100), 2
+    ) if aggregate_stats['total_opens'] > 0 else 0
+
+    enriched_users.sort(key=lambda x: x['unique_open_rate'], reverse=True)
+
+    aggregate_stats['specialties'] = sorted(list(aggregate_stats['specialties']))
+    aggregate_stats['campaigns'] = sorted(list(aggregate_stats['campaigns']))
+
+    return {
+        'tier': tier_label,
+        'user_count': user_count,
+        'matched_count': len(enriched_users),
+        'aggregate': aggregate_stats,
+        'users': enriched_users
+    }
+
 @list_analysis_bp.route('/engagement-by-tier', methods=['POST'])
 def engagement_by_tier():
     try:
-        data = request.json
-        iqvia_npis = set(data.get('iqvia_npis', []))
-        target_lists = data.get('target_lists', [])
+        loaded, error = _session_or_error(request.json)
+        if error:
+            return error
+        iqvia_npis, target_lists = loaded
 
-        if not iqvia_npis or not target_lists:
+        if not len(iqvia_npis) or not target_lists:
             return jsonify({'error': 'Missing required data'}), 400
 
-        npi_to_lists = defaultdict(set)
-        for idx, target_list in enumerate(target_lists):
-            for npi in target_list.get('npis', []):
-                if npi in iqvia_npis:
-                    npi_to_lists[npi].add(idx)
-
         total_lists = len(target_lists)
-        tier_to_npis = defaultdict(list)
-
-        for npi in iqvia_npis:
-            count = len(npi_to_lists.get(npi, set()))
-            tier_to_npis[count].append(npi)
+        npi_index, tiers, distribution = compute_npi_tiers(iqvia_npis, target_lists)
 
         conn = get_db_connection()
         cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-        tier_results = []
+        stage_npi_tiers(cursor, npi_index, tiers)
+
+        cursor.execute("""
+            SELECT
+                t.tier,
+                up.email,
+                up.first_name,
+                up.last_name,
+                up.specialty,
+                up.npi,
+                cd.campaign_base_name,
+                ci.event_type,
+                COUNT(*) as event_count
+            FROM tmp_npi_tiers t
+            JOIN user_profiles up ON up.npi = t.npi
+            LEFT JOIN campaign_interactions ci ON LOWER(up.email) = ci.email
+            LEFT JOIN campaign_deployments cd ON ci.campaign_id = cd.campaign_id
+            GROUP BY t.tier, up.email, up.first_name, up.last_name, up.specialty, up.npi, cd.campaign_base_name, ci.event_type
+            ORDER BY t.tier, up.email, cd.campaign_base_name
+        """)
+
+        rows_by_tier = defaultdict(list)
+        for row in cursor.fetchall():
+            rows_by_tier[row['tier']].append(row)
 
+        tier_results = []
         for tier_count in range(total_lists, -1, -1):
-            npis_in_tier = tier_to_npis.get(tier_count, [])
-
-            if not npis_in_tier:
-                tier_results.append({
-                    'tier': f'{tier_count}/{total_lists}',
-                    'user_count': 0,
-                    'matched_count': 0,
-                    'aggregate': {
-                        'total_delivered': 0,
-                        'total_unique_opens': 0,
-                        'total_opens': 0,
-                        'total_unique_clicks': 0,
-                        'total_clicks': 0,
-                        'avg_unique_open_rate': 0,
-                        'avg_total_open_rate': 0,
-                        'avg_unique_click_rate': 0,
-                        'avg_total_click_rate': 0,
-                        'specialties': [],
-                        'campaigns': []
-                    },
-                    'users': []
-                })
+            tier_label = f'{tier_count}/{total_lists}'
+            user_count = int(distribution[tier_count])
+            if user_count == 0:
+                tier_results.append(_empty_tier_result(tier_label))
                 continue
+            tier_results.append(_build_tier_result(tier_label, user_count, rows_by_tier.get(tier_count, [])))
 
-            placeholders = ','.join(['%s'] * len(npis_in_tier))
-
-            cursor.execute(f"""
-                SELECT
-                    up.email,
-                    up.first_name,
-                    up.last_name,
-                    up.specialty,
-                    up.npi,
-                    cd.campaign_base_name,
-                    ci.event_type,
-                    COUNT(*) as event_count
-                FROM user_profiles up
-                LEFT JOIN campaign_interactions ci ON LOWER(up.email) = ci.email
-                LEFT JOIN campaign_deployments cd ON ci.campaign_id = cd.campaign_id
-                WHERE up.npi IN ({placeholders})
-                GROUP BY up.email, up.first_name, up.last_name, up.specialty, up.npi, cd.campaign_base_name, ci.event_type
-                ORDER BY up.email, cd.campaign_base_name
-            """, npis_in_tier)
-
-            raw_data = cursor.fetchall()
-
-            users_data = {}
-
-            for row in raw_data:
-                email = row['email'].lower() if row['email'] else '' 
-                campaign_name = row['campaign_base_name']
-                event_type = row['event_type']
-
-                if email not in users_data:
-                    users_data[email] = {
-                        'email': email,
-                        'first_name': row['first_name'],
-                        'last_name': row['last_name'],
-                        'specialty': row['specialty'] or '',
-                        'npi': row['npi'],
-                        'campaigns': {},
-                        'total_sends': 0,
-                        'unique_opens': 0,
-                        'total_opens': 0,
-                        'unique_clicks': 0,
-                        'total_clicks': 0
-                    }
-
-                if not campaign_name or not event_type:
-                    continue
-
-                event_type_lower = event_type.lower()
-                event_count = row['event_count']
-
-                if campaign_name not in users_data[email]['campaigns']:
-                    users_data[email]['campaigns'][campaign_name] = {
-                        'sent': False,
-                        'bounced': False,
-                        'opened': False,
-                        'clicked': False,
-                        'open_count': 0,
-                        'click_count': 0
-                    }
-
-                if event_type_lower == 'sent':
-                    users_data[email]['campaigns'][campaign_name]['sent'] = True
-                elif event_type_lower == 'bounce':
-                    users_data[email]['campaigns'][campaign_name]['bounced'] = True
-                elif event_type_lower == 'open':
-                    users_data[email]['campaigns'][campaign_name]['opened'] = True
-                    users_data[email]['campaigns'][campaign_name]['open_count'] = event_count
-                elif event_type_lower == 'click':
-                    users_data[email]['campaigns'][campaign_name]['clicked'] = True
-                    users_data[email]['campaigns'][campaign_name]['click_count'] = event_count
-
-            enriched_users = []
-            aggregate_stats = {
-                'total_delivered': 0,
-                'total_unique_opens': 0,
-                'total_opens': 0,
-                'total_unique_clicks': 0,
-                'total_clicks': 0,
-                'specialties': set(),
-                'campaigns': set()
-            }
+        total_npis_on_target_lists = int(distribution[1:].sum())
 
-            for email, user_data in users_data.items():
-                user_campaigns = []
-                total_delivered = 0
-
-                for campaign_name, camp_stats in user_data['campaigns'].items():
-                    if camp_stats['sent']:
-                        is_delivered = not camp_stats['bounced'] or camp_stats['opened']
-
-                        if is_delivered:
-                            total_delivered += 1
-                            user_campaigns.append(campaign_name)
-
-                            if camp_stats['opened']:
-                                user_data['unique_opens'] += 1
-                                user_data['total_opens'] += camp_stats['open_count']
-
-                            if camp_stats['clicked']:
-                                user_data['unique_clicks'] += 1
-                                user_data['total_clicks'] += camp_stats['click_count']
-
-                if total_delivered == 0:
-                    continue
-
-                unique_open_rate = round((user_data['unique_opens'] / total_delivered * 100), 2) if total_delivered > 0 else 0
-                total_open_rate = round((user_data['total_opens'] / total_delivered * 100), 2) if total_delivered > 0 else 0
-                unique_click_rate = round((user_data['unique_clicks'] / user_data['unique_opens'] * 100), 2) if user_data['unique_opens'] > 0 else 0
-                total_click_rate = round((user_data['total_clicks'] / user_data['total_opens'] * 100), 2) if user_data['total_opens'] > 0 else 0
-
-                enriched_users.append({
-                    'email': user_data['email'],
-                    'first_name': user_data['first_name'],
-                    'last_name': user_data['last_name'],
-                    'specialty': user_data['specialty'],
-                    'npi': user_data['npi'],
-                    'campaigns_sent': user_campaigns,
-                    'campaign_count': total_delivered,
-                    'unique_opens': user_data['unique_opens'],
-                    'total_opens': user_data['total_opens'],
-                    'unique_clicks': user_data['unique_clicks'],
-                    'total_clicks': user_data['total_clicks'],
-                    'unique_open_rate': unique_open_rate,
-                    'total_open_rate': total_open_rate,
-                    'unique_click_rate': unique_click_rate,
-                    'total_click_rate': total_click_rate
-                })
-
-                aggregate_stats['total_delivered'] += total_delivered
-                aggregate_stats['total_unique_opens'] += user_data['unique_opens']
-                aggregate_stats['total_opens'] += user_data['total_opens']
-                aggregate_stats['total_unique_clicks'] += user_data['unique_clicks']
-                aggregate_stats['total_clicks'] += user_data['total_clicks']
-                aggregate_stats['specialties'].add(user_data['specialty'])
-                aggregate_stats['campaigns'].update(user_campaigns)
-
-            aggregate_stats['avg_unique_open_rate'] = round(
-                (aggregate_stats['total_unique_opens'] / aggregate_stats['total_delivered'] * 100), 2
-            ) if aggregate_stats['total_delivered'] > 0 else 0
-
-            aggregate_stats['avg_total_open_rate'] = round(
-                (aggregate_stats['total_opens'] / aggregate_stats['total_delivered'] * 100), 2
-            ) if aggregate_stats['total_delivered'] > 0 else 0
-
-            aggregate_stats['avg_unique_click_rate'] = round(
-                (aggregate_stats['total_unique_clicks'] / aggregate_stats['total_unique_opens'] * 100), 2
-            ) if aggregate_stats['total_unique_opens'] > 0 else 0
-
-            aggregate_stats['avg_total_click_rate'] = round(
-                (aggregate_stats['total_clicks'] / aggregate_stats['total_opens'] * 100), 2
-            ) if aggregate_stats['total_opens'] > 0 else 0
-
-            enriched_users.sort(key=lambda x: x['unique_open_rate'], reverse=True)
-
-            aggregate_stats['specialties'] = sorted(list(aggregate_stats['specialties']))
-            aggregate_stats['campaigns'] = sorted(list(aggregate_stats['campaigns']))
-
-            tier_results.append({
-                'tier': f'{tier_count}/{total_lists}',
-                'user_count': len(npis_in_tier),
-                'matched_count': len(enriched_users),
-                'aggregate': aggregate_stats,
-                'users': enriched_users
-            })
-
-        all_target_list_npis = []
-        for tier_count in range(1, total_lists + 1):
-            npis_in_tier = tier_to_npis.get(tier_count, [])
-            all_target_list_npis.extend(npis_in_tier)
-
-        total_npis_on_target_lists = len(all_target_list_npis)
-
-        if all_target_list_npis:
-            placeholders = ','.join(['%s'] * len(all_target_list_npis))
-            cursor.execute(f"""
-                SELECT DISTINCT up.npi
-                FROM user_profiles up
+        if total_npis_on_target_lists:
+            cursor.execute("""
+                SELECT COUNT(DISTINCT up.npi) AS opened
+                FROM tmp_npi_tiers t
+                JOIN user_profiles up ON up.npi = t.npi
                 JOIN campaign_interactions ci ON LOWER(up.email) = ci.email
-                WHERE up.npi IN ({placeholders})
+                WHERE t.tier > 0
                 AND ci.event_type = 'open'
-            """, all_target_list_npis)
-
-            users_who_opened = cursor.fetchall()
-            users_who_opened_at_least_one = len(users_who_opened)
+            """)
+            users_who_opened_at_least_one = cursor.fetchone()['opened']
         else:
             users_who_opened_at_least_one = 0
 
+        conn.commit()
+
         total_matched_in_db = 0
         total_delivered_overall = 0
         total_unique_opens_overall = 0
@@ -548,7 +643,10 @@ def engagement_by_tier():
 def engagement_comparison():
     try:
         data = request.json
-        target_lists = data.get('target_lists', [])
+        loaded, error = _session_or_error(data)
+        if error:
+            return error
+        _, target_lists = loaded
         campaign_assignments = data.get('campaign_assignments', {})
 
         if not target_lists or not campaign_assignments:
@@ -560,8 +658,8 @@ def engagement_comparison():
         results = []
 
         for list_idx, target_list in enumerate(target_lists):
-            list_name = target_list.get('filename')
-            list_npis = set(target_list.get('npis', []))
+            list_name = target_list['filename']
+            list_npis = target_list['npis']
             assigned_campaigns = campaign_assignments.get(str(list_idx), [])
 
             if not assigned_campaigns:
@@ -576,8 +674,9 @@ def engagement_comparison():
 
                 campaign_data = cursor.fetchall()
 
-                target_users = [row for row in campaign_data if row['npi'] in list_npis]
-                non_target_users = [row for row in campaign_data if row['npi'] not in list_npis]
+                on_list = npi_membership([row['npi'] for row in campaign_data], list_npis)
+                target_users = [row for row, hit in zip(campaign_data, on_list) if hit]
+                non_target_users = [row for row, hit in zip(campaign_data, on_list) if not hit]
 
                 def calculate_metrics(users):
                     if not users:
@@ -676,6 +775,59 @@ def find_zip_column(df):
     return None
 
 
+def is_zip_header(name):
+    name = str(name).upper()
+    return 'ZIP' in name or 'POSTAL' in name
+
+def _csv_zip_chunks(file, encoding, delimiter, zip_col):
+    file.seek(0)
+    for chunk in pd.read_csv(file, encoding=encoding, sep=delimiter, usecols=[zip_col], dtype=str,
+                             chunksize=DMA_CHUNK_ROWS):
+        yield chunk[zip_col]
+
+def sniff_zip_column(file):
+    filename = file.filename
+    file_extension = filename.lower().split('.')[-1] if '.' in filename else ''
+
+    if file_extension != 'csv':
+        df, error = read_file_to_dataframe(file, columns=is_zip_header)
+        if error:
+            return None, None, None, None, error
+        return df.columns.tolist(), find_zip_column(df), df, None, None
+
+    try:
+        csv_format = sniff_csv(file)
+        preview = read_csv_frame(file, limit=DMA_SNIFF_ROWS, csv_format=csv_format, dtype=str)
+    except Exception as e:
+        return None, None, None, None, f"Failed to read CSV file '{filename}': {str(e)}"
+
+    if preview.empty or len(preview.columns) == 0:
+        return None, None, None, None, f"File '{filename}' appears to be empty or has no columns."
+
+    return preview.columns.tolist(), find_zip_column(preview), None, csv_format, None
+
+def count_file_dmas(file, zip_col, df, csv_format, dma_index):
+    if df is not None:
+        return count_dma_codes(df[zip_col], dma_index)
+
+    encoding, delimiter = csv_format
+    for candidate in csv_encodings(encoding):
+        row_count = 0
+        unmapped = 0
+        partial_counts = []
+        try:
+            for zips in _csv_zip_chunks(file, candidate, delimiter, zip_col):
+                n, counts, missing = count_dma_codes(zips, dma_index)
+                row_count += n
+                unmapped += missing
+                partial_counts.append(counts)
+        except UnicodeDecodeError:
+            continue
+        counts = pd.concat(partial_counts).groupby(level=0).sum() if partial_counts else pd.Series(dtype='int64')
+        return row_count, counts, unmapped
+
+    raise ValueError(f"Unable to decode '{file.filename}' with any supported encoding")
+
 @list_analysis_bp.route('/dma-breakdown', methods=['POST'])
 def dma_breakdown():
     try:
@@ -684,54 +836,48 @@ def dma_breakdown():
         if not input_files or len(input_files) == 0:
             return jsonify({'error': 'At least one input file is required'}), 400
 
-        dma_mapping = load_dma_mapping()
-        if not dma_mapping:
+        dma_index = load_dma_index()
+        if dma_index.empty:
             return jsonify({'error': 'DMA code mapping file could not be loaded.'}), 500
 
-        all_zips = []
+        file_counts = []
         file_summaries = []
+        total_records = 0
         unmapped_count = 0
 
         for idx, input_file in enumerate(input_files):
             if not input_file.filename:
                 return jsonify({'error': f'File #{idx + 1} has no filename'}), 400
 
-            df, error = read_file_to_dataframe(input_file)
+            columns, zip_col, df, csv_format, error = sniff_zip_column(input_file)
             if error:
                 return jsonify({'error': error}), 400
 
-            zip_col = find_zip_column(df)
             if not zip_col:
-                available_columns = ', '.join(df.columns.tolist()[:10])
-                more = '...' if len(df.columns) > 10 else ''
+                available_columns = ', '.join(columns[:10])
+                more = '...' if len(columns) > 10 else ''
                 return jsonify({
                     'error': f'Zip code column not found in "{input_file.filename}". '
                              f'Available columns: {available_columns}{more}. '
                              f'Please ensure the file contains a column with zip codes.'
                 }), 400
 
-            zips = df[zip_col].dropna().astype(str).str.replace(r'\.0$', '', regex=True).str.strip()
-            zips = zips[zips != ''].tolist()
-            cleaned_zips = [z.split('-')[0].split('.')[0].zfill(5)[:5] for z in zips]
-            all_zips.extend(cleaned_zips)
+            row_count, counts, unmapped = count_file_dmas(input_file, zip_col, df, csv_format, dma_index)
+            file_counts.append(counts)
+            total_records += row_count
+            unmapped_count += unmapped
             file_summaries.append({
                 'filename': input_file.filename,
-                'row_count': len(cleaned_zips)
+                'row_count': row_count
             })
 
-        dma_counts = defaultdict(int)
-        for zip_code in all_zips:
-            dma_code = dma_mapping.get(zip_code)
-            if dma_code:
-                dma_counts[dma_code] += 1
-            else:
-                unmapped_count += 1
+        dma_counts = pd.concat(file_counts).groupby(level=0).sum() if file_counts else pd.Series(dtype='int64')
 
         results = []
-        for dma_code in sorted(dma_counts.keys(), key=lambda x: int(x) if x.isdigit() else 0):
+        for dma_code in sorted(dma_counts.index, key=lambda x: int(x) if x.isdigit() else 0):
             results.append({
                 'dma_code': int(dma_code) if dma_code.isdigit() else dma_code,
-                'count': dma_counts[dma_code]
+                'count': int(dma_counts[dma_code])
             })
 
         grand_total = sum(r['count'] for r in results)
@@ -739,7 +885,7 @@ def dma_breakdown():
         return jsonify({
             'results': results,
             'grand_total': grand_total,
-            'total_records': len(all_zips),
+            'total_records': total_records,
             'unmapped_count': unmapped_count,
             'file_summaries': file_summaries
         }), 200
@@ -748,4 +894,4 @@ def dma_breakdown():
         import traceback
         error_trace = traceback.format_exc()
         print(f"DMA breakdown error: {error_trace}")
-        return jsonify({'error': f'Server error: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
@@ -5,6 +5,9 @@ import re
 import csv
 import io
 from collections import defaultdict
+from datetime import datetime, timedelta
+import base64
+import hashlib
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
@@ -161,6 +164,12 @@ def _strip_suite(addr_norm):
         return ''
     return _SUITE_SUFFIX_RE.sub('', addr_norm).strip()
 
+def _addr_hash(addr):
+    key = _strip_suite(_norm_addr(addr))
+    if not key:
+        return None
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big', signed=True)
+
 def _addresses_equal(a_norm, b_norm):
     if not a_norm or not b_norm:
         return False
@@ -343,19 +352,65 @@ PRINT_SEARCH_FIELDS = {
           'specialty', 'email', 'company', 'title'],
 }
 
+DIGITAL_SEARCH_FIELDS = ['first_name', 'last_name', 'email', 'npi', 'specialty']
+
+MEMBER_TOTALS_TTL = timedelta(minutes=5)
+_member_totals_cache = {}
+
+
+def member_search_expr(fields, alias=None):
+    prefix = f"{alias}." if alias else ''
+    joined = " || ' ' || ".join(f"COALESCE({prefix}{f}::text, '')" for f in fields)
+    return f"LOWER({joined})"
+
+
 def _build_print_search(alias, tokens):
-    fields = PRINT_SEARCH_FIELDS[alias]
     if not tokens:
         return "", []
-    parts = []
-    params = []
-    for tok in tokens:
-        ors = " OR ".join(f"LOWER(COALESCE({alias}.{f}::text, '')) LIKE %s" for f in fields)
-        parts.append(f"({ors})")
-        params.extend([f"%{tok}%"] * len(fields))
+    expr = member_search_expr(PRINT_SEARCH_FIELDS[alias], alias)
+    parts = [f"{expr} LIKE %s" for _ in tokens]
+    params = [f"%{tok}%" for tok in tokens]
     return " AND " + " AND ".join(parts), params
 
 
+def _encode_member_cursor(row):
+    values = [row.get('last_name') or '', row.get('first_name') or '',
+              row.get('source_table'), row.get('source_id')]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def _decode_member_cursor(token):
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != 4:
+        return None
+    return values
+
+
+def _member_keyset(alias, source_table, cursor_values):
+    if not cursor_values:
+        return "", []
+    return (f" AND (COALESCE({alias}.last_name, ''), COALESCE({alias}.first_name, ''), "
+            f"'{source_table}'::text, {alias}.id) > (%s, %s, %s, %s)"), list(cursor_values)
+
+
+def _cached_member_totals(key, compute):
+    now = datetime.utcnow()
+    cached = _member_totals_cache.get(key)
+    if cached and cached['expires_at'] > now:
+        return cached['value']
+    value = compute()
+    _member_totals_cache[key] = {'value': value, 'expires_at': now + MEMBER_TOTALS_TTL}
+    if len(_member_totals_cache) > 500:
+        for k in [k for k, v in _member_totals_cache.items() if v['expires_at'] <= now]:
+            _member_totals_cache.pop(k, None)
+    return value
+
+
 @list_management_bp.route('/print-lists/members', methods=['GET'])
 def print_list_members():
     list_name = request.args.get('list', '').strip()
@@ -365,6 +420,7 @@ def print_list_members():
     per_page = int(request.args.get('per_page', 100))
     search = request.args.get('search', '').strip()
     all_mode = request.args.get('all', '').lower() == 'true'
+    cursor_values = None if all_mode else _decode_member_cursor(request.args.get('cursor', '').strip())
     offset = (page - 1) * per_page
 
     if list_type not in ('subscribed', 'unsubscribed'):
@@ -397,31 +453,53 @@ def print_list_members():
     u_lf_sql, u_lf_params = _list_filter('u')
     p_lf_sql, p_lf_params = _list_filter('p')
 
+    up_ks, up_ks_params = _member_keyset('up', 'universal_profiles', cursor_values)
+    u_ks, u_ks_params = _member_keyset('u', 'user_profiles', cursor_values)
+    p_ks, p_ks_params = _member_keyset('p', 'print_only_contacts', cursor_values)
+
     conn = get_db_connection()
     try:
         cur = conn.cursor(cursor_factory=RealDictCursor)
         cur.execute("SET LOCAL jit = 'off'")
-        cur.execute("SET LOCAL work_mem = '64MB'")
-        cur.execute("SET LOCAL effective_cache_size = '512MB'")
+        if all_mode:
+            cur.execute("SET LOCAL work_mem = '64MB'")
+            cur.execute("SET LOCAL effective_cache_size = '512MB'")
 
-        up_join = "LEFT JOIN user_profiles u ON u.npi = up.npi AND u.npi IS NOT NULL"
+        up_join = """LEFT JOIN LATERAL (
+                    SELECT * FROM user_profiles u
+                    WHERE u.npi = up.npi
+                    ORDER BY u.id
+                    LIMIT 1
+                 ) u ON TRUE"""
         up_active_filter = ""
         u_active_filter = ""
         poc_active_filter = ""
         not_exists_active = ""
 
         source_expr_u = classify_source_sql_expr('u')
-        limit_clause = "" if all_mode else f"LIMIT {per_page} OFFSET {offset}"
+        if all_mode:
+            limit_clause = ""
+        elif cursor_values:
+            limit_clause = f"LIMIT {per_page}"
+        else:
+            limit_clause = f"LIMIT {per_page} OFFSET {offset}"
+
+        def _branch_order(alias):
+            if all_mode:
+                return ""
+            branch_limit = per_page if cursor_values else per_page + offset
+            return (f"ORDER BY COALESCE({alias}.last_name, ''), COALESCE({alias}.first_name, ''), {alias}.id "
+                    f"LIMIT {branch_limit}")
 
-        def _flag_col(alias, key):
-            return f"""(SELECT e->>'{key}'
-                        FROM jsonb_array_elements(COALESCE({alias}.address_history, '[]'::jsonb)) e
-                        WHERE e->>'event' IN ('address_flagged_invalid','undeliverable')
-                        ORDER BY e->>'changed_at' DESC NULLS LAST LIMIT 1)"""
+        def _flag_cols(alias):
+            return f"""{alias}.last_address_flag_event AS address_flag_event,
+                    {alias}.last_address_flag_reason AS address_flag_reason,
+                    {alias}.last_address_flag_at::text AS address_flag_at,
+                    {alias}.last_address_flag_source AS address_flag_source"""
 
         members_sql = f"""
             SELECT * FROM (
-                (SELECT DISTINCT ON (up.npi)
+                (SELECT
                     'universal_profiles' AS source_table, up.id AS source_id,
                     up.npi, up.first_name, up.last_name, up.credential,
                     up.primary_specialty, up.primary_taxonomy_code,
@@ -434,10 +512,7 @@ def print_list_members():
                     NULL AS company, NULL AS title,
                     up.is_active AS is_active,
                     up.provider_status, up.provider_status_source,
-                    {_flag_col('up', 'event')} AS address_flag_event,
-                    {_flag_col('up', 'reason')} AS address_flag_reason,
-                    {_flag_col('up', 'changed_at')} AS address_flag_at,
-                    {_flag_col('up', 'source')} AS address_flag_source,
+                    {_flag_cols('up')},
                     u.inactive_reason, u.inactive_source, u.inactive_at
                  FROM universal_profiles up
                  {up_join}
@@ -445,7 +520,8 @@ def print_list_members():
                    AND (up.entity_type IS NULL OR up.entity_type <> '2')
                  {up_active_filter}
                  {up_search}
-                 ORDER BY up.npi)
+                 {up_ks}
+                 {_branch_order('up')})
 
                 UNION ALL
 
@@ -462,17 +538,16 @@ def print_list_members():
                     NULL AS company, NULL AS title,
                     u.is_active AS is_active,
                     NULL AS provider_status, NULL AS provider_status_source,
-                    {_flag_col('u', 'event')} AS address_flag_event,
-                    {_flag_col('u', 'reason')} AS address_flag_reason,
-                    {_flag_col('u', 'changed_at')} AS address_flag_at,
-                    {_flag_col('u', 'source')} AS address_flag_source,
+                    {_flag_cols('u')},
                     u.inactive_reason, u.inactive_source, u.inactive_at
                  FROM user_profiles u
                  WHERE {u_lf_sql}
                  {u_active_filter}
                  AND (u.npi IS NULL OR u.npi = '' OR NOT EXISTS (
                     SELECT 1 FROM universal_profiles up WHERE up.npi = u.npi {not_exists_active}))
-                 {u_search})
+                 {u_search}
+                 {u_ks}
+                 {_branch_order('u')})
 
                 UNION ALL
 
@@ -489,53 +564,56 @@ def print_list_members():
                     p.company, p.title,
                     p.is_active AS is_active,
                     NULL AS provider_status, NULL AS provider_status_source,
-                    {_flag_col('p', 'event')} AS address_flag_event,
-                    {_flag_col('p', 'reason')} AS address_flag_reason,
-                    {_flag_col('p', 'changed_at')} AS address_flag_at,
-                    {_flag_col('p', 'source')} AS address_flag_source,
+                    {_flag_cols('p')},
                     NULL AS inactive_reason, NULL AS inactive_source, NULL::timestamp AS inactive_at
                  FROM print_only_contacts p
                  WHERE {p_lf_sql}
                  {poc_active_filter}
-                 {poc_search})
+                 {poc_search}
+                 {p_ks}
+                 {_branch_order('p')})
             ) combined
-            ORDER BY last_name, first_name
+            ORDER BY COALESCE(last_name, ''), COALESCE(first_name, ''), source_table, source_id
             {limit_clause}
         """
         cur.execute(members_sql,
-                    up_lf_params + up_params +
-                    u_lf_params + u_params +
-                    p_lf_params + poc_params)
+                    up_lf_params + up_params + up_ks_params +
+                    u_lf_params + u_params + u_ks_params +
+                    p_lf_params + poc_params + p_ks_params)
         members = cur.fetchall()
 
         if all_mode:
             total = len(members)
             audience_count = sum(1 for m in members if m.get('in_audience'))
         else:
-            cur.execute(f"""
-                SELECT
-                    (SELECT COUNT(*) FROM universal_profiles up
-                     WHERE {up_lf_sql}
-                       AND (up.entity_type IS NULL OR up.entity_type <> '2')
-                       {up_active_filter} {up_search}) AS up_total,
-                    (SELECT COUNT(*) FROM universal_profiles up
-                     WHERE {up_lf_sql}
-                       AND (up.entity_type IS NULL OR up.entity_type <> '2')
-                       {up_active_filter} {up_search}
-                     AND EXISTS (SELECT 1 FROM user_profiles u WHERE u.npi = up.npi AND u.is_active = TRUE)) AS up_in_audience,
-                    (SELECT COUNT(*) FROM user_profiles u
-                     WHERE {u_lf_sql} {u_active_filter} {u_search}
-                     AND (u.npi IS NULL OR u.npi = '' OR NOT EXISTS (
-                        SELECT 1 FROM universal_profiles up WHERE up.npi = u.npi {not_exists_active}))) AS u_only,
-                    (SELECT COUNT(*) FROM print_only_contacts p
-                     WHERE {p_lf_sql} {poc_active_filter} {poc_search}) AS poc_total
-            """, up_lf_params + up_params +
-                 up_lf_params + up_params +
-                 u_lf_params + u_params +
-                 p_lf_params + poc_params)
-            cnt = cur.fetchone()
-            total = (cnt['up_total'] or 0) + (cnt['u_only'] or 0) + (cnt['poc_total'] or 0)
-            audience_count = (cnt['up_in_audience'] or 0) + (cnt['u_only'] or 0)
+            def _count_members():
+                cur.execute(f"""
+                    SELECT
+                        (SELECT COUNT(*) FROM universal_profiles up
+                         WHERE {up_lf_sql}
+                           AND (up.entity_type IS NULL OR up.entity_type <> '2')
+                           {up_active_filter} {up_search}) AS up_total,
+                        (SELECT COUNT(*) FROM universal_profiles up
+                         WHERE {up_lf_sql}
+                           AND (up.entity_type IS NULL OR up.entity_type <> '2')
+                           {up_active_filter} {up_search}
+                         AND EXISTS (SELECT 1 FROM user_profiles u WHERE u.npi = up.npi AND u.is_active = TRUE)) AS up_in_audience,
+                        (SELECT COUNT(*) FROM user_profiles u
+                         WHERE {u_lf_sql} {u_active_filter} {u_search}
+                         AND (u.npi IS NULL OR u.npi = '' OR NOT EXISTS (
+                            SELECT 1 FROM universal_profiles up WHERE up.npi = u.npi {not_exists_active}))) AS u_only,
+                        (SELECT COUNT(*) FROM print_only_contacts p
+                         WHERE {p_lf_sql} {poc_active_filter} {poc_search}) AS poc_total
+                """, up_lf_params + up_params +
+                     up_lf_params + up_params +
+                     u_lf_params + u_params +
+                     p_lf_params + poc_params)
+                cnt = cur.fetchone()
+                return ((cnt['up_total'] or 0) + (cnt['u_only'] or 0) + (cnt['poc_total'] or 0),
+                        (cnt['up_in_audience'] or 0) + (cnt['u_only'] or 0))
+
+            total, audience_count = _cached_member_totals(
+                ('print', tuple(sorted(list_names)), list_type, search), _count_members)
 
         cur.close()
         return jsonify({
@@ -545,6 +623,7 @@ def print_list_members():
             'page': page,
             'per_page': per_page if not all_mode else total,
             'total_pages': 1 if all_mode else (total + per_page - 1) // per_page,
+            'next_cursor': _encode_member_cursor(members[-1]) if not all_mode and len(members) == per_page else None,
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -615,6 +694,7 @@ def digital_list_members():
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 100))
     search = request.args.get('search', '').strip()
+    cursor_values = _decode_member_cursor(request.args.get('cursor', '').strip())
     offset = (page - 1) * per_page
 
     if lists_param:
@@ -634,17 +714,11 @@ def digital_list_members():
         search_clause = ""
         search_params = []
         if search:
-            search_clause = """
-                AND (
-                    LOWER(u.first_name) LIKE %s
-                    OR LOWER(u.last_name) LIKE %s
-                    OR LOWER(u.email) LIKE %s
-                    OR u.npi LIKE %s
-                    OR LOWER(u.specialty) LIKE %s
-                )
-            """
-            term = f"%{search.lower()}%"
-            search_params = [term, term, term, term, term]
+            search_clause = f"AND {member_search_expr(DIGITAL_SEARCH_FIELDS, 'u')} LIKE %s"
+            search_params = [f"%{search.lower()}%"]
+
+        keyset_clause, keyset_params = _member_keyset('u', 'user_profiles', cursor_values)
+        limit_clause = f"LIMIT {per_page}" if cursor_values else f"LIMIT {per_page} OFFSET {offset}"
 
         source_expr = classify_source_sql_expr('u')
         cur.execute(f"""
@@ -671,21 +745,25 @@ def digital_list_members():
               AND u.is_active = TRUE
               AND NOT EXISTS (SELECT 1 FROM universal_profiles up WHERE up.npi = u.npi AND up.entity_type = '2')
               {search_clause}
-            ORDER BY u.last_name, u.first_name
-            LIMIT {per_page} OFFSET {offset}
-        """, [list_names] + search_params)
+              {keyset_clause}
+            ORDER BY COALESCE(u.last_name, ''), COALESCE(u.first_name, ''), u.id
+            {limit_clause}
+        """, [list_names] + search_params + keyset_params)
         members = cur.fetchall()
 
-        cur.execute(f"""
-            SELECT COUNT(DISTINCT LOWER(TRIM(u.email))) AS c
-            FROM user_profiles u
-            WHERE u.digital_lists_subscribed ?| %s
-              AND u.is_active = TRUE
-              AND u.email IS NOT NULL AND u.email <> ''
-              AND NOT EXISTS (SELECT 1 FROM universal_profiles up WHERE up.npi = u.npi AND up.entity_type = '2')
-              {search_clause}
-        """, [list_names] + search_params)
-        total = cur.fetchone()['c']
+        def _count_members():
+            cur.execute(f"""
+                SELECT COUNT(DISTINCT LOWER(TRIM(u.email))) AS c
+                FROM user_profiles u
+                WHERE u.digital_lists_subscribed ?| %s
+                  AND u.is_active = TRUE
+                  AND u.email IS NOT NULL AND u.email <> ''
+                  AND NOT EXISTS (SELECT 1 FROM universal_profiles up WHERE up.npi = u.npi AND up.entity_type = '2')
+                  {search_clause}
+            """, [list_names] + search_params)
+            return cur.fetchone()['c']
+
+        total = _cached_member_totals(('digital', tuple(sorted(list_names)), search), _count_members)
 
         cur.close()
         return jsonify({
@@ -694,6 +772,7 @@ def digital_list_members():
             'page': page,
             'per_page': per_page,
             'total_pages': (total + per_page - 1) // per_page,
+            'next_cursor': _encode_member_cursor(members[-1]) if len(members) == per_page else None,
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1257,6 +1336,7 @@ def print_lists_subscribe():
                       f"{first_name} {last_name} | {target_table}#{target_id} | Lists: {', '.join(lists_to_add)}")
 
         conn.commit()
+        _member_totals_cache.clear()
         cur.close()
         return jsonify({
             'status': 'ok',
@@ -1398,7 +1478,9 @@ def print_lists_unsubscribe():
             if not first_name or not last_name:
                 return jsonify({'error': 'no match found and first_name/last_name required to create new entry'}), 400
             history_init = '[]'
+            flag_init = (None, None, None)
             if flag_address and (address_1 or city or state or zipcode):
+                flag_init = ('address_flagged_invalid', reason_text or None, 'manual_unsubscribe')
                 history_init = json.dumps([{
                     'event': 'address_flagged_invalid',
                     'source': 'manual_unsubscribe',
@@ -1415,20 +1497,23 @@ def print_lists_unsubscribe():
                 INSERT INTO print_only_contacts
                   (first_name, last_name, npi, email, address, city, state, zipcode,
                    specialty, company, print_lists_subscribed, print_lists_unsubscribed,
-                   unsubscribe_reason, address_history, is_active, source, created_at, updated_at)
+                   unsubscribe_reason, address_history,
+                   last_address_flag_event, last_address_flag_reason, last_address_flag_source,
+                   is_active, source, created_at, updated_at)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, '[]'::jsonb, %s::jsonb,
-                        %s, %s::jsonb, TRUE, 'manual_unsub', NOW(), NOW())
+                        %s, %s::jsonb, %s, %s, %s, TRUE, 'manual_unsub', NOW(), NOW())
                 RETURNING id
             """, (first_name, last_name, npi or None, email or None,
                   address_1 or None, city or None, state or None, zipcode or None,
                   specialty or None, company or None,
                   json.dumps(_dedupe(lists_to_remove)),
                   reason_text or None,
-                  history_init))
+                  history_init) + flag_init)
             new_id = cur.fetchone()['id']
             _activity_log(cur, npi or None, 'unsubscribe',
                           f"{first_name} {last_name} | print_only_contacts#{new_id} (new) | Lists: {', '.join(lists_to_remove)} | Reason: {reason_text}" + (' | address flagged' if flag_address else ''))
             conn.commit()
+            _member_totals_cache.clear()
             cur.close()
             return jsonify({
                 'status': 'ok',
@@ -1539,9 +1624,13 @@ def print_lists_unsubscribe():
                             'mailing_address', jsonb_build_object('address_1', mailing_address_1, 'city', mailing_city, 'state', mailing_state, 'zipcode', mailing_zipcode),
                             'changed_at', NOW()::text
                         )),
+                        last_address_flag_event = 'address_flagged_invalid',
+                        last_address_flag_reason = %s,
+                        last_address_flag_source = 'manual_unsubscribe',
+                        last_address_flag_at = NOW(),
                         updated_at = NOW()
                     WHERE id = %s
-                """, (reason_text or None, row['id']))
+                """, (reason_text or None, reason_text or None, row['id']))
             else:
                 addr_col, city_col, state_col, zip_col = ADDRESS_FIELDS[table]
                 cur.execute(f"""
@@ -1553,9 +1642,13 @@ def print_lists_unsubscribe():
                             'flagged_address', jsonb_build_object('address_1', {addr_col}, 'city', {city_col}, 'state', {state_col}, 'zipcode', {zip_col}),
                             'changed_at', NOW()::text
                         )),
+                        last_address_flag_event = 'address_flagged_invalid',
+                        last_address_flag_reason = %s,
+                        last_address_flag_source = 'manual_unsubscribe',
+                        last_address_flag_at = NOW(),
                         updated_at = NOW()
                     WHERE id = %s
-                """, (reason_text or None, row['id']))
+                """, (reason_text or None, reason_text or None, row['id']))
 
         _activity_log(cur, row.get('npi'), 'unsubscribe',
                       f"{row['first_name']} {row['last_name']} | {table}#{row['id']} | Removed: {', '.join(lists_to_remove)} | Reason: {reason_text}" + (' | address flagged invalid' if flag_address else ''))
@@ -1578,6 +1671,7 @@ def print_lists_unsubscribe():
                                                reason_text or 'Address blacklisted')
 
         conn.commit()
+        _member_totals_cache.clear()
         cur.close()
         return jsonify({
             'status': 'ok',
@@ -1652,6 +1746,7 @@ def print_lists_resubscribe():
                       f"{row['first_name']} {row['last_name']} | {table}#{row['id']} | Added: {', '.join(lists_to_add)}")
 
         conn.commit()
+        _member_totals_cache.clear()
         cur.close()
         return jsonify({'status': 'ok', 'table': table, 'id': row['id'], 'lists_added': lists_to_add})
     except Exception as e:
@@ -1805,6 +1900,7 @@ def print_lists_update_address():
                       f"{source_table}#{source_id} -> {full_addr}, {city}, {state} {zipcode}")
 
         conn.commit()
+        _member_totals_cache.clear()
         cur.close()
         return jsonify({
             'status': 'ok',
@@ -2634,6 +2730,10 @@ def _ncoa_cascade_undeliverable(cur, table, npi, return_code, decoded, old_addr,
                         'return_code', %s, 'decoded', %s,
                         'attempted_address', %s, 'changed_at', NOW()::text
                     )),
+                    last_address_flag_event = 'undeliverable',
+                    last_address_flag_reason = NULL,
+                    last_address_flag_source = 'walsworth_ncoa_cascade',
+                    last_address_flag_at = NOW(),
                     updated_at = NOW()
                 WHERE id = %s
             """, (json.dumps(new_unsub), reason, return_code, decoded, old_addr, r['id']))
@@ -2649,6 +2749,10 @@ def _ncoa_cascade_undeliverable(cur, table, npi, return_code, decoded, old_addr,
                         'return_code', %s, 'decoded', %s,
                         'attempted_address', %s, 'changed_at', NOW()::text
                     )),
+                    last_address_flag_event = 'undeliverable',
+                    last_address_flag_reason = NULL,
+                    last_address_flag_source = 'walsworth_ncoa_cascade',
+                    last_address_flag_at = NOW(),
                     updated_at = NOW()
                 WHERE id = %s
             """, (json.dumps(new_unsub), reason, return_code, decoded, old_addr, r['id']))
@@ -2747,6 +2851,10 @@ def _ncoa_apply_undeliverable(cur, entry):
                     'attempted_address', %s,
                     'changed_at', NOW()::text
                 )),
+                last_address_flag_event = 'undeliverable',
+                last_address_flag_reason = NULL,
+                last_address_flag_source = 'walsworth_ncoa',
+                last_address_flag_at = NOW(),
                 updated_at = NOW()
             WHERE id = %s
         """, (json.dumps(new_unsub), reason, return_code, decoded, old_addr, rid))
@@ -2764,6 +2872,10 @@ def _ncoa_apply_undeliverable(cur, entry):
                     'attempted_address', %s,
                     'changed_at', NOW()::text
                 )),
+                last_address_flag_event = 'undeliverable',
+                last_address_flag_reason = NULL,
+                last_address_flag_source = 'walsworth_ncoa',
+                last_address_flag_at = NOW(),
                 updated_at = NOW()
             WHERE id = %s
         """, (json.dumps(new_unsub), reason, return_code, decoded, old_addr, rid))
@@ -2832,6 +2944,7 @@ def ncoa_apply():
                 errors.append({'csv_idx': entry.get('csv_idx'), 'table': entry.get('table'), 'error': str(e)})
 
         conn.commit()
+        _member_totals_cache.clear()
         cur.close()
         return jsonify({
             'applied': {
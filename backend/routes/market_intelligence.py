@@ -1,10 +1,235 @@
 from flask import Blueprint, jsonify, request
+from datetime import datetime, timedelta
 from sqlalchemy import text
 from db_pool import get_db_connection as get_connection
 from routes.source_classification import classify_source_sql_expr
 
 market_intelligence_bp = Blueprint('market_intelligence', __name__)
 
+OPPORTUNITY_SOURCES = ('clinical_trials', 'open_payments_summary', 'pdufa_dates', 'patent_expirations')
+
+OPPORTUNITY_COLUMNS = ['company', 'total_trials', 'upcoming_trials', 'recruiting', 'trial_areas',
+                       'total_kols', 'total_spend', 'audience_kols', 'pending_pdufa', 'next_pdufa_date',
+                       'expiring_drugs', 'opportunity_score']
+
+OPPORTUNITY_SIGNALS_SQL = """
+    WITH trial_signals AS (
+        SELECT sponsor_name as company,
+               COUNT(*) as total_trials,
+               COUNT(*) FILTER (WHERE primary_completion_date BETWEEN CURRENT_DATE AND CURRENT_DATE + interval '18 months') as upcoming_trials,
+               COUNT(*) FILTER (WHERE status = 'RECRUITING') as recruiting,
+               ARRAY_AGG(DISTINCT therapeutic_area) FILTER (WHERE therapeutic_area IS NOT NULL) as trial_areas
+        FROM clinical_trials
+        WHERE sponsor_class = 'INDUSTRY'
+        GROUP BY sponsor_name
+    ),
+    payment_signals AS (
+        SELECT manufacturer_name as company,
+               COUNT(DISTINCT npi) as total_kols,
+               SUM(total_payments) as total_spend,
+               ROUND(AVG(total_payments)::numeric, 2) as avg_spend_per_kol
+        FROM open_payments_summary
+        GROUP BY manufacturer_name
+    ),
+    audience_signals AS (
+        SELECT op.manufacturer_name as company,
+               COUNT(DISTINCT op.npi) as audience_kols
+        FROM open_payments_summary op
+        INNER JOIN user_profiles up ON op.npi = up.npi
+        WHERE up.npi IS NOT NULL AND up.npi != ''
+        GROUP BY op.manufacturer_name
+    ),
+    pdufa_signals AS (
+        SELECT company_name as company,
+               COUNT(*) as pdufa_count,
+               COUNT(*) FILTER (WHERE status = 'pending') as pending_pdufa,
+               MIN(target_date) FILTER (WHERE status = 'pending') as next_pdufa_date
+        FROM pdufa_dates
+        GROUP BY company_name
+    ),
+    patent_signals AS (
+        SELECT applicant as company,
+               COUNT(DISTINCT drug_name) as expiring_drugs
+        FROM patent_expirations
+        WHERE patent_expiration_date BETWEEN CURRENT_DATE AND CURRENT_DATE + interval '3 years'
+        AND drug_name IS NOT NULL AND drug_name != ''
+        GROUP BY applicant
+    ),
+    all_companies AS (
+        SELECT company FROM trial_signals
+        UNION SELECT company FROM payment_signals
+        UNION SELECT company FROM pdufa_signals
+    )
+    SELECT
+        ac.company,
+        COALESCE(ts.total_trials, 0) as total_trials,
+        COALESCE(ts.upcoming_trials, 0) as upcoming_trials,
+        COALESCE(ts.recruiting, 0) as recruiting,
+        to_jsonb(ts.trial_areas) as trial_areas,
+        COALESCE(ps.total_kols, 0) as total_kols,
+        COALESCE(ps.total_spend, 0) as total_spend,
+        COALESCE(aus.audience_kols, 0) as audience_kols,
+        COALESCE(pf.pending_pdufa, 0) as pending_pdufa,
+        pf.next_pdufa_date,
+        COALESCE(pat.expiring_drugs, 0) as expiring_drugs,
+        (
+            CASE WHEN COALESCE(ts.upcoming_trials, 0) > 0 THEN 25 ELSE 0 END +
+            LEAST(COALESCE(ts.upcoming_trials, 0) * 5, 25) +
+            CASE WHEN COALESCE(pf.pending_pdufa, 0) > 0 THEN 20 ELSE 0 END +
+            CASE WHEN COALESCE(aus.audience_kols, 0) > 0 THEN 15 ELSE 0 END +
+            LEAST(COALESCE(aus.audience_kols, 0)::float / GREATEST(COALESCE(ps.total_kols, 1), 1) * 15, 15) +
+            CASE WHEN COALESCE(ps.total_spend, 0) > 1000000 THEN 10
+                 WHEN COALESCE(ps.total_spend, 0) > 100000 THEN 5
+                 ELSE 0 END +
+            CASE WHEN COALESCE(pat.expiring_drugs, 0) > 0 THEN 10 ELSE 0 END
+        ) as opportunity_score
+    FROM all_companies ac
+    LEFT JOIN trial_signals ts ON ac.company = ts.company
+    LEFT JOIN payment_signals ps ON ac.company = ps.company
+    LEFT JOIN audience_signals aus ON ac.company = aus.company
+    LEFT JOIN pdufa_signals pf ON ac.company = pf.company
+    LEFT JOIN patent_signals pat ON ac.company = pat.company
+    WHERE (
+        COALESCE(ts.upcoming_trials, 0) > 0 OR
+        COALESCE(pf.pending_pdufa, 0) > 0 OR
+        COALESCE(aus.audience_kols, 0) > 0 OR
+        COALESCE(ps.total_spend, 0) > 100000
+    )
+"""
+
+_opportunities_cache = {}
+
+CONTENT_TRIGGER_SOURCES = ('fda_approvals', 'pdufa_dates', 'patent_expirations', 'pubmed_trends', 'conferences')
+
+VERSIONED_SOURCES = tuple(dict.fromkeys(OPPORTUNITY_SOURCES + CONTENT_TRIGGER_SOURCES))
+
+CONTENT_TRIGGERS_TTL = timedelta(seconds=60)
+
+CONTENT_TRIGGERS_SQL = """
+    WITH yearly AS (
+        SELECT search_term, therapeutic_area, year, SUM(publication_count) as total
+        FROM pubmed_trends WHERE month = 0
+        GROUP BY search_term, therapeutic_area, year
+    ),
+    growth AS (
+        SELECT a.search_term, a.therapeutic_area,
+               a.total as current_total, b.total as prev_total,
+               CASE WHEN b.total > 0
+                   THEN ROUND(((a.total - b.total)::numeric / b.total) * 100, 1)
+                   ELSE NULL END as growth_pct
+        FROM yearly a JOIN yearly b ON a.search_term = b.search_term AND a.year = b.year + 1
+        WHERE a.year = (SELECT MAX(year) FROM pubmed_trends WHERE month = 0)
+        AND b.total > 10
+    )
+    SELECT type, trigger_date, title, detail, company, area
+    FROM (
+        (SELECT 1 AS section, ROW_NUMBER() OVER (ORDER BY approval_date DESC) AS ord,
+                'fda_approval' AS type, approval_date AS trigger_date,
+                CONCAT(CASE WHEN submission_type = 'ORIG' THEN 'New Approval' ELSE 'New Indication' END,
+                       ': ', COALESCE(NULLIF(brand_name, ''), generic_name)) AS title,
+                CASE WHEN therapeutic_area IS NOT NULL AND therapeutic_area <> ''
+                     THEN CONCAT(therapeutic_area, ' - ', submission_description)
+                     ELSE COALESCE(submission_description, '') END AS detail,
+                sponsor_name AS company, therapeutic_area AS area
+         FROM fda_approvals
+         WHERE approval_date >= CURRENT_DATE - interval '90 days'
+         AND therapeutic_area IN ('oncology', 'dermatology', 'neuroscience'))
+
+        UNION ALL
+
+        (SELECT 2, ROW_NUMBER() OVER (ORDER BY target_date ASC),
+                'pdufa', target_date,
+                CONCAT('PDUFA Decision: ', drug_name),
+                COALESCE(therapeutic_area, ''),
+                company_name, therapeutic_area
+         FROM pdufa_dates
+         WHERE target_date BETWEEN CURRENT_DATE AND CURRENT_DATE + interval '90 days'
+         AND status = 'pending')
+
+        UNION ALL
+
+        (SELECT 3, ROW_NUMBER() OVER (ORDER BY patent_expiration_date ASC),
+                'patent_cliff', patent_expiration_date,
+                CONCAT('Patent Expiring: ', drug_name, ' (', active_ingredient, ')'),
+                CONCAT('Applicant: ', applicant),
+                applicant, NULL
+         FROM patent_expirations
+         WHERE patent_expiration_date BETWEEN CURRENT_DATE AND CURRENT_DATE + interval '180 days'
+         AND drug_name IS NOT NULL AND drug_name != ''
+         ORDER BY patent_expiration_date ASC
+         LIMIT 20)
+
+        UNION ALL
+
+        (SELECT 4, ROW_NUMBER() OVER (ORDER BY growth_pct DESC),
+                'research_momentum', NULL::date,
+                CONCAT('Research Surge: ', search_term),
+                CONCAT('+', growth_pct, '% YoY (', current_total, ' publications)'),
+                NULL, therapeutic_area
+         FROM growth WHERE growth_pct >= 30
+         ORDER BY growth_pct DESC LIMIT 15)
+
+        UNION ALL
+
+        (SELECT 5, ROW_NUMBER() OVER (ORDER BY start_date ASC),
+                'conference', start_date,
+                CONCAT('Conference Coming: ', abbreviation, ' - ', name),
+                CONCAT(therapeutic_area, ' | Pitch window open'),
+                NULL, therapeutic_area
+         FROM conferences
+         WHERE pitch_window_start <= CURRENT_DATE AND start_date >= CURRENT_DATE)
+    ) sections
+    ORDER BY trigger_date ASC NULLS LAST, section, ord
+"""
+
+_content_triggers_cache = {}
+
+
+def source_version_stamp(cur, sources):
+    cur.execute("""
+        SELECT CURRENT_DATE::text,
+               COALESCE(jsonb_object_agg(source_name, version), '{}'::jsonb)
+        FROM market_intel_source_versions
+        WHERE source_name = ANY(%s)
+    """, (list(sources),))
+    today, versions = cur.fetchone()
+    return '|'.join(f"{s}:{versions.get(s, 0)}" for s in sources) + f"|{today}"
+
+
+def refresh_opportunity_scores(conn, version):
+    cur = conn.cursor()
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext('company_opportunity_scores'))")
+    cur.execute("SELECT source_version FROM company_opportunity_scores LIMIT 1")
+    row = cur.fetchone()
+    if not row or row[0] != version:
+        cur.execute("DELETE FROM company_opportunity_scores")
+        cur.execute(f"""
+            INSERT INTO company_opportunity_scores ({', '.join(OPPORTUNITY_COLUMNS)}, source_version, computed_at)
+            SELECT signals.*, %s, NOW()
+            FROM ({OPPORTUNITY_SIGNALS_SQL}) signals
+        """, (version,))
+    conn.commit()
+    cur.close()
+
+
+def opportunity_scores_source(cur):
+    version = source_version_stamp(cur, OPPORTUNITY_SOURCES)
+    cur.execute("SELECT source_version FROM company_opportunity_scores LIMIT 1")
+    row = cur.fetchone()
+    if row and row[0] == version:
+        return version, "company_opportunity_scores"
+    return version, f"({OPPORTUNITY_SIGNALS_SQL}) signals"
+
+
+def _serialize_opportunity(row):
+    o = dict(zip(OPPORTUNITY_COLUMNS, row))
+    for k, v in o.items():
+        if hasattr(v, 'isoformat'):
+            o[k] = v.isoformat()
+        elif hasattr(v, '__float__'):
+            o[k] = float(v)
+    return o
+
 @market_intelligence_bp.route('/clinical-trials', methods=['GET'])
 def get_clinical_trials():
     therapeutic_area = request.args.get('therapeutic_area')
@@ -583,119 +808,42 @@ def get_fda_safety_alerts():
 @market_intelligence_bp.route('/content-triggers', methods=['GET'])
 def get_content_triggers():
     try:
+        now = datetime.utcnow()
+        cached = _content_triggers_cache.get('entry')
+        if cached and cached['expires_at'] > now:
+            return jsonify(cached['payload'])
+
         conn = get_connection()
         cur = conn.cursor()
-
-        triggers = []
-
-        cur.execute("""
-            SELECT approval_date, brand_name, generic_name, sponsor_name,
-                   submission_type, therapeutic_area, submission_description
-            FROM fda_approvals
-            WHERE approval_date >= CURRENT_DATE - interval '90 days'
-            AND therapeutic_area IN ('oncology', 'dermatology', 'neuroscience')
-            ORDER BY approval_date DESC
-        """)
-        for row in cur.fetchall():
-            triggers.append({
-                'type': 'fda_approval',
-                'date': row[0].isoformat() if row[0] else None,
-                'title': f"{'New Approval' if row[4] == 'ORIG' else 'New Indication'}: {row[1] or row[2]}",
-                'detail': f"{row[5]} - {row[6] or ''}" if row[5] else row[6] or '',
-                'company': row[3],
-                'area': row[5],
-            })
-
-        cur.execute("""
-            SELECT target_date, drug_name, company_name, therapeutic_area
-            FROM pdufa_dates
-            WHERE target_date BETWEEN CURRENT_DATE AND CURRENT_DATE + interval '90 days'
-            AND status = 'pending'
-            ORDER BY target_date ASC
-        """)
-        for row in cur.fetchall():
-            triggers.append({
-                'type': 'pdufa',
-                'date': row[0].isoformat() if row[0] else None,
-                'title': f"PDUFA Decision: {row[1]}",
-                'detail': row[3] or '',
-                'company': row[2],
-                'area': row[3],
-            })
-
-        cur.execute("""
-            SELECT drug_name, active_ingredient, applicant, patent_expiration_date
-            FROM patent_expirations
-            WHERE patent_expiration_date BETWEEN CURRENT_DATE AND CURRENT_DATE + interval '180 days'
-            AND drug_name IS NOT NULL AND drug_name != ''
-            ORDER BY patent_expiration_date ASC
-            LIMIT 20
-        """)
-        for row in cur.fetchall():
-            triggers.append({
-                'type': 'patent_cliff',
-                'date': row[3].isoformat() if row[3] else None,
-                'title': f"Patent Expiring: {row[0]} ({row[1]})",
-                'detail': f"Applicant: {row[2]}",
-                'company': row[2],
-                'area': None,
-            })
-
-        cur.execute("""
-            WITH yearly AS (
-                SELECT search_term, therapeutic_area, year, SUM(publication_count) as total
-                FROM pubmed_trends WHERE month = 0
-                GROUP BY search_term, therapeutic_area, year
-            ),
-            growth AS (
-                SELECT a.search_term, a.therapeutic_area,
-                       a.total as current_total, b.total as prev_total,
-                       CASE WHEN b.total > 0
-                           THEN ROUND(((a.total - b.total)::numeric / b.total) * 100, 1)
-                           ELSE NULL END as growth_pct
-                FROM yearly a JOIN yearly b ON a.search_term = b.search_term AND a.year = b.year + 1
-                WHERE a.year = (SELECT MAX(year) FROM pubmed_trends WHERE month = 0)
-                AND b.total > 10
-            )
-            SELECT search_term, therapeutic_area, growth_pct, current_total
-            FROM growth WHERE growth_pct >= 30
-            ORDER BY growth_pct DESC LIMIT 15
-        """)
-        for row in cur.fetchall():
-            triggers.append({
-                'type': 'research_momentum',
-                'date': None,
-                'title': f"Research Surge: {row[0]}",
-                'detail': f"+{row[2]}% YoY ({row[3]} publications)",
-                'company': None,
-                'area': row[1],
-            })
-
-        cur.execute("""
-            SELECT name, abbreviation, therapeutic_area, start_date, pitch_window_start, pitch_window_end
-            FROM conferences
-            WHERE pitch_window_start <= CURRENT_DATE AND start_date >= CURRENT_DATE
-            ORDER BY start_date ASC
-        """)
-        for row in cur.fetchall():
-            triggers.append({
-                'type': 'conference',
-                'date': row[3].isoformat() if row[3] else None,
-                'title': f"Conference Coming: {row[1]} - {row[0]}",
-                'detail': f"{row[2]} | Pitch window open",
-                'company': None,
-                'area': row[2],
-            })
-
-        triggers.sort(key=lambda x: x.get('date') or '9999', reverse=False)
+        version = source_version_stamp(cur, CONTENT_TRIGGER_SOURCES)
+        if cached and cached['version'] == version:
+            cached['expires_at'] = now + CONTENT_TRIGGERS_TTL
+            conn.close()
+            return jsonify(cached['payload'])
+
+        cur.execute(CONTENT_TRIGGERS_SQL)
+        triggers = [{
+            'type': row[0],
+            'date': row[1].isoformat() if row[1] else None,
+            'title': row[2],
+            'detail': row[3],
+            'company': row[4],
+            'area': row[5],
+        } for row in cur.fetchall()]
 
         conn.close()
 
-        return jsonify({
+        payload = {
             'status': 'success',
             'triggers': triggers,
             'total': len(triggers)
-        })
+        }
+        _content_triggers_cache['entry'] = {
+            'payload': payload,
+            'version': version,
+            'expires_at': now + CONTENT_TRIGGERS_TTL,
+        }
+        return jsonify(payload)
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
@@ -1083,113 +1231,31 @@ def get_opportunities():
     try:
         conn = get_connection()
         cur = conn.cursor()
+        version, scores_source = opportunity_scores_source(cur)
 
-        cur.execute("""
-            WITH trial_signals AS (
-                SELECT sponsor_name as company,
-                       COUNT(*) as total_trials,
-                       COUNT(*) FILTER (WHERE primary_completion_date BETWEEN CURRENT_DATE AND CURRENT_DATE + interval '18 months') as upcoming_trials,
-                       COUNT(*) FILTER (WHERE status = 'RECRUITING') as recruiting,
-                       ARRAY_AGG(DISTINCT therapeutic_area) FILTER (WHERE therapeutic_area IS NOT NULL) as trial_areas
-                FROM clinical_trials
-                WHERE sponsor_class = 'INDUSTRY'
-                GROUP BY sponsor_name
-            ),
-            payment_signals AS (
-                SELECT manufacturer_name as company,
-                       COUNT(DISTINCT npi) as total_kols,
-                       SUM(total_payments) as total_spend,
-                       ROUND(AVG(total_payments)::numeric, 2) as avg_spend_per_kol
-                FROM open_payments_summary
-                GROUP BY manufacturer_name
-            ),
-            audience_signals AS (
-                SELECT op.manufacturer_name as company,
-                       COUNT(DISTINCT op.npi) as audience_kols
-                FROM open_payments_summary op
-                INNER JOIN user_profiles up ON op.npi = up.npi
-                WHERE up.npi IS NOT NULL AND up.npi != ''
-                GROUP BY op.manufacturer_name
-            ),
-            pdufa_signals AS (
-                SELECT company_name as company,
-                       COUNT(*) as pdufa_count,
-                       COUNT(*) FILTER (WHERE status = 'pending') as pending_pdufa,
-                       MIN(target_date) FILTER (WHERE status = 'pending') as next_pdufa_date
-                FROM pdufa_dates
-                GROUP BY company_name
-            ),
-            patent_signals AS (
-                SELECT applicant as company,
-                       COUNT(DISTINCT drug_name) as expiring_drugs
-                FROM patent_expirations
-                WHERE patent_expiration_date BETWEEN CURRENT_DATE AND CURRENT_DATE + interval '3 years'
-                AND drug_name IS NOT NULL AND drug_name != ''
-                GROUP BY applicant
-            ),
-            all_companies AS (
-                SELECT company FROM trial_signals
-                UNION SELECT company FROM payment_signals
-                UNION SELECT company FROM pdufa_signals
-            )
-            SELECT
-                ac.company,
-                COALESCE(ts.total_trials, 0) as total_trials,
-                COALESCE(ts.upcoming_trials, 0) as upcoming_trials,
-                COALESCE(ts.recruiting, 0) as recruiting,
-                ts.trial_areas,
-                COALESCE(ps.total_kols, 0) as total_kols,
-                COALESCE(ps.total_spend, 0) as total_spend,
-                COALESCE(aus.audience_kols, 0) as audience_kols,
-                COALESCE(pf.pending_pdufa, 0) as pending_pdufa,
-                pf.next_pdufa_date,
-                COALESCE(pat.expiring_drugs, 0) as expiring_drugs,
-                (
-                    CASE WHEN COALESCE(ts.upcoming_trials, 0) > 0 THEN 25 ELSE 0 END +
-                    LEAST(COALESCE(ts.upcoming_trials, 0) * 5, 25) +
-                    CASE WHEN COALESCE(pf.pending_pdufa, 0) > 0 THEN 20 ELSE 0 END +
-                    CASE WHEN COALESCE(aus.audience_kols, 0) > 0 THEN 15 ELSE 0 END +
-                    LEAST(COALESCE(aus.audience_kols, 0)::float / GREATEST(COALESCE(ps.total_kols, 1), 1) * 15, 15) +
-                    CASE WHEN COALESCE(ps.total_spend, 0) > 1000000 THEN 10
-                         WHEN COALESCE(ps.total_spend, 0) > 100000 THEN 5
-                         ELSE 0 END +
-                    CASE WHEN COALESCE(pat.expiring_drugs, 0) > 0 THEN 10 ELSE 0 END
-                ) as opportunity_score
-            FROM all_companies ac
-            LEFT JOIN trial_signals ts ON ac.company = ts.company
-            LEFT JOIN payment_signals ps ON ac.company = ps.company
-            LEFT JOIN audience_signals aus ON ac.company = aus.company
-            LEFT JOIN pdufa_signals pf ON ac.company = pf.company
-            LEFT JOIN patent_signals pat ON ac.company = pat.company
-            WHERE (
-                COALESCE(ts.upcoming_trials, 0) > 0 OR
-                COALESCE(pf.pending_pdufa, 0) > 0 OR
-                COALESCE(aus.audience_kols, 0) > 0 OR
-                COALESCE(ps.total_spend, 0) > 100000
-            )
+        cached = _opportunities_cache.get(version)
+        if cached:
+            conn.close()
+            return jsonify(cached)
+
+        cur.execute(f"""
+            SELECT {', '.join(OPPORTUNITY_COLUMNS)}
+            FROM {scores_source}
             ORDER BY opportunity_score DESC, total_spend DESC
             LIMIT 100
         """)
-
-        columns = [desc[0] for desc in cur.description]
-        opportunities = [dict(zip(columns, row)) for row in cur.fetchall()]
-
-        for o in opportunities:
-            for k, v in o.items():
-                if hasattr(v, 'isoformat'):
-                    o[k] = v.isoformat()
-                elif hasattr(v, '__float__'):
-                    o[k] = float(v)
-                elif v is None:
-                    o[k] = None
+        opportunities = [_serialize_opportunity(row) for row in cur.fetchall()]
 
         conn.close()
 
-        return jsonify({
+        payload = {
             'status': 'success',
             'opportunities': opportunities,
             'total': len(opportunities)
-        })
+        }
+        _opportunities_cache.clear()
+        _opportunities_cache[version] = payload
+        return jsonify(payload)
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
@@ -1316,6 +1382,17 @@ def get_company_profile(company_name):
         client_cols = [d[0] for d in cur.description]
         client_brands = [dict(zip(client_cols, r)) for r in cur.fetchall()]
 
+        _, scores_source = opportunity_scores_source(cur)
+        cur.execute(f"""
+            SELECT {', '.join(OPPORTUNITY_COLUMNS)}
+            FROM {scores_source}
+            WHERE company = ANY(%(names)s)
+            ORDER BY opportunity_score DESC
+            LIMIT 1
+        """, {'names': list(dict.fromkeys([company_name] + aliases))})
+        opportunity_row = cur.fetchone()
+        opportunity = _serialize_opportunity(opportunity_row) if opportunity_row else None
+
         all_items = trials + kols + pdufa + patents + matched_kols + fda_items + spending_items
         for item in all_items:
             for k, v in item.items():
@@ -1384,7 +1461,8 @@ def get_company_profile(company_name):
                 'brands': [c['brand'] for c in client_brands],
                 'agencies': list(set(c['agency'] for c in client_brands if c.get('agency'))),
                 'sales': list(set(c['sales_member'] for c in client_brands if c.get('sales_member'))),
-            }
+            },
+            'opportunity': opportunity
         })
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
@@ -5,6 +5,7 @@ INDIVIDUAL_ONLY_SQL = "(entity_type IS NULL OR entity_type <> '2')"
 def _individual_only_filter(query):
     return query.filter((UniversalProfile.entity_type.is_(None)) | (UniversalProfile.entity_type != '2'))
 from routes.source_classification import classify_source, classify_source_sql_expr
+from query_helpers import session_id_set_filter
 import csv
 import io
 
@@ -251,37 +252,20 @@ def quick_npi_lookup():
 
             from sqlalchemy import text
 
-            placeholders = ','.join([f':npi_{i}' for i in range(len(cleaned_npis))])
-            params = {f'npi_{i}': npi for i, npi in enumerate(cleaned_npis)}
+            npi_filter, params = session_id_set_filter(session, 'up.npi', cleaned_npis, 'npis')
 
             source_expr = classify_source_sql_expr('up')
-            flag_event_expr = """COALESCE(
-                (SELECT e->>'event' FROM jsonb_array_elements(COALESCE(univ.address_history, '[]'::jsonb)) e
-                 WHERE e->>'event' IN ('address_flagged_invalid','undeliverable')
-                 ORDER BY e->>'changed_at' DESC NULLS LAST LIMIT 1),
-                (SELECT e->>'event' FROM jsonb_array_elements(COALESCE(up.address_history, '[]'::jsonb)) e
-                 WHERE e->>'event' IN ('address_flagged_invalid','undeliverable')
-                 ORDER BY e->>'changed_at' DESC NULLS LAST LIMIT 1)
-            )"""
-            flag_reason_expr = """COALESCE(
-                (SELECT e->>'reason' FROM jsonb_array_elements(COALESCE(univ.address_history, '[]'::jsonb)) e
-                 WHERE e->>'event' IN ('address_flagged_invalid','undeliverable')
-                 ORDER BY e->>'changed_at' DESC NULLS LAST LIMIT 1),
-                (SELECT e->>'reason' FROM jsonb_array_elements(COALESCE(up.address_history, '[]'::jsonb)) e
-                 WHERE e->>'event' IN ('address_flagged_invalid','undeliverable')
-                 ORDER BY e->>'changed_at' DESC NULLS LAST LIMIT 1)
-            )"""
             user_query = text(f"""
                 SELECT up.npi, up.first_name, up.last_name, up.specialty, up.degree,
                        up.address, up.city, up.state, up.zipcode,
                        COALESCE(univ.provider_status, 'Active') AS provider_status,
                        up.is_active AS up_is_active,
                        ({source_expr}) AS source_class,
-                       ({flag_event_expr}) AS address_flag_event,
-                       ({flag_reason_expr}) AS address_flag_reason
+                       COALESCE(univ.last_address_flag_event, up.last_address_flag_event) AS address_flag_event,
+                       COALESCE(univ.last_address_flag_reason, up.last_address_flag_reason) AS address_flag_reason
                 FROM user_profiles up
                 LEFT JOIN universal_profiles univ ON up.npi = univ.npi
-                WHERE up.npi IS NOT NULL AND up.npi != '' AND up.npi IN ({placeholders})
+                WHERE up.npi IS NOT NULL AND up.npi != '' AND {npi_filter}
                   AND (univ.entity_type IS NULL OR univ.entity_type <> '2')
             """)
 
@@ -325,9 +309,12 @@ def quick_npi_lookup():
             remaining_npis = [npi for npi in cleaned_npis if npi not in found_npis]
 
             if remaining_npis:
+                remaining_filter, remaining_params = session_id_set_filter(
+                    session, 'universal_profiles.npi', remaining_npis, 'remaining_npis', 'tmp_remaining_npis'
+                )
                 universal_profiles = _individual_only_filter(session.query(UniversalProfile).filter(
-                    UniversalProfile.npi.in_(remaining_npis)
-                )).all()
+                    text(remaining_filter)
+                )).params(**remaining_params).all()
 
                 for profile in universal_profiles:
                     if profile.npi not in found_npis:
@@ -339,20 +326,6 @@ def quick_npi_lookup():
                             if len(zipcode) == 9 and zipcode.isdigit():
                                 zipcode = f"{zipcode[:5]}-{zipcode[5:]}"
                         provider_status = profile.provider_status or 'Active'
-                        history = profile.address_history or []
-                        if isinstance(history, str):
-                            try:
-                                import json as _json
-                                history = _json.loads(history)
-                            except Exception:
-                                history = []
-                        flag_event = None
-                        flag_reason = None
-                        flag_events = [e for e in history if isinstance(e, dict) and e.get('event') in ('address_flagged_invalid', 'undeliverable')]
-                        if flag_events:
-                            latest = max(flag_events, key=lambda e: e.get('changed_at') or '')
-                            flag_event = latest.get('event')
-                            flag_reason = latest.get('reason')
                         results.append({
                             'npi': profile.npi,
                             'first_name': profile.first_name,
@@ -370,8 +343,8 @@ def quick_npi_lookup():
                             'provider_status': provider_status,
                             'audience_active': None,
                             'source': 'Market',
-                            'address_flag_event': flag_event,
-                            'address_flag_reason': flag_reason,
+                            'address_flag_event': profile.last_address_flag_event,
+                            'address_flag_reason': profile.last_address_flag_reason,
                         })
 
             missing_npis = [npi for npi in cleaned_npis if npi not in found_npis]
@@ -495,8 +468,7 @@ def specialty_lookup():
         try:
             from sqlalchemy import text
 
-            placeholders = ','.join([f':spec_{i}' for i in range(len(specialties))])
-            params = {f'spec_{i}': s for i, s in enumerate(specialties)}
+            specialty_filter, params = session_id_set_filter(session, 'up.specialty', specialties, 'specialties')
 
             source_expr = classify_source_sql_expr('up')
             audience_q = text(f"""
@@ -507,7 +479,7 @@ def specialty_lookup():
                        ({source_expr}) AS source_class
                 FROM user_profiles up
                 LEFT JOIN universal_profiles univ ON up.npi = univ.npi
-                WHERE up.specialty IN ({placeholders})
+                WHERE {specialty_filter}
                   AND up.npi IS NOT NULL AND up.npi != ''
                   AND (univ.entity_type IS NULL OR univ.entity_type <> '2')
             """)
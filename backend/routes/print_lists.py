@@ -125,8 +125,8 @@ def get_subscribers():
             params.extend([s, f'%{search}%', s, s, s])
 
         if list_filter:
-            where_clauses.append("subscribed_lists LIKE %s")
-            params.append(f'%{list_filter}%')
+            where_clauses.append("print_lists_subscribed ? %s")
+            params.append(list_filter)
 
         if status == 'active':
             where_clauses.append("is_subscribed = TRUE")
@@ -186,10 +186,14 @@ def get_stats():
         cur.execute("SELECT COUNT(*) as total FROM print_list_subscribers WHERE is_comp = TRUE AND is_subscribed = TRUE")
         total_comp = cur.fetchone()['total']
 
-        list_counts = {}
-        for list_name in VALID_LISTS:
-            cur.execute("SELECT COUNT(*) as c FROM print_list_subscribers WHERE subscribed_lists LIKE %s AND is_subscribed = TRUE", (f'%{list_name}%',))
-            list_counts[list_name] = cur.fetchone()['c']
+        cur.execute("""
+            SELECT l.name, COUNT(*) as c
+            FROM print_list_subscribers, jsonb_array_elements_text(print_lists_subscribed) AS l(name)
+            WHERE print_lists_subscribed ?| %s AND is_subscribed = TRUE AND l.name = ANY(%s)
+            GROUP BY l.name
+        """, (VALID_LISTS, VALID_LISTS))
+        found = {row['name']: row['c'] for row in cur.fetchall()}
+        list_counts = {list_name: found.get(list_name, 0) for list_name in VALID_LISTS}
 
         cur.execute("""
             SELECT COUNT(*) as c FROM print_list_subscribers
@@ -1407,11 +1411,11 @@ def export_list(list_name):
                    pls.subscribe_date, pls.source, pls.notes
             FROM print_list_subscribers pls
             LEFT JOIN universal_profiles up ON up.npi = pls.npi AND pls.npi IS NOT NULL AND pls.npi != ''
-            WHERE pls.subscribed_lists LIKE %s
+            WHERE pls.print_lists_subscribed ? %s
               AND pls.is_subscribed = TRUE
               AND (up.is_active IS NULL OR up.is_active = TRUE)
             ORDER BY pls.last_name, pls.first_name
-        """, (f'%{list_name}%',))
+        """, (list_name,))
         rows = cur.fetchall()
         cur.close()
 
@@ -31,9 +31,28 @@ def get_session():
     Session = sessionmaker(bind=_engine)
     return Session()
 
-def serialize_program(program, session):
-    items = session.query(ProgramItem).filter_by(program_id=program.id).order_by(ProgramItem.item_type, ProgramItem.item_label).all()
-    sub_programs = session.query(SubProgram).filter_by(program_id=program.id).order_by(SubProgram.sort_order).all()
+def _children_by_program(session, program_ids):
+    items_by_program = {pid: [] for pid in program_ids}
+    sub_programs_by_program = {pid: [] for pid in program_ids}
+    if not program_ids:
+        return items_by_program, sub_programs_by_program
+    items = session.query(ProgramItem).filter(
+        ProgramItem.program_id.in_(program_ids)
+    ).order_by(ProgramItem.program_id, ProgramItem.item_type, ProgramItem.item_label).all()
+    for item in items:
+        items_by_program[item.program_id].append(item)
+    sub_programs = session.query(SubProgram).filter(
+        SubProgram.program_id.in_(program_ids)
+    ).order_by(SubProgram.program_id, SubProgram.sort_order).all()
+    for sp in sub_programs:
+        sub_programs_by_program[sp.program_id].append(sp)
+    return items_by_program, sub_programs_by_program
+
+def serialize_program(program, session, items=None, sub_programs=None):
+    if items is None or sub_programs is None:
+        items_by_program, sub_programs_by_program = _children_by_program(session, [program.id])
+        items = items_by_program[program.id]
+        sub_programs = sub_programs_by_program[program.id]
 
     direct_items = [i for i in items if not i.sub_program_id]
     sp_items_map = {}
@@ -74,7 +93,9 @@ def get_all_programs():
     try:
         session = get_session()
         programs = session.query(Program).order_by(Program.updated_at.desc()).all()
-        result = [serialize_program(p, session) for p in programs]
+        items_by_program, sub_programs_by_program = _children_by_program(session, [p.id for p in programs])
+        result = [serialize_program(p, session, items_by_program[p.id], sub_programs_by_program[p.id])
+                  for p in programs]
         session.close()
         return jsonify({'status': 'success', 'programs': result}), 200
     except Exception as e:
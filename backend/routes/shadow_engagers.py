@@ -1,14 +1,221 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from psycopg2.extras import RealDictCursor
+import base64
+import json
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from db_pool import get_db_connection
+from query_helpers import copy_rows
 
 shadow_engagers_bp = Blueprint('shadow_engagers', __name__)
 
+SHADOW_PAGE_SIZE = 100
+SHADOW_MAX_PAGE_SIZE = 1000
+SHADOW_SCORE_BATCH = 500000
+SHADOW_CLASSIFICATIONS = [(75, 'Confirmed'), (50, 'Likely'), (30, 'Potential')]
+SHADOW_RESCORE_COLUMNS = ['email', 'confidence_pct', 'classification',
+                          'campaigns_clicked_no_open', 'campaigns_with_opens', 'total_campaigns_sent',
+                          'total_clean_clicks_no_open', 'distinct_campaigns_clicked']
+SHADOW_SORT_KEYS = {
+    'confidence_pct': 'confidence_pct',
+    'email': 'LOWER(email)',
+    'last_name': "LOWER(COALESCE(last_name, ''))",
+    'specialty': "LOWER(COALESCE(specialty, ''))",
+    'classification': 'classification',
+    'campaigns_clicked_no_open': 'COALESCE(campaigns_clicked_no_open, 0)',
+    'campaigns_with_opens': 'COALESCE(campaigns_with_opens, 0)',
+    'total_clean_clicks_no_open': 'COALESCE(total_clean_clicks_no_open, 0)',
+}
+
+SHADOW_STATS_SQL = """
+    WITH per_campaign AS (
+        SELECT ci.email,
+               COALESCE(cd.campaign_base_name, ci.campaign_id) AS campaign,
+               bool_or(ci.event_type = 'sent') AS sent,
+               bool_or(ci.event_type = 'open') AS opened,
+               COUNT(*) FILTER (WHERE ci.event_type = 'click') AS clicks
+        FROM tmp_shadow_emails t
+        JOIN campaign_interactions ci ON ci.email = t.email
+        LEFT JOIN campaign_deployments cd ON cd.campaign_id = ci.campaign_id
+        WHERE ci.event_type IN ('sent', 'open', 'click')
+        GROUP BY 1, 2
+    )
+    SELECT email,
+           COUNT(*) FILTER (WHERE clicks > 0 AND NOT opened) AS campaigns_clicked_no_open,
+           COUNT(*) FILTER (WHERE opened) AS campaigns_with_opens,
+           COUNT(*) FILTER (WHERE sent) AS total_campaigns_sent,
+           COALESCE(SUM(clicks) FILTER (WHERE NOT opened), 0) AS total_clean_clicks_no_open,
+           COUNT(*) FILTER (WHERE clicks > 0) AS distinct_campaigns_clicked
+    FROM per_campaign
+    GROUP BY email
+"""
+
+_shadow_counts_cache = {}
+
+
+def shadow_confidence(no_open, with_opens, clicked, clean_clicks):
+    if not clicked:
+        return 0.0
+    score = (55 * no_open / clicked
+             + 25 * min(no_open, 10) / 10
+             + 20 * min(clean_clicks, 20) / 20
+             - 5 * min(with_opens, 6))
+    return round(max(0.0, min(100.0, score)), 1)
+
+
+def shadow_classification(confidence):
+    for threshold, label in SHADOW_CLASSIFICATIONS:
+        if confidence >= threshold:
+            return label
+    return 'Unlikely'
+
+
+def _score_shadow_batch(cursor, lo_id, hi_id):
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS tmp_shadow_emails (email TEXT PRIMARY KEY) ON COMMIT DROP
+    """)
+    cursor.execute("TRUNCATE tmp_shadow_emails")
+    cursor.execute("""
+        INSERT INTO tmp_shadow_emails (email)
+        SELECT DISTINCT email
+        FROM campaign_interactions
+        WHERE id > %s AND id <= %s
+          AND event_type IN ('click', 'open')
+          AND email IS NOT NULL
+    """, (lo_id, hi_id))
+    dirty = cursor.rowcount
+    if not dirty:
+        return 0
+    cursor.execute("ANALYZE tmp_shadow_emails")
+
+    cursor.execute(SHADOW_STATS_SQL)
+    scored = []
+    for email, no_open, with_opens, sent, clean_clicks, clicked in cursor.fetchall():
+        if not no_open:
+            continue
+        confidence = shadow_confidence(no_open, with_opens, clicked, clean_clicks)
+        scored.append((email, confidence, shadow_classification(confidence), no_open, with_opens, sent,
+                       clean_clicks, clicked))
+
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS tmp_shadow_scores (
+            email TEXT, confidence_pct DOUBLE PRECISION, classification TEXT,
+            campaigns_clicked_no_open INTEGER, campaigns_with_opens INTEGER,
+            total_campaigns_sent INTEGER, total_clean_clicks_no_open INTEGER,
+            distinct_campaigns_clicked INTEGER
+        ) ON COMMIT DROP
+    """)
+    cursor.execute("TRUNCATE tmp_shadow_scores")
+    copy_rows(cursor, 'tmp_shadow_scores', SHADOW_RESCORE_COLUMNS, scored)
+
+    cursor.execute("""
+        DELETE FROM shadow_engager_rescores r
+        USING tmp_shadow_emails t
+        WHERE r.email = t.email
+          AND NOT EXISTS (SELECT 1 FROM tmp_shadow_scores s WHERE s.email = t.email)
+    """)
+    cursor.execute(f"""
+        INSERT INTO shadow_engager_rescores ({', '.join(SHADOW_RESCORE_COLUMNS)}, rescored_at)
+        SELECT {', '.join(SHADOW_RESCORE_COLUMNS)}, NOW()
+        FROM tmp_shadow_scores
+        ON CONFLICT (email) DO UPDATE
+        SET {', '.join(f'{c} = EXCLUDED.{c}' for c in SHADOW_RESCORE_COLUMNS[1:])},
+            rescored_at = EXCLUDED.rescored_at
+    """)
+    return dirty
+
+
+def score_shadow_engagers(conn, batch_size=SHADOW_SCORE_BATCH):
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext('shadow_engager_scoring'))")
+    cursor.execute("SELECT last_interaction_id FROM shadow_engager_watermarks WHERE id = 1")
+    row = cursor.fetchone()
+    watermark = row[0] if row else 0
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM campaign_interactions")
+    high = cursor.fetchone()[0]
+
+    rescored = 0
+    while watermark < high:
+        upper = min(watermark + batch_size, high)
+        rescored += _score_shadow_batch(cursor, watermark, upper)
+        cursor.execute("""
+            INSERT INTO shadow_engager_watermarks (id, last_interaction_id, emails_rescored, updated_at)
+            VALUES (1, %s, %s, NOW())
+            ON CONFLICT (id) DO UPDATE
+            SET last_interaction_id = EXCLUDED.last_interaction_id,
+                emails_rescored = EXCLUDED.emails_rescored,
+                updated_at = EXCLUDED.updated_at
+        """, (upper, rescored))
+        conn.commit()
+        watermark = upper
+        if watermark < high:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext('shadow_engager_scoring'))")
+    conn.commit()
+    cursor.close()
+    return rescored, watermark
+
+
+def _encode_shadow_cursor(sort, direction, row):
+    return base64.urlsafe_b64encode(json.dumps([sort, direction, row['sort_key'], row['id']]).encode()).decode()
+
+
+def _decode_shadow_cursor(token, sort, direction):
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != 4 or values[:2] != [sort, direction]:
+        return None
+    return values[2:]
+
+
+def _shadow_filters(args):
+    classifications = [c.strip() for c in args.get('classification', '').split(',') if c.strip()]
+    min_confidence = args.get('min_confidence', type=float)
+    specialty = args.get('specialty', '').strip()
+    search = args.get('search', '').strip()
+
+    where = []
+    params = []
+    if classifications:
+        where.append("classification = ANY(%s)")
+        params.append(classifications)
+    if min_confidence is not None:
+        where.append("confidence_pct >= %s")
+        params.append(min_confidence)
+    if specialty:
+        where.append("LOWER(specialty) = LOWER(%s)")
+        params.append(specialty)
+    if search:
+        where.append("(email ILIKE %s OR first_name ILIKE %s OR last_name ILIKE %s OR specialty ILIKE %s)")
+        params += [f'%{search}%'] * 4
+    return where, params
+
+
+def _shadow_counts(cursor, last_updated):
+    cached = _shadow_counts_cache.get('counts')
+    if cached and cached['last_updated'] == last_updated:
+        return cached['value']
+    cursor.execute("SELECT classification, COUNT(*) AS n FROM shadow_engagers GROUP BY classification")
+    counts = {r['classification']: r['n'] for r in cursor.fetchall()}
+    counts['total'] = sum(counts.values())
+    _shadow_counts_cache['counts'] = {'last_updated': last_updated, 'value': counts}
+    return counts
+
+
 @shadow_engagers_bp.route('/', methods=['GET'])
 def get_shadow_engagers():
     try:
+        limit = min(max(request.args.get('limit', SHADOW_PAGE_SIZE, type=int), 1), SHADOW_MAX_PAGE_SIZE)
+        sort = request.args.get('sort', 'confidence_pct')
+        if sort not in SHADOW_SORT_KEYS:
+            sort = 'confidence_pct'
+        direction = 'asc' if request.args.get('dir', 'desc').lower() == 'asc' else 'desc'
+        sort_key = SHADOW_SORT_KEYS[sort]
+        cursor_values = _decode_shadow_cursor(request.args.get('cursor', '').strip(), sort, direction)
+
         conn = get_db_connection()
         cursor = conn.cursor(cursor_factory=RealDictCursor)
 
@@ -16,24 +223,54 @@ def get_shadow_engagers():
         meta = cursor.fetchone()
         last_updated = meta['last_updated'].isoformat() if meta and meta['last_updated'] else None
 
-        cursor.execute("""
-            SELECT email, first_name, last_name, specialty,
-                   confidence_pct, classification,
-                   campaigns_clicked_no_open, campaigns_with_opens,
-                   total_campaigns_sent, total_clean_clicks_no_open,
-                   distinct_campaigns_clicked
-            FROM shadow_engagers
-            ORDER BY confidence_pct DESC
-        """)
+        where, params = _shadow_filters(request.args)
+        counts = _shadow_counts(cursor, last_updated)
+        if where:
+            cursor.execute(f"SELECT COUNT(*) AS n FROM shadow_engagers WHERE {' AND '.join(where)}", params)
+            total = cursor.fetchone()['n']
+        else:
+            total = counts['total']
+
+        if cursor_values:
+            where.append(f"({sort_key}, id) {'>' if direction == 'asc' else '<'} (%s, %s)")
+            params += cursor_values
+
+        cursor.execute(f"""
+            SELECT p.*,
+                   r.confidence_pct AS rescored_confidence_pct,
+                   r.classification AS rescored_classification,
+                   r.rescored_at
+            FROM (
+                SELECT id, email, first_name, last_name, specialty,
+                       confidence_pct, classification,
+                       campaigns_clicked_no_open, campaigns_with_opens,
+                       total_campaigns_sent, total_clean_clicks_no_open,
+                       distinct_campaigns_clicked,
+                       {sort_key} AS sort_key
+                FROM shadow_engagers
+                {'WHERE ' + ' AND '.join(where) if where else ''}
+                ORDER BY {sort_key} {direction}, id {direction}
+                LIMIT %s
+            ) p
+            LEFT JOIN shadow_engager_rescores r ON r.email = p.email
+            ORDER BY p.sort_key {direction}, p.id {direction}
+        """, params + [limit])
         rows = cursor.fetchall()
 
         cursor.close()
         conn.close()
 
+        next_cursor = _encode_shadow_cursor(sort, direction, rows[-1]) if len(rows) == limit else None
+        for row in rows:
+            row.pop('sort_key')
+
         return jsonify({
             'last_updated': last_updated,
             'count': len(rows),
-            'engagers': rows
+            'total': total,
+            'counts': counts,
+            'engagers': rows,
+            'next_cursor': next_cursor,
         })
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
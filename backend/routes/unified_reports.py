@@ -4,10 +4,17 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine, or_, and_, func
 from models import (
     CampaignReportManager,
-    CampaignReportingMetadata,
     CMIContractValue,
     CMIExpectedReport
 )
+from cmi_lookups import (
+    metadata_name_key,
+    metadata_by_name_date,
+    metadata_by_campaign_id,
+    contracts_by_placement as lookup_contracts,
+    placed_metadata_for
+)
+from cmi_board_snapshots import board_snapshot_response, register_board
 from datetime import datetime, timedelta
 import os
 
@@ -62,121 +69,125 @@ def get_client_id_field(client_name):
             return value
     return None
 
+def _due_this_week_payload(session):
+    week_start, week_end = get_current_reporting_week()
+
+    week_param = request.args.get('week')
+    if week_param:
+        week_start = datetime.strptime(week_param, '%Y-%m-%d').date()
+        week_end = week_start + timedelta(days=6)
+
+    days_back = request.args.get('days_back', 21, type=int)
+    cutoff_date = (datetime.now() - timedelta(days=days_back)).date()
+
+    campaigns = session.query(CampaignReportManager).filter(
+        or_(
+            CampaignReportManager.reporting_week_start >= cutoff_date,
+            CampaignReportManager.reporting_week_start.is_(None)
+        ),
+        CampaignReportManager.batch != 'no_data' 
+    ).all()
+
+    metadata_lookup = metadata_by_name_date(session, [
+        (c.campaign_name, c.send_date.date() if c.send_date else None) for c in campaigns
+    ])
+    metadata_by_id = metadata_by_campaign_id(session, [c.campaign_id for c in campaigns])
+
+    placement_ids = set()
+    for campaign in campaigns:
+        send_date = campaign.send_date.date() if campaign.send_date else None
+        metadata = (metadata_lookup.get(metadata_name_key(campaign.campaign_name, send_date))
+                    or metadata_by_id.get(str(campaign.campaign_id)))
+        placement_ids.add(campaign.cmi_placement_id or (metadata.cmi_placement_id if metadata else None))
+    contracts_by_placement = lookup_contracts(session, placement_ids)
+
+    monthly_start, is_first_week = get_monthly_report_period()
+    filters = [CMIExpectedReport.reporting_week_start == week_start]
+    if is_first_week and monthly_start:
+        filters.append(
+            and_(
+                CMIExpectedReport.expected_data_frequency == 'Monthly',
+                CMIExpectedReport.reporting_week_start == monthly_start
+            )
+        )
+    expected_reports = session.query(CMIExpectedReport).filter(or_(*filters)).all()
+    expected_placement_ids = {str(e.cmi_placement_id) for e in expected_reports if e.cmi_placement_id}
+
+    result = []
+    for campaign in campaigns:
+        send_date = campaign.send_date.date() if campaign.send_date else None
+        metadata = (metadata_lookup.get(metadata_name_key(campaign.campaign_name, send_date))
+                    or metadata_by_id.get(str(campaign.campaign_id)))
+
+        placement_id = campaign.cmi_placement_id or (metadata.cmi_placement_id if metadata else None)
+
+        contract = contracts_by_placement.get(str(placement_id)) if placement_id else None
+
+        is_cmi_expected = str(placement_id) in expected_placement_ids if placement_id else False
+
+        report_data = {
+            'id': campaign.id,
+            'campaign_name': campaign.campaign_name,
+            'send_date': campaign.send_date.strftime('%Y-%m-%d') if campaign.send_date else None,
+            'brand': campaign.brand_name,
+            'agency': campaign.agency,
+            'batch': campaign.batch,
+            'is_submitted': campaign.is_submitted,
+            'reporting_week_start': campaign.reporting_week_start.isoformat() if campaign.reporting_week_start else None,
+
+            'cmi_placement_id': placement_id,
+            'client_placement_id': metadata.client_placement_id if metadata else campaign.client_placement_id,
+            'target_list_id': metadata.target_list_id if metadata else campaign.target_list_id,
+            'creative_code': metadata.creative_code if metadata else campaign.creative_code,
+            'gcm_placement_id': metadata.gcm_placement_id if metadata else campaign.gcm_placement_id,
+            'gcm_placement_id2': metadata.gcm_placement_id2 if metadata else campaign.gcm_placement_id2,
+            'supplier': metadata.supplier if metadata else campaign.supplier,
+            'vehicle_name': metadata.vehicle_name if metadata else campaign.vehicle_name,
+            'placement_description': metadata.placement_description if metadata else campaign.placement_description,
+
+            'has_client_id': bool(metadata.client_id if metadata else campaign.client_id),
+            'client_id_field': None,
+
+            'buy_component_type': contract.buy_component_type if contract else campaign.buy_component_type,
+            'contract_number': contract.contract_number if contract else campaign.contract_number,
+            'client': contract.client if contract else None,
+            'frequency': contract.frequency if contract else campaign.expected_data_frequency,
+            'contract_metric': contract.metric if contract else None,
+            'contract_notes': contract.notes if contract else None,
+
+            'has_metadata': metadata is not None,
+            'has_contract': contract is not None,
+            'is_cmi_expected': is_cmi_expected,
+
+            'match_confidence': campaign.match_confidence
+        }
+
+        client_name = contract.client if contract else None
+        if client_name:
+            report_data['client_id_field'] = get_client_id_field(client_name)
+
+        result.append(report_data)
+
+    return {
+        'status': 'success',
+        'week_start': week_start.isoformat(),
+        'week_end': week_end.isoformat(),
+        'reports': result,
+        'count': len(result)
+    }
+
+register_board('unified_due_this_week', lambda: get_current_reporting_week()[0], _due_this_week_payload)
+
 @unified_reports_bp.route('/due-this-week', methods=['GET'])
 @cross_origin()
 def get_due_this_week():
     try:
         session = get_session()
-        week_start, week_end = get_current_reporting_week()
-
         week_param = request.args.get('week')
-        if week_param:
-            week_start = datetime.strptime(week_param, '%Y-%m-%d').date()
-            week_end = week_start + timedelta(days=6)
-
-        days_back = request.args.get('days_back', 21, type=int)
-        cutoff_date = (datetime.now() - timedelta(days=days_back)).date()
-
-        campaigns = session.query(CampaignReportManager).filter(
-            or_(
-                CampaignReportManager.reporting_week_start >= cutoff_date,
-                CampaignReportManager.reporting_week_start.is_(None)
-            ),
-            CampaignReportManager.batch != 'no_data' 
-        ).all()
-
-        metadata_records = session.query(CampaignReportingMetadata).all()
-        metadata_lookup = {}
-        for m in metadata_records:
-            key = f"{(m.campaign_name or '').lower().strip()}_{m.send_date}"
-            metadata_lookup[key] = m
-            if m.campaign_id:
-                metadata_lookup[f"id_{m.campaign_id}"] = m
-
-        contracts = session.query(CMIContractValue).all()
-        contracts_by_placement = {}
-        for c in contracts:
-            if c.placement_id:
-                contracts_by_placement[str(c.placement_id)] = c
-
-        monthly_start, is_first_week = get_monthly_report_period()
-        filters = [CMIExpectedReport.reporting_week_start == week_start]
-        if is_first_week and monthly_start:
-            filters.append(
-                and_(
-                    CMIExpectedReport.expected_data_frequency == 'Monthly',
-                    CMIExpectedReport.reporting_week_start == monthly_start
-                )
-            )
-        expected_reports = session.query(CMIExpectedReport).filter(or_(*filters)).all()
-        expected_placement_ids = {str(e.cmi_placement_id) for e in expected_reports if e.cmi_placement_id}
-
-        result = []
-        for campaign in campaigns:
-            campaign_name_normalized = (campaign.campaign_name or '').lower().strip()
-            send_date = campaign.send_date.date() if campaign.send_date else None
-
-            metadata_key = f"{campaign_name_normalized}_{send_date}"
-            metadata = metadata_lookup.get(metadata_key) or metadata_lookup.get(f"id_{campaign.campaign_id}")
-
-            placement_id = campaign.cmi_placement_id or (metadata.cmi_placement_id if metadata else None)
-
-            contract = contracts_by_placement.get(str(placement_id)) if placement_id else None
-
-            is_cmi_expected = str(placement_id) in expected_placement_ids if placement_id else False
-
-            report_data = {
-                'id': campaign.id,
-                'campaign_name': campaign.campaign_name,
-                'send_date': campaign.send_date.strftime('%Y-%m-%d') if campaign.send_date else None,
-                'brand': campaign.brand_name,
-                'agency': campaign.agency,
-                'batch': campaign.batch,
-                'is_submitted': campaign.is_submitted,
-                'reporting_week_start': campaign.reporting_week_start.isoformat() if campaign.reporting_week_start else None,
-
-                'cmi_placement_id': placement_id,
-                'client_placement_id': metadata.client_placement_id if metadata else campaign.client_placement_id,
-                'target_list_id': metadata.target_list_id if metadata else campaign.target_list_id,
-                'creative_code': metadata.creative_code if metadata else campaign.creative_code,
-                'gcm_placement_id': metadata.gcm_placement_id if metadata else campaign.gcm_placement_id,
-                'gcm_placement_id2': metadata.gcm_placement_id2 if metadata else campaign.gcm_placement_id2,
-                'supplier': metadata.supplier if metadata else campaign.supplier,
-                'vehicle_name': metadata.vehicle_name if metadata else campaign.vehicle_name,
-                'placement_description': metadata.placement_description if metadata else campaign.placement_description,
-
-                'has_client_id': bool(metadata.client_id if metadata else campaign.client_id),
-                'client_id_field': None,
-
-                'buy_component_type': contract.buy_component_type if contract else campaign.buy_component_type,
-                'contract_number': contract.contract_number if contract else campaign.contract_number,
-                'client': contract.client if contract else None,
-                'frequency': contract.frequency if contract else campaign.expected_data_frequency,
-                'contract_metric': contract.metric if contract else None,
-                'contract_notes': contract.notes if contract else None,
-
-                'has_metadata': metadata is not None,
-                'has_contract': contract is not None,
-                'is_cmi_expected': is_cmi_expected,
-
-                'match_confidence': campaign.match_confidence
-            }
-
-            client_name = contract.client if contract else None
-            if client_name:
-                report_data['client_id_field'] = get_client_id_field(client_name)
-
-            result.append(report_data)
-
+        week_start = datetime.strptime(week_param, '%Y-%m-%d').date() if week_param else get_current_reporting_week()[0]
+        response = board_snapshot_response(session, 'unified_due_this_week', week_start, lambda: _due_this_week_payload(session))
         session.close()
-
-        return jsonify({
-            'status': 'success',
-            'week_start': week_start.isoformat(),
-            'week_end': week_end.isoformat(),
-            'reports': result,
-            'count': len(result)
-        }), 200
+        return response
 
     except Exception as e:
         import traceback
@@ -186,172 +197,177 @@ def get_due_this_week():
             'message': str(e)
         }), 500
 
-@unified_reports_bp.route('/no-data', methods=['GET'])
-@cross_origin()
-def get_no_data_reports():
-    try:
-        session = get_session()
-        week_start, week_end = get_current_reporting_week()
-
-        week_param = request.args.get('week')
-        if week_param:
-            week_start = datetime.strptime(week_param, '%Y-%m-%d').date()
-            week_end = week_start + timedelta(days=6)
-
-        monthly_start, is_first_week = get_monthly_report_period()
-        filters = [CMIExpectedReport.reporting_week_start == week_start]
-
-        if is_first_week and monthly_start:
-            filters.append(
-                and_(
-                    CMIExpectedReport.expected_data_frequency == 'Monthly',
-                    CMIExpectedReport.reporting_week_start == monthly_start
-                )
-            )
+def _no_data_payload(session):
+    week_start, week_end = get_current_reporting_week()
 
-        expected_reports = session.query(CMIExpectedReport).filter(or_(*filters)).all()
+    week_param = request.args.get('week')
+    if week_param:
+        week_start = datetime.strptime(week_param, '%Y-%m-%d').date()
+        week_end = week_start + timedelta(days=6)
 
-        contracts = session.query(CMIContractValue).all()
-        contracts_by_placement = {}
-        for c in contracts:
-            if c.placement_id:
-                contracts_by_placement[str(c.placement_id)] = c
-
-        campaigns_with_data = session.query(CampaignReportManager).filter(
-            CampaignReportManager.reporting_week_start == week_start,
-            CampaignReportManager.batch != 'no_data'
-        ).all()
+    monthly_start, is_first_week = get_monthly_report_period()
+    filters = [CMIExpectedReport.reporting_week_start == week_start]
 
-        pld_placement_ids_with_data = set()
-        for c in campaigns_with_data:
-            if c.cmi_placement_id:
-                pld_placement_ids_with_data.add(str(c.cmi_placement_id))
-            if c.agency_metadata and isinstance(c.agency_metadata, dict):
-                agency_pid = c.agency_metadata.get('cmi_placement_id')
-                if agency_pid:
-                    pld_placement_ids_with_data.add(str(agency_pid))
-
-        campaigns_without_pid = [c for c in campaigns_with_data if not c.cmi_placement_id and not (c.agency_metadata and isinstance(c.agency_metadata, dict) and c.agency_metadata.get('cmi_placement_id'))]
-        if campaigns_without_pid:
-            metadata_records = session.query(CampaignReportingMetadata).filter(
-                CampaignReportingMetadata.cmi_placement_id.isnot(None)
-            ).all()
-            for c in campaigns_without_pid:
-                c_name = (c.campaign_name or '').lower().strip()
-                c_send = c.send_date.date() if c.send_date else None
-                for m in metadata_records:
-                    m_name = (m.campaign_name or '').lower().strip()
-                    if m.campaign_id and c.campaign_id and str(m.campaign_id) == str(c.campaign_id):
-                        pld_placement_ids_with_data.add(str(m.cmi_placement_id))
-                        break
-                    if m_name == c_name and m.send_date and c_send and str(m.send_date) == str(c_send):
+    if is_first_week and monthly_start:
+        filters.append(
+            and_(
+                CMIExpectedReport.expected_data_frequency == 'Monthly',
+                CMIExpectedReport.reporting_week_start == monthly_start
+            )
+        )
+
+    expected_reports = session.query(CMIExpectedReport).filter(or_(*filters)).all()
+
+    contracts_by_placement = lookup_contracts(session, [e.cmi_placement_id for e in expected_reports])
+
+    campaigns_with_data = session.query(CampaignReportManager).filter(
+        CampaignReportManager.reporting_week_start == week_start,
+        CampaignReportManager.batch != 'no_data'
+    ).all()
+
+    pld_placement_ids_with_data = set()
+    for c in campaigns_with_data:
+        if c.cmi_placement_id:
+            pld_placement_ids_with_data.add(str(c.cmi_placement_id))
+        if c.agency_metadata and isinstance(c.agency_metadata, dict):
+            agency_pid = c.agency_metadata.get('cmi_placement_id')
+            if agency_pid:
+                pld_placement_ids_with_data.add(str(agency_pid))
+
+    campaigns_without_pid = [c for c in campaigns_with_data if not c.cmi_placement_id and not (c.agency_metadata and isinstance(c.agency_metadata, dict) and c.agency_metadata.get('cmi_placement_id'))]
+    if campaigns_without_pid:
+        metadata_records = placed_metadata_for(
+            session,
+            [c.campaign_id for c in campaigns_without_pid],
+            [c.send_date.date() for c in campaigns_without_pid if c.send_date]
+        )
+        for c in campaigns_without_pid:
+            c_name = (c.campaign_name or '').lower().strip()
+            c_send = c.send_date.date() if c.send_date else None
+            for m in metadata_records:
+                m_name = (m.campaign_name or '').lower().strip()
+                if m.campaign_id and c.campaign_id and str(m.campaign_id) == str(c.campaign_id):
+                    pld_placement_ids_with_data.add(str(m.cmi_placement_id))
+                    break
+                if m_name == c_name and m.send_date and c_send and str(m.send_date) == str(c_send):
+                    pld_placement_ids_with_data.add(str(m.cmi_placement_id))
+                    break
+                if c_send and m.send_date and str(m.send_date) == str(c_send):
+                    if m_name and c_name and (m_name in c_name or c_name in m_name):
                         pld_placement_ids_with_data.add(str(m.cmi_placement_id))
                         break
-                    if c_send and m.send_date and str(m.send_date) == str(c_send):
-                        if m_name and c_name and (m_name in c_name or c_name in m_name):
-                            pld_placement_ids_with_data.add(str(m.cmi_placement_id))
-                            break
-
-        grouped = {}
-        for report in expected_reports:
-            pid = str(report.cmi_placement_id) if report.cmi_placement_id else f"unknown_{report.id}"
-            if pid not in grouped:
-                grouped[pid] = {
-                    'reports': [],
-                    'data_types': set()
-                }
-            grouped[pid]['reports'].append(report)
-            if report.data_type:
-                grouped[pid]['data_types'].add(report.data_type.upper())
-
-        pld_and_agg = []
-        agg_only = []
-        matched_reports = []
-
-        for placement_id, group in grouped.items():
-            contract = contracts_by_placement.get(placement_id)
-            contract_data_type = (contract.data_type or '').upper() if contract else ''
-            is_monthly = any(r.expected_data_frequency == 'Monthly' for r in group['reports'])
-
-            if is_monthly and contract_data_type == 'AGG':
-                has_data = any(
-                    r.is_matched or r.is_submitted or r.status in ('matched', 'attached', 'standalone', 'moved_to_due')
-                    for r in group['reports']
-                )
-            else:
-                has_data = placement_id in pld_placement_ids_with_data
-
-            rep_report = group['reports'][0]
-
-            report_data = {
-                'id': rep_report.id,
-                'cmi_placement_id': rep_report.cmi_placement_id,
-                'client_placement_id': rep_report.client_placement_id,
-                'brand': contract.brand if contract else rep_report.brand_name,
-                'vehicle': contract.vehicle if contract else rep_report.vehicle_name,
-                'supplier': rep_report.supplier,
-                'placement_description': contract.placement_description if contract else rep_report.placement_description,
-                'data_types': list(group['data_types']),
-                'reporting_week_start': rep_report.reporting_week_start.isoformat() if rep_report.reporting_week_start else None,
-
-                'contract_number': contract.contract_number if contract else rep_report.contract_number,
-                'client': contract.client if contract else rep_report.client_name,
-                'buy_component_type': contract.buy_component_type if contract else rep_report.buy_type,
-                'frequency': (contract.frequency if contract and contract.frequency else None) or rep_report.expected_data_frequency,
-                'contract_metric': (contract.metric if contract and contract.metric else None) or rep_report.agg_metric,
-                'contract_notes': contract.notes if contract else rep_report.notes,
-                'has_contract_match': contract is not None,
-
-                'is_agg_only': rep_report.is_agg_only,
-                'is_monthly': is_monthly,
-                'agg_metric': rep_report.agg_metric,
-                'agg_value': rep_report.agg_value,
-                'status': rep_report.status,
-                'is_submitted': rep_report.is_submitted,
-                'submitted_for_week': rep_report.submitted_for_week.isoformat() if rep_report.submitted_for_week else None
-            }
 
-            if has_data:
-                matched_reports.append(report_data)
-            else:
-                if contract_data_type:
-                    if contract_data_type == 'AGG':
-                        report_data['is_agg_only'] = True
-                        agg_only.append(report_data)
-                    elif contract_data_type in ('PLD & AGG', 'PLD AND AGG', 'PLD&AGG'):
-                        pld_and_agg.append(report_data)
-                    elif contract_data_type == 'PLD':
-                        pld_and_agg.append(report_data)
-                    else:
-                        pld_and_agg.append(report_data)
+    grouped = {}
+    for report in expected_reports:
+        pid = str(report.cmi_placement_id) if report.cmi_placement_id else f"unknown_{report.id}"
+        if pid not in grouped:
+            grouped[pid] = {
+                'reports': [],
+                'data_types': set()
+            }
+        grouped[pid]['reports'].append(report)
+        if report.data_type:
+            grouped[pid]['data_types'].add(report.data_type.upper())
+
+    pld_and_agg = []
+    agg_only = []
+    matched_reports = []
+
+    for placement_id, group in grouped.items():
+        contract = contracts_by_placement.get(placement_id)
+        contract_data_type = (contract.data_type or '').upper() if contract else ''
+        is_monthly = any(r.expected_data_frequency == 'Monthly' for r in group['reports'])
+
+        if is_monthly and contract_data_type == 'AGG':
+            has_data = any(
+                r.is_matched or r.is_submitted or r.status in ('matched', 'attached', 'standalone', 'moved_to_due')
+                for r in group['reports']
+            )
+        else:
+            has_data = placement_id in pld_placement_ids_with_data
+
+        rep_report = group['reports'][0]
+
+        report_data = {
+            'id': rep_report.id,
+            'cmi_placement_id': rep_report.cmi_placement_id,
+            'client_placement_id': rep_report.client_placement_id,
+            'brand': contract.brand if contract else rep_report.brand_name,
+            'vehicle': contract.vehicle if contract else rep_report.vehicle_name,
+            'supplier': rep_report.supplier,
+            'placement_description': contract.placement_description if contract else rep_report.placement_description,
+            'data_types': list(group['data_types']),
+            'reporting_week_start': rep_report.reporting_week_start.isoformat() if rep_report.reporting_week_start else None,
+
+            'contract_number': contract.contract_number if contract else rep_report.contract_number,
+            'client': contract.client if contract else rep_report.client_name,
+            'buy_component_type': contract.buy_component_type if contract else rep_report.buy_type,
+            'frequency': (contract.frequency if contract and contract.frequency else None) or rep_report.expected_data_frequency,
+            'contract_metric': (contract.metric if contract and contract.metric else None) or rep_report.agg_metric,
+            'contract_notes': contract.notes if contract else rep_report.notes,
+            'has_contract_match': contract is not None,
+
+            'is_agg_only': rep_report.is_agg_only,
+            'is_monthly': is_monthly,
+            'agg_metric': rep_report.agg_metric,
+            'agg_value': rep_report.agg_value,
+            'status': rep_report.status,
+            'is_submitted': rep_report.is_submitted,
+            'submitted_for_week': rep_report.submitted_for_week.isoformat() if rep_report.submitted_for_week else None
+        }
+
+        if has_data:
+            matched_reports.append(report_data)
+        else:
+            if contract_data_type:
+                if contract_data_type == 'AGG':
+                    report_data['is_agg_only'] = True
+                    agg_only.append(report_data)
+                elif contract_data_type in ('PLD & AGG', 'PLD AND AGG', 'PLD&AGG'):
+                    pld_and_agg.append(report_data)
+                elif contract_data_type == 'PLD':
+                    pld_and_agg.append(report_data)
                 else:
-                    has_pld = 'PLD' in group['data_types'] or 'DETAIL' in group['data_types']
-                    has_agg = 'AGG' in group['data_types'] or 'AGGREGATE' in group['data_types']
-
-                    if has_pld:
-                        pld_and_agg.append(report_data)
-                    elif has_agg:
-                        report_data['is_agg_only'] = True
-                        agg_only.append(report_data)
-
-        pld_and_agg.sort(key=lambda x: (x.get('brand') or '').lower())
-        agg_only.sort(key=lambda x: (x.get('brand') or '').lower())
-
-        all_expected_placement_ids = list({str(e.cmi_placement_id) for e in expected_reports if e.cmi_placement_id})
+                    pld_and_agg.append(report_data)
+            else:
+                has_pld = 'PLD' in group['data_types'] or 'DETAIL' in group['data_types']
+                has_agg = 'AGG' in group['data_types'] or 'AGGREGATE' in group['data_types']
+
+                if has_pld:
+                    pld_and_agg.append(report_data)
+                elif has_agg:
+                    report_data['is_agg_only'] = True
+                    agg_only.append(report_data)
+
+    pld_and_agg.sort(key=lambda x: (x.get('brand') or '').lower())
+    agg_only.sort(key=lambda x: (x.get('brand') or '').lower())
+
+    all_expected_placement_ids = list({str(e.cmi_placement_id) for e in expected_reports if e.cmi_placement_id})
+
+    return {
+        'status': 'success',
+        'week_start': week_start.isoformat(),
+        'week_end': week_end.isoformat(),
+        'pld_and_agg': pld_and_agg,
+        'agg_only': agg_only,
+        'matched_placement_ids': list(pld_placement_ids_with_data),
+        'all_expected_placement_ids': all_expected_placement_ids,
+        'total_expected': len(expected_reports),
+        'total_no_data': len(pld_and_agg) + len(agg_only)
+    }
+
+register_board('unified_no_data', lambda: get_current_reporting_week()[0], _no_data_payload)
 
+@unified_reports_bp.route('/no-data', methods=['GET'])
+@cross_origin()
+def get_no_data_reports():
+    try:
+        session = get_session()
+        week_param = request.args.get('week')
+        week_start = datetime.strptime(week_param, '%Y-%m-%d').date() if week_param else get_current_reporting_week()[0]
+        response = board_snapshot_response(session, 'unified_no_data', week_start, lambda: _no_data_payload(session))
         session.close()
-
-        return jsonify({
-            'status': 'success',
-            'week_start': week_start.isoformat(),
-            'week_end': week_end.isoformat(),
-            'pld_and_agg': pld_and_agg,
-            'agg_only': agg_only,
-            'matched_placement_ids': list(pld_placement_ids_with_data),
-            'all_expected_placement_ids': all_expected_placement_ids,
-            'total_expected': len(expected_reports),
-            'total_no_data': len(pld_and_agg) + len(agg_only)
-        }), 200
+        return response
 
     except Exception as e:
         import traceback
@@ -377,21 +393,25 @@ def generate_batch_json():
             CampaignReportManager.id.in_(campaign_ids)
         ).all()
 
-        metadata_records = session.query(CampaignReportingMetadata).all()
-        metadata_lookup = {}
-        for m in metadata_records:
-            key = f"{(m.campaign_name or '').lower().strip()}_{m.send_date}"
-            metadata_lookup[key] = m
+        metadata_lookup = metadata_by_name_date(session, [
+            (c.campaign_name, c.send_date.date() if c.send_date else None) for c in campaigns
+        ])
 
-        contracts = session.query(CMIContractValue).all()
-        contracts_by_placement = {str(c.placement_id): c for c in contracts if c.placement_id}
+        placement_ids = set()
+        for campaign in campaigns:
+            send_date = campaign.send_date.date() if campaign.send_date else None
+            metadata = metadata_lookup.get(metadata_name_key(campaign.campaign_name, send_date))
+            placement_ids.add(campaign.cmi_placement_id or (metadata.cmi_placement_id if metadata else None))
+        for aggs in attached_aggs.values():
+            placement_ids.update(agg.get('cmi_placement_id') for agg in aggs)
+        placement_ids.update(agg.get('cmi_placement_id') for agg in standalone_aggs)
+        contracts_by_placement = lookup_contracts(session, placement_ids)
 
         batch_records = []
 
         for campaign in campaigns:
-            campaign_name_normalized = (campaign.campaign_name or '').lower().strip()
             send_date = campaign.send_date.date() if campaign.send_date else None
-            metadata = metadata_lookup.get(f"{campaign_name_normalized}_{send_date}")
+            metadata = metadata_lookup.get(metadata_name_key(campaign.campaign_name, send_date))
 
             placement_id = campaign.cmi_placement_id or (metadata.cmi_placement_id if metadata else None)
             contract = contracts_by_placement.get(str(placement_id)) if placement_id else None
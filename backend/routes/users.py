@@ -8,6 +8,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from db_pool import get_db_connection
+from query_helpers import id_set_filter
 from routes.source_classification import classify_source_sql_expr
 
 users_bp = Blueprint('users', __name__)
@@ -505,51 +506,31 @@ def analyze_list():
         cursor = conn.cursor(cursor_factory=RealDictCursor)
 
         user_list_normalized = [u.lower() if input_type == 'email' else u for u in user_list]
-        placeholders = ','.join(['%s'] * len(user_list_normalized))
+        match_column = 'LOWER(up.email)' if input_type == 'email' else 'up.npi'
+        list_filter, list_params = id_set_filter(cursor, match_column, user_list_normalized)
 
         source_expr = classify_source_sql_expr('up')
-        if input_type == 'email':
-            query = f"""
-                SELECT
-                    up.email,
-                    up.npi,
-                    up.first_name,
-                    up.last_name,
-                    up.specialty,
-                    up.is_active AS up_is_active,
-                    ({source_expr}) AS source,
-                    cd.campaign_base_name as campaign_name,
-                    ci.event_type,
-                    COUNT(*) as event_count
-                FROM user_profiles up
-                LEFT JOIN campaign_interactions ci ON LOWER(up.email) = ci.email
-                LEFT JOIN campaign_deployments cd ON ci.campaign_id = cd.campaign_id
-                WHERE LOWER(up.email) IN ({placeholders})
-                GROUP BY up.id, up.email, up.npi, up.first_name, up.last_name, up.specialty, up.is_active, up.ac_segments, cd.campaign_base_name, ci.event_type
-                ORDER BY up.email, cd.campaign_base_name
-            """
-        else:
-            query = f"""
-                SELECT
-                    up.email,
-                    up.npi,
-                    up.first_name,
-                    up.last_name,
-                    up.specialty,
-                    up.is_active AS up_is_active,
-                    ({source_expr}) AS source,
-                    cd.campaign_base_name as campaign_name,
-                    ci.event_type,
-                    COUNT(*) as event_count
-                FROM user_profiles up
-                LEFT JOIN campaign_interactions ci ON LOWER(up.email) = ci.email
-                LEFT JOIN campaign_deployments cd ON ci.campaign_id = cd.campaign_id
-                WHERE up.npi IN ({placeholders})
-                GROUP BY up.id, up.email, up.npi, up.first_name, up.last_name, up.specialty, up.is_active, up.ac_segments, cd.campaign_base_name, ci.event_type
-                ORDER BY up.email, cd.campaign_base_name
-            """
+        query = f"""
+            SELECT
+                up.email,
+                up.npi,
+                up.first_name,
+                up.last_name,
+                up.specialty,
+                up.is_active AS up_is_active,
+                ({source_expr}) AS source,
+                cd.campaign_base_name as campaign_name,
+                ci.event_type,
+                COUNT(*) as event_count
+            FROM user_profiles up
+            LEFT JOIN campaign_interactions ci ON LOWER(up.email) = ci.email
+            LEFT JOIN campaign_deployments cd ON ci.campaign_id = cd.campaign_id
+            WHERE {list_filter}
+            GROUP BY up.id, up.email, up.npi, up.first_name, up.last_name, up.specialty, up.is_active, up.ac_segments, cd.campaign_base_name, ci.event_type
+            ORDER BY up.email, cd.campaign_base_name
+        """
 
-        cursor.execute(query, user_list_normalized)
+        cursor.execute(query, list_params)
         raw_data = cursor.fetchall()
 
         users_data = {}
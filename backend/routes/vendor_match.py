@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from models import get_session
 from sqlalchemy import text
+from query_helpers import session_id_set_filter
 
 vendor_match_bp = Blueprint('vendor_match', __name__)
 
@@ -38,17 +39,14 @@ def vendor_match_lookup():
         session = get_session()
         try:
             flags = {}
-            for i in range(0, len(valid), 5000):
-                chunk = valid[i:i + 5000]
-                placeholders = ','.join([f':n{j}' for j in range(len(chunk))])
-                params = {f'n{j}': npi for j, npi in enumerate(chunk)}
-                rows = session.execute(text(f"""
-                    SELECT npi, COALESCE(iqvia_match, false), COALESCE(hld_match, false)
-                    FROM universal_profiles
-                    WHERE npi IN ({placeholders})
-                """), params).fetchall()
-                for row in rows:
-                    flags[str(row[0])] = (bool(row[1]), bool(row[2]))
+            npi_filter, params = session_id_set_filter(session, 'npi', valid, 'npis')
+            rows = session.execute(text(f"""
+                SELECT npi, COALESCE(iqvia_match, false), COALESCE(hld_match, false)
+                FROM universal_profiles
+                WHERE {npi_filter}
+            """), params).fetchall()
+            for row in rows:
+                flags[str(row[0])] = (bool(row[1]), bool(row[2]))
 
             results = []
             iqvia_count = hld_count = both_count = neither_count = 0
@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from routes.deliverability import refresh_domain_deliverability
+
+load_dotenv()
+
+BATCH_CAMPAIGNS = 50
+
+STATEMENTS = [
+    """CREATE TABLE IF NOT EXISTS campaign_domain_deliverability (
+        campaign_id VARCHAR(100) NOT NULL,
+        domain VARCHAR(255) NOT NULL,
+        sent INTEGER DEFAULT 0,
+        bounces INTEGER DEFAULT 0,
+        opens INTEGER DEFAULT 0,
+        clicks INTEGER DEFAULT 0,
+        unsubs INTEGER DEFAULT 0,
+        refreshed_at TIMESTAMP DEFAULT NOW(),
+        PRIMARY KEY (campaign_id, domain)
+    )""",
+    """CREATE TABLE IF NOT EXISTS campaign_deliverability_state (
+        campaign_id VARCHAR(100) PRIMARY KEY,
+        last_interaction_id BIGINT NOT NULL DEFAULT 0,
+        refreshed_at TIMESTAMP DEFAULT NOW()
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_ci_campaign_id_id ON campaign_interactions (campaign_id, id)",
+]
+
+
+def add_campaign_domain_deliverability():
+    DATABASE_URL = os.getenv('DATABASE_URL')
+    if not DATABASE_URL:
+        sys.exit("DATABASE_URL is not set")
+    engine = create_engine(DATABASE_URL)
+
+    with engine.begin() as conn:
+        for stmt in STATEMENTS:
+            print(f"Running: {' '.join(stmt.split())[:100]}")
+            conn.execute(text(stmt))
+        campaign_ids = [r[0] for r in conn.execute(text("""
+            SELECT DISTINCT campaign_id FROM campaign_interactions
+            WHERE campaign_id IS NOT NULL
+              AND campaign_id NOT IN (SELECT campaign_id FROM campaign_deliverability_state)
+        """)).fetchall()]
+
+    print(f"Backfilling {len(campaign_ids):,} campaigns")
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        started = time.time()
+        total = 0
+        for i in range(0, len(campaign_ids), BATCH_CAMPAIGNS):
+            total += refresh_domain_deliverability(cursor, campaign_ids[i:i + BATCH_CAMPAIGNS])
+            raw.commit()
+            print(f"  {min(i + BATCH_CAMPAIGNS, len(campaign_ids)):,}/{len(campaign_ids):,} campaigns")
+        cursor.close()
+    finally:
+        raw.close()
+    print(f"Done: {total:,} domain rows in {time.time() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    add_campaign_domain_deliverability()
@@ -0,0 +1,49 @@
+import os
+import sys
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cmi_board_snapshots import BOARD_SOURCES
+from scripts.add_company_opportunity_scores import BUMP_FUNCTION_SQL, version_trigger_statements
+
+load_dotenv()
+
+
+def add_cmi_board_snapshots():
+    DATABASE_URL = os.getenv('DATABASE_URL')
+    if not DATABASE_URL:
+        sys.exit("DATABASE_URL is not set")
+    engine = create_engine(DATABASE_URL)
+
+    statements = [
+        """CREATE TABLE IF NOT EXISTS market_intel_source_versions (
+            id SERIAL PRIMARY KEY,
+            source_name VARCHAR(100) NOT NULL,
+            version BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT NOW()
+        )""",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_misv_source_unique ON market_intel_source_versions (source_name)",
+        """CREATE TABLE IF NOT EXISTS cmi_board_snapshots (
+            id SERIAL PRIMARY KEY,
+            board VARCHAR(50) NOT NULL,
+            week_start DATE NOT NULL,
+            params_key VARCHAR(500) NOT NULL,
+            version VARCHAR(255) NOT NULL,
+            payload JSONB,
+            built_at TIMESTAMP DEFAULT NOW()
+        )""",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_cmi_board_snapshot_key ON cmi_board_snapshots (board, week_start, params_key)",
+        BUMP_FUNCTION_SQL,
+    ] + version_trigger_statements(BOARD_SOURCES)
+
+    with engine.begin() as conn:
+        for stmt in statements:
+            print(f"Running: {' '.join(stmt.split())[:120]}")
+            conn.execute(text(stmt))
+    print("Done.")
+
+
+if __name__ == '__main__':
+    add_cmi_board_snapshots()
@@ -0,0 +1,34 @@
+import os
+import sys
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+load_dotenv()
+
+def add_cmi_metadata_indexes():
+    DATABASE_URL = os.getenv('DATABASE_URL')
+    if not DATABASE_URL:
+        sys.exit("DATABASE_URL is not set")
+    engine = create_engine(DATABASE_URL)
+
+    statements = [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_crm_name_send_date ON campaign_reporting_metadata ((lower(btrim(campaign_name))), send_date)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_crm_cmi_placement_id ON campaign_reporting_metadata (cmi_placement_id)",
+    ]
+
+    results = []
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for stmt in statements:
+            print(f"Running: {stmt}")
+            try:
+                conn.execute(text(stmt))
+                results.append((stmt, 'ok', None))
+            except Exception as e:
+                print(f"  failed: {e}")
+                results.append((stmt, 'failed', str(e)))
+    return results
+
+if __name__ == '__main__':
+    results = add_cmi_metadata_indexes()
+    failures = [r for r in results if r[1] != 'ok']
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,85 @@
+import os
+import sys
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from routes.market_intelligence import VERSIONED_SOURCES
+
+load_dotenv()
+
+BUMP_FUNCTION_SQL = """
+    CREATE OR REPLACE FUNCTION bump_market_intel_source_version() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO market_intel_source_versions (source_name, version, updated_at)
+        VALUES (TG_TABLE_NAME, 1, NOW())
+        ON CONFLICT (source_name) DO UPDATE
+        SET version = market_intel_source_versions.version + 1,
+            updated_at = NOW();
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+
+def version_trigger_statements(tables):
+    statements = []
+    for table in tables:
+        statements += [
+            f"DROP TRIGGER IF EXISTS trg_{table}_source_version ON {table}",
+            f"""CREATE TRIGGER trg_{table}_source_version
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+                FOR EACH STATEMENT EXECUTE FUNCTION bump_market_intel_source_version()""",
+            f"""INSERT INTO market_intel_source_versions (source_name, version, updated_at)
+                VALUES ('{table}', 1, NOW())
+                ON CONFLICT (source_name) DO NOTHING""",
+        ]
+    return statements
+
+
+def add_company_opportunity_scores():
+    DATABASE_URL = os.getenv('DATABASE_URL')
+    if not DATABASE_URL:
+        sys.exit("DATABASE_URL is not set")
+    engine = create_engine(DATABASE_URL)
+
+    statements = [
+        """CREATE TABLE IF NOT EXISTS market_intel_source_versions (
+            id SERIAL PRIMARY KEY,
+            source_name VARCHAR(100) NOT NULL,
+            version BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT NOW()
+        )""",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_misv_source_unique ON market_intel_source_versions (source_name)",
+        """CREATE TABLE IF NOT EXISTS company_opportunity_scores (
+            id SERIAL PRIMARY KEY,
+            company VARCHAR(500),
+            total_trials INTEGER DEFAULT 0,
+            upcoming_trials INTEGER DEFAULT 0,
+            recruiting INTEGER DEFAULT 0,
+            trial_areas JSONB,
+            total_kols INTEGER DEFAULT 0,
+            total_spend NUMERIC(16, 2) DEFAULT 0,
+            audience_kols INTEGER DEFAULT 0,
+            pending_pdufa INTEGER DEFAULT 0,
+            next_pdufa_date DATE,
+            expiring_drugs INTEGER DEFAULT 0,
+            opportunity_score DOUBLE PRECISION DEFAULT 0,
+            source_version VARCHAR(255) NOT NULL,
+            computed_at TIMESTAMP DEFAULT NOW()
+        )""",
+        "CREATE INDEX IF NOT EXISTS ix_company_opportunity_scores_company ON company_opportunity_scores (company)",
+        "CREATE INDEX IF NOT EXISTS idx_cos_score ON company_opportunity_scores (opportunity_score, total_spend)",
+        BUMP_FUNCTION_SQL,
+    ] + version_trigger_statements(VERSIONED_SOURCES)
+
+    with engine.begin() as conn:
+        for stmt in statements:
+            print(f"Running: {' '.join(stmt.split())[:120]}")
+            conn.execute(text(stmt))
+    print("Done.")
+
+
+if __name__ == '__main__':
+    add_company_opportunity_scores()
@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+from datetime import date, timedelta
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from routes.ga_insights import refresh_ga_url_user_daily, classify_ga_pages
+
+load_dotenv()
+
+BACKFILL_DAYS = 366
+CHUNK_DAYS = 7
+LOOKBACK_DAYS = 3
+
+STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """CREATE TABLE IF NOT EXISTS ga_url_user_daily (
+        day DATE NOT NULL,
+        url_clean TEXT NOT NULL,
+        user_pseudo_id TEXT NOT NULL,
+        events INTEGER NOT NULL DEFAULT 0,
+        page_views INTEGER NOT NULL DEFAULT 0,
+        engagement_ms BIGINT NOT NULL DEFAULT 0,
+        session_ids TEXT[],
+        first_seen TIMESTAMPTZ,
+        last_seen TIMESTAMPTZ,
+        city TEXT,
+        city_ts TIMESTAMPTZ,
+        device TEXT,
+        device_ts TIMESTAMPTZ,
+        property TEXT,
+        PRIMARY KEY (day, url_clean, user_pseudo_id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_gaud_url_day ON ga_url_user_daily (url_clean, day)",
+    "CREATE INDEX IF NOT EXISTS idx_gaud_url_trgm ON ga_url_user_daily USING gin (url_clean gin_trgm_ops)",
+    """CREATE TABLE IF NOT EXISTS ga_page_disease (
+        key_hash TEXT PRIMARY KEY,
+        url_key TEXT NOT NULL,
+        page_title TEXT NOT NULL DEFAULT '',
+        property TEXT NOT NULL DEFAULT '',
+        disease TEXT,
+        rules_version TEXT NOT NULL,
+        classified_at TIMESTAMP DEFAULT NOW()
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_gapd_rules_version ON ga_page_disease (rules_version)",
+]
+
+
+def add_ga_url_user_daily(days=None):
+    DATABASE_URL = os.getenv('DATABASE_URL')
+    if not DATABASE_URL:
+        sys.exit("DATABASE_URL is not set")
+    engine = create_engine(DATABASE_URL)
+
+    with engine.begin() as conn:
+        for stmt in STATEMENTS:
+            print(f"Running: {' '.join(stmt.split())[:100]}")
+            conn.execute(text(stmt))
+        last_day = conn.execute(text("SELECT MAX(day) FROM ga_url_user_daily")).scalar()
+
+    today = date.today()
+    if days:
+        since = today - timedelta(days=days)
+    elif last_day:
+        since = min(last_day + timedelta(days=1), today - timedelta(days=LOOKBACK_DAYS))
+    else:
+        since = today - timedelta(days=BACKFILL_DAYS)
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        started = time.time()
+        total = 0
+        chunk_start = since
+        while chunk_start < today:
+            chunk_end = min(chunk_start + timedelta(days=CHUNK_DAYS), today)
+            rows = refresh_ga_url_user_daily(cursor, chunk_start, chunk_end)
+            raw.commit()
+            total += rows
+            print(f"  {chunk_start} .. {chunk_end}: {rows:,} url-user-days")
+            chunk_start = chunk_end
+        cursor.close()
+        classified = classify_ga_pages(raw, since)
+    finally:
+        raw.close()
+    print(f"Done: {total:,} rows since {since}, {classified:,} pages classified in {time.time() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    days = None
+    if '--days' in sys.argv:
+        days = int(sys.argv[sys.argv.index('--days') + 1])
+    add_ga_url_user_daily(days)
@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+load_dotenv()
+
+FLAG_TABLES = ('universal_profiles', 'user_profiles', 'print_only_contacts')
+BATCH_SIZE = 50000
+
+BACKFILL_SQL = """
+    UPDATE {table} t
+    SET last_address_flag_event = f.event,
+        last_address_flag_reason = f.reason,
+        last_address_flag_source = f.source,
+        last_address_flag_at = f.changed_at
+    FROM (
+        SELECT x.id, latest.*
+        FROM {table} x
+        CROSS JOIN LATERAL (
+            SELECT e->>'event' AS event,
+                   e->>'reason' AS reason,
+                   e->>'source' AS source,
+                   NULLIF(e->>'changed_at', '')::timestamp AS changed_at
+            FROM jsonb_array_elements(COALESCE(x.address_history::jsonb, '[]'::jsonb)) e
+            WHERE e->>'event' IN ('address_flagged_invalid','undeliverable')
+            ORDER BY e->>'changed_at' DESC NULLS LAST
+            LIMIT 1
+        ) latest
+        WHERE x.id >= :lo AND x.id < :hi
+          AND x.address_history IS NOT NULL
+    ) f
+    WHERE t.id = f.id
+"""
+
+
+def add_columns(engine):
+    statements = []
+    for table in FLAG_TABLES:
+        statements += [
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS last_address_flag_event VARCHAR(50)",
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS last_address_flag_reason TEXT",
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS last_address_flag_source VARCHAR(100)",
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS last_address_flag_at TIMESTAMP",
+        ]
+    with engine.begin() as conn:
+        for stmt in statements:
+            print(f"Running: {stmt}")
+            conn.execute(text(stmt))
+
+
+def backfill(engine, table):
+    with engine.connect() as conn:
+        lo, hi = conn.execute(text(f"SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM {table}")).one()
+
+    started = time.time()
+    updated = 0
+    for start in range(lo, hi + 1, BATCH_SIZE):
+        with engine.begin() as conn:
+            result = conn.execute(text(BACKFILL_SQL.format(table=table)),
+                                  {'lo': start, 'hi': start + BATCH_SIZE})
+            updated += result.rowcount
+    print(f"{table}: {updated:,} rows flagged in {time.time() - started:.1f}s")
+    return updated
+
+
+def add_last_address_flag_columns(tables=FLAG_TABLES):
+    DATABASE_URL = os.getenv('DATABASE_URL')
+    if not DATABASE_URL:
+        sys.exit("DATABASE_URL is not set")
+    engine = create_engine(DATABASE_URL)
+
+    add_columns(engine)
+    for table in tables:
+        backfill(engine, table)
+    print("Done.")
+
+
+if __name__ == '__main__':
+    requested = [a for a in sys.argv[1:] if a in FLAG_TABLES]
+    add_last_address_flag_columns(requested or FLAG_TABLES)
@@ -0,0 +1,52 @@
+import os
+import sys
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from routes.list_management import PRINT_SEARCH_FIELDS, DIGITAL_SEARCH_FIELDS, member_search_expr
+
+load_dotenv()
+
+def _trgm_index(name, table, fields):
+    return (f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} "
+            f"USING gin (({member_search_expr(fields)}) gin_trgm_ops)")
+
+def _keyset_index(name, table):
+    return (f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} "
+            f"((COALESCE(last_name, '')), (COALESCE(first_name, '')), id)")
+
+def add_member_search_indexes():
+    DATABASE_URL = os.getenv('DATABASE_URL')
+    if not DATABASE_URL:
+        sys.exit("DATABASE_URL is not set")
+    engine = create_engine(DATABASE_URL)
+
+    statements = [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        _trgm_index('idx_up_member_search_trgm', 'universal_profiles', PRINT_SEARCH_FIELDS['up']),
+        _trgm_index('idx_u_print_member_search_trgm', 'user_profiles', PRINT_SEARCH_FIELDS['u']),
+        _trgm_index('idx_u_digital_member_search_trgm', 'user_profiles', DIGITAL_SEARCH_FIELDS),
+        _trgm_index('idx_poc_member_search_trgm', 'print_only_contacts', PRINT_SEARCH_FIELDS['p']),
+        _keyset_index('idx_up_member_keyset', 'universal_profiles'),
+        _keyset_index('idx_u_member_keyset', 'user_profiles'),
+        _keyset_index('idx_poc_member_keyset', 'print_only_contacts'),
+    ]
+
+    results = []
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for stmt in statements:
+            print(f"Running: {stmt}")
+            try:
+                conn.execute(text(stmt))
+                results.append((stmt, 'ok', None))
+            except Exception as e:
+                print(f"  failed: {e}")
+                results.append((stmt, 'failed', str(e)))
+    return results
+
+if __name__ == '__main__':
+    results = add_member_search_indexes()
+    failures = [r for r in results if r[1] != 'ok']
+    sys.exit(1 if failures else 0)
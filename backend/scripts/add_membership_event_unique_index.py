@@ -0,0 +1,56 @@
+import os
+import sys
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+load_dotenv()
+
+STATEMENTS = [
+    """CREATE TABLE IF NOT EXISTS etl_checkpoints (
+        job VARCHAR(500) PRIMARY KEY,
+        source_offset BIGINT NOT NULL DEFAULT 0,
+        users_loaded BIGINT DEFAULT 0,
+        interactions_loaded BIGINT DEFAULT 0,
+        campaign_ids JSON,
+        completed_at TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT NOW()
+    )""",
+    """DELETE FROM ac_membership_events a
+        USING ac_membership_events b
+        WHERE a.user_profile_id = b.user_profile_id
+          AND a.dimension = b.dimension
+          AND a.name = b.name
+          AND a.event = b.event
+          AND a.at = b.at
+          AND a.id > b.id""",
+]
+
+INDEX_STATEMENTS = [
+    """CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_ame_user_dim_name_event_at
+        ON ac_membership_events (user_profile_id, dimension, name, event, at)""",
+]
+
+
+def add_membership_event_unique_index():
+    DATABASE_URL = os.getenv('DATABASE_URL')
+    if not DATABASE_URL:
+        sys.exit("DATABASE_URL is not set")
+    engine = create_engine(DATABASE_URL)
+
+    with engine.begin() as conn:
+        for stmt in STATEMENTS:
+            print(f"Running: {' '.join(stmt.split())[:100]}")
+            result = conn.execute(text(stmt))
+            if stmt.lstrip().startswith('DELETE'):
+                print(f"  removed {result.rowcount} duplicate events")
+
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for stmt in INDEX_STATEMENTS:
+            print(f"Running: {' '.join(stmt.split())}")
+            conn.execute(text(stmt))
+        conn.execute(text("ANALYZE ac_membership_events"))
+    print("Done.")
+
+
+if __name__ == '__main__':
+    add_membership_event_unique_index()
@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+load_dotenv()
+
+BACKFILL_BATCH = 20000
+
+ADDRESS_ABBREVIATIONS = [
+    ('STREET', 'ST'), ('AVENUE', 'AVE'), ('BOULEVARD', 'BLVD'), ('DRIVE', 'DR'),
+    ('LANE', 'LN'), ('ROAD', 'RD'), ('COURT', 'CT'), ('PLACE', 'PL'),
+    ('SUITE', 'STE'), ('APARTMENT', 'APT'), ('BUILDING', 'BLDG'),
+]
+SUITE_SUFFIX_PATTERN = r'\s+(STE|SUITE|APT|APARTMENT|UNIT|BLDG|BUILDING|RM|ROOM|FL|FLOOR|#)\s*\S.*$'
+
+HASH_COLUMNS = {
+    'universal_profiles': [
+        ('practice_addr_hash', '{row}.practice_address_1', ['practice_address_1']),
+        ('mailing_addr_hash', '{row}.mailing_address_1', ['mailing_address_1']),
+    ],
+    'user_profiles': [
+        ('addr_hash', '{row}.address', ['address']),
+    ],
+    'print_only_contacts': [
+        ('addr_hash', '{row}.address', ['address']),
+    ],
+    'print_list_subscribers': [
+        ('addr_hash', "concat_ws(' ', {row}.address_1, {row}.address_2)", ['address_1', 'address_2']),
+    ],
+}
+
+
+def _norm_addr_sql():
+    expr = "upper(regexp_replace(addr, '^\\s+|\\s+$', '', 'g'))"
+    for full, abbr in ADDRESS_ABBREVIATIONS:
+        expr = f"regexp_replace({expr}, '\\y{full}\\y', '{abbr}', 'g')"
+    expr = f"regexp_replace({expr}, '[.,#]', '', 'g')"
+    expr = f"regexp_replace({expr}, '\\s+', ' ', 'g')"
+    return f"regexp_replace({expr}, '^\\s+|\\s+$', '', 'g')"
+
+
+def _table_statements(table, columns):
+    sets = '\n'.join(f"        NEW.{col} := ncoa_addr_hash({expr.format(row='NEW')});" for col, expr, _ in columns)
+    sources = sorted({src for _, _, srcs in columns for src in srcs})
+    return [f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {col} BIGINT" for col, _, _ in columns] + [
+        f"""CREATE OR REPLACE FUNCTION sync_{table}_addr_hash() RETURNS trigger AS $$
+    BEGIN
+{sets}
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql""",
+        f"DROP TRIGGER IF EXISTS trg_{table}_addr_hash ON {table}",
+        f"""CREATE TRIGGER trg_{table}_addr_hash
+        BEFORE INSERT OR UPDATE OF {', '.join(sources)} ON {table}
+        FOR EACH ROW EXECUTE FUNCTION sync_{table}_addr_hash()""",
+    ]
+
+
+STATEMENTS = [
+    f"""CREATE OR REPLACE FUNCTION ncoa_norm_addr(addr TEXT) RETURNS TEXT AS $$
+        SELECT COALESCE({_norm_addr_sql()}, '')
+    $$ LANGUAGE sql IMMUTABLE""",
+    f"""CREATE OR REPLACE FUNCTION ncoa_addr_hash(addr TEXT) RETURNS BIGINT AS $$
+        SELECT ('x' || left(md5(s), 16))::bit(64)::bigint
+        FROM (SELECT btrim(regexp_replace(ncoa_norm_addr(addr), '{SUITE_SUFFIX_PATTERN}', '', 'i')) AS s) n
+        WHERE s <> ''
+    $$ LANGUAGE sql IMMUTABLE""",
+] + [stmt for table, columns in HASH_COLUMNS.items() for stmt in _table_statements(table, columns)]
+
+INDEX_STATEMENTS = [
+    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_{table}_{col} ON {table} ({col})"
+    for table, columns in HASH_COLUMNS.items() for col, _, _ in columns
+]
+
+
+def add_ncoa_address_hash():
+    DATABASE_URL = os.getenv('DATABASE_URL')
+    if not DATABASE_URL:
+        sys.exit("DATABASE_URL is not set")
+    engine = create_engine(DATABASE_URL)
+
+    with engine.begin() as conn:
+        for stmt in STATEMENTS:
+            print(f"Running: {' '.join(stmt.split())[:100]}")
+            conn.execute(text(stmt))
+
+    for table, columns in HASH_COLUMNS.items():
+        sets = ', '.join(f"{col} = ncoa_addr_hash({expr.format(row=table)})" for col, expr, _ in columns)
+        stale = ' OR '.join(f"{col} IS DISTINCT FROM ncoa_addr_hash({expr.format(row=table)})" for col, expr, _ in columns)
+        with engine.begin() as conn:
+            max_id = conn.execute(text(f"SELECT COALESCE(MAX(id), 0) FROM {table}")).scalar()
+
+        started = time.time()
+        backfilled = 0
+        lo = 0
+        while lo < max_id:
+            hi = lo + BACKFILL_BATCH
+            with engine.begin() as conn:
+                backfilled += conn.execute(text(f"""
+                    UPDATE {table} SET {sets}
+                    WHERE id > :lo AND id <= :hi AND ({stale})
+                """), {'lo': lo, 'hi': hi}).rowcount
+            lo = hi
+        print(f"{table}: {backfilled:,} rows backfilled in {time.time() - started:.1f}s")
+
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for stmt in INDEX_STATEMENTS:
+            print(f"Running: {stmt}")
+            conn.execute(text(stmt))
+        for table in HASH_COLUMNS:
+            conn.execute(text(f"ANALYZE {table}"))
+    print("Done.")
+
+
+if __name__ == '__main__':
+    add_ncoa_address_hash()
@@ -0,0 +1,45 @@
+import os
+import sys
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.print_list_diff import normalizer_function_statements
+
+load_dotenv()
+
+STATEMENTS = normalizer_function_statements() + [
+    """ALTER TABLE print_list_subscribers ADD COLUMN IF NOT EXISTS match_key TEXT
+        GENERATED ALWAYS AS (print_list_match_key(npi, first_name, last_name, address_1, city, state, zipcode)) STORED""",
+    """ALTER TABLE print_list_subscribers ADD COLUMN IF NOT EXISTS name_key TEXT
+        GENERATED ALWAYS AS (print_list_name_key(first_name, last_name)) STORED""",
+]
+
+INDEX_STATEMENTS = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_print_match_key ON print_list_subscribers (match_key)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_print_name_key ON print_list_subscribers (name_key)",
+]
+
+
+def add_print_list_match_keys():
+    DATABASE_URL = os.getenv('DATABASE_URL')
+    if not DATABASE_URL:
+        sys.exit("DATABASE_URL is not set")
+    engine = create_engine(DATABASE_URL)
+
+    with engine.begin() as conn:
+        for stmt in STATEMENTS:
+            print(f"Running: {' '.join(stmt.split())[:100]}")
+            conn.execute(text(stmt))
+
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for stmt in INDEX_STATEMENTS:
+            print(f"Running: {stmt}")
+            conn.execute(text(stmt))
+        conn.execute(text("ANALYZE print_list_subscribers"))
+    print("Done.")
+
+
+if __name__ == '__main__':
+    add_print_list_match_keys()
@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+load_dotenv()
+
+BACKFILL_BATCH = 20000
+
+STATEMENTS = [
+    "ALTER TABLE print_list_subscribers ADD COLUMN IF NOT EXISTS print_lists_subscribed JSONB",
+    "ALTER TABLE print_list_subscribers ADD COLUMN IF NOT EXISTS print_lists_unsubscribed JSONB",
+    """CREATE OR REPLACE FUNCTION print_list_names(lists TEXT) RETURNS jsonb AS $$
+        SELECT COALESCE(jsonb_agg(name ORDER BY pos), '[]'::jsonb)
+        FROM (
+            SELECT btrim(t.name) AS name, MIN(t.pos) AS pos
+            FROM unnest(string_to_array(lists, ',')) WITH ORDINALITY AS t(name, pos)
+            WHERE btrim(t.name) <> ''
+            GROUP BY btrim(t.name)
+        ) names
+    $$ LANGUAGE sql IMMUTABLE""",
+    """CREATE OR REPLACE FUNCTION sync_print_list_membership() RETURNS trigger AS $$
+    BEGIN
+        NEW.print_lists_subscribed := print_list_names(NEW.subscribed_lists);
+        NEW.print_lists_unsubscribed := print_list_names(NEW.unsubscribed_lists);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS trg_print_list_membership ON print_list_subscribers",
+    """CREATE TRIGGER trg_print_list_membership
+        BEFORE INSERT OR UPDATE OF subscribed_lists, unsubscribed_lists ON print_list_subscribers
+        FOR EACH ROW EXECUTE FUNCTION sync_print_list_membership()""",
+]
+
+INDEX_STATEMENTS = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_print_lists_subscribed_gin ON print_list_subscribers USING gin (print_lists_subscribed)",
+]
+
+
+def add_print_list_membership():
+    DATABASE_URL = os.getenv('DATABASE_URL')
+    if not DATABASE_URL:
+        sys.exit("DATABASE_URL is not set")
+    engine = create_engine(DATABASE_URL)
+
+    with engine.begin() as conn:
+        for stmt in STATEMENTS:
+            print(f"Running: {' '.join(stmt.split())[:100]}")
+            conn.execute(text(stmt))
+        max_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM print_list_subscribers")).scalar()
+
+    started = time.time()
+    backfilled = 0
+    lo = 0
+    while lo < max_id:
+        hi = lo + BACKFILL_BATCH
+        with engine.begin() as conn:
+            backfilled += conn.execute(text("""
+                UPDATE print_list_subscribers
+                SET print_lists_subscribed = print_list_names(subscribed_lists),
+                    print_lists_unsubscribed = print_list_names(unsubscribed_lists)
+                WHERE id > :lo AND id <= :hi
+                  AND (print_lists_subscribed IS NULL OR print_lists_unsubscribed IS NULL)
+            """), {'lo': lo, 'hi': hi}).rowcount
+        print(f"  ids {lo + 1}..{hi}: {backfilled:,} rows backfilled")
+        lo = hi
+    print(f"Backfill done: {backfilled:,} rows in {time.time() - started:.1f}s")
+
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for stmt in INDEX_STATEMENTS:
+            print(f"Running: {stmt}")
+            conn.execute(text(stmt))
+        conn.execute(text("ANALYZE print_list_subscribers"))
+    print("Done.")
+
+
+if __name__ == '__main__':
+    add_print_list_membership()
@@ -1,6 +1,7 @@
 import os
 import sys
 import json
+import time
 from datetime import datetime, timezone
 
 import pandas as pd
@@ -8,6 +9,9 @@ import psycopg2
 from psycopg2.extras import execute_values, RealDictCursor
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from query_helpers import copy_rows
+
 load_dotenv()
 
 FULL_LIST_URL = (
@@ -19,6 +23,8 @@ MASTER_LIST_NAME = '*Master List'
 SOURCE_TAG = 'backfill_initial'
 USER_CHUNK = 5000
 INSERT_BATCH = 5000
+CHECKPOINT_JOB = 'backfill_membership_events'
+EVENT_COLUMNS = ['user_profile_id', 'email', 'dimension', 'name', 'event', 'source', 'reason', 'at']
 
 
 def parse_dt(s):
@@ -140,6 +146,7 @@ def insert_events_idempotent(conn, rows):
               AND e.name = t.name
               AND e.event = t.event
         )
+        ON CONFLICT DO NOTHING
     """)
     inserted = cur.rowcount
     conn.commit()
@@ -147,6 +154,144 @@ def insert_events_idempotent(conn, rows):
     return inserted
 
 
+def _stage_events(cur, rows):
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS _bf_events (
+            user_profile_id INTEGER,
+            email TEXT,
+            dimension TEXT,
+            name TEXT,
+            event TEXT,
+            source TEXT,
+            reason TEXT,
+            at TIMESTAMP
+        ) ON COMMIT DROP
+    """)
+    cur.execute("TRUNCATE _bf_events")
+    copy_rows(cur, '_bf_events', EVENT_COLUMNS, rows)
+
+
+NEW_EVENTS_SQL = """
+    SELECT DISTINCT ON (t.user_profile_id, t.dimension, t.name, t.event)
+           t.user_profile_id, t.email, t.dimension, t.name, t.event, t.at, t.source, t.reason
+    FROM _bf_events t
+    WHERE NOT EXISTS (
+        SELECT 1 FROM ac_membership_events e
+        WHERE e.user_profile_id = t.user_profile_id
+          AND e.dimension = t.dimension
+          AND e.name = t.name
+          AND e.event = t.event
+    )
+    ORDER BY t.user_profile_id, t.dimension, t.name, t.event, t.at
+"""
+
+
+def insert_new_events(cur):
+    cur.execute(f"""
+        INSERT INTO ac_membership_events
+            (user_profile_id, email, dimension, name, event, at, source, reason)
+        {NEW_EVENTS_SQL}
+        ON CONFLICT (user_profile_id, dimension, name, event, at) DO NOTHING
+    """)
+    return cur.rowcount
+
+
+def count_new_events(cur):
+    cur.execute(f"SELECT COUNT(*) FROM ({NEW_EVENTS_SQL}) n")
+    return cur.fetchone()[0]
+
+
+def load_checkpoint(cur):
+    cur.execute("SELECT source_offset, users_loaded FROM etl_checkpoints WHERE job = %s", (CHECKPOINT_JOB,))
+    row = cur.fetchone()
+    return (row[0], row[1]) if row else (0, 0)
+
+
+def save_checkpoint(cur, last_id, users_seen, done=False):
+    cur.execute("""
+        INSERT INTO etl_checkpoints (job, source_offset, users_loaded, completed_at, updated_at)
+        VALUES (%s, %s, %s, CASE WHEN %s THEN NOW() END, NOW())
+        ON CONFLICT (job) DO UPDATE
+        SET source_offset = EXCLUDED.source_offset,
+            users_loaded = EXCLUDED.users_loaded,
+            completed_at = EXCLUDED.completed_at,
+            updated_at = EXCLUDED.updated_at
+    """, (CHECKPOINT_JOB, last_id, users_seen, done))
+
+
+def run_bulk(dry_run=False, start_after=None, restart=False):
+    dates_map = load_dates_from_csv()
+
+    conn = psycopg2.connect(os.getenv('DATABASE_URL'))
+    read_conn = psycopg2.connect(os.getenv('DATABASE_URL'))
+    cur = conn.cursor()
+
+    if restart and not dry_run:
+        cur.execute("DELETE FROM etl_checkpoints WHERE job = %s", (CHECKPOINT_JOB,))
+        conn.commit()
+    last_id, users_seen = load_checkpoint(cur)
+    if start_after is not None:
+        last_id, users_seen = start_after, 0
+    cur.execute("SELECT COUNT(*) FROM user_profiles WHERE email IS NOT NULL AND id > %s", (last_id,))
+    remaining = cur.fetchone()[0]
+    conn.commit()
+    print(f"Scanning {remaining:,} user_profiles rows after id {last_id:,}...")
+
+    scan = read_conn.cursor(name='backfill_membership_scan', cursor_factory=RealDictCursor)
+    scan.itersize = USER_CHUNK
+    scan.execute("""
+        SELECT id, email, created_at,
+               digital_lists_subscribed, digital_lists_unsubscribed,
+               ac_tags, ac_segments
+        FROM user_profiles
+        WHERE email IS NOT NULL AND id > %s
+        ORDER BY id
+    """, (last_id,))
+
+    started = time.time()
+    scanned = 0
+    total_events_built = 0
+    total_new = 0
+    try:
+        while True:
+            users = scan.fetchmany(USER_CHUNK)
+            if not users:
+                break
+            events = []
+            for u in users:
+                events.extend(build_events_for_user(u, dates_map))
+            scanned += len(users)
+            users_seen += len(users)
+            last_id = users[-1]['id']
+            total_events_built += len(events)
+
+            _stage_events(cur, events)
+            if dry_run:
+                total_new += count_new_events(cur)
+                conn.rollback()
+            else:
+                total_new += insert_new_events(cur)
+                save_checkpoint(cur, last_id, users_seen)
+                conn.commit()
+
+            rate = scanned / max(time.time() - started, 0.001)
+            print(f"  {'[dry-run] ' if dry_run else ''}users={scanned:,}/{remaining:,} last_id={last_id:,} "
+                  f"events_built={total_events_built:,} {'new' if dry_run else 'inserted'}={total_new:,} "
+                  f"rate={rate:,.0f} users/s", flush=True)
+
+        if not dry_run:
+            save_checkpoint(cur, last_id, users_seen, done=True)
+            conn.commit()
+    finally:
+        scan.close()
+        cur.close()
+        read_conn.close()
+        conn.close()
+
+    print(f"\nDone. users_processed={scanned:,} events_built={total_events_built:,} "
+          f"{'would_insert' if dry_run else 'inserted'}={total_new:,} last_id={last_id:,}")
+
+
 def run(dry_run=False):
     dates_map = load_dates_from_csv()
 
@@ -198,4 +343,10 @@ if __name__ == '__main__':
     dry = '--dry-run' in sys.argv
     if dry:
         print(">>> DRY RUN — no DB writes <<<")
-    run(dry_run=dry)
\ No newline at end of file
+    if '--bulk' in sys.argv:
+        start_after = None
+        if '--from-id' in sys.argv:
+            start_after = int(sys.argv[sys.argv.index('--from-id') + 1])
+        run_bulk(dry_run=dry, start_after=start_after, restart='--restart' in sys.argv)
+    else:
+        run(dry_run=dry)
\ No newline at end of file
@@ -0,0 +1,134 @@
+import os
+import sys
+import csv
+import time
+from collections import defaultdict
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+if not os.getenv('DATABASE_URL'):
+    sys.exit("DATABASE_URL is not set")
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from query_helpers import copy_rows
+from routes.list_management import (
+    _ncoa_get, _norm_addr, _norm_name, _split_individual_name, _addresses_equal,
+    _first_name_compatible, _addr_hash,
+)
+
+TABLE_ADDRESSES = {
+    'universal_profiles': ['mailing_address_1', 'practice_address_1'],
+    'user_profiles': ['address'],
+    'print_only_contacts': ['address'],
+    'print_list_subscribers': ["concat_ws(' ', address_1, address_2)"],
+}
+HASH_COLUMNS = {
+    'universal_profiles': ['mailing_addr_hash', 'practice_addr_hash'],
+    'user_profiles': ['addr_hash'],
+    'print_only_contacts': ['addr_hash'],
+    'print_list_subscribers': ['addr_hash'],
+}
+
+
+def load_ncoa_rows(path):
+    with open(path, encoding='utf-8-sig', errors='replace', newline='') as f:
+        rows = []
+        for r in csv.DictReader(f):
+            first, last = _split_individual_name(_ncoa_get(r, 'individual_name'))
+            old_addr = _ncoa_get(r, 'previous_delivery_address')
+            if not last or not _norm_addr(old_addr):
+                continue
+            rows.append((len(rows), _norm_name(first), _norm_name(last), old_addr,
+                         _ncoa_get(r, 'current_delivery_address')))
+        return rows
+
+
+def legacy_matches(cur, rows):
+    last_names = list({r[2] for r in rows})
+    pairs = set()
+    for table, columns in TABLE_ADDRESSES.items():
+        cur.execute(f"""
+            SELECT id, first_name, last_name, {', '.join(f'{c} AS a{i}' for i, c in enumerate(columns))}
+            FROM {table}
+            WHERE UPPER(TRIM(last_name)) = ANY(%s)
+        """, (last_names,))
+        idx = defaultdict(list)
+        for c in cur.fetchall():
+            idx[_norm_name(c['last_name'])].append(c)
+        for row_no, first, last, old_addr, new_addr in rows:
+            norm_old, norm_new = _norm_addr(old_addr), _norm_addr(new_addr)
+            for c in idx.get(last, []):
+                if not _first_name_compatible(first, c['first_name']):
+                    continue
+                for i in range(len(columns)):
+                    addr_n = _norm_addr(c[f'a{i}'])
+                    if _addresses_equal(addr_n, norm_old) or (norm_new and _addresses_equal(addr_n, norm_new)):
+                        pairs.add((row_no, table, c['id']))
+                        break
+    return pairs
+
+
+def hash_matches(cur, rows):
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS tmp_ncoa_rows (
+            row_no INTEGER, norm_first TEXT, norm_last TEXT, addr_hash BIGINT
+        ) ON COMMIT DROP
+    """)
+    cur.execute("TRUNCATE tmp_ncoa_rows")
+    staged = {}
+    for row_no, first, last, old_addr, new_addr in rows:
+        for h in {_addr_hash(old_addr), _addr_hash(new_addr)} - {None}:
+            staged[(row_no, h)] = (row_no, first, last, h)
+    copy_rows(cur, 'tmp_ncoa_rows', ['row_no', 'norm_first', 'norm_last', 'addr_hash'], staged.values())
+    cur.execute("ANALYZE tmp_ncoa_rows")
+
+    pairs = set()
+    for table, column in ((t, c) for t, columns in HASH_COLUMNS.items() for c in columns):
+        cur.execute(f"""
+            SELECT DISTINCT t.row_no, t.norm_first, p.id, p.first_name
+            FROM tmp_ncoa_rows t
+            JOIN {table} p ON p.{column} = t.addr_hash
+            WHERE UPPER(TRIM(p.last_name)) = t.norm_last
+        """)
+        for r in cur.fetchall():
+            if _first_name_compatible(r['norm_first'], r['first_name']):
+                pairs.add((r['row_no'], table, r['id']))
+    return pairs
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main(paths):
+    conn = psycopg2.connect(os.getenv('DATABASE_URL'))
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    ok = True
+    print(f"{'file':<40} {'rows':>6} {'before':>9} {'after':>9} {'speedup':>8} {'matches':>8}  parity")
+    try:
+        for path in paths:
+            rows = load_ncoa_rows(path)
+            legacy, before = timed(legacy_matches, cur, rows)
+            hashed, after = timed(hash_matches, cur, rows)
+            conn.rollback()
+            same = legacy == hashed
+            ok = ok and same
+            parity = 'OK' if same else f'MISMATCH (-{len(legacy - hashed)} +{len(hashed - legacy)})'
+            print(f"{os.path.basename(path)[:40]:<40} {len(rows):>6} {before:>8.2f}s {after:>8.2f}s "
+                  f"{before / max(after, 1e-6):>7.1f}x {len(hashed):>8}  {parity}")
+    finally:
+        cur.close()
+        conn.close()
+    return ok
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python scripts/benchmark_ncoa_verify.py <ncoa_return.csv> [...]")
+        sys.exit(1)
+    sys.exit(0 if main(sys.argv[1:]) else 1)
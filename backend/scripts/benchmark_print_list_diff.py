@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+if not os.getenv('DATABASE_URL'):
+    sys.exit("DATABASE_URL is not set")
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from scripts.apply_print_list_sync import BASE, load_xlsx_rows
+from scripts.print_list_diff import (
+    LIST_MEMBER_SQL, SUBSCRIBER_COLUMNS, excel_key, match_key, stage_row,
+    stage_excel_rows, match_staged_rows, diff_report,
+)
+
+LIST_NAME = 'JCAD'
+PRINT_FILE = 'JCAD Print List.xlsx'
+COMP_FILE = 'JCAD Comp List.xlsx'
+
+
+def timed(timings, label, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    timings.append((label, time.perf_counter() - start))
+    return result
+
+
+def load_rows():
+    rows = []
+    for name, is_comp in ((PRINT_FILE, False), (COMP_FILE, True)):
+        for r in load_xlsx_rows(os.path.join(BASE, name)):
+            r['__is_comp'] = is_comp
+            rows.append(r)
+    return rows
+
+
+def reference_diff(conn, excel_rows):
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute(f"SELECT {SUBSCRIBER_COLUMNS} FROM print_list_subscribers p WHERE {LIST_MEMBER_SQL}",
+                {'list_name': LIST_NAME})
+    db_by_key = {}
+    for r in cur.fetchall():
+        db_by_key.setdefault(match_key(r.get('npi'), r.get('first_name'), r.get('last_name'), r.get('address_1'),
+                                       r.get('city'), r.get('state'), r.get('zipcode')), r)
+    cur.close()
+    matched = set()
+    seen = set()
+    unmatched = 0
+    for r in excel_rows:
+        key = excel_key(r)
+        if key in seen:
+            continue
+        seen.add(key)
+        if key in db_by_key:
+            matched.add(db_by_key[key]['id'])
+        else:
+            unmatched += 1
+    return {'key': len(matched), 'unmatched': unmatched}
+
+
+def engine_diff(conn, excel_rows):
+    cur = conn.cursor()
+    stage_excel_rows(cur, (stage_row(i, r, r['__is_comp']) for i, r in enumerate(excel_rows)))
+    counts = match_staged_rows(cur, LIST_NAME)
+    cur.close()
+    return counts
+
+
+def main():
+    conn = psycopg2.connect(os.getenv('DATABASE_URL'))
+    timings = []
+    try:
+        excel_rows = timed(timings, 'excel load', load_rows)
+        reference = timed(timings, 'reference (python dict join)', reference_diff, conn, excel_rows)
+        counts = timed(timings, 'engine stage + match', engine_diff, conn, excel_rows)
+        report = timed(timings, 'engine report', diff_report, conn, LIST_NAME, excel_rows)
+    finally:
+        conn.rollback()
+        conn.close()
+
+    print(f'{LIST_NAME}: {len(excel_rows)} Excel rows')
+    for label, seconds in timings:
+        print(f'  {label:<32} {seconds:>8.2f}s')
+    print(f"  exact-key matches: reference={reference['key']} engine={counts['key']}"
+          f" {'OK' if reference['key'] == counts['key'] else 'MISMATCH'}")
+    print(f"  name matches={counts['name']} adds={len(report['adds'])} edits={len(report['edits'])}"
+          f" flag_flips={len(report['flag_flips'])} removes={len(report['removes'])}")
+    return reference['key'] == counts['key']
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
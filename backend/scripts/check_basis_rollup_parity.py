@@ -0,0 +1,103 @@
+import os
+import sys
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+load_dotenv()
+if not os.getenv('DATABASE_URL'):
+    sys.exit("DATABASE_URL is not set")
+
+from sqlalchemy import func
+from models import get_session, BasisExchangeStats, BasisDailyStats
+from basis_rollups import refresh_basis_rollups
+from routes.basis import _accumulate, exchange_totals, campaign_totals, property_totals
+
+SPEND_TOLERANCE = 0.01
+
+
+def raw_totals(session, model, key_fields, sum_fields, start=None, end=None, filters=()):
+    sums = {
+        'impressions': func.sum(model.impressions),
+        'clicks': func.sum(model.clicks),
+        'spend': func.sum(model.spend),
+        'days_active': func.count(func.distinct(model.report_date)),
+    }
+    if hasattr(model, 'bids'):
+        sums['bids'] = func.sum(model.bids)
+    query = session.query(
+        *[getattr(model, f) for f in key_fields],
+        *[sums[f].label(f) for f in sum_fields]
+    ).filter(*filters)
+    if start:
+        query = query.filter(model.report_date >= start)
+    if end:
+        query = query.filter(model.report_date <= end)
+    totals = {}
+    _accumulate(totals, query.group_by(*[getattr(model, f) for f in key_fields]).all(), key_fields, sum_fields)
+    return totals
+
+
+def compare(label, raw, rolled):
+    mismatches = []
+    for key in set(raw) | set(rolled):
+        a = raw.get(key)
+        b = rolled.get(key)
+        if a is None or b is None:
+            mismatches.append((key, a, b))
+            continue
+        for field, value in a.items():
+            tolerance = SPEND_TOLERANCE if field == 'spend' else 0
+            if abs(value - b[field]) > tolerance:
+                mismatches.append((key, a, b))
+                break
+    status = 'OK' if not mismatches else 'MISMATCH'
+    print(f"{label:<40} raw={len(raw):>6} rollup={len(rolled):>6}  {status}")
+    for key, a, b in mismatches[:10]:
+        print(f"    {key}: raw={a} rollup={b}")
+    return not mismatches
+
+
+def main():
+    session = get_session()
+    try:
+        if '--refresh' in sys.argv:
+            rows = refresh_basis_rollups(session)
+            print(f"Refreshed rollups: {rows:,} rows")
+
+        today = datetime.utcnow().date()
+        window_start = today - timedelta(days=45)
+        window_end = today - timedelta(days=3)
+        property_filters = (BasisDailyStats.property_name.isnot(None),
+                            func.length(BasisDailyStats.property_name) > 0)
+        exchange_fields = ['impressions', 'clicks', 'spend', 'bids']
+        property_fields = ['impressions', 'clicks', 'spend', 'days_active']
+
+        checks = [
+            ('exchange (all time)',
+             raw_totals(session, BasisExchangeStats, ['exchange_name'], exchange_fields),
+             exchange_totals(session)),
+            ('exchange (partial-week window)',
+             raw_totals(session, BasisExchangeStats, ['exchange_name'], exchange_fields, window_start, window_end),
+             exchange_totals(session, window_start, window_end)),
+            ('campaign (all time)',
+             raw_totals(session, BasisExchangeStats, ['basis_campaign_id'], exchange_fields),
+             campaign_totals(session)),
+            ('campaign (partial-week window)',
+             raw_totals(session, BasisExchangeStats, ['basis_campaign_id'], exchange_fields, window_start, window_end),
+             campaign_totals(session, window_start, window_end)),
+            ('property/vendor (last 365 days)',
+             raw_totals(session, BasisDailyStats, ['property_name', 'vendor_name'], property_fields,
+                        today - timedelta(days=365), None, property_filters),
+             property_totals(session, today - timedelta(days=365))),
+        ]
+
+        ok = all([compare(label, raw, rolled) for label, raw, rolled in checks])
+    finally:
+        session.close()
+    return ok
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,42 @@
+import os
+import sys
+from dotenv import load_dotenv
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+load_dotenv()
+if not os.getenv('DATABASE_URL'):
+    sys.exit("DATABASE_URL is not set")
+
+from query_helpers import assert_max_statements
+from routes.ab_testing import ab_testing_bp
+from routes.programs import programs_bp
+
+CHECKS = [
+    ('GET /api/ab-testing/tests', '/api/ab-testing/tests', 'tests', 2, ['ab_tests', 'ab_test_groups']),
+    ('GET /api/programs/', '/api/programs/', 'programs', 3, ['programs', 'program_items', 'sub_programs']),
+]
+
+
+def main():
+    app = Flask(__name__)
+    app.register_blueprint(ab_testing_bp, url_prefix='/api/ab-testing')
+    app.register_blueprint(programs_bp, url_prefix='/api/programs')
+    client = app.test_client()
+
+    ok = True
+    for label, url, key, limit, tables in CHECKS:
+        try:
+            with assert_max_statements(limit, tables=tables) as statements:
+                response = client.get(url)
+            rows = len((response.get_json() or {}).get(key) or [])
+            print(f"{label:<32} {rows:>5} rows  {len(statements):>3} statements  OK")
+        except AssertionError as e:
+            ok = False
+            print(f"{label:<32} FAILED: {e}")
+    return ok
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
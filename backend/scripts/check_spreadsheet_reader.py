@@ -0,0 +1,67 @@
+import os
+import re
+import sys
+import zipfile
+from io import BytesIO
+
+import openpyxl
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spreadsheet_reader import iter_xlsx_rows, iter_xlsx_records, read_xlsx_frame
+
+SAMPLE_ROWS = [
+    ('Name', 'NPI', 'Zip'),
+    ('Ada Smith', '1234567890', '02139'),
+    ('Ben Jones', '1987654321', '10001'),
+    (None, None, None),
+    ('Cy Park', '1122334455', '94105'),
+]
+
+
+def stale_dimension_workbook(rows, ref='A1'):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for row in rows:
+        ws.append(row)
+    raw = BytesIO()
+    wb.save(raw)
+
+    out = BytesIO()
+    with zipfile.ZipFile(BytesIO(raw.getvalue())) as src, zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename == 'xl/worksheets/sheet1.xml':
+                data = re.sub(rb'<dimension ref="[^"]*"\s*/>', f'<dimension ref="{ref}"/>'.encode(), data)
+            dst.writestr(item, data)
+    return out.getvalue()
+
+
+def check(label, ok):
+    print(f"{'OK  ' if ok else 'FAIL'} {label}")
+    return ok
+
+
+def main():
+    content = stale_dimension_workbook(SAMPLE_ROWS)
+    expected = pd.read_excel(BytesIO(content), dtype=str).dropna(how='all').reset_index(drop=True)
+
+    rows = list(iter_xlsx_rows(BytesIO(content)))
+    records = list(iter_xlsx_records(BytesIO(content)))
+    frame = read_xlsx_frame(BytesIO(content))
+
+    results = [
+        check('iter_xlsx_rows reads every column past a stale <dimension>',
+              rows[:1] == [SAMPLE_ROWS[0]] and len(rows) == len(SAMPLE_ROWS)),
+        check('iter_xlsx_records matches pd.read_excel',
+              records == expected.to_dict('records')),
+        check('read_xlsx_frame matches pd.read_excel',
+              list(frame.columns) == list(expected.columns) and frame.astype(str).values.tolist()
+              == expected.astype(str).values.tolist()),
+    ]
+    return all(results)
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
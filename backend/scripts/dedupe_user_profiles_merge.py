@@ -1,12 +1,17 @@
 import os
 import sys
 import time
+import json
 from collections import defaultdict
+from itertools import groupby
 
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from query_helpers import copy_rows
+
 load_dotenv()
 
 DATABASE_URL = os.getenv('DATABASE_URL') or \
@@ -25,6 +30,13 @@ JSONB_ARRAY_COLS = [
     'print_lists_subscribed', 'print_lists_unsubscribed',
     'target_lists', 'address_history',
 ]
+ADDRESS_FLAG_COLS = [
+    'last_address_flag_event', 'last_address_flag_reason',
+    'last_address_flag_source', 'last_address_flag_at',
+]
+ADDRESS_FLAG_EVENTS = ('address_flagged_invalid', 'undeliverable')
+BATCH_GROUPS = 2000
+SCAN_ITERSIZE = 10000
 
 
 def get_existing_columns(cur):
@@ -49,7 +61,7 @@ def fetch_duplicate_groups(cur):
 
 def fetch_rows_for_email(cur, email_lc, present_cols):
     cols = ['id', 'email', 'is_active', 'created_at', 'updated_at',
-            'inactive_at'] + SCALAR_PREFERRED + JSONB_ARRAY_COLS
+            'inactive_at'] + SCALAR_PREFERRED + JSONB_ARRAY_COLS + ADDRESS_FLAG_COLS
     cols = [c for c in cols if c in present_cols]
     col_list = ', '.join(cols)
     cur.execute(
@@ -96,6 +108,16 @@ def merge_rows(rows, cols):
                     seen.append(item)
         merged[col] = seen
 
+    if 'last_address_flag_event' in cols:
+        flag_events = [e for e in merged.get('address_history') or []
+                       if isinstance(e, dict) and e.get('event') in ADDRESS_FLAG_EVENTS]
+        if flag_events:
+            latest = max(flag_events, key=lambda e: e.get('changed_at') or '')
+            merged['last_address_flag_event'] = latest.get('event')
+            merged['last_address_flag_reason'] = latest.get('reason')
+            merged['last_address_flag_source'] = latest.get('source')
+            merged['last_address_flag_at'] = latest.get('changed_at')
+
     if 'created_at' in cols:
         created_values = [r.get('created_at') for r in all_rows if r.get('created_at') is not None]
         merged['created_at'] = min(created_values) if created_values else None
@@ -124,6 +146,17 @@ def apply_merge(conn, winner, losers, merged, cols):
 
     loser_ids = [l['id'] for l in losers]
     if loser_ids:
+        cur.execute("""
+            DELETE FROM ac_membership_events e
+            WHERE e.user_profile_id = ANY(%(losers)s)
+              AND EXISTS (
+                SELECT 1 FROM ac_membership_events o
+                WHERE o.dimension = e.dimension AND o.name = e.name
+                  AND o.event = e.event AND o.at = e.at
+                  AND (o.user_profile_id = %(winner)s
+                       OR (o.user_profile_id = ANY(%(losers)s) AND o.id < e.id))
+              )
+        """, {'winner': winner['id'], 'losers': loser_ids})
         cur.execute(
             "UPDATE ac_membership_events SET user_profile_id = %s WHERE user_profile_id = ANY(%s)",
             (winner['id'], loser_ids),
@@ -140,6 +173,10 @@ def apply_merge(conn, winner, losers, merged, cols):
         if col in cols:
             sets.append(f"{col} = %s::jsonb")
             params.append(_json.dumps(merged.get(col) or []))
+    for col in ADDRESS_FLAG_COLS:
+        if col in cols:
+            sets.append(f"{col} = %s")
+            params.append(merged.get(col))
     if 'created_at' in cols:
         sets.append("created_at = %s")
         params.append(merged.get('created_at'))
@@ -155,6 +192,174 @@ def apply_merge(conn, winner, losers, merged, cols):
     cur.close()
 
 
+def merge_columns(cols):
+    update_cols = [c for c in SCALAR_PREFERRED + ['email'] + JSONB_ARRAY_COLS + ADDRESS_FLAG_COLS
+                   + ['created_at', 'inactive_at'] if c in cols]
+    return update_cols + ['is_active']
+
+
+def iter_duplicate_groups(read_conn, present_cols):
+    cols = ['id', 'email', 'is_active', 'created_at', 'updated_at',
+            'inactive_at'] + SCALAR_PREFERRED + JSONB_ARRAY_COLS + ADDRESS_FLAG_COLS
+    cols = [c for c in cols if c in present_cols]
+    cur = read_conn.cursor(name='dedupe_user_profiles_scan', cursor_factory=RealDictCursor)
+    cur.itersize = SCAN_ITERSIZE
+    cur.execute(f"""
+        WITH dup AS (
+            SELECT LOWER(TRIM(email)) AS e
+            FROM user_profiles
+            WHERE email IS NOT NULL AND email <> ''
+            GROUP BY 1
+            HAVING COUNT(*) > 1
+        )
+        SELECT {', '.join('p.' + c for c in cols)}, dup.e AS email_key
+        FROM user_profiles p
+        JOIN dup ON LOWER(TRIM(p.email)) = dup.e
+        ORDER BY dup.e, p.id
+    """)
+    try:
+        for email_lc, rows in groupby(cur, key=lambda r: r['email_key']):
+            yield email_lc, [{k: v for k, v in r.items() if k != 'email_key'} for r in rows], cols
+    finally:
+        cur.close()
+
+
+def _copy_value(col, value):
+    if col in JSONB_ARRAY_COLS:
+        return json.dumps(value or [], default=str)
+    return value
+
+
+def apply_merge_batch(conn, batch, cols):
+    update_cols = merge_columns(cols)
+    cur = conn.cursor()
+    cur.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS tmp_dedupe_winners ON COMMIT DROP AS
+        SELECT id, {', '.join(update_cols)} FROM user_profiles LIMIT 0
+    """)
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS tmp_dedupe_losers (
+            loser_id INTEGER PRIMARY KEY, winner_id INTEGER NOT NULL
+        ) ON COMMIT DROP
+    """)
+    cur.execute("TRUNCATE tmp_dedupe_winners, tmp_dedupe_losers")
+    copy_rows(cur, 'tmp_dedupe_winners', ['id'] + update_cols,
+              ([winner['id']] + [_copy_value(c, merged.get(c)) for c in update_cols]
+               for winner, _, merged in batch))
+    copy_rows(cur, 'tmp_dedupe_losers', ['loser_id', 'winner_id'],
+              ((l['id'], winner['id']) for winner, losers, _ in batch for l in losers))
+
+    cur.execute("""
+        DELETE FROM ac_membership_events e
+        USING tmp_dedupe_losers l
+        WHERE e.user_profile_id = l.loser_id
+          AND EXISTS (
+            SELECT 1 FROM ac_membership_events o
+            WHERE o.dimension = e.dimension AND o.name = e.name
+              AND o.event = e.event AND o.at = e.at
+              AND (o.user_profile_id = l.winner_id
+                   OR (o.id < e.id AND o.user_profile_id IN (
+                       SELECT l2.loser_id FROM tmp_dedupe_losers l2 WHERE l2.winner_id = l.winner_id)))
+          )
+    """)
+    cur.execute("""
+        UPDATE ac_membership_events e SET user_profile_id = l.winner_id
+        FROM tmp_dedupe_losers l
+        WHERE e.user_profile_id = l.loser_id
+    """)
+    cur.execute("DELETE FROM user_profiles p USING tmp_dedupe_losers l WHERE p.id = l.loser_id")
+    deleted = cur.rowcount
+    cur.execute(f"""
+        UPDATE user_profiles p SET {', '.join(f'{c} = w.{c}' for c in update_cols)}, updated_at = NOW()
+        FROM tmp_dedupe_winners w
+        WHERE p.id = w.id
+    """)
+    cur.close()
+    return deleted
+
+
+def _apply_batch_or_groups(conn, batch, cols):
+    try:
+        deleted = apply_merge_batch(conn, batch, cols)
+        conn.commit()
+        return len(batch), 0, deleted
+    except psycopg2.DatabaseError as e:
+        conn.rollback()
+        print(f'  batch of {len(batch):,} groups failed ({e}); retrying group by group', flush=True)
+
+    success = failed = deleted = 0
+    for winner, losers, merged in batch:
+        try:
+            apply_merge(conn, winner, losers, merged, cols)
+            conn.commit()
+            success += 1
+            deleted += len(losers)
+        except Exception as e:
+            conn.rollback()
+            failed += 1
+            print(f'  FAILED {merged["email"]}: {e}', flush=True)
+    return success, failed, deleted
+
+
+def run_batched(dry_run, batch_groups=BATCH_GROUPS):
+    conn = psycopg2.connect(DATABASE_URL)
+    read_conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    present_cols = get_existing_columns(cur)
+    cur.execute("""
+        SELECT COUNT(*) FROM (
+            SELECT 1 FROM user_profiles
+            WHERE email IS NOT NULL AND email <> ''
+            GROUP BY LOWER(TRIM(email))
+            HAVING COUNT(*) > 1
+        ) d
+    """)
+    total_groups = cur.fetchone()[0]
+    cur.close()
+    conn.commit()
+    print(f'duplicate-email groups: {total_groups:,} (batches of {batch_groups:,})')
+
+    started = time.time()
+    seen = success = failed = rows_deleted = 0
+    batch = []
+    cols = []
+
+    def flush():
+        nonlocal success, failed, rows_deleted
+        if dry_run:
+            success += len(batch)
+            rows_deleted += sum(len(losers) for _, losers, _ in batch)
+        else:
+            ok, bad, deleted = _apply_batch_or_groups(conn, batch, cols)
+            success += ok
+            failed += bad
+            rows_deleted += deleted
+        batch.clear()
+        elapsed = time.time() - started
+        rate = seen / max(elapsed, 0.001)
+        eta = (total_groups - seen) / max(rate, 0.001)
+        print(f'  {seen:,}/{total_groups:,} groups; merged={success:,} failed={failed:,} '
+              f'deleted={rows_deleted:,} rate={rate:,.0f}/s eta={eta:.0f}s', flush=True)
+
+    try:
+        for email_lc, rows, cols in iter_duplicate_groups(read_conn, present_cols):
+            seen += 1
+            winner, losers, merged = merge_rows(rows, cols)
+            if dry_run and seen <= 5:
+                print(f'  {email_lc}: {len(rows)} rows -> 1 row; merged subs={len(merged.get("digital_lists_subscribed") or [])}, is_active={merged["is_active"]}, would_delete_ids={[l["id"] for l in losers]}')
+            batch.append((winner, losers, merged))
+            if len(batch) >= batch_groups:
+                flush()
+        if batch:
+            flush()
+    finally:
+        read_conn.close()
+        conn.close()
+
+    label = '[dry-run] would merge' if dry_run else 'DONE'
+    print(f'\n{label} in {time.time()-started:.0f}s: merged_groups={success:,} failed_groups={failed:,} rows_deleted={rows_deleted:,}', flush=True)
+
+
 def run(dry_run):
     conn = psycopg2.connect(DATABASE_URL)
     cur = conn.cursor()
@@ -238,4 +443,10 @@ if __name__ == '__main__':
     dry = '--dry-run' in sys.argv
     if dry:
         print('>>> DRY RUN — no DB writes <<<')
-    run(dry_run=dry)
\ No newline at end of file
+    if '--batched' in sys.argv:
+        batch_groups = BATCH_GROUPS
+        if '--batch-size' in sys.argv:
+            batch_groups = int(sys.argv[sys.argv.index('--batch-size') + 1])
+        run_batched(dry_run=dry, batch_groups=batch_groups)
+    else:
+        run(dry_run=dry)
\ No newline at end of file
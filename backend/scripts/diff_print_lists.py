@@ -1,8 +1,6 @@
 import os
 import sys
-import re
 import json
-import openpyxl
 from collections import defaultdict
 from dotenv import load_dotenv
 
@@ -12,148 +10,26 @@ load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file_
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+from spreadsheet_reader import iter_xlsx_records, xlsx_sheet_names
+from scripts.print_list_diff import (
+    norm_str, norm_zip, norm_addr, get_addr, get_zip, name_key,
+    stage_row, stage_excel_rows, match_staged_rows, list_member_count, diff_report,
+)
+
 BASE = r'C:\Users\AndrewDaly\Desktop\email-campaign-dashboard\backend\Lists\Print Lists'
 HT_BASE = os.path.join(BASE, 'Hot Topics List Changes')
 
 
-def norm_str(s):
-    if s is None:
-        return ''
-    if isinstance(s, float):
-        if s.is_integer():
-            s = str(int(s))
-        else:
-            s = str(s)
-    s = str(s).strip().upper()
-    s = re.sub(r'\s+', ' ', s)
-    return s
-
-
-def norm_zip(s):
-    if s is None:
-        return ''
-    if isinstance(s, float):
-        if s.is_integer():
-            s = str(int(s))
-        else:
-            s = str(s)
-    s = re.sub(r'\D', '', str(s))
-    if len(s) > 5:
-        s = s[:5]
-    return s.zfill(5) if s else ''
-
-
-def norm_addr(s):
-    if not s:
-        return ''
-    s = norm_str(s)
-    repl = {
-        'STREET': 'ST', 'AVENUE': 'AVE', 'BOULEVARD': 'BLVD', 'DRIVE': 'DR',
-        'LANE': 'LN', 'ROAD': 'RD', 'COURT': 'CT', 'PLACE': 'PL',
-        'SUITE': 'STE', 'APARTMENT': 'APT', 'BUILDING': 'BLDG',
-        'NORTH': 'N', 'SOUTH': 'S', 'EAST': 'E', 'WEST': 'W',
-        'HIGHWAY': 'HWY', 'PARKWAY': 'PKWY', 'CIRCLE': 'CIR',
-    }
-    for full, abbr in repl.items():
-        s = re.sub(r'\b' + full + r'\b', abbr, s)
-    s = re.sub(r'[.,#]', '', s)
-    s = re.sub(r'\s+', ' ', s)
-    return s.strip()
-
-
-def norm_name(s):
-    if not s:
-        return ''
-    s = norm_str(s)
-    s = re.sub(r'[^A-Z\s-]', '', s)
-    return s.strip()
-
-
-def get_npi(row):
-    npi = row.get('NPI Number') or row.get('NPI') or row.get('npi')
-    if npi is None:
-        return None
-    if isinstance(npi, float):
-        if npi.is_integer():
-            npi = str(int(npi))
-        else:
-            return None
-    npi = str(npi).strip()
-    if re.match(r'^\d{10}$', npi):
-        return npi
-    return None
-
-
-def get_addr(row):
-    return row.get('Address 1') or row.get('Address Line 1') or row.get('Address  1') or ''
-
-
-def get_zip(row):
-    return row.get('Zip') or row.get('Zip Code') or ''
-
-
 def load_xlsx_rows(path, sheet=None):
-    wb = openpyxl.load_workbook(path, data_only=True)
-    sheets = [sheet] if sheet else wb.sheetnames
+    sheets = [sheet] if sheet else xlsx_sheet_names(path)
     out = []
     for sn in sheets:
-        ws = wb[sn]
-        rows = list(ws.iter_rows(values_only=True))
-        if not rows:
-            continue
-        header = [str(h).strip() if h else '' for h in rows[0]]
-        for r in rows[1:]:
-            if r is None or all(v is None or (isinstance(v, str) and not v.strip()) for v in r):
-                continue
-            d = {header[i]: r[i] for i in range(min(len(header), len(r)))}
+        for d in iter_xlsx_records(path, sheet=sn):
             d['__sheet'] = sn
             out.append(d)
-    wb.close()
     return out
 
 
-def excel_key(row):
-    npi = get_npi(row)
-    if npi:
-        return ('npi', npi)
-    fn = norm_name(row.get('First Name', ''))
-    ln = norm_name(row.get('Last Name', ''))
-    addr = norm_addr(get_addr(row))
-    city = norm_str(row.get('City', ''))
-    state = norm_str(row.get('State', ''))
-    zc = norm_zip(get_zip(row))
-    return ('nm', fn, ln, addr, city, state, zc)
-
-
-def db_key(row):
-    npi = (row.get('npi') or '').strip()
-    if npi and re.match(r'^\d{10}$', npi):
-        return ('npi', npi)
-    return (
-        'nm',
-        norm_name(row.get('first_name')),
-        norm_name(row.get('last_name')),
-        norm_addr(row.get('address_1')),
-        norm_str(row.get('city')),
-        norm_str(row.get('state')),
-        norm_zip(row.get('zipcode')),
-    )
-
-
-def fetch_subs(conn, list_name):
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    cur.execute("""
-        SELECT id, npi, first_name, last_name, degree, specialty, type_of_professional,
-               company, title, address_1, address_2, city, state, zipcode,
-               subscribed_lists, unsubscribed_lists, is_comp
-        FROM print_list_subscribers
-        WHERE subscribed_lists LIKE %s AND is_subscribed = TRUE
-    """, (f'%{list_name}%',))
-    rows = cur.fetchall()
-    cur.close()
-    return [r for r in rows if list_name in (r.get('subscribed_lists') or '').split(',')]
-
-
 def diff_print_list(conn, list_name, print_file, comp_file=None, comp_sheet=None, label=None):
     label = label or list_name
     print_rows = load_xlsx_rows(os.path.join(BASE, print_file))
@@ -168,96 +44,11 @@ def diff_print_list(conn, list_name, print_file, comp_file=None, comp_sheet=None
             r['__source'] = 'comp'
 
     excel_rows = print_rows + comp_rows
-    db_rows = fetch_subs(conn, list_name)
-
-    excel_by_key = {}
-    excel_by_name = defaultdict(list)
-    dupe_excel_keys = 0
-    for r in excel_rows:
-        k = excel_key(r)
-        if k in excel_by_key:
-            dupe_excel_keys += 1
-            continue
-        excel_by_key[k] = r
-        nk = (norm_name(r.get('First Name', '')), norm_name(r.get('Last Name', '')))
-        excel_by_name[nk].append(r)
-
-    db_by_key = {}
-    db_by_name = defaultdict(list)
-    dupe_db_keys = 0
-    for r in db_rows:
-        k = db_key(r)
-        if k in db_by_key:
-            dupe_db_keys += 1
-            continue
-        db_by_key[k] = r
-        nk = (norm_name(r.get('first_name')), norm_name(r.get('last_name')))
-        db_by_name[nk].append(r)
-
-    adds = []
-    edits = []
-    flag_flips = []
-    matched_db_ids = set()
-
-    for k, er in excel_by_key.items():
-        match = db_by_key.get(k)
-        if not match:
-            nk = (norm_name(er.get('First Name', '')), norm_name(er.get('Last Name', '')))
-            cands = db_by_name.get(nk, [])
-            for cand in cands:
-                if cand['id'] in matched_db_ids:
-                    continue
-                e_addr = norm_addr(get_addr(er))
-                d_addr = norm_addr(cand.get('address_1'))
-                if e_addr and d_addr and (e_addr[:10] == d_addr[:10] or norm_str(er.get('City')) == norm_str(cand.get('city'))):
-                    match = cand
-                    break
-        if not match:
-            adds.append(er)
-            continue
-        matched_db_ids.add(match['id'])
-
-        e_addr = norm_addr(get_addr(er))
-        e_city = norm_str(er.get('City'))
-        e_state = norm_str(er.get('State'))
-        e_zip = norm_zip(get_zip(er))
-        e_fn = norm_name(er.get('First Name'))
-        e_ln = norm_name(er.get('Last Name'))
-        e_comp = er['__is_comp']
-
-        d_addr = norm_addr(match.get('address_1'))
-        d_city = norm_str(match.get('city'))
-        d_state = norm_str(match.get('state'))
-        d_zip = norm_zip(match.get('zipcode'))
-        d_fn = norm_name(match.get('first_name'))
-        d_ln = norm_name(match.get('last_name'))
-        d_comp = bool(match.get('is_comp'))
-
-        field_diffs = {}
-        if e_addr and e_addr != d_addr:
-            field_diffs['address_1'] = (match.get('address_1'), get_addr(er))
-        if e_city and e_city != d_city:
-            field_diffs['city'] = (match.get('city'), er.get('City'))
-        if e_state and e_state != d_state:
-            field_diffs['state'] = (match.get('state'), er.get('State'))
-        if e_zip and d_zip and e_zip != d_zip:
-            field_diffs['zipcode'] = (match.get('zipcode'), get_zip(er))
-        if e_fn != d_fn and e_fn:
-            field_diffs['first_name'] = (match.get('first_name'), er.get('First Name'))
-        if e_ln != d_ln and e_ln:
-            field_diffs['last_name'] = (match.get('last_name'), er.get('Last Name'))
-
-        flag_changed = e_comp != d_comp
-
-        if field_diffs:
-            edits.append({'db': match, 'excel': er, 'diffs': field_diffs, 'flag_flip': flag_changed, 'new_is_comp': e_comp})
-        elif flag_changed:
-            flag_flips.append({'db': match, 'excel': er, 'new_is_comp': e_comp})
-
-    removes = []
-    for r in db_rows:
-        if r['id'] not in matched_db_ids:
-            removes.append(r)
+    cur = conn.cursor()
+    dupe_excel_keys = stage_excel_rows(cur, (stage_row(i, r, r['__is_comp']) for i, r in enumerate(excel_rows)))
+    match_staged_rows(cur, list_name)
+    cur.close()
+    db_count, dupe_db_keys = list_member_count(conn, list_name)
 
     return {
         'label': label,
@@ -266,12 +57,9 @@ def diff_print_list(conn, list_name, print_file, comp_file=None, comp_sheet=None
         'excel_print': len(print_rows),
         'excel_comp': len(comp_rows),
         'dupe_excel_keys': dupe_excel_keys,
-        'db_count': len(db_rows),
+        'db_count': db_count,
         'dupe_db_keys': dupe_db_keys,
-        'adds': adds,
-        'edits': edits,
-        'flag_flips': flag_flips,
-        'removes': removes,
+        **diff_report(conn, list_name, excel_rows),
     }
 
 
@@ -285,25 +73,25 @@ def diff_unsub_sheet(conn, excel_path, sheet, list_token, label=None):
     not_found = []
     multi = []
 
-    for er in rows:
-        fn_raw = er.get('First Name')
-        ln_raw = er.get('Last Name')
-        if not fn_raw or not ln_raw:
-            continue
-        fn = norm_name(fn_raw)
-        ln = norm_name(ln_raw)
+    named = [er for er in rows if er.get('First Name') and er.get('Last Name')]
+    cur.execute("""
+        SELECT id, npi, first_name, last_name, address_1, city, state, zipcode,
+               subscribed_lists, unsubscribed_lists, is_subscribed, name_key
+        FROM print_list_subscribers
+        WHERE name_key = ANY(%s)
+        ORDER BY id
+    """, (list({name_key(er.get('First Name'), er.get('Last Name')) for er in named}),))
+    cands_by_name = defaultdict(list)
+    for c in cur.fetchall():
+        cands_by_name[c.pop('name_key')].append(c)
+
+    for er in named:
         addr = norm_addr(get_addr(er))
         city = norm_str(er.get('City'))
         state = norm_str(er.get('State'))
         zc = norm_zip(get_zip(er))
 
-        cur.execute("""
-            SELECT id, npi, first_name, last_name, address_1, city, state, zipcode,
-                   subscribed_lists, unsubscribed_lists, is_subscribed
-            FROM print_list_subscribers
-            WHERE UPPER(TRIM(first_name)) = %s AND UPPER(TRIM(last_name)) = %s
-        """, (fn, ln))
-        cands = cur.fetchall()
+        cands = cands_by_name.get(name_key(er.get('First Name'), er.get('Last Name')), [])
         if not cands:
             not_found.append({'excel': er})
             continue
@@ -430,13 +218,11 @@ def main():
     ]
     for fname in ht_files:
         path = os.path.join(HT_BASE, fname)
-        wb = openpyxl.load_workbook(path, data_only=True, read_only=True)
-        for sn in wb.sheetnames:
+        for sn in xlsx_sheet_names(path):
             tok = f'HT-{sn}'
             key = f'HT::{fname}::{sn}'
             results[key] = diff_unsub_sheet(conn, path, sn, tok, label=key)
             summarize_unsub(results[key], key)
-        wb.close()
 
     out_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'print_list_diff_report.json')
     serializable = {}
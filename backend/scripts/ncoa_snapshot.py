@@ -1,12 +1,16 @@
 import os
+import sys
 import json
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
 
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+from query_helpers import copy_rows
+
 PEOPLE = [
     ('RENNY', 'ABRAHAM'), ('ARINDAM', 'BAGCHI'), ('AUNG', 'BAJAJ'),
     ('KAREN', 'BOSSOLT LO RUSSO'), ('MARK', 'BYRON'), ('SARAH', 'CONLON'),
@@ -28,60 +32,58 @@ PEOPLE = [
     ('JEN-CHIN', 'WANG'), ('IRIM', 'YASIN'),
 ]
 
-last_names = list({ln for _, ln in PEOPLE})
+SNAPSHOT_QUERIES = {
+    'universal_profiles': """
+        SELECT id, npi, first_name, last_name,
+               practice_address_1, practice_city, practice_state, practice_zipcode,
+               mailing_address_1, mailing_city, mailing_state, mailing_zipcode,
+               practice_addr_hash, mailing_addr_hash,
+               provider_status, provider_status_source, is_active,
+               COALESCE(jsonb_array_length(address_history), 0) AS hist_n
+    """,
+    'user_profiles': """
+        SELECT id, npi, first_name, last_name, address, city, state, zipcode, addr_hash, is_active,
+               inactive_reason, inactive_source,
+               COALESCE(jsonb_array_length(address_history), 0) AS hist_n
+    """,
+    'print_only_contacts': """
+        SELECT id, npi, first_name, last_name, address, city, state, zipcode, addr_hash, is_active,
+               print_lists_subscribed
+    """,
+    'print_list_subscribers': """
+        SELECT id, npi, first_name, last_name, address_1, city, state, zipcode, addr_hash,
+               subscribed_lists, is_subscribed, is_comp
+    """,
+}
 
 conn = psycopg2.connect(os.getenv('DATABASE_URL'))
 cur = conn.cursor(cursor_factory=RealDictCursor)
 
 cur.execute("""
-    SELECT id, npi, first_name, last_name,
-           practice_address_1, practice_city, practice_state, practice_zipcode,
-           mailing_address_1, mailing_city, mailing_state, mailing_zipcode,
-           provider_status, provider_status_source, is_active,
-           COALESCE(jsonb_array_length(address_history), 0) AS hist_n
-    FROM universal_profiles
-    WHERE UPPER(TRIM(last_name)) = ANY(%s)
-""", (last_names,))
-up_rows = cur.fetchall()
-
-cur.execute("""
-    SELECT id, npi, first_name, last_name, address, city, state, zipcode, is_active,
-           inactive_reason, inactive_source,
-           COALESCE(jsonb_array_length(address_history), 0) AS hist_n
-    FROM user_profiles
-    WHERE UPPER(TRIM(last_name)) = ANY(%s)
-""", (last_names,))
-u_rows = cur.fetchall()
-
-cur.execute("""
-    SELECT id, npi, first_name, last_name, address, city, state, zipcode, is_active,
-           print_lists_subscribed
-    FROM print_only_contacts
-    WHERE UPPER(TRIM(last_name)) = ANY(%s)
-""", (last_names,))
-p_rows = cur.fetchall()
-
-cur.execute("""
-    SELECT id, npi, first_name, last_name, address_1, city, state, zipcode,
-           subscribed_lists, is_subscribed, is_comp
-    FROM print_list_subscribers
-    WHERE UPPER(TRIM(last_name)) = ANY(%s)
-""", (last_names,))
-pls_rows = cur.fetchall()
+    CREATE TEMP TABLE IF NOT EXISTS tmp_ncoa_people (
+        person_first TEXT, person_last TEXT, PRIMARY KEY (person_first, person_last)
+    ) ON COMMIT DROP
+""")
+cur.execute("TRUNCATE tmp_ncoa_people")
+copy_rows(cur, 'tmp_ncoa_people', ['person_first', 'person_last'], dict.fromkeys(PEOPLE))
+cur.execute("ANALYZE tmp_ncoa_people")
 
-snapshot = {}
-for fn, ln in PEOPLE:
-    key = f'{fn} {ln}'
-    snapshot[key] = {
-        'universal_profiles': [dict(r) for r in up_rows
-                                if (r['first_name'] or '').upper() == fn and (r['last_name'] or '').upper() == ln],
-        'user_profiles': [dict(r) for r in u_rows
-                           if (r['first_name'] or '').upper() == fn and (r['last_name'] or '').upper() == ln],
-        'print_only_contacts': [dict(r) for r in p_rows
-                                 if (r['first_name'] or '').upper() == fn and (r['last_name'] or '').upper() == ln],
-        'print_list_subscribers': [dict(r) for r in pls_rows
-                                    if (r['first_name'] or '').upper() == fn and (r['last_name'] or '').upper() == ln],
-    }
+snapshot = {f'{fn} {ln}': {table: [] for table in SNAPSHOT_QUERIES} for fn, ln in PEOPLE}
+for table, select in SNAPSHOT_QUERIES.items():
+    cur.execute(f"""
+        SELECT q.*, t.person_first, t.person_last
+        FROM tmp_ncoa_people t
+        JOIN LATERAL ({select}
+            FROM {table} p
+            WHERE UPPER(p.last_name) = t.person_last
+              AND UPPER(p.first_name) = t.person_first
+        ) q ON TRUE
+        ORDER BY q.id
+    """)
+    for r in cur.fetchall():
+        key = f"{r.pop('person_first')} {r.pop('person_last')}"
+        snapshot[key][table].append(dict(r))
+conn.rollback()
 
 out = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ncoa_before_snapshot.json')
 with open(out, 'w') as f:
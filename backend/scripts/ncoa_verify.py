@@ -1,12 +1,17 @@
 import os
+import sys
 import json
+import time
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
 
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+from query_helpers import copy_rows
+
 EXPECTED_UPDATES = [
     ('1891174397', 'RENNY', 'ABRAHAM', '6340 BURBANK WAY', 'PLANO', 'TX', '75024'),
     ('1922404367', 'ARINDAM', 'BAGCHI', '10323 WADING HERON DR', 'ARLINGTON', 'TN', '38002'),
@@ -60,10 +65,9 @@ EXPECTED_UNDELV = [
 ]
 
 
-def addr_match(db_val, target):
-    if not db_val:
-        return False
-    return target.upper().strip().replace('.', '').replace(',', '') in db_val.upper().strip().replace('.', '').replace(',', '')
+LAST_EVENT_SQL = """(SELECT e->>'event' FROM jsonb_array_elements(COALESCE({alias}.address_history, '[]'::jsonb)) e
+                WHERE e->>'event' = 'address_update'
+                ORDER BY e->>'changed_at' DESC LIMIT 1)"""
 
 
 conn = psycopg2.connect(os.getenv('DATABASE_URL'))
@@ -73,65 +77,61 @@ print('=' * 80)
 print('ADDRESS UPDATES — verifying cascade across all tables')
 print('=' * 80)
 
+started = time.perf_counter()
+cur.execute("""
+    CREATE TEMP TABLE IF NOT EXISTS tmp_ncoa_expected (
+        npi TEXT PRIMARY KEY, first_name TEXT, last_name TEXT,
+        new_address TEXT, new_city TEXT, new_state TEXT, new_zipcode TEXT, new_hash BIGINT
+    ) ON COMMIT DROP
+""")
+cur.execute("TRUNCATE tmp_ncoa_expected")
+copy_rows(cur, 'tmp_ncoa_expected',
+          ['npi', 'first_name', 'last_name', 'new_address', 'new_city', 'new_state', 'new_zipcode'],
+          EXPECTED_UPDATES)
+cur.execute("UPDATE tmp_ncoa_expected SET new_hash = ncoa_addr_hash(new_address)")
+cur.execute("ANALYZE tmp_ncoa_expected")
+
+cur.execute("""
+    SELECT t.npi, up.id, up.practice_address_1, up.mailing_address_1,
+           up.practice_addr_hash = t.new_hash OR up.mailing_addr_hash = t.new_hash AS matched,
+           COALESCE(jsonb_array_length(up.address_history), 0) AS hist_n
+    FROM tmp_ncoa_expected t
+    JOIN universal_profiles up ON up.npi = t.npi
+""")
+up_by_npi = {r['npi']: r for r in cur.fetchall()}
+
+cur.execute(f"""
+    SELECT t.npi,
+           array_agg(u.id ORDER BY u.id) AS ids,
+           array_agg(u.address ORDER BY u.id) AS addresses,
+           COALESCE(bool_or(u.addr_hash = t.new_hash), FALSE) AS matched,
+           COALESCE(bool_or(jsonb_array_length(u.address_history) > 0
+                            AND {LAST_EVENT_SQL.format(alias='u')} = 'address_update'), FALSE) AS history
+    FROM tmp_ncoa_expected t
+    JOIN user_profiles u ON u.npi = t.npi
+    GROUP BY t.npi
+""")
+u_by_npi = {r['npi']: r for r in cur.fetchall()}
+
 success = 0
 fail = []
 
 for npi, fn, ln, new_addr, new_city, new_state, new_zip in EXPECTED_UPDATES:
-    cur.execute("""
-        SELECT id, first_name, last_name, practice_address_1, practice_city, practice_state,
-               mailing_address_1, mailing_city, mailing_state,
-               old_practice_address_1, old_mailing_address_1,
-               COALESCE(jsonb_array_length(address_history), 0) AS hist_n,
-               (SELECT e->>'event' FROM jsonb_array_elements(COALESCE(address_history, '[]'::jsonb)) e
-                WHERE e->>'event' = 'address_update'
-                ORDER BY e->>'changed_at' DESC LIMIT 1) AS last_event,
-               (SELECT e->>'source' FROM jsonb_array_elements(COALESCE(address_history, '[]'::jsonb)) e
-                WHERE e->>'event' = 'address_update'
-                ORDER BY e->>'changed_at' DESC LIMIT 1) AS last_source
-        FROM universal_profiles WHERE npi = %s
-    """, (npi,))
-    up = cur.fetchone()
-
-    cur.execute("""
-        SELECT id, first_name, last_name, address, city, state,
-               COALESCE(jsonb_array_length(address_history), 0) AS hist_n,
-               (SELECT e->>'event' FROM jsonb_array_elements(COALESCE(address_history, '[]'::jsonb)) e
-                WHERE e->>'event' = 'address_update'
-                ORDER BY e->>'changed_at' DESC LIMIT 1) AS last_event,
-               (SELECT e->>'source' FROM jsonb_array_elements(COALESCE(address_history, '[]'::jsonb)) e
-                WHERE e->>'event' = 'address_update'
-                ORDER BY e->>'changed_at' DESC LIMIT 1) AS last_source
-        FROM user_profiles WHERE npi = %s
-    """, (npi,))
-    u_list = cur.fetchall()
-
-    cur.execute("""
-        SELECT id, first_name, last_name, address, city, state,
-               COALESCE(jsonb_array_length(address_history), 0) AS hist_n
-        FROM print_only_contacts WHERE npi = %s
-    """, (npi,))
-    p_list = cur.fetchall()
-
+    up = up_by_npi.get(npi)
+    u = u_by_npi.get(npi)
     issues = []
 
-    up_matched_practice = up and addr_match(up['practice_address_1'], new_addr)
-    up_matched_mailing = up and addr_match(up['mailing_address_1'], new_addr)
-    up_matched = up_matched_practice or up_matched_mailing
-
-    u_matched_any = any(addr_match(r['address'], new_addr) for r in u_list)
-    u_history_any = any(r['hist_n'] > 0 and r['last_event'] == 'address_update' for r in u_list)
-
-    if up and not up_matched:
+    if up and not up['matched']:
         issues.append(f"UP#{up['id']} address NOT updated: practice={up['practice_address_1']!r} mail={up['mailing_address_1']!r}")
     if up and up['hist_n'] == 0:
         issues.append(f"UP#{up['id']} address_history is EMPTY")
 
-    if u_list and not u_matched_any:
-        issues.append(f"user_profiles addresses NOT updated: {[(r['id'], r['address']) for r in u_list]}")
-    if u_list and not u_history_any:
+    if u and not u['matched']:
+        issues.append(f"user_profiles addresses NOT updated: {list(zip(u['ids'], u['addresses']))}")
+    if u and not u['history']:
         issues.append(f"user_profiles address_history NOT recorded for any row")
 
-    if not up and not u_list:
+    if not up and not u:
         issues.append("NO record found in universal_profiles OR user_profiles by NPI")
 
     if issues:
@@ -139,7 +139,8 @@ for npi, fn, ln, new_addr, new_city, new_state, new_zip in EXPECTED_UPDATES:
     else:
         success += 1
 
-print(f'\nSUCCESS: {success}/{len(EXPECTED_UPDATES)}')
+conn.rollback()
+print(f'\nSUCCESS: {success}/{len(EXPECTED_UPDATES)}  (verified in {time.perf_counter() - started:.2f}s)')
 if fail:
     print(f'\nFAILED ({len(fail)}):')
     for f in fail:
@@ -0,0 +1,529 @@
+import re
+from psycopg2.extras import RealDictCursor
+from query_helpers import copy_rows
+
+ADDRESS_ABBREVIATIONS = {
+    'STREET': 'ST', 'AVENUE': 'AVE', 'BOULEVARD': 'BLVD', 'DRIVE': 'DR',
+    'LANE': 'LN', 'ROAD': 'RD', 'COURT': 'CT', 'PLACE': 'PL',
+    'SUITE': 'STE', 'APARTMENT': 'APT', 'BUILDING': 'BLDG',
+    'NORTH': 'N', 'SOUTH': 'S', 'EAST': 'E', 'WEST': 'W',
+    'HIGHWAY': 'HWY', 'PARKWAY': 'PKWY', 'CIRCLE': 'CIR',
+}
+
+SCALAR_FIELDS = ['first_name', 'last_name', 'specialty', 'type_of_professional', 'company', 'title']
+ADDRESS_FIELDS = ['address_1', 'address_2', 'city', 'state', 'zipcode']
+
+STAGE_COLUMNS = [
+    'row_no', 'is_comp', 'is_dupe', 'match_key', 'name_key',
+    'norm_first_name', 'norm_last_name', 'norm_address_1', 'norm_city', 'norm_state', 'norm_zipcode',
+    'npi', 'first_name', 'last_name', 'address_1', 'address_2', 'city', 'state', 'zipcode',
+    'specialty', 'type_of_professional', 'company', 'title',
+]
+
+SUBSCRIBER_COLUMNS = """
+    p.id, p.npi, p.first_name, p.last_name, p.degree, p.specialty, p.type_of_professional,
+    p.company, p.title, p.address_1, p.address_2, p.city, p.state, p.zipcode,
+    p.subscribed_lists, p.unsubscribed_lists, p.is_comp, p.is_subscribed
+"""
+
+LIST_MEMBER_SQL = "p.print_lists_subscribed ? %(list_name)s AND p.is_subscribed = TRUE"
+
+ADD_TOKEN_SQL = """(
+    SELECT string_agg(x, ',')
+    FROM jsonb_array_elements_text(
+        COALESCE(p.{column}, '[]'::jsonb)
+        || CASE WHEN COALESCE(p.{column}, '[]'::jsonb) ? %(list_name)s THEN '[]'::jsonb
+                ELSE jsonb_build_array(%(list_name)s::text) END
+    ) x
+)"""
+
+REMOVE_TOKEN_SQL = """(
+    SELECT string_agg(x, ',')
+    FROM jsonb_array_elements_text(COALESCE(p.print_lists_subscribed, '[]'::jsonb)) x
+    WHERE x <> %(list_name)s
+)"""
+
+
+def norm_str(s):
+    if s is None:
+        return ''
+    if isinstance(s, float):
+        if s.is_integer():
+            s = str(int(s))
+        else:
+            s = str(s)
+    s = str(s).strip().upper()
+    s = re.sub(r'\s+', ' ', s)
+    return s
+
+
+def norm_zip(s):
+    if s is None:
+        return ''
+    if isinstance(s, float):
+        if s.is_integer():
+            s = str(int(s))
+        else:
+            s = str(s)
+    s = re.sub(r'\D', '', str(s))
+    if len(s) > 5:
+        s = s[:5]
+    return s.zfill(5) if s else ''
+
+
+def norm_addr(s):
+    if not s:
+        return ''
+    s = norm_str(s)
+    for full, abbr in ADDRESS_ABBREVIATIONS.items():
+        s = re.sub(r'\b' + full + r'\b', abbr, s)
+    s = re.sub(r'[.,#]', '', s)
+    s = re.sub(r'\s+', ' ', s)
+    return s.strip()
+
+
+def norm_name(s):
+    if not s:
+        return ''
+    s = norm_str(s)
+    s = re.sub(r'[^A-Z\s-]', '', s)
+    return s.strip()
+
+
+def get_npi(row):
+    npi = row.get('NPI Number') or row.get('NPI') or row.get('npi')
+    if npi is None:
+        return None
+    if isinstance(npi, float):
+        if npi.is_integer():
+            npi = str(int(npi))
+        else:
+            return None
+    npi = str(npi).strip()
+    if re.match(r'^\d{10}$', npi):
+        return npi
+    return None
+
+
+def excel_val(row, *keys):
+    for k in keys:
+        if k in row and row[k] not in (None, ''):
+            return row[k]
+    return None
+
+
+def get_addr(row):
+    return excel_val(row, 'Address 1', 'Address Line 1', 'Address  1')
+
+
+def get_addr2(row):
+    return excel_val(row, 'Address 2', 'Address Line 2', 'Address  2')
+
+
+def get_zip(row):
+    z = excel_val(row, 'Zip', 'Zip Code', 'ZipCode')
+    if z is None:
+        return None
+    if isinstance(z, float):
+        if z.is_integer():
+            z = int(z)
+    s = re.sub(r'\D', '', str(z))
+    if len(s) > 5:
+        s = s[:5]
+    return s.zfill(5) if s else None
+
+
+def to_str(v):
+    if v is None:
+        return None
+    if isinstance(v, float):
+        if v.is_integer():
+            v = int(v)
+    s = str(v).strip()
+    return s if s else None
+
+
+def name_key(first_name, last_name):
+    return f"{norm_name(first_name)}|{norm_name(last_name)}"
+
+
+def match_key(npi, first_name, last_name, address_1, city, state, zipcode):
+    if npi:
+        return f"npi:{npi}"
+    return 'nm:' + '|'.join([norm_name(first_name), norm_name(last_name), norm_addr(address_1),
+                             norm_str(city), norm_str(state), norm_zip(zipcode)])
+
+
+def excel_key(row):
+    return match_key(get_npi(row), row.get('First Name'), row.get('Last Name'), get_addr(row),
+                     row.get('City'), row.get('State'), get_zip(row))
+
+
+def stage_row(row_no, row, is_comp, type_of_prof_field='Type of Professional'):
+    state = to_str(row.get('State'))
+    return (
+        row_no, is_comp, False, excel_key(row), name_key(row.get('First Name'), row.get('Last Name')),
+        norm_name(row.get('First Name')), norm_name(row.get('Last Name')), norm_addr(get_addr(row)),
+        norm_str(row.get('City')), norm_str(row.get('State')), norm_zip(get_zip(row)),
+        get_npi(row), to_str(row.get('First Name')), to_str(row.get('Last Name')),
+        to_str(get_addr(row)), to_str(get_addr2(row)), to_str(row.get('City')),
+        state.upper()[:2] if state else None, get_zip(row),
+        to_str(row.get('Specialty')), to_str(row.get(type_of_prof_field) or row.get('Type of Professional')),
+        to_str(row.get('Company')), to_str(row.get('Title')),
+    )
+
+
+def _sql_norm_str(expr):
+    return f"upper(regexp_replace(regexp_replace(COALESCE({expr}, ''), '^\\s+|\\s+$', '', 'g'), '\\s+', ' ', 'g'))"
+
+
+def _sql_norm_addr(expr):
+    s = _sql_norm_str(expr)
+    for full, abbr in ADDRESS_ABBREVIATIONS.items():
+        s = f"regexp_replace({s}, '\\y{full}\\y', '{abbr}', 'g')"
+    s = f"regexp_replace(regexp_replace({s}, '[.,#]', '', 'g'), '\\s+', ' ', 'g')"
+    return f"regexp_replace({s}, '^\\s+|\\s+$', '', 'g')"
+
+
+def normalizer_function_statements():
+    return [
+        f"""CREATE OR REPLACE FUNCTION print_norm_str(s TEXT) RETURNS TEXT AS $$
+            SELECT {_sql_norm_str('s')}
+        $$ LANGUAGE sql IMMUTABLE""",
+        """CREATE OR REPLACE FUNCTION print_norm_name(s TEXT) RETURNS TEXT AS $$
+            SELECT regexp_replace(regexp_replace(print_norm_str(s), '[^A-Z\\s-]', '', 'g'), '^\\s+|\\s+$', '', 'g')
+        $$ LANGUAGE sql IMMUTABLE""",
+        f"""CREATE OR REPLACE FUNCTION print_norm_addr(s TEXT) RETURNS TEXT AS $$
+            SELECT {_sql_norm_addr('s')}
+        $$ LANGUAGE sql IMMUTABLE""",
+        """CREATE OR REPLACE FUNCTION print_norm_zip(s TEXT) RETURNS TEXT AS $$
+            SELECT CASE WHEN d = '' THEN '' ELSE lpad(left(d, 5), 5, '0') END
+            FROM (SELECT regexp_replace(COALESCE(s, ''), '\\D', '', 'g') AS d) z
+        $$ LANGUAGE sql IMMUTABLE""",
+        """CREATE OR REPLACE FUNCTION print_list_name_key(first_name TEXT, last_name TEXT) RETURNS TEXT AS $$
+            SELECT print_norm_name(first_name) || '|' || print_norm_name(last_name)
+        $$ LANGUAGE sql IMMUTABLE""",
+        """CREATE OR REPLACE FUNCTION print_list_match_key(npi TEXT, first_name TEXT, last_name TEXT,
+                                                         address_1 TEXT, city TEXT, state TEXT, zipcode TEXT)
+        RETURNS TEXT AS $$
+            SELECT CASE
+                WHEN btrim(COALESCE(npi, '')) ~ '^\\d{10}$' THEN 'npi:' || btrim(npi)
+                ELSE 'nm:' || concat_ws('|', print_norm_name(first_name), print_norm_name(last_name),
+                                        print_norm_addr(address_1), print_norm_str(city),
+                                        print_norm_str(state), print_norm_zip(zipcode))
+            END
+        $$ LANGUAGE sql IMMUTABLE""",
+    ]
+
+
+def stage_excel_rows(cur, rows):
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS tmp_print_list_rows (
+            row_no INTEGER PRIMARY KEY, is_comp BOOLEAN, is_dupe BOOLEAN,
+            match_key TEXT, name_key TEXT,
+            norm_first_name TEXT, norm_last_name TEXT, norm_address_1 TEXT,
+            norm_city TEXT, norm_state TEXT, norm_zipcode TEXT,
+            npi TEXT, first_name TEXT, last_name TEXT, address_1 TEXT, address_2 TEXT,
+            city TEXT, state TEXT, zipcode TEXT, specialty TEXT, type_of_professional TEXT,
+            company TEXT, title TEXT
+        ) ON COMMIT DROP
+    """)
+    cur.execute("TRUNCATE tmp_print_list_rows")
+    copy_rows(cur, 'tmp_print_list_rows', STAGE_COLUMNS, rows)
+    cur.execute("""
+        UPDATE tmp_print_list_rows t SET is_dupe = TRUE
+        WHERE EXISTS (
+            SELECT 1 FROM tmp_print_list_rows f
+            WHERE f.match_key = t.match_key AND f.row_no < t.row_no
+        )
+    """)
+    dupes = cur.rowcount
+    cur.execute("ANALYZE tmp_print_list_rows")
+    return dupes
+
+
+def match_staged_rows(cur, list_name, npi_fallback=False):
+    params = {'list_name': list_name}
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS tmp_print_list_matches (
+            row_no INTEGER PRIMARY KEY, subscriber_id INTEGER UNIQUE, match_type TEXT
+        ) ON COMMIT DROP
+    """)
+    cur.execute("TRUNCATE tmp_print_list_matches")
+
+    cur.execute(f"""
+        INSERT INTO tmp_print_list_matches (row_no, subscriber_id, match_type)
+        SELECT DISTINCT ON (t.row_no) t.row_no, p.id, 'key'
+        FROM tmp_print_list_rows t
+        JOIN print_list_subscribers p ON p.match_key = t.match_key
+        WHERE NOT t.is_dupe AND {LIST_MEMBER_SQL}
+        ORDER BY t.row_no, p.id
+    """, params)
+    counts = {'key': cur.rowcount, 'name': 0, 'npi': 0}
+
+    while True:
+        cur.execute(f"""
+            INSERT INTO tmp_print_list_matches (row_no, subscriber_id, match_type)
+            SELECT DISTINCT ON (c.subscriber_id) c.row_no, c.subscriber_id, 'name'
+            FROM (
+                SELECT DISTINCT ON (t.row_no) t.row_no, p.id AS subscriber_id
+                FROM tmp_print_list_rows t
+                JOIN print_list_subscribers p ON p.name_key = t.name_key
+                WHERE NOT t.is_dupe AND {LIST_MEMBER_SQL}
+                  AND t.norm_address_1 <> ''
+                  AND print_norm_addr(p.address_1) <> ''
+                  AND (left(t.norm_address_1, 10) = left(print_norm_addr(p.address_1), 10)
+                       OR t.norm_city = print_norm_str(p.city))
+                  AND NOT EXISTS (SELECT 1 FROM tmp_print_list_matches m WHERE m.row_no = t.row_no)
+                  AND NOT EXISTS (SELECT 1 FROM tmp_print_list_matches m WHERE m.subscriber_id = p.id)
+                ORDER BY t.row_no, p.id
+            ) c
+            ORDER BY c.subscriber_id, c.row_no
+        """, params)
+        if not cur.rowcount:
+            break
+        counts['name'] += cur.rowcount
+
+    if npi_fallback:
+        cur.execute("""
+            INSERT INTO tmp_print_list_matches (row_no, subscriber_id, match_type)
+            SELECT DISTINCT ON (c.subscriber_id) c.row_no, c.subscriber_id, 'npi'
+            FROM (
+                SELECT DISTINCT ON (t.row_no) t.row_no, p.id AS subscriber_id
+                FROM tmp_print_list_rows t
+                JOIN print_list_subscribers p ON p.npi = t.npi
+                WHERE NOT t.is_dupe AND t.npi IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM tmp_print_list_matches m WHERE m.row_no = t.row_no)
+                  AND NOT EXISTS (SELECT 1 FROM tmp_print_list_matches m WHERE m.subscriber_id = p.id)
+                ORDER BY t.row_no, p.id
+            ) c
+            ORDER BY c.subscriber_id, c.row_no
+        """)
+        counts['npi'] = cur.rowcount
+
+    cur.execute("ANALYZE tmp_print_list_matches")
+    return counts
+
+
+def _build_changes(cur, list_name):
+    scalar_flags = ',\n'.join(
+        f"(t.{f} IS NOT NULL AND print_norm_str(t.{f}) <> print_norm_str(p.{f})) AS {f}_changed"
+        for f in SCALAR_FIELDS
+    )
+    cur.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS tmp_print_list_changes (
+            subscriber_id INTEGER PRIMARY KEY, row_no INTEGER, npi TEXT,
+            old_address_1 TEXT, old_is_comp BOOLEAN,
+            addr_changed BOOLEAN, {', '.join(f'{f}_changed BOOLEAN' for f in SCALAR_FIELDS)},
+            npi_filled BOOLEAN, list_added BOOLEAN, resubscribed BOOLEAN, comp_flipped BOOLEAN
+        ) ON COMMIT DROP
+    """)
+    cur.execute("TRUNCATE tmp_print_list_changes")
+    cur.execute(f"""
+        INSERT INTO tmp_print_list_changes
+        SELECT p.id, t.row_no, COALESCE(t.npi, NULLIF(p.npi, '')), p.address_1, p.is_comp,
+               (t.address_1 IS NOT NULL AND t.norm_address_1 <> ''
+                AND t.norm_address_1 <> print_norm_addr(p.address_1)),
+               {scalar_flags},
+               (t.npi IS NOT NULL AND COALESCE(p.npi, '') = ''),
+               NOT COALESCE(p.print_lists_subscribed ? %(list_name)s, FALSE),
+               NOT COALESCE(p.is_subscribed, FALSE),
+               COALESCE(p.is_comp, FALSE) <> t.is_comp
+        FROM tmp_print_list_matches m
+        JOIN tmp_print_list_rows t ON t.row_no = m.row_no
+        JOIN print_list_subscribers p ON p.id = m.subscriber_id
+    """, {'list_name': list_name})
+
+
+def _edited_sql(alias='c'):
+    return ' OR '.join([f'{alias}.addr_changed'] + [f'{alias}.{f}_changed' for f in SCALAR_FIELDS])
+
+
+def _changed_sql(alias='c'):
+    return ' OR '.join([_edited_sql(alias)] + [f'{alias}.{f}' for f in
+                                               ('npi_filled', 'list_added', 'resubscribed', 'comp_flipped')])
+
+
+def list_member_count(conn, list_name):
+    cur = conn.cursor()
+    cur.execute(f"""
+        SELECT COUNT(*) AS n, COUNT(*) - COUNT(DISTINCT p.match_key) AS dupes
+        FROM print_list_subscribers p
+        WHERE {LIST_MEMBER_SQL}
+    """, {'list_name': list_name})
+    count, dupes = cur.fetchone()
+    cur.close()
+    return count, dupes
+
+
+def diff_report(conn, list_name, excel_rows):
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    params = {'list_name': list_name}
+
+    cur.execute("SELECT row_no FROM tmp_print_list_rows t WHERE NOT t.is_dupe AND NOT EXISTS "
+                "(SELECT 1 FROM tmp_print_list_matches m WHERE m.row_no = t.row_no) ORDER BY row_no")
+    adds = [excel_rows[r['row_no']] for r in cur.fetchall()]
+
+    cur.execute(f"""
+        SELECT {SUBSCRIBER_COLUMNS}
+        FROM print_list_subscribers p
+        WHERE {LIST_MEMBER_SQL}
+          AND NOT EXISTS (SELECT 1 FROM tmp_print_list_matches m WHERE m.subscriber_id = p.id)
+        ORDER BY p.id
+    """, params)
+    removes = cur.fetchall()
+
+    cur.execute(f"""
+        SELECT {SUBSCRIBER_COLUMNS}, t.row_no, t.is_comp AS new_is_comp,
+               t.norm_address_1 <> '' AND t.norm_address_1 <> print_norm_addr(p.address_1) AS address_1_diff,
+               t.norm_city <> '' AND t.norm_city <> print_norm_str(p.city) AS city_diff,
+               t.norm_state <> '' AND t.norm_state <> print_norm_str(p.state) AS state_diff,
+               t.norm_zipcode <> '' AND print_norm_zip(p.zipcode) <> ''
+                   AND t.norm_zipcode <> print_norm_zip(p.zipcode) AS zipcode_diff,
+               t.norm_first_name <> '' AND t.norm_first_name <> print_norm_name(p.first_name) AS first_name_diff,
+               t.norm_last_name <> '' AND t.norm_last_name <> print_norm_name(p.last_name) AS last_name_diff,
+               COALESCE(p.is_comp, FALSE) <> t.is_comp AS flag_flip
+        FROM tmp_print_list_matches m
+        JOIN tmp_print_list_rows t ON t.row_no = m.row_no
+        JOIN print_list_subscribers p ON p.id = m.subscriber_id
+        ORDER BY t.row_no
+    """)
+    edits = []
+    flag_flips = []
+    excel_fields = {
+        'address_1': get_addr, 'city': lambda r: r.get('City'), 'state': lambda r: r.get('State'),
+        'zipcode': lambda r: excel_val(r, 'Zip', 'Zip Code', 'ZipCode'),
+        'first_name': lambda r: r.get('First Name'), 'last_name': lambda r: r.get('Last Name'),
+    }
+    for row in cur.fetchall():
+        er = excel_rows[row.pop('row_no')]
+        flag_flip = row.pop('flag_flip')
+        new_is_comp = row.pop('new_is_comp')
+        diffs = {}
+        for field, excel_value in excel_fields.items():
+            if row.pop(f'{field}_diff'):
+                diffs[field] = (row.get(field), excel_value(er))
+        if diffs:
+            edits.append({'db': row, 'excel': er, 'diffs': diffs, 'flag_flip': flag_flip, 'new_is_comp': new_is_comp})
+        elif flag_flip:
+            flag_flips.append({'db': row, 'excel': er, 'new_is_comp': new_is_comp})
+    cur.close()
+    return {'adds': adds, 'edits': edits, 'flag_flips': flag_flips, 'removes': removes}
+
+
+def apply_staged_changes(conn, list_name, source='file_sync'):
+    cur = conn.cursor()
+    params = {'list_name': list_name, 'source': source}
+    _build_changes(cur, list_name)
+
+    address_sets = ',\n'.join(
+        [f"old_{f} = CASE WHEN c.addr_changed THEN p.{f} ELSE p.old_{f} END" for f in ADDRESS_FIELDS]
+        + [f"{f} = CASE WHEN c.addr_changed THEN t.{f} ELSE p.{f} END" for f in ADDRESS_FIELDS]
+    )
+    scalar_sets = ',\n'.join(f"{f} = CASE WHEN c.{f}_changed THEN t.{f} ELSE p.{f} END" for f in SCALAR_FIELDS)
+    cur.execute(f"""
+        UPDATE print_list_subscribers p SET
+            address_history = CASE WHEN c.addr_changed
+                THEN COALESCE(p.address_history, '[]'::jsonb) || jsonb_build_array(jsonb_build_object(
+                    'address', p.address_1, 'address_2', p.address_2, 'city', p.city,
+                    'state', p.state, 'zipcode', p.zipcode, 'changed_at', NOW()::text))
+                ELSE p.address_history END,
+            {address_sets},
+            {scalar_sets},
+            npi = CASE WHEN c.npi_filled THEN t.npi ELSE p.npi END,
+            subscribed_lists = CASE WHEN c.list_added THEN {ADD_TOKEN_SQL.format(column='print_lists_subscribed')}
+                                    ELSE p.subscribed_lists END,
+            is_subscribed = CASE WHEN c.resubscribed THEN TRUE ELSE p.is_subscribed END,
+            is_comp = CASE WHEN c.comp_flipped THEN t.is_comp ELSE p.is_comp END,
+            updated_at = NOW()
+        FROM tmp_print_list_changes c
+        JOIN tmp_print_list_rows t ON t.row_no = c.row_no
+        WHERE p.id = c.subscriber_id AND ({_changed_sql()})
+    """, params)
+
+    field_notes = ', '.join(
+        f"CASE WHEN c.{f}_changed THEN '{f}=' || t.{f} END" for f in SCALAR_FIELDS
+    )
+    cur.execute(f"""
+        INSERT INTO print_list_activity_log (npi, action, details, created_at)
+        SELECT COALESCE(c.npi, 'N/A'), 'file_sync_update',
+               left(%(list_name)s || ': ' || concat_ws('; ',
+                   CASE WHEN c.addr_changed THEN 'addr: ' || COALESCE(c.old_address_1, 'None') || ' -> ' || t.address_1 END,
+                   CASE WHEN {' OR '.join(f'c.{f}_changed' for f in SCALAR_FIELDS)}
+                        THEN 'fields: ' || concat_ws(', ', {field_notes}) END,
+                   CASE WHEN c.comp_flipped
+                        THEN 'is_comp: ' || initcap(COALESCE(c.old_is_comp::text, 'none')) || ' -> ' || initcap(t.is_comp::text) END
+               ), 500),
+               NOW()
+        FROM tmp_print_list_changes c
+        JOIN tmp_print_list_rows t ON t.row_no = c.row_no
+        WHERE {_changed_sql()}
+    """, params)
+
+    cur.execute(f"""
+        SELECT COUNT(*) FILTER (WHERE {_edited_sql()}) AS edits,
+               COUNT(*) FILTER (WHERE c.comp_flipped AND NOT ({_edited_sql()})) AS flag_flips,
+               COUNT(*) FILTER (WHERE NOT ({_changed_sql()})) AS noop
+        FROM tmp_print_list_changes c
+    """)
+    edits, flag_flips, noop = cur.fetchone()
+
+    cur.execute("""
+        WITH added AS (
+            INSERT INTO print_list_subscribers
+            (npi, first_name, last_name, specialty, type_of_professional, company, title,
+             address_1, address_2, city, state, zipcode,
+             subscribed_lists, is_subscribed, is_comp, subscribe_date, source, created_at, updated_at)
+            SELECT t.npi, t.first_name, t.last_name, t.specialty, t.type_of_professional, t.company, t.title,
+                   t.address_1, t.address_2, t.city, t.state, t.zipcode,
+                   %(list_name)s, TRUE, t.is_comp, NOW(), %(source)s, NOW(), NOW()
+            FROM tmp_print_list_rows t
+            WHERE NOT t.is_dupe
+              AND NOT EXISTS (SELECT 1 FROM tmp_print_list_matches m WHERE m.row_no = t.row_no)
+            ORDER BY t.row_no
+            ON CONFLICT DO NOTHING
+            RETURNING npi, first_name, last_name, is_comp
+        )
+        INSERT INTO print_list_activity_log (npi, action, details, created_at)
+        SELECT COALESCE(npi, 'N/A'), 'subscribe',
+               left('File sync ADD: ' || %(list_name)s || CASE WHEN is_comp THEN ' (comp)' ELSE '' END
+                    || ' - ' || COALESCE(first_name, 'None') || ' ' || COALESCE(last_name, 'None'), 500),
+               NOW()
+        FROM added
+    """, params)
+    adds = cur.rowcount
+    cur.close()
+    return {'adds': adds, 'edits': edits, 'flag_flips': flag_flips, 'noop': noop}
+
+
+def apply_removes(conn, list_name, removes):
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS tmp_print_list_removes (
+            subscriber_id INTEGER PRIMARY KEY, reason TEXT
+        ) ON COMMIT DROP
+    """)
+    cur.execute("TRUNCATE tmp_print_list_removes")
+    copy_rows(cur, 'tmp_print_list_removes', ['subscriber_id', 'reason'], removes)
+    params = {'list_name': list_name}
+    cur.execute("""
+        INSERT INTO print_list_activity_log (npi, action, details, created_at)
+        SELECT COALESCE(NULLIF(p.npi, ''), 'N/A'), 'unsubscribe',
+               left(%(list_name)s || ': ' || COALESCE(p.first_name, 'None') || ' ' || COALESCE(p.last_name, 'None')
+                    || ' - ' || r.reason, 500),
+               NOW()
+        FROM tmp_print_list_removes r
+        JOIN print_list_subscribers p ON p.id = r.subscriber_id
+    """, params)
+    cur.execute(f"""
+        UPDATE print_list_subscribers p
+        SET subscribed_lists = {REMOVE_TOKEN_SQL},
+            unsubscribed_lists = {ADD_TOKEN_SQL.format(column='print_lists_unsubscribed')},
+            is_subscribed = {REMOVE_TOKEN_SQL} IS NOT NULL,
+            unsubscribe_reason = r.reason, unsubscribe_date = NOW(), updated_at = NOW()
+        FROM tmp_print_list_removes r
+        WHERE p.id = r.subscriber_id
+    """, params)
+    count = cur.rowcount
+    cur.close()
+    return count
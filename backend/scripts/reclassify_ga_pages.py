@@ -0,0 +1,30 @@
+import os
+import sys
+import time
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from routes.ga_insights import DISEASE_RULES_VERSION, reclassify_ga_pages
+
+load_dotenv()
+
+
+def main():
+    DATABASE_URL = os.getenv('DATABASE_URL')
+    if not DATABASE_URL:
+        sys.exit("DATABASE_URL is not set")
+    engine = create_engine(DATABASE_URL)
+
+    raw = engine.raw_connection()
+    try:
+        started = time.time()
+        stored = reclassify_ga_pages(raw)
+    finally:
+        raw.close()
+    print(f"Reclassified {stored:,} pages to rules {DISEASE_RULES_VERSION} in {time.time() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
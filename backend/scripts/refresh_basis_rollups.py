@@ -0,0 +1,33 @@
+import os
+import sys
+import time
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from basis_rollups import ensure_basis_rollups, refresh_basis_rollups
+
+load_dotenv()
+
+
+def main():
+    DATABASE_URL = os.getenv('DATABASE_URL')
+    if not DATABASE_URL:
+        sys.exit("DATABASE_URL is not set")
+    session = sessionmaker(bind=create_engine(DATABASE_URL))()
+
+    try:
+        started = time.time()
+        if '--full' in sys.argv:
+            rows = refresh_basis_rollups(session)
+        else:
+            rows = ensure_basis_rollups(session)
+    finally:
+        session.close()
+    print(f"Rebuilt {rows:,} weekly rollup rows in {time.time() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+import os
+import sys
+import time
+from dotenv import load_dotenv
+from flask import Flask
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import routes.expected_reports
+import routes.unified_reports
+from cmi_board_snapshots import rebuild_board_snapshots
+
+load_dotenv()
+
+
+def main():
+    DATABASE_URL = os.getenv('DATABASE_URL')
+    if not DATABASE_URL:
+        sys.exit("DATABASE_URL is not set")
+    session = sessionmaker(bind=create_engine(DATABASE_URL))()
+
+    try:
+        started = time.time()
+        with Flask(__name__).app_context():
+            rebuilt = rebuild_board_snapshots(session, sys.argv[1:] or None)
+    finally:
+        session.close()
+    print(f"Rebuilt {rebuilt} CMI board snapshots in {time.time() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
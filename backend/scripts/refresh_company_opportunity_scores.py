@@ -0,0 +1,37 @@
+import os
+import sys
+import time
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from routes.market_intelligence import OPPORTUNITY_SOURCES, refresh_opportunity_scores, source_version_stamp
+
+load_dotenv()
+
+
+def main():
+    DATABASE_URL = os.getenv('DATABASE_URL')
+    if not DATABASE_URL:
+        sys.exit("DATABASE_URL is not set")
+    engine = create_engine(DATABASE_URL)
+
+    raw = engine.raw_connection()
+    try:
+        started = time.time()
+        cur = raw.cursor()
+        version = source_version_stamp(cur, OPPORTUNITY_SOURCES)
+        cur.close()
+        refresh_opportunity_scores(raw, version)
+        cur = raw.cursor()
+        cur.execute("SELECT COUNT(*) FROM company_opportunity_scores")
+        rows = cur.fetchone()[0]
+        cur.close()
+    finally:
+        raw.close()
+    print(f"company_opportunity_scores at {version}: {rows:,} rows in {time.time() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
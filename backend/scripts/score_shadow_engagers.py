@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from routes.shadow_engagers import score_shadow_engagers
+
+load_dotenv()
+
+STATEMENTS = [
+    """CREATE TABLE IF NOT EXISTS shadow_engager_watermarks (
+        id INTEGER PRIMARY KEY,
+        last_interaction_id BIGINT NOT NULL DEFAULT 0,
+        emails_rescored INTEGER DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT NOW()
+    )""",
+    """CREATE TABLE IF NOT EXISTS shadow_engager_rescores (
+        email VARCHAR(255) PRIMARY KEY,
+        confidence_pct DOUBLE PRECISION NOT NULL,
+        classification VARCHAR(20) NOT NULL,
+        campaigns_clicked_no_open INTEGER DEFAULT 0,
+        campaigns_with_opens INTEGER DEFAULT 0,
+        total_campaigns_sent INTEGER DEFAULT 0,
+        total_clean_clicks_no_open INTEGER DEFAULT 0,
+        distinct_campaigns_clicked INTEGER DEFAULT 0,
+        rescored_at TIMESTAMP DEFAULT NOW()
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_shadow_confidence_keyset ON shadow_engagers (confidence_pct, id)",
+    "CREATE INDEX IF NOT EXISTS idx_shadow_class_confidence_keyset ON shadow_engagers (classification, confidence_pct, id)",
+    "CREATE INDEX IF NOT EXISTS idx_shadow_updated_at ON shadow_engagers (updated_at)",
+]
+
+
+def main():
+    DATABASE_URL = os.getenv('DATABASE_URL')
+    if not DATABASE_URL:
+        sys.exit("DATABASE_URL is not set")
+    engine = create_engine(DATABASE_URL)
+
+    with engine.begin() as conn:
+        for stmt in STATEMENTS:
+            print(f"Running: {' '.join(stmt.split())[:100]}")
+            conn.execute(text(stmt))
+        if '--from-now' in sys.argv:
+            conn.execute(text("""
+                INSERT INTO shadow_engager_watermarks (id, last_interaction_id, updated_at)
+                SELECT 1, COALESCE(MAX(id), 0), NOW() FROM campaign_interactions
+                ON CONFLICT (id) DO UPDATE
+                SET last_interaction_id = EXCLUDED.last_interaction_id,
+                    updated_at = EXCLUDED.updated_at
+            """))
+            conn.execute(text("TRUNCATE shadow_engager_rescores"))
+            print("Watermark moved to the latest interaction and interim rescores cleared.")
+            return
+
+    raw = engine.raw_connection()
+    try:
+        started = time.time()
+        rescored, watermark = score_shadow_engagers(raw)
+    finally:
+        raw.close()
+    print(f"Rescored {rescored:,} emails up to interaction {watermark:,} in {time.time() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,17 @@
 import psycopg2
-from psycopg2.extras import execute_values
 import pandas as pd
 import os
+import sys
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from query_helpers import copy_rows
+
 load_dotenv()
 
-def seed_user_npis():
+NPI_UPDATE_CHUNK = 100000
+
+def seed_user_npis(update_chunk=NPI_UPDATE_CHUNK, dry_run=False):
     try:
         conn = psycopg2.connect(os.getenv('DATABASE_URL'))
         cursor = conn.cursor()
@@ -39,24 +44,34 @@ def seed_user_npis():
 
         print(f"Found columns - NPI: {npi_col}, Email: {email_col}")
 
-        cursor.execute("""
-            SELECT column_name
-            FROM information_schema.columns
-            WHERE table_name = 'user_profiles' AND column_name = 'npi'
-        """)
+        if not dry_run:
+            cursor.execute("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name = 'user_profiles' AND column_name = 'npi'
+            """)
 
-        if not cursor.fetchone():
-            print("Adding 'npi' column to user_profiles table...")
-            cursor.execute("ALTER TABLE user_profiles ADD COLUMN npi VARCHAR(50)")
-            conn.commit()
-            print("Column 'npi' added successfully")
-        else:
-            print("Modifying 'npi' column size if needed...")
-            cursor.execute("ALTER TABLE user_profiles ALTER COLUMN npi TYPE VARCHAR(50)")
-            conn.commit()
+            if not cursor.fetchone():
+                print("Adding 'npi' column to user_profiles table...")
+                cursor.execute("ALTER TABLE user_profiles ADD COLUMN npi VARCHAR(50)")
+                conn.commit()
+                print("Column 'npi' added successfully")
+            else:
+                print("Modifying 'npi' column size if needed...")
+                cursor.execute("ALTER TABLE user_profiles ALTER COLUMN npi TYPE VARCHAR(50)")
+                conn.commit()
+
+        print("Staging CSV into a temp table...")
 
-        print("Processing CSV and updating user_profiles in batches...")
+        cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS temp_npi_rows (
+                email VARCHAR(255),
+                npi VARCHAR(50)
+            )
+        """)
+        cursor.execute("TRUNCATE temp_npi_rows")
 
+        staged = 0
         for chunk in pd.read_csv(full_list_url, usecols=[npi_col, email_col], chunksize=chunk_size):
             chunks_processed += 1
 
@@ -76,32 +91,56 @@ def seed_user_npis():
                 print(f"  Chunk {chunks_processed}: No valid data, skipping")
                 continue
 
+            copy_rows(cursor, 'temp_npi_rows', ['email', 'npi'], zip(chunk[email_col], chunk[npi_col]))
+            staged += len(chunk)
+            print(f"  Chunk {chunks_processed}: Staged {len(chunk):,} rows (total: {staged:,})")
+
+        cursor.execute("DROP TABLE IF EXISTS temp_npi_updates")
+        cursor.execute("""
+            CREATE TEMP TABLE temp_npi_updates AS
+            SELECT DISTINCT ON (email) email, npi
+            FROM temp_npi_rows
+            ORDER BY email
+        """)
+        cursor.execute("ALTER TABLE temp_npi_updates ADD PRIMARY KEY (email)")
+        cursor.execute("ANALYZE temp_npi_updates")
+        cursor.execute("DROP TABLE temp_npi_rows")
+
+        if dry_run:
             cursor.execute("""
-                CREATE TEMP TABLE IF NOT EXISTS temp_npi_updates (
-                    email VARCHAR(255),
-                    npi VARCHAR(50)
-                )
+                SELECT COUNT(*) FILTER (WHERE up.npi IS NULL) AS would_fill,
+                       COUNT(*) FILTER (WHERE up.npi IS NOT NULL AND up.npi = t.npi) AS already_set,
+                       COUNT(*) FILTER (WHERE up.npi IS NOT NULL AND up.npi <> t.npi) AS conflicting,
+                       (SELECT COUNT(*) FROM temp_npi_updates) - COUNT(*) AS no_profile
+                FROM user_profiles up
+                JOIN temp_npi_updates t ON LOWER(up.email) = t.email
             """)
-            cursor.execute("TRUNCATE temp_npi_updates")
-
-            values = [(row[email_col], row[npi_col]) for _, row in chunk.iterrows()]
-            execute_values(cursor, """
-                INSERT INTO temp_npi_updates (email, npi) VALUES %s
-            """, values, page_size=1000)
+            would_fill, already_set, conflicting, no_profile = cursor.fetchone()
+            conn.rollback()
+            print(f"\nDry run: {would_fill} profiles would get an NPI, {already_set} already match, "
+                  f"{conflicting} have a different NPI (kept), {no_profile} CSV emails have no profile")
+            cursor.close()
+            conn.close()
+            return
 
+        cursor.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM user_profiles")
+        low, high = cursor.fetchone()
+        conn.commit()
+        for start in range(low, high + 1, update_chunk):
             cursor.execute("""
                 UPDATE user_profiles up
                 SET npi = t.npi
                 FROM temp_npi_updates t
-                WHERE LOWER(up.email) = LOWER(t.email)
+                WHERE up.id >= %s AND up.id < %s
+                AND LOWER(up.email) = t.email
                 AND up.npi IS NULL
-            """)
+            """, (start, start + update_chunk))
 
             rows_updated = cursor.rowcount
             total_updated += rows_updated
             conn.commit()
 
-            print(f"  Chunk {chunks_processed}: Processed {len(chunk):,} rows, updated {rows_updated:,} records (total: {total_updated:,})")
+            print(f"  Profiles {start:,}-{start + update_chunk - 1:,}: updated {rows_updated:,} records (total: {total_updated:,})")
 
         print(f"\nSuccessfully updated {total_updated} user profiles with NPI values")
 
@@ -122,4 +161,7 @@ def seed_user_npis():
         traceback.print_exc()
 
 if __name__ == '__main__':
-    seed_user_npis()
\ No newline at end of file
+    update_chunk = NPI_UPDATE_CHUNK
+    if '--chunk-size' in sys.argv:
+        update_chunk = int(sys.argv[sys.argv.index('--chunk-size') + 1])
+    seed_user_npis(update_chunk=update_chunk, dry_run='--dry-run' in sys.argv)
\ No newline at end of file
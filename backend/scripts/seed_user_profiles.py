@@ -1,26 +1,89 @@
 import json
 import os
+import sys
 from dotenv import load_dotenv
-from models import get_session, UserProfile, CampaignInteraction
-from datetime import datetime
+from models import get_session, UserProfile
+from query_helpers import copy_rows
 import math
 
 load_dotenv()
 
-def clean_nan(obj):
-    if isinstance(obj, dict):
-        return {k: clean_nan(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [clean_nan(item) for item in obj]
-    elif isinstance(obj, float) and math.isnan(obj):
-        return None
-    else:
-        return obj
+SEED_CHUNK_SIZE = 50000
+SEED_COLUMNS = ['contact_id', 'email', 'first_name', 'last_name', 'specialty', 'degree', 'address',
+                'city', 'state', 'zipcode', 'country']
+SEED_MERGE_COLUMNS = SEED_COLUMNS[2:]
+
 
-def seed_user_profiles():
-    print("Starting user_profiles data migration...")
+def clean_nan(value):
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def seed_rows(data):
+    for email, user_data in data.items():
+        if not isinstance(user_data, dict):
+            continue
+        yield (clean_nan(user_data.get('contact_id')), email) + tuple(
+            clean_nan(user_data.get(c)) for c in SEED_MERGE_COLUMNS
+        )
+
+
+def _stage_chunk(cursor, rows):
+    cursor.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS tmp_seed_user_profiles (
+            {', '.join(f'{c} TEXT' for c in SEED_COLUMNS)}
+        ) ON COMMIT DROP
+    """)
+    cursor.execute("TRUNCATE tmp_seed_user_profiles")
+    copy_rows(cursor, 'tmp_seed_user_profiles', SEED_COLUMNS, rows)
+    cursor.execute("ANALYZE tmp_seed_user_profiles")
+
+
+def _merged(column):
+    return f"COALESCE(s.{column}, up.{column})"
+
+
+def _diff_chunk(cursor):
+    changed = ' OR '.join(f"{_merged(c)} IS DISTINCT FROM up.{c}" for c in ['contact_id'] + SEED_MERGE_COLUMNS)
+    cursor.execute(f"""
+        SELECT COUNT(*) FILTER (WHERE up.id IS NULL) AS inserts,
+               COUNT(*) FILTER (WHERE up.id IS NOT NULL AND ({changed})) AS updates,
+               COUNT(*) FILTER (WHERE up.id IS NOT NULL AND NOT ({changed})) AS unchanged
+        FROM (SELECT DISTINCT ON (email) * FROM tmp_seed_user_profiles) s
+        LEFT JOIN user_profiles up ON up.email = s.email
+    """)
+    return cursor.fetchone()
+
+
+def _merge_chunk(cursor):
+    columns = ', '.join(SEED_COLUMNS)
+    updates = ',\n'.join(f"{c} = COALESCE(EXCLUDED.{c}, user_profiles.{c})" for c in ['contact_id'] + SEED_MERGE_COLUMNS)
+    changed = ' OR '.join(f"COALESCE(EXCLUDED.{c}, user_profiles.{c}) IS DISTINCT FROM user_profiles.{c}"
+                          for c in ['contact_id'] + SEED_MERGE_COLUMNS)
+    cursor.execute(f"""
+        WITH merged AS (
+            INSERT INTO user_profiles ({columns}, is_active, created_at, updated_at)
+            SELECT DISTINCT ON (email) {columns}, TRUE, NOW(), NOW()
+            FROM tmp_seed_user_profiles
+            ORDER BY email
+            ON CONFLICT (email) DO UPDATE SET
+                {updates},
+                updated_at = NOW()
+            WHERE {changed}
+            RETURNING (xmax = 0) AS inserted
+        )
+        SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM merged
+    """)
+    return cursor.fetchone()
+
+
+def seed_user_profiles(chunk_size=SEED_CHUNK_SIZE, dry_run=False):
+    print(f"Starting user_profiles data migration{' (dry run)' if dry_run else ''}...")
 
     session = get_session()
+    conn = session.connection().connection
+    cursor = conn.cursor()
 
     try:
         with open('user_profiles.json', 'r', encoding='utf-8') as f:
@@ -29,46 +92,34 @@ def seed_user_profiles():
         print(f"Loaded {len(data)} user profiles from JSON")
 
         total_users = len(data)
-        batch_size = 100
-        batch = []
         processed = 0
-
-        for email, user_data in data.items():
-            if not isinstance(user_data, dict):
-                continue
-
-            campaigns_data = clean_nan(user_data.get('campaigns', {}))
-
-            user_profile = UserProfile(
-                contact_id=user_data.get('contact_id'),
-                email=email,
-                first_name=user_data.get('first_name') if not (isinstance(user_data.get('first_name'), float) and math.isnan(user_data.get('first_name'))) else None,
-                last_name=user_data.get('last_name') if not (isinstance(user_data.get('last_name'), float) and math.isnan(user_data.get('last_name'))) else None,
-                specialty=user_data.get('specialty') if not (isinstance(user_data.get('specialty'), float) and math.isnan(user_data.get('specialty'))) else None,
-                degree=user_data.get('degree'),
-                address=user_data.get('address'),
-                city=user_data.get('city') if not (isinstance(user_data.get('city'), float) and math.isnan(user_data.get('city'))) else None,
-                state=user_data.get('state'),
-                zipcode=user_data.get('zipcode'),
-                country=user_data.get('country') if not (isinstance(user_data.get('country'), float) and math.isnan(user_data.get('country'))) else None,
-                campaigns_data=campaigns_data
-            )
-
-            batch.append(user_profile)
-            processed += 1
-
-            if len(batch) >= batch_size:
-                session.bulk_save_objects(batch)
-                session.commit()
-                print(f"Processed {processed}/{total_users} users ({(processed/total_users*100):.1f}%)")
-                batch = []
-
-        if batch:
-            session.bulk_save_objects(batch)
-            session.commit()
-            print(f"Processed {processed}/{total_users} users (100%)")
+        inserted = updated = unchanged = 0
+        rows = seed_rows(data)
+
+        while True:
+            chunk = [r for _, r in zip(range(chunk_size), rows)]
+            if not chunk:
+                break
+            _stage_chunk(cursor, chunk)
+            processed += len(chunk)
+
+            if dry_run:
+                ins, upd, same = _diff_chunk(cursor)
+                unchanged += same
+            else:
+                ins, upd = _merge_chunk(cursor)
+                conn.commit()
+            inserted += ins
+            updated += upd
+            print(f"Processed {processed}/{total_users} users ({(processed/total_users*100):.1f}%)")
+
+        if dry_run:
+            conn.rollback()
+            print(f"Dry run: {inserted} would be inserted, {updated} updated, {unchanged} unchanged")
+            return
 
         print("User profiles migration completed successfully!")
+        print(f"Inserted {inserted}, updated {updated}, unchanged {processed - inserted - updated}")
 
         count = session.query(UserProfile).count()
         print(f"Total user profiles in database: {count}")
@@ -78,10 +129,14 @@ def seed_user_profiles():
         print("Please ensure the file exists before running this script")
     except Exception as e:
         print(f"ERROR during migration: {str(e)}")
-        session.rollback()
+        conn.rollback()
         raise
     finally:
+        cursor.close()
         session.close()
 
 if __name__ == '__main__':
-    seed_user_profiles()
\ No newline at end of file
+    chunk_size = SEED_CHUNK_SIZE
+    if '--chunk-size' in sys.argv:
+        chunk_size = int(sys.argv[sys.argv.index('--chunk-size') + 1])
+    seed_user_profiles(chunk_size=chunk_size, dry_run='--dry-run' in sys.argv)
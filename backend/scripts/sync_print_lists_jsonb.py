@@ -2,14 +2,16 @@ import os
 import re
 import sys
 import json
-import openpyxl
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
 
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+from spreadsheet_reader import iter_xlsx_records
+
 BASE = r'C:\Users\AndrewDaly\Desktop\email-campaign-dashboard\backend\Lists\Print Lists'
 
 DRY_RUN = '--apply' not in sys.argv
@@ -85,20 +87,7 @@ def get_zip(r):
 
 
 def load_excel(path):
-    wb = openpyxl.load_workbook(path, data_only=True)
-    ws = wb[wb.sheetnames[0]]
-    rows = list(ws.iter_rows(values_only=True))
-    if not rows:
-        wb.close()
-        return []
-    header = [str(h).strip() if h else '' for h in rows[0]]
-    out = []
-    for r in rows[1:]:
-        if r is None or all(v is None or (isinstance(v, str) and not v.strip()) for v in r):
-            continue
-        out.append({header[i]: r[i] for i in range(min(len(header), len(r)))})
-    wb.close()
-    return out
+    return list(iter_xlsx_records(path, sheet=0))
 
 
 def bulk_add_list_by_npi(cur, table, list_name, npis):
@@ -1,111 +1,95 @@
 import os
-import re
-import json
-import openpyxl
-from collections import defaultdict
+import sys
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
 
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
-BASE = r'C:\Users\AndrewDaly\Desktop\email-campaign-dashboard\backend\Lists\Print Lists'
-
-
-def norm_str(s):
-    if s is None:
-        return ''
-    if isinstance(s, float) and s.is_integer():
-        s = str(int(s))
-    return re.sub(r'\s+', ' ', str(s).strip().upper())
-
+from query_helpers import stage_values
+from spreadsheet_reader import iter_xlsx_records
+from scripts.print_list_diff import get_npi
 
-def get_npi(row):
-    npi = row.get('NPI Number') or row.get('NPI')
-    if npi is None:
-        return None
-    if isinstance(npi, float):
-        if npi.is_integer():
-            npi = int(npi)
-        else:
-            return None
-    npi = str(npi).strip()
-    return npi if re.match(r'^\d{10}$', npi) else None
-
-
-def load_excel(path):
-    wb = openpyxl.load_workbook(path, data_only=True)
-    ws = wb[wb.sheetnames[0]]
-    rows = list(ws.iter_rows(values_only=True))
-    header = [str(h).strip() if h else '' for h in rows[0]]
-    out = []
-    for r in rows[1:]:
-        if r is None or all(v is None or (isinstance(v, str) and not v.strip()) for v in r):
-            continue
-        d = {header[i]: r[i] for i in range(min(len(header), len(r)))}
-        out.append(d)
-    wb.close()
-    return out
+BASE = r'C:\Users\AndrewDaly\Desktop\email-campaign-dashboard\backend\Lists\Print Lists'
+PROFILE_TABLES = ['universal_profiles', 'user_profiles', 'print_only_contacts']
 
 
 def diff_list(conn, list_name, excel_path):
-    excel_rows = load_excel(excel_path)
-    excel_npis = set()
+    excel_rows = list(iter_xlsx_records(excel_path, sheet=0))
+    excel_npis = []
     excel_no_npi = []
     for r in excel_rows:
         npi = get_npi(r)
         if npi:
-            excel_npis.add(npi)
+            excel_npis.append(npi)
         else:
             excel_no_npi.append(r)
 
     cur = conn.cursor(cursor_factory=RealDictCursor)
+    stage_values(cur, 'tmp_excel_npis', excel_npis)
 
     cur.execute("""
-        SELECT npi FROM universal_profiles
-        WHERE print_lists_subscribed ?| ARRAY[%s] AND npi IS NOT NULL AND npi <> ''
-    """, (list_name,))
-    up_npis = {r['npi'] for r in cur.fetchall()}
+        CREATE TEMP TABLE IF NOT EXISTS tmp_list_npis (
+            source TEXT, npi TEXT, PRIMARY KEY (source, npi)
+        ) ON COMMIT DROP
+    """)
+    cur.execute("TRUNCATE tmp_list_npis")
+    for table in PROFILE_TABLES:
+        cur.execute(f"""
+            INSERT INTO tmp_list_npis (source, npi)
+            SELECT DISTINCT %s, npi FROM {table}
+            WHERE print_lists_subscribed ? %s AND npi IS NOT NULL AND npi <> ''
+        """, (table, list_name))
+    cur.execute("ANALYZE tmp_list_npis")
 
     cur.execute("""
-        SELECT npi FROM user_profiles
-        WHERE print_lists_subscribed ?| ARRAY[%s] AND npi IS NOT NULL AND npi <> ''
-    """, (list_name,))
-    u_npis = {r['npi'] for r in cur.fetchall()}
+        SELECT (SELECT COUNT(*) FROM tmp_excel_npis) AS excel_unique,
+               COUNT(*) FILTER (WHERE source = 'universal_profiles') AS up,
+               COUNT(*) FILTER (WHERE source = 'user_profiles') AS u,
+               COUNT(*) FILTER (WHERE source = 'print_only_contacts') AS poc,
+               COUNT(DISTINCT npi) AS db_all
+        FROM tmp_list_npis
+    """)
+    counts = cur.fetchone()
 
     cur.execute("""
-        SELECT npi FROM print_only_contacts
-        WHERE print_lists_subscribed ?| ARRAY[%s] AND npi IS NOT NULL AND npi <> ''
-    """, (list_name,))
-    poc_npis = {r['npi'] for r in cur.fetchall()}
+        SELECT e.value AS npi FROM tmp_excel_npis e
+        WHERE NOT EXISTS (SELECT 1 FROM tmp_list_npis l WHERE l.npi = e.value)
+        ORDER BY e.value
+    """)
+    missing_in_db = [r['npi'] for r in cur.fetchall()]
+
+    cur.execute("""
+        SELECT DISTINCT l.npi FROM tmp_list_npis l
+        WHERE NOT EXISTS (SELECT 1 FROM tmp_excel_npis e WHERE e.value = l.npi)
+        ORDER BY l.npi
+    """)
+    extra_in_db = [r['npi'] for r in cur.fetchall()]
 
     cur.execute("""
         SELECT id, first_name, last_name, address FROM print_only_contacts
-        WHERE print_lists_subscribed ?| ARRAY[%s]
+        WHERE print_lists_subscribed ? %s
           AND (npi IS NULL OR npi = '')
     """, (list_name,))
     poc_no_npi = cur.fetchall()
 
-    db_all_npis = up_npis | u_npis | poc_npis
-
-    in_excel_not_in_db = excel_npis - db_all_npis
-    in_db_not_in_excel = db_all_npis - excel_npis
-
     cur.close()
+    conn.rollback()
 
     return {
         'list_name': list_name,
         'excel_total_rows': len(excel_rows),
-        'excel_unique_npis': len(excel_npis),
+        'excel_unique_npis': counts['excel_unique'],
         'excel_no_npi_rows': len(excel_no_npi),
-        'db_up_npis': len(up_npis),
-        'db_u_npis': len(u_npis),
-        'db_poc_npis': len(poc_npis),
-        'db_all_unique_npis': len(db_all_npis),
+        'db_up_npis': counts['up'],
+        'db_u_npis': counts['u'],
+        'db_poc_npis': counts['poc'],
+        'db_all_unique_npis': counts['db_all'],
         'db_poc_no_npi': len(poc_no_npi),
-        'missing_in_db': sorted(in_excel_not_in_db),
-        'extra_in_db': sorted(in_db_not_in_excel),
+        'missing_in_db': missing_in_db,
+        'extra_in_db': extra_in_db,
         'excel_no_npi_sample': [
             {'name': f"{r.get('First Name','')} {r.get('Last Name','')}".strip(),
              'addr': r.get('Address 1') or r.get('Address Line 1') or r.get('Address  1'),
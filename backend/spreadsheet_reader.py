@@ -0,0 +1,167 @@
+import codecs
+import csv
+from itertools import islice
+import openpyxl
+import pandas as pd
+
+CSV_SNIFF_BYTES = 1 << 20
+CSV_DIALECT_CHARS = 64 * 1024
+CSV_DELIMITERS = ',\t;|'
+CSV_FALLBACK_ENCODING = 'latin-1'
+
+
+def _is_blank_row(row):
+    return row is None or all(v is None or (isinstance(v, str) and not v.strip()) for v in row)
+
+
+def _resolve_sheet(wb, sheet):
+    if sheet is None:
+        return wb.active
+    if isinstance(sheet, int):
+        return wb.worksheets[sheet]
+    return wb[sheet]
+
+
+def _header_name(value):
+    return str(value).strip() if value is not None else ''
+
+
+def _column_indexes(header, columns):
+    if columns is None:
+        return list(range(len(header)))
+    if callable(columns):
+        return [i for i, h in enumerate(header) if columns(h)]
+    wanted = set(columns)
+    return [i for i, h in enumerate(header) if h in wanted]
+
+
+def xlsx_sheet_names(source):
+    wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def iter_xlsx_rows(source, sheet=None, min_row=1, max_rows=None):
+    wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        ws = _resolve_sheet(wb, sheet)
+        ws.reset_dimensions()
+        rows = ws.iter_rows(min_row=min_row, values_only=True)
+        if max_rows is not None:
+            rows = islice(rows, max_rows)
+        for row in rows:
+            yield row
+    finally:
+        wb.close()
+
+
+def find_header_row(source, predicate, sheet=None, scan_rows=20):
+    for offset, row in enumerate(iter_xlsx_rows(source, sheet=sheet, max_rows=scan_rows)):
+        if any(predicate(cell) for cell in row if cell):
+            return offset + 1, list(row)
+    return None, []
+
+
+def iter_xlsx_records(source, sheet=None, columns=None, limit=None):
+    rows = iter_xlsx_rows(source, sheet=sheet)
+    try:
+        header = [_header_name(h) for h in next(rows)]
+    except StopIteration:
+        return
+    indexes = _column_indexes(header, columns)
+    emitted = 0
+    for row in rows:
+        if limit is not None and emitted >= limit:
+            break
+        if _is_blank_row(row):
+            continue
+        yield {header[i]: row[i] for i in indexes if i < len(row)}
+        emitted += 1
+
+
+def _frame_columns(header):
+    names = []
+    seen = {}
+    for i, h in enumerate(header):
+        name = _header_name(h) or f'Unnamed: {i}'
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def read_xlsx_frame(source, sheet=None, columns=None, limit=None):
+    rows = iter_xlsx_rows(source, sheet=sheet)
+    try:
+        header = _frame_columns(next(rows))
+    except StopIteration:
+        return pd.DataFrame()
+    indexes = _column_indexes(header, columns)
+    if not indexes:
+        return pd.DataFrame(columns=header)
+
+    data = []
+    for row in rows:
+        if limit is not None and len(data) >= limit:
+            break
+        if _is_blank_row(row):
+            continue
+        data.append([row[i] if i < len(row) else None for i in indexes])
+    return pd.DataFrame(data, columns=[header[i] for i in indexes])
+
+
+def _sniff_encoding(sample):
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    try:
+        sample.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return CSV_FALLBACK_ENCODING
+
+
+def sniff_csv(source, sample_bytes=CSV_SNIFF_BYTES):
+    source.seek(0)
+    sample = source.read(sample_bytes)
+    source.seek(0)
+    encoding = _sniff_encoding(sample)
+
+    text = sample.decode(encoding, errors='ignore')
+    if (len(sample) == sample_bytes or len(text) > CSV_DIALECT_CHARS) and '\n' in text[:CSV_DIALECT_CHARS]:
+        text = text[:text.rindex('\n', 0, CSV_DIALECT_CHARS)]
+    try:
+        delimiter = csv.Sniffer().sniff(text, delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        delimiter = ','
+    return encoding, delimiter
+
+
+def csv_encodings(encoding):
+    return [encoding] if encoding == CSV_FALLBACK_ENCODING else [encoding, CSV_FALLBACK_ENCODING]
+
+
+def read_csv_frame(source, columns=None, limit=None, csv_format=None, **kwargs):
+    encoding, delimiter = csv_format or sniff_csv(source)
+    for candidate in csv_encodings(encoding):
+        try:
+            source.seek(0)
+            header = [str(h) for h in pd.read_csv(source, encoding=candidate, sep=delimiter, nrows=0).columns]
+            indexes = _column_indexes(header, columns)
+            if not indexes:
+                return pd.DataFrame(columns=header)
+            source.seek(0)
+            return pd.read_csv(source, encoding=candidate, sep=delimiter, nrows=limit,
+                               usecols=None if columns is None else indexes, low_memory=False, **kwargs)
+        except UnicodeDecodeError:
+            if candidate == CSV_FALLBACK_ENCODING:
+                raise
@@ -19,7 +19,7 @@ const unsubClass = (r) => {
   return 'metric-good';
 };
 
-const DrillTable = ({ rows, labelKey, labelTitle, minSendsDefault = 50 }) => {
+const DrillTable = ({ rows, labelKey, labelTitle, minSendsDefault = 50, countNote }) => {
   const [sortKey, setSortKey] = useState('sent');
   const [sortDir, setSortDir] = useState('desc');
   const [minSends, setMinSends] = useState(minSendsDefault);
@@ -57,6 +57,7 @@ const DrillTable = ({ rows, labelKey, labelTitle, minSendsDefault = 50 }) => {
             onChange={(e) => setMinSends(Math.max(0, parseInt(e.target.value || '0', 10)))}
           />
         </label>
+        {countNote && <span className="cdm-count-note">{countNote}</span>}
         <span className="cdm-row-count">{filtered.length} {labelTitle}</span>
       </div>
       <div className="cdm-table-scroll">
@@ -99,6 +100,9 @@ const CampaignDrillDownModal = ({ campaign, onClose }) => {
   const [error, setError] = useState(null);
   const [data, setData] = useState(null);
   const [activeView, setActiveView] = useState('domain');
+  const countNote = campaign.deployments > 1
+    ? 'Counts are per deployment: a recipient of several deployments is counted once in each.'
+    : null;
 
   useEffect(() => {
     const onEsc = (e) => { if (e.key === 'Escape') onClose(); };
@@ -193,6 +197,7 @@ const CampaignDrillDownModal = ({ campaign, onClose }) => {
               labelKey="domain"
               labelTitle="Domain"
               minSendsDefault={50}
+              countNote={countNote}
             />
           )}
           {!loading && !error && data && activeView === 'state' && (
@@ -201,6 +206,7 @@ const CampaignDrillDownModal = ({ campaign, onClose }) => {
               labelKey="state"
               labelTitle="State"
               minSendsDefault={20}
+              countNote={countNote}
             />
           )}
         </div>
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback, useMemo } from 'react';
+import React, { useState, useEffect, useCallback, useMemo, useRef } from 'react';
 import { API_BASE_URL } from '../../config/api';
 import MultiSelectDropdown from '../common/MultiSelectDropdown';
 import TablePagination from '../common/TablePagination';
@@ -65,14 +65,18 @@ const DigitalListDisplay = ({ externalSearch = '' }) => {
     return Object.entries(c).sort((a, b) => b[1] - a[1]).map(([v, n]) => ({ value: v, count: n }));
   }, [overview.segments]);
 
+  const pageCursorsRef = useRef({});
+
   const fetchMembers = useCallback((tab, pg, search) => {
     let url = '';
+    if (pg === 1) pageCursorsRef.current = {};
     if (tab === 'audience') {
       const params = new URLSearchParams({ page: pg, per_page: PER_PAGE, search: search || '', status: audienceStatus });
       url = `${API_BASE_URL}/api/list-management/audience?${params}`;
     } else if (tab === 'lists') {
       if (selected.lists.length === 0) { setMembers([]); setTotal(0); setTotalPages(1); return; }
       const params = new URLSearchParams({ lists: selected.lists.join(','), list: selected.lists[0], page: pg, per_page: PER_PAGE, search: search || '' });
+      if (pageCursorsRef.current[pg]) params.set('cursor', pageCursorsRef.current[pg]);
       url = `${API_BASE_URL}/api/list-management/digital-lists/members?${params}`;
     } else if (tab === 'tags') {
       if (selected.tags.length === 0) { setMembers([]); setTotal(0); setTotalPages(1); return; }
@@ -88,6 +92,7 @@ const DigitalListDisplay = ({ externalSearch = '' }) => {
     fetch(url)
       .then(r => r.json())
       .then(d => {
+        if (d.next_cursor) pageCursorsRef.current[pg + 1] = d.next_cursor;
         setMembers(d.members || []);
         setTotal(d.total || 0);
         setTotalPages(d.total_pages || 1);
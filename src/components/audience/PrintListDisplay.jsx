@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback, useMemo } from 'react';
+import React, { useState, useEffect, useCallback, useMemo, useRef } from 'react';
 import { API_BASE_URL } from '../../config/api';
 import MultiSelectDropdown from '../common/MultiSelectDropdown';
 import TablePagination from '../common/TablePagination';
@@ -198,8 +198,11 @@ const PrintListDisplay = ({ externalSearch = '' }) => {
 
   const dropdownOptions = activeType === 'subscribed' ? subscribedDropdownOptions : unsubscribedDropdownOptions;
 
+  const pageCursorsRef = useRef({});
+
   const fetchMembers = useCallback((lists, type, pg, search) => {
     if (type === 'blacklisted') return;
+    if (pg === 1) pageCursorsRef.current = {};
     if (!lists || lists.length === 0) {
       setMembers([]); setTotal(0); setAudienceCount(0); setTotalPages(1);
       return;
@@ -213,9 +216,11 @@ const PrintListDisplay = ({ externalSearch = '' }) => {
       per_page: PER_PAGE,
       search: search || '',
     });
+    if (pageCursorsRef.current[pg]) params.set('cursor', pageCursorsRef.current[pg]);
     fetch(`${API_BASE_URL}/api/list-management/print-lists/members?${params}`)
       .then(r => r.json())
       .then(d => {
+        if (d.next_cursor) pageCursorsRef.current[pg + 1] = d.next_cursor;
         setMembers(d.members || []);
         setTotal(d.total || 0);
         setAudienceCount(d.audience_count || 0);
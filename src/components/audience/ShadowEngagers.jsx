@@ -1,13 +1,19 @@
-import React, { useState, useEffect, useMemo } from 'react';
+import React, { useState, useEffect, useMemo, useRef, useCallback } from 'react';
 import { API_BASE_URL } from '../../config/api';
 import '../../styles/CampaignPerformancePage.css';
 import '../../styles/AudienceQueryBuilder.css';
 import '../../styles/ShadowEngagers.css';
-import { matchesSearchTerm } from '../../utils/searchUtils';
 import TablePagination from '../common/TablePagination';
 import exportTableCSV from '../../utils/exportTableCSV';
 
 const PER_PAGE = 100;
+const EXPORT_PAGE_SIZE = 1000;
+
+const buildParams = (limit, search, sort, dir, cursor) => {
+  const params = new URLSearchParams({ limit, search: search || '', sort, dir });
+  if (cursor) params.set('cursor', cursor);
+  return params;
+};
 
 const ShadowEngagers = ({ externalSearch = '' }) => {
   const [data, setData] = useState(null);
@@ -16,20 +22,27 @@ const ShadowEngagers = ({ externalSearch = '' }) => {
   const [sortField, setSortField] = useState('confidence_pct');
   const [sortDir, setSortDir] = useState('desc');
   const [currentPage, setCurrentPage] = useState(1);
+  const [debouncedSearch, setDebouncedSearch] = useState(externalSearch.trim());
+  const [exporting, setExporting] = useState(false);
+  const pageCursorsRef = useRef({});
 
   useEffect(() => {
-    fetchData();
-  }, []);
+    const t = setTimeout(() => setDebouncedSearch(externalSearch.trim()), 300);
+    return () => clearTimeout(t);
+  }, [externalSearch]);
 
-  const fetchData = async () => {
+  const fetchData = useCallback(async (pg, search, sort, dir) => {
+    if (pg === 1) pageCursorsRef.current = {};
     setLoading(true);
     setError(null);
     try {
-      const response = await fetch(`${API_BASE_URL}/api/shadow-engagers/`);
+      const params = buildParams(PER_PAGE, search, sort, dir, pageCursorsRef.current[pg]);
+      const response = await fetch(`${API_BASE_URL}/api/shadow-engagers/?${params}`);
       const result = await response.json();
       if (result.error) {
         setError(result.error);
       } else {
+        if (result.next_cursor) pageCursorsRef.current[pg + 1] = result.next_cursor;
         setData(result);
       }
     } catch (err) {
@@ -37,33 +50,18 @@ const ShadowEngagers = ({ externalSearch = '' }) => {
     } finally {
       setLoading(false);
     }
-  };
-
-  const filtered = useMemo(() => {
-    if (!data?.engagers) return [];
-    let rows = [...data.engagers];
+  }, []);
 
-    if (externalSearch.trim()) {
-      rows = rows.filter(r =>
-        matchesSearchTerm(r.email, externalSearch) ||
-        matchesSearchTerm(r.first_name, externalSearch) ||
-        matchesSearchTerm(r.last_name, externalSearch) ||
-        matchesSearchTerm(r.specialty, externalSearch)
-      );
-    }
+  useEffect(() => {
+    setCurrentPage(1);
+    fetchData(1, debouncedSearch, sortField, sortDir);
+  }, [debouncedSearch, sortField, sortDir, fetchData]);
 
-    rows.sort((a, b) => {
-      let aVal = a[sortField];
-      let bVal = b[sortField];
-      if (typeof aVal === 'string') aVal = (aVal || '').toLowerCase();
-      if (typeof bVal === 'string') bVal = (bVal || '').toLowerCase();
-      if (aVal < bVal) return sortDir === 'asc' ? -1 : 1;
-      if (aVal > bVal) return sortDir === 'asc' ? 1 : -1;
-      return 0;
-    });
+  useEffect(() => {
+    if (currentPage > 1) fetchData(currentPage, debouncedSearch, sortField, sortDir);
+  }, [currentPage]); // eslint-disable-line react-hooks/exhaustive-deps
 
-    return rows;
-  }, [data, externalSearch, sortField, sortDir]);
+  const filtered = data?.engagers || [];
 
   const handleSort = (field) => {
     if (sortField === field) {
@@ -91,14 +89,13 @@ const ShadowEngagers = ({ externalSearch = '' }) => {
   };
 
   const counts = useMemo(() => {
-    if (!data?.engagers) return {};
-    const e = data.engagers;
+    const c = data?.counts || {};
     return {
-      total: e.length,
-      confirmed: e.filter(r => r.classification === 'Confirmed').length,
-      likely: e.filter(r => r.classification === 'Likely').length,
-      potential: e.filter(r => r.classification === 'Potential').length,
-      unlikely: e.filter(r => r.classification === 'Unlikely').length,
+      total: c.total || 0,
+      confirmed: c.Confirmed || 0,
+      likely: c.Likely || 0,
+      potential: c.Potential || 0,
+      unlikely: c.Unlikely || 0,
     };
   }, [data]);
 
@@ -113,7 +110,7 @@ const ShadowEngagers = ({ externalSearch = '' }) => {
     return d.toLocaleDateString('en-US', { month: 'short', day: 'numeric', year: 'numeric' });
   };
 
-  if (loading) {
+  if (loading && !data) {
     return (
       <div className="shadow-engagers">
         <div className="shadow-loading">Loading shadow engager data...</div>
@@ -132,7 +129,7 @@ const ShadowEngagers = ({ externalSearch = '' }) => {
     );
   }
 
-  if (!data?.engagers?.length) {
+  if (!data?.engagers?.length && !debouncedSearch) {
     return (
       <div className="shadow-engagers">
         <div className="shadow-empty">
@@ -143,13 +140,31 @@ const ShadowEngagers = ({ externalSearch = '' }) => {
     );
   }
 
-  const totalPages = Math.max(1, Math.ceil(filtered.length / PER_PAGE));
-  const pageStart = (currentPage - 1) * PER_PAGE;
-  const visibleData = filtered.slice(pageStart, pageStart + PER_PAGE);
+  const totalPages = Math.max(currentPage, ...Object.keys(pageCursorsRef.current).map(Number));
+  const visibleData = filtered;
+
+  const handleExport = async () => {
+    setExporting(true);
+    const all = [];
+    try {
+      let cursor = null;
+      do {
+        const params = buildParams(EXPORT_PAGE_SIZE, debouncedSearch, sortField, sortDir, cursor);
+        const response = await fetch(`${API_BASE_URL}/api/shadow-engagers/?${params}`);
+        const result = await response.json();
+        if (result.error) throw new Error(result.error);
+        all.push(...result.engagers);
+        cursor = result.next_cursor;
+      } while (cursor);
+    } catch (err) {
+      alert('Export failed: ' + err.message);
+      return;
+    } finally {
+      setExporting(false);
+    }
 
-  const handleExport = () => {
     const headers = ['Email', 'First Name', 'Last Name', 'Specialty', 'Confidence %', 'Classification', 'Clicks w/o Open', 'Campaigns w/ Opens', 'Total Clicks'];
-    const rows = filtered.map(r => [
+    const rows = all.map(r => [
       r.email || '',
       r.first_name || '',
       r.last_name || '',
@@ -196,9 +211,11 @@ const ShadowEngagers = ({ externalSearch = '' }) => {
           </svg>
           <span>Last updated: {formatLastUpdated(data.last_updated)}</span>
         </div>
-        <span className="shadow-result-count">{filtered.length.toLocaleString()} results</span>
+        <span className="shadow-result-count">{(data.total ?? counts.total).toLocaleString()} results</span>
         {filtered.length > 0 && (
-          <button className="export-button" onClick={handleExport}>Export CSV</button>
+          <button className="export-button" onClick={handleExport} disabled={exporting}>
+            {exporting ? 'Exporting...' : 'Export CSV'}
+          </button>
         )}
       </div>
 
@@ -248,6 +265,14 @@ const ShadowEngagers = ({ externalSearch = '' }) => {
                       />
                     </div>
                     <span>{row.confidence_pct}%</span>
+                    {row.rescored_confidence_pct != null && row.rescored_confidence_pct !== row.confidence_pct && (
+                      <span
+                        className="shadow-rescore"
+                        title={`Interim rescore from newer events (${row.rescored_classification}), not bot-filtered`}
+                      >
+                        now {row.rescored_confidence_pct}%
+                      </span>
+                    )}
                   </div>
                 </td>
                 <td><span className={getClassBadge(row.classification)}>{row.classification}</span></td>
@@ -151,10 +151,7 @@ const IQVIACrossover = () => {
             const response = await fetch(`${API_BASE_URL}/api/list-analysis/calculate-crossover`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    iqvia_npis: uploadedData.iqvia_npis,
-                    target_lists: uploadedData.target_lists
-                })
+                body: JSON.stringify({ session_id: uploadedData.session_id })
             });
 
             if (!response.ok) {
@@ -184,10 +181,7 @@ const IQVIACrossover = () => {
             const response = await fetch(`${API_BASE_URL}/api/list-analysis/engagement-by-tier`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    iqvia_npis: uploadedData.iqvia_npis,
-                    target_lists: uploadedData.target_lists
-                })
+                body: JSON.stringify({ session_id: uploadedData.session_id })
             });
 
             if (!response.ok) {
@@ -2767,7 +2767,8 @@ const DocumentationPage = () => {
                 <div className="docs-step-num">1</div>
                 <div className="docs-step-text">
                   <strong>Upload Files:</strong> Upload an IQVIA Full List (single file) and Target Lists (multiple files).
-                  Supports .csv, .xlsx, .xls formats via drag-and-drop or file picker.
+                  Supports .csv, .xlsx, .xls formats via drag-and-drop or file picker. The parsed NPIs stay on the server
+                  in an upload session for 6 hours; later steps send only the session token, so re-upload after it expires.
                 </div>
               </div>
               <div className="docs-step">
@@ -3012,7 +3013,19 @@ const DocumentationPage = () => {
               <li>A confidence score (0&ndash;100%) is calculated based on: ratio of no-open-click campaigns to total clicked campaigns, number of campaigns with clicks but no opens, total clean clicks, and penalty for campaigns where opens did fire.</li>
               <li>Classifications: <strong>Confirmed</strong> (&ge;75%), <strong>Likely</strong> (50&ndash;74%), <strong>Potential</strong> (30&ndash;49%), <strong>Unlikely</strong> (&lt;30%).</li>
             </ul>
-            <p>Results table uses standard pagination (100 rows per page) with an &ldquo;Export CSV&rdquo; button at the top.</p>
+            <p>
+              Between full detection runs, <code>backend/scripts/score_shadow_engagers.py</code> rescores only the emails with
+              new click or open events in <code>campaign_interactions</code> since its last watermark. These interim scores are
+              stored separately in <code>shadow_engager_rescores</code> and never change the detection script&rsquo;s rows. They
+              use 55 &times; (no-open clicked campaigns / clicked campaigns) + 25 &times; min(no-open clicked campaigns, 10) / 10
+              + 20 &times; min(clean clicks, 20) / 20 &minus; 5 per campaign with opens (up to 6), clamped to 0&ndash;100, with no
+              bot filtering. The table shows an interim score next to the detected one when they differ. Run the script with
+              <code>--from-now</code> after each full detection run to clear them.
+            </p>
+            <p>
+              Results are fetched 100 rows at a time and sorted on the server, highest confidence first by default.
+              &ldquo;Export CSV&rdquo; pages through every matching row in the current sort order.
+            </p>
           </div>
 
           <div className="docs-card">